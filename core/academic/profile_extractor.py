@@ -5,14 +5,15 @@ import re
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, Tuple
 
-import pdfplumber
-from core.ai_engine.config import get_vectorstore
+from core.ai_engine.config import get_pdf_page_cache_dir, get_vectorstore
+from core.ai_engine.pdf_pages import load_pdf_pages
 from core.ai_engine.retrieval.llm import (
     build_llm,
     get_backup_models,
     get_runtime_openrouter_config,
     invoke_text,
 )
+from core.ai_engine.vector_ops import exclude_tombstoned
 from core.models import AcademicDocument
 
 
@@ -214,25 +215,25 @@ def _detect_pdf_table_fields(docs: List[AcademicDocument]) -> Tuple[List[str], D
         except Exception:
             continue
         try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages[:2]:
-                    tables = page.extract_tables() or []
-                    for tb in tables[:5]:
-                        if not tb:
-                            continue
-                        rows = [[str(c or "").strip() for c in row] for row in tb if row]
-                        for row in rows[:2]:
-                            row_text = " | ".join([c for c in row if c])
-                            if not row_text:
-                                continue
-                            row_low = _norm(row_text)
-                            for canon, aliases in TABLE_FIELD_ALIASES.items():
-                                if any(_norm(alias) in row_low for alias in aliases):
-                                    fields.add(canon)
-                                    if len(evidence[canon]) < 3:
-                                        evidence[canon].append(f"pdf:{doc.title}: {row_text[:180]}")
+            # biasanya cache hit: PDF sudah diparse saat ingest
+            pages = load_pdf_pages(file_path, cache_dir=get_pdf_page_cache_dir(), max_pages=2)
         except Exception:
             continue
+        for tables, _text in pages:
+            for tb in tables[:5]:
+                if not tb:
+                    continue
+                rows = [[str(c or "").strip() for c in row] for row in tb if row]
+                for row in rows[:2]:
+                    row_text = " | ".join([c for c in row if c])
+                    if not row_text:
+                        continue
+                    row_low = _norm(row_text)
+                    for canon, aliases in TABLE_FIELD_ALIASES.items():
+                        if any(_norm(alias) in row_low for alias in aliases):
+                            fields.add(canon)
+                            if len(evidence[canon]) < 3:
+                                evidence[canon].append(f"pdf:{doc.title}: {row_text[:180]}")
     return sorted(fields), dict(evidence)
 
 
@@ -391,11 +392,11 @@ def _gather_texts(user) -> Tuple[List[Tuple[str, str]], List[str], List[Academic
             texts.append((f"title:{t}", t))
 
     try:
-        vectorstore = get_vectorstore()
+        vectorstore = get_vectorstore(user_id=user.id)
         chunks = vectorstore.similarity_search(
             "program studi prodi jurusan semester target karir career pekerjaan",
             k=25,
-            filter={"user_id": str(user.id)},
+            filter=exclude_tombstoned({"user_id": str(user.id)}, user.id),
         )
         for c in chunks:
             content = str(getattr(c, "page_content", "") or "").strip()
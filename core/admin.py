@@ -1,4 +1,4 @@
-from django.contrib import admin
+﻿from django.contrib import admin
 from django.contrib import messages
 from django import forms
 from django.urls import path
@@ -26,10 +26,13 @@ from .models import (
     SystemSetting,
     UserLoginPresence,
     RagRequestMetric,
+    IngestDocumentMetric,
     SystemHealthSnapshot,
+    IngestionJob,
 )
 from .monitoring import (
     build_realtime_infra_payload,
+    build_realtime_ingest_payload,
     build_realtime_overview_payload,
     build_realtime_rag_payload,
 )
@@ -99,6 +102,7 @@ def _build_quick_admin_links() -> list[dict[str, str | None]]:
         ("LLM Config", "core_llmconfiguration", True),
         ("Presence", "core_userloginpresence", False),
         ("RAG Metrics", "core_ragrequestmetric", False),
+        ("Ingest Metrics", "core_ingestdocumentmetric", False),
         ("Infra Health", "core_systemhealthsnapshot", False),
     ]
     links: list[dict[str, str | None]] = []
@@ -368,6 +372,66 @@ class RagRequestMetricAdmin(BaseAdmin):
         "fallback_used",
         "source_count",
         "status_code",
+        "stage_timings",
+        "created_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def username(self, obj):
+        return obj.user.username if obj.user_id else "-"
+
+    username.short_description = "User"
+
+
+@admin.register(IngestDocumentMetric)
+class IngestDocumentMetricAdmin(BaseAdmin):
+    list_display = (
+        "created_at",
+        "file_name",
+        "username",
+        "file_type",
+        "ok",
+        "chunks",
+        "embedded",
+        "skipped",
+        "total_ms",
+        "peak_rss_mb",
+    )
+    list_filter = (
+        "ok",
+        "file_type",
+        _dt_filter("created_at"),
+    )
+    search_fields = ("file_name", "user__username", "error")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
+    list_per_page = 50
+    date_hierarchy = "created_at"
+    ordering = ("-created_at",)
+    readonly_fields = (
+        "user",
+        "doc_id",
+        "file_name",
+        "file_type",
+        "ok",
+        "error",
+        "bytes_in",
+        "text_chars",
+        "chunk_bytes",
+        "chunks",
+        "embedded",
+        "skipped",
+        "updated",
+        "deleted",
+        "batches",
+        "peak_rss_mb",
+        "total_ms",
+        "stage_timings",
         "created_at",
     )
 
@@ -416,6 +480,57 @@ class SystemHealthSnapshotAdmin(BaseAdmin):
         return False
 
 
+@admin.register(IngestionJob)
+class IngestionJobAdmin(BaseAdmin):
+    list_display = (
+        "id",
+        "created_at",
+        "username",
+        "kind",
+        "status",
+        "stage",
+        "progress",
+        "file_name",
+        "attempts",
+        "finished_at",
+    )
+    list_filter = ("kind", "status", _dt_filter("created_at"))
+    search_fields = ("file_name", "user__username", "worker_id")
+    list_select_related = ("user",)
+    list_per_page = 50
+    date_hierarchy = "created_at"
+    ordering = ("-created_at", "-id")
+    readonly_fields = (
+        "user",
+        "document",
+        "kind",
+        "status",
+        "file_name",
+        "stage",
+        "progress",
+        "stage_timings",
+        "chunk_stats",
+        "error",
+        "attempts",
+        "worker_id",
+        "created_at",
+        "started_at",
+        "heartbeat_at",
+        "finished_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def username(self, obj):
+        return obj.user.username if obj.user_id else "-"
+
+    username.short_description = "User"
+
+
 class LLMConfigurationAdminForm(forms.ModelForm):
     openrouter_api_key = forms.CharField(
         required=False,
@@ -441,6 +556,7 @@ class LLMConfigurationAdminForm(forms.ModelForm):
             "openrouter_timeout",
             "openrouter_max_retries",
             "openrouter_temperature",
+            "openrouter_base_url",
         )
 
 
@@ -476,6 +592,7 @@ class LLMConfigurationAdmin(BaseAdmin):
                 "openrouter_timeout",
                 "openrouter_max_retries",
                 "openrouter_temperature",
+                "openrouter_base_url",
                 "updated_at",
             )
         }),
@@ -667,6 +784,8 @@ def _build_dashboard_metrics() -> dict:
     overview = build_realtime_overview_payload().get("summary", {})
     rag_live = build_realtime_rag_payload(limit=min(20, admin_dash.max_rows))
     infra_live = build_realtime_infra_payload(limit=min(20, admin_dash.max_rows))
+    ingest_live = build_realtime_ingest_payload(limit=min(20, admin_dash.max_rows))
+    ingest_throughput = ingest_live.get("throughput", {})
 
     reg_limit = max(registration_limit.max_registered_users, 1)
     conc_limit = max(concurrent_limit.max_concurrent_logins, 1)
@@ -720,6 +839,10 @@ def _build_dashboard_metrics() -> dict:
         "kpi_rag_events": rag_live.get("events", []),
         "kpi_rag_p95_retrieval_ms": rag_live.get("p95_retrieval_ms", 0),
         "kpi_infra_snapshots": infra_live.get("snapshots", []),
+        "kpi_ingest_events": ingest_live.get("events", []),
+        "kpi_ingest_docs_10m": ingest_throughput.get("docs_10m", 0),
+        "kpi_ingest_chunks_per_sec": ingest_throughput.get("chunks_per_sec", 0),
+        "kpi_ingest_mb_per_min": ingest_throughput.get("mb_per_min", 0),
     }
 
 
@@ -778,6 +901,12 @@ def realtime_infra_api(request):
     return JsonResponse(payload)
 
 
+def realtime_ingest_api(request):
+    max_rows = get_admin_dashboard_state().max_rows
+    payload = build_realtime_ingest_payload(limit=min(30, max_rows))
+    return JsonResponse(payload)
+
+
 def system_log_detail_view(request, log_type: str):
     payload = _build_single_log_payload(log_type=log_type, lines=300)
     context = {
@@ -872,6 +1001,11 @@ def _custom_admin_get_urls():
             admin.site.admin_view(realtime_infra_api),
             name="realtime_infra",
         ),
+        path(
+            "realtime-ingest/",
+            admin.site.admin_view(realtime_ingest_api),
+            name="realtime_ingest",
+        ),
         path(
             "system-logs/<str:log_type>/",
             admin.site.admin_view(system_log_detail_view),
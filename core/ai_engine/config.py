@@ -1,18 +1,30 @@
 ﻿import logging
 import os
-from typing import Iterable, List
+import zlib
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
 
 from django.conf import settings
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from pydantic import PrivateAttr
 
+from .embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 CHROMA_PERSIST_DIR = os.path.join(settings.BASE_DIR, "chroma_db")
+PDF_PAGE_CACHE_DIR = os.path.join(settings.BASE_DIR, "pdf_page_cache")
+EMBED_CACHE_DIR = os.path.join(settings.BASE_DIR, "embedding_cache")
+REPAIR_CACHE_DIR = os.path.join(settings.BASE_DIR, "repair_cache")
 DEFAULT_EMBEDDING_MODEL = "intfloat/multilingual-e5-large"
 LEGACY_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+BASE_COLLECTION_NAME = "academic_rag"
+COLLECTION_LAYOUTS = ("single", "user", "shard")
+VECTOR_BACKENDS = ("chroma", "memmap")
+MEMMAP_SUBDIR = "memmap"
 _EMBEDDING_SINGLETON: HuggingFaceEmbeddings | None = None
+_PERSIST_DIR_OVERRIDE: str | None = None
 
 
 def _env_bool(name: str, default: bool = False) -> bool:
@@ -25,10 +37,12 @@ class PrefixAwareHuggingFaceEmbeddings(HuggingFaceEmbeddings):
     Prefix e5-style query/passage agar retrieval lintas bahasa lebih stabil.
     """
     _use_e5_prefix: bool = PrivateAttr(default=False)
+    _cache: Optional[EmbeddingCache] = PrivateAttr(default=None)
 
-    def __init__(self, *args, use_e5_prefix: bool = False, **kwargs):
+    def __init__(self, *args, use_e5_prefix: bool = False, cache: Optional[EmbeddingCache] = None, **kwargs):
         super().__init__(*args, **kwargs)
         self._use_e5_prefix = bool(use_e5_prefix)
+        self._cache = cache
 
     def _with_query_prefix(self, text: str) -> str:
         t = str(text or "").strip()
@@ -51,7 +65,23 @@ class PrefixAwareHuggingFaceEmbeddings(HuggingFaceEmbeddings):
 
     def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
         prepared = [self._with_passage_prefix(t) for t in texts]
-        return super().embed_documents(prepared)
+        if self._cache is None:
+            return super().embed_documents(prepared)
+        # hanya teks yang belum pernah di-embed (model+normalize+teks sama) yang masuk model
+        return self._cache.embed(prepared, super().embed_documents)
+
+
+def _build_embedding_cache(model_name: str, normalize: bool) -> Optional[EmbeddingCache]:
+    if not _env_bool("RAG_EMBED_CACHE", default=True):
+        return None
+    root = str(os.environ.get("RAG_EMBED_CACHE_DIR", "") or "").strip() or EMBED_CACHE_DIR
+    try:
+        max_mb = int(os.environ.get("RAG_EMBED_CACHE_MAX_MB", "512"))
+    except ValueError:
+        max_mb = 512
+    if max_mb <= 0:
+        return None
+    return EmbeddingCache(root, model_name=model_name, normalize=normalize, max_bytes=max_mb * 1024 * 1024)
 
 
 def _build_embedding(model_name: str, normalize: bool) -> HuggingFaceEmbeddings:
@@ -60,6 +90,7 @@ def _build_embedding(model_name: str, normalize: bool) -> HuggingFaceEmbeddings:
         model_name=model_name,
         encode_kwargs={"normalize_embeddings": bool(normalize)},
         use_e5_prefix=use_e5_prefix,
+        cache=_build_embedding_cache(model_name, normalize),
     )
 
 
@@ -103,9 +134,113 @@ def preprocess_embedding_passage(text: str) -> str:
     return f"passage: {t}"
 
 
-def get_vectorstore():
+def get_persist_directory() -> str:
+    return _PERSIST_DIR_OVERRIDE or CHROMA_PERSIST_DIR
+
+
+def get_pdf_page_cache_dir() -> str:
+    """
+    Direktori cache ekstraksi PDF per halaman ("" = cache dimatikan via PDF_PAGE_CACHE=0).
+    """
+    if not _env_bool("PDF_PAGE_CACHE", True):
+        return ""
+    return str(os.environ.get("PDF_PAGE_CACHE_DIR", "") or "").strip() or PDF_PAGE_CACHE_DIR
+
+
+def get_repair_cache_dir() -> str:
+    """
+    Direktori cache hasil LLM row repair ("" = cache dimatikan via INGEST_REPAIR_CACHE=0).
+    """
+    if not _env_bool("INGEST_REPAIR_CACHE", True):
+        return ""
+    return str(os.environ.get("INGEST_REPAIR_CACHE_DIR", "") or "").strip() or REPAIR_CACHE_DIR
+
+
+@contextmanager
+def override_persist_directory(path: str) -> Iterator[str]:
+    """
+    Arahkan sementara get_vectorstore() ke direktori Chroma lain
+    (dipakai harness evaluasi offline agar tidak menyentuh chroma_db produksi).
+    """
+    global _PERSIST_DIR_OVERRIDE
+    previous = _PERSIST_DIR_OVERRIDE
+    _PERSIST_DIR_OVERRIDE = str(path)
+    try:
+        yield _PERSIST_DIR_OVERRIDE
+    finally:
+        _PERSIST_DIR_OVERRIDE = previous
+
+
+def get_collection_layout() -> str:
+    """
+    RAG_COLLECTION_LAYOUT: `single` (default, semua user di academic_rag + filter user_id),
+    `user` (satu collection per user) atau `shard` (user dibagi ke RAG_COLLECTION_SHARDS collection).
+    Ganti layout = jalankan `python manage.py migrate_vector_collections --to <layout>`.
+    """
+    layout = str(os.environ.get("RAG_COLLECTION_LAYOUT", "single") or "single").strip().lower()
+    return layout if layout in COLLECTION_LAYOUTS else "single"
+
+
+def get_collection_shards() -> int:
+    try:
+        return max(int(os.environ.get("RAG_COLLECTION_SHARDS", "16")), 1)
+    except ValueError:
+        return 16
+
+
+def _user_shard_key(user_id) -> int:
+    try:
+        return int(str(user_id).strip())
+    except ValueError:
+        # user_id non-numerik (data lama): tetap stabil antar proses, beda dengan hash()
+        return zlib.crc32(str(user_id).encode("utf-8"))
+
+
+def collection_name_for_user(user_id=None, layout: str | None = None, shards: int | None = None) -> str:
+    """
+    Nama collection Chroma untuk user. Tanpa user_id (operasi global/admin) selalu collection
+    dasar. Filter `where user_id` tetap dipasang oleh pemanggil di semua layout.
+    """
+    layout = layout or get_collection_layout()
+    if user_id is None or str(user_id).strip() == "" or layout == "single":
+        return BASE_COLLECTION_NAME
+    key = _user_shard_key(user_id)
+    if layout == "user":
+        return f"{BASE_COLLECTION_NAME}_u{key}"
+    return f"{BASE_COLLECTION_NAME}_s{key % (shards or get_collection_shards()):03d}"
+
+
+def get_vector_backend() -> str:
+    """
+    RAG_VECTOR_BACKEND: `chroma` (default) atau `memmap` (exact search int8 + rescore per user,
+    lihat memmap_store). Backend memmap selalu memakai satu collection per user.
+    """
+    backend = str(os.environ.get("RAG_VECTOR_BACKEND", "chroma") or "chroma").strip().lower()
+    return backend if backend in VECTOR_BACKENDS else "chroma"
+
+
+def get_memmap_directory() -> str:
+    return os.path.join(get_persist_directory(), MEMMAP_SUBDIR)
+
+
+def get_chroma_client():
+    """Client Chroma mentah (tanpa memuat model embedding) untuk operasi lintas collection."""
+    import chromadb
+
+    return chromadb.PersistentClient(path=get_persist_directory())
+
+
+def get_vectorstore(user_id=None, collection_name: str | None = None):
+    if get_vector_backend() == "memmap":
+        from .memmap_store import MemmapVectorStore
+
+        return MemmapVectorStore(
+            get_memmap_directory(),
+            embedding_function=get_embedding_function(),
+            collection_name=collection_name or collection_name_for_user(user_id, layout="user"),
+        )
     return Chroma(
-        persist_directory=CHROMA_PERSIST_DIR,
+        persist_directory=get_persist_directory(),
         embedding_function=get_embedding_function(),
-        collection_name="academic_rag",
+        collection_name=collection_name or collection_name_for_user(user_id),
     )
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Content-addressed embedding cache
+# =========================
+# Vektor disimpan sebagai float16 di satu file memmap (slot x dim); index key -> slot +
+# last_used di SQLite kecil di sebelahnya. Namespace direktori = (model, normalize), key =
+# hash teks yang sudah diberi prefix passage. Kapasitas dihitung dari batas ukuran
+# (RAG_EMBED_CACHE_MAX_MB); kalau penuh, slot yang paling lama tidak dipakai di-reuse.
+#
+# Cache dipakai bersama beberapa proses (web + worker ingest). Lookup key -> slot dan copy
+# vektor terjadi di satu transaksi BEGIN IMMEDIATE, sama seperti put_many, jadi slot tidak
+# bisa di-evict/ditimpa proses lain di tengah copy. Kapasitas aktif dicatat di tabel
+# cache_meta; proses yang memmap-nya beda ukuran (file di-truncate proses lain) memetakan
+# ulang sebelum menyentuh vektor.
+
+_SQL_BATCH = 500
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(name or "").lower()).strip("-")[:48] or "model"
+
+
+def text_key(text: str) -> str:
+    return hashlib.blake2b(str(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, root_dir: str, model_name: str, normalize: bool, max_bytes: int):
+        ns = hashlib.sha256(f"{model_name}\0{int(bool(normalize))}".encode("utf-8")).hexdigest()[:12]
+        self.dir = os.path.join(root_dir, f"{_slug(model_name)}-{ns}")
+        self.model_name = model_name
+        self.normalize = bool(normalize)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.dim = 0
+        self.capacity = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[np.memmap] = None
+
+    # ---------- storage ----------
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.dir, "meta.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.dir, "vectors.f16")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.dir, exist_ok=True)
+            db = sqlite3.connect(
+                os.path.join(self.dir, "index.sqlite3"),
+                timeout=30.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+            db.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._db = db
+        return self._db
+
+    def _open(self, dim: int = 0) -> bool:
+        """
+        Buka memmap. Tanpa meta.json, cache baru dibuat hanya kalau `dim` diketahui
+        (setelah batch pertama di-embed model).
+        """
+        if self._vectors is not None:
+            return True
+        meta = {}
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f) or {}
+        except (OSError, ValueError):
+            meta = {}
+
+        dim = int(meta.get("dim") or dim or 0)
+        if dim <= 0:
+            return False
+        capacity = self.max_bytes // (dim * 2)
+        if capacity <= 0:
+            return False
+
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if int(meta.get("capacity") or 0) > capacity:
+                # batas ukuran diperkecil: buang slot di luar kapasitas baru
+                db.execute("DELETE FROM entries WHERE slot >= ?", (capacity,))
+            mode = "r+" if os.path.exists(self._vectors_path) else "w+"
+            if mode == "r+":
+                os.truncate(self._vectors_path, capacity * dim * 2)
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode=mode, shape=(capacity, dim))
+            db.execute("INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('capacity', ?)", (capacity,))
+            if int(meta.get("dim") or 0) != dim or int(meta.get("capacity") or 0) != capacity:
+                tmp = f"{self._meta_path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model_name, "normalize": self.normalize, "dim": dim, "capacity": capacity}, f)
+                os.replace(tmp, self._meta_path)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            self._vectors = None
+            raise
+        self.dim = dim
+        self.capacity = capacity
+        return True
+
+    def _sync_capacity(self, db: sqlite3.Connection) -> None:
+        """
+        Panggil di dalam transaksi: kalau proses lain sudah truncate file ke kapasitas lain,
+        petakan ulang memmap supaya tidak membaca/menulis di luar ukuran file.
+        """
+        row = db.execute("SELECT value FROM cache_meta WHERE name = 'capacity'").fetchone()
+        capacity = int(row[0]) if row else self.capacity
+        if capacity == self.capacity:
+            return
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode="r+", shape=(capacity, self.dim))
+        self.capacity = capacity
+
+    # ---------- lookup / store ----------
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not keys or not self._open():
+            return {}
+        db = self._connect()
+        uniq = list(dict.fromkeys(keys))
+        # lookup + copy dalam satu transaksi: put_many proses lain tidak bisa evict slot di tengahnya
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._sync_capacity(db)
+            slots: Dict[str, int] = {}
+            for i in range(0, len(uniq), _SQL_BATCH):
+                part = uniq[i:i + _SQL_BATCH]
+                marks = ",".join("?" * len(part))
+                for key, slot in db.execute(f"SELECT key, slot FROM entries WHERE key IN ({marks})", part):
+                    if int(slot) < self.capacity:
+                        slots[key] = int(slot)
+            now = time.time()
+            hit_keys = list(slots)
+            for i in range(0, len(hit_keys), _SQL_BATCH):
+                part = hit_keys[i:i + _SQL_BATCH]
+                marks = ",".join("?" * len(part))
+                db.execute(f"UPDATE entries SET last_used = ? WHERE key IN ({marks})", [now, *part])
+            found = {key: np.array(self._vectors[slot], dtype=np.float32) for key, slot in slots.items()}
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return found
+
+    def _allocate(self, db: sqlite3.Connection, need: int) -> List[int]:
+        row = db.execute("SELECT COALESCE(MAX(slot) + 1, 0), COUNT(*) FROM entries").fetchone()
+        next_slot, used = int(row[0]), int(row[1])
+        if used < next_slot:
+            # ada lubang (mis. setelah proses lain gagal di tengah); rapatkan dari awal
+            taken = {int(s) for (s,) in db.execute("SELECT slot FROM entries")}
+            free = [s for s in range(self.capacity) if s not in taken][:need]
+        else:
+            free = list(range(next_slot, min(self.capacity, next_slot + need)))
+        remaining = need - len(free)
+        if remaining > 0:
+            victims = db.execute("SELECT key, slot FROM entries ORDER BY last_used, slot LIMIT ?", (remaining,)).fetchall()
+            for i in range(0, len(victims), _SQL_BATCH):
+                part = [k for k, _s in victims[i:i + _SQL_BATCH]]
+                marks = ",".join("?" * len(part))
+                db.execute(f"DELETE FROM entries WHERE key IN ({marks})", part)
+            free.extend(int(s) for _k, s in victims)
+        return free
+
+    def put_many(self, items: Sequence[Tuple[str, np.ndarray]]) -> None:
+        if not items:
+            return
+        dim = int(np.asarray(items[0][1]).shape[-1])
+        if not self._open(dim) or dim != self.dim:
+            return
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._sync_capacity(db)
+            items = list(dict(items).items())[: self.capacity]
+            known = set()
+            keys = [k for k, _v in items]
+            for i in range(0, len(keys), _SQL_BATCH):
+                part = keys[i:i + _SQL_BATCH]
+                marks = ",".join("?" * len(part))
+                known.update(k for (k,) in db.execute(f"SELECT key FROM entries WHERE key IN ({marks})", part))
+            items = [(k, v) for k, v in items if k not in known]
+            slots = self._allocate(db, len(items))
+            now = time.time()
+            rows = []
+            for (key, vec), slot in zip(items, slots):
+                self._vectors[slot] = np.asarray(vec, dtype=np.float16)
+                rows.append((key, slot, now))
+            self._vectors.flush()
+            db.executemany("INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)", rows)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    # ---------- embed wrapper ----------
+    def embed(self, texts: Sequence[str], compute: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Ambil vektor dari cache; hanya teks yang miss dikirim ke `compute`. Hasil miss juga
+        dibulatkan ke float16 supaya vektor sama persis untuk hit maupun miss.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        keys = [text_key(t) for t in texts]
+        try:
+            with self._lock:
+                found = self.get_many(keys)
+        except Exception as e:
+            logger.warning(" EMBED_CACHE lookup gagal, bypass: %s", e)
+            return compute(texts)
+
+        miss_keys: List[str] = []
+        miss_texts: List[str] = []
+        seen = set(found)
+        for key, text in zip(keys, texts):
+            if key not in seen:
+                seen.add(key)
+                miss_keys.append(key)
+                miss_texts.append(text)
+
+        if miss_texts:
+            # model dipanggil di luar lock supaya thread lain tetap bisa membaca cache
+            fresh = np.asarray(compute(miss_texts), dtype=np.float32)
+            fresh = fresh.astype(np.float16).astype(np.float32)
+            for key, vec in zip(miss_keys, fresh):
+                found[key] = vec
+            try:
+                with self._lock:
+                    self.put_many(list(zip(miss_keys, fresh)))
+            except Exception as e:
+                logger.warning(" EMBED_CACHE simpan gagal: %s", e)
+
+        with self._lock:
+            self.hits += len(texts) - len(miss_texts)
+            self.misses += len(miss_texts)
+        logger.debug(" EMBED_CACHE texts=%s miss=%s", len(texts), len(miss_texts))
+        return [found[k].tolist() for k in keys]
+
+    def stats(self) -> Dict[str, int]:
+        entries = 0
+        with self._lock:
+            if self._db is not None:
+                entries = int(self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "capacity": self.capacity,
+            "dim": self.dim,
+        }
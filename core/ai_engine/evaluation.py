@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from core.monitoring import summarize_stage_timings
+
+from .config import override_persist_directory
+from .ingest import process_document_timed
+from .retrieval.main import _retrieval_settings, retrieve_context
+from .retrieval.router import route_query
+from .tracing import span, stage_breakdown, start_trace
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Offline retrieval evaluation
+# =========================
+# Corpus tetap (PDF jadwal bawaan + transkrip sintetis) di-ingest lewat process_document
+# ke direktori Chroma sementara, lalu query berlabel diputar ulang lewat bagian retrieval
+# ask_bot (tanpa LLM). Output JSON stabil supaya hasil antar commit bisa di-diff.
+
+EVAL_USER_ID = 990001
+DEFAULT_KS = (1, 3, 5, 10)
+DEFAULT_QUERIES_PATH = Path(__file__).resolve().parent / "eval_data" / "rag_eval_queries.json"
+SCHEDULE_PDF_NAME = "Jadwal Mata Kuliah Semester GANJIL TA.2024-2025.pdf"
+TRANSCRIPT_TITLE = "Transkrip Nilai Semester 1-4.csv"
+
+_WS_RE = re.compile(r"\s+")
+
+_TRANSCRIPT_COURSES = [
+    (1, "HK101", "Pengantar Ilmu Hukum", 3, "A"),
+    (1, "HK102", "Pengantar Hukum Indonesia", 3, "A-"),
+    (1, "HK103", "Pancasila", 2, "B+"),
+    (1, "HK104", "Bahasa Indonesia", 2, "A"),
+    (1, "HK105", "Ilmu Negara", 2, "B"),
+    (2, "HK201", "Hukum Perdata", 3, "B+"),
+    (2, "HK202", "Hukum Pidana", 3, "A-"),
+    (2, "HK203", "Hukum Tata Negara", 3, "B"),
+    (2, "HK204", "Hukum Adat", 2, "C+"),
+    (2, "HK205", "Kewarganegaraan", 2, "A"),
+    (3, "HK301", "Hukum Administrasi Negara", 3, "B"),
+    (3, "HK302", "Hukum Dagang", 2, "B-"),
+    (3, "HK303", "Hukum Agraria", 2, "C"),
+    (3, "HK304", "Hukum Islam", 2, "A-"),
+    (3, "HK305", "Hukum Acara Pidana", 3, "B+"),
+    (4, "HK401", "Hukum Acara Perdata", 3, "B"),
+    (4, "HK402", "Hukum Ketenagakerjaan", 2, "A"),
+    (4, "HK403", "Hukum Lingkungan", 2, "D"),
+    (4, "HK404", "Sosiologi Hukum", 2, "B+"),
+    (4, "HK405", "Hukum Pajak", 2, "C+"),
+]
+
+_GRADE_POINTS = {"A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7, "C+": 2.3, "C": 2.0, "D": 1.0, "E": 0.0}
+
+
+@dataclass(frozen=True)
+class EvalQuery:
+    qid: str
+    query: str
+    contains: Tuple[str, ...]
+    source: str = ""
+
+
+@dataclass
+class QueryOutcome:
+    qid: str
+    query: str
+    rank: int = 0  # 1-based posisi chunk relevan pertama di ranking; 0 = tidak ketemu
+    ranked_count: int = 0
+    context_count: int = 0
+    context_hit: bool = False
+    top_score: float = 0.0
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+def _norm_text(text: Any) -> str:
+    return _WS_RE.sub(" ", str(text or "")).strip().lower()
+
+
+def load_eval_queries(path: Optional[str] = None) -> List[EvalQuery]:
+    with open(path or DEFAULT_QUERIES_PATH, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    out: List[EvalQuery] = []
+    for idx, item in enumerate(raw.get("queries") or [], start=1):
+        query = str(item.get("query") or "").strip()
+        contains = tuple(_norm_text(x) for x in (item.get("contains") or []) if _norm_text(x))
+        if not query or not contains:
+            continue
+        out.append(
+            EvalQuery(
+                qid=str(item.get("id") or f"q{idx}"),
+                query=query,
+                contains=contains,
+                source=str(item.get("source") or "").strip(),
+            )
+        )
+    return out
+
+
+def is_relevant(doc: Any, label: EvalQuery) -> bool:
+    """
+    Chunk dianggap relevan kalau memuat semua frasa `contains` (case/whitespace-insensitive)
+    dan, bila diisi, metadata `source` memuat `label.source`.
+    """
+    if label.source:
+        source = str((getattr(doc, "metadata", None) or {}).get("source") or "")
+        if label.source.lower() not in source.lower():
+            return False
+    text = _norm_text(getattr(doc, "page_content", ""))
+    return all(needle in text for needle in label.contains)
+
+
+def first_relevant_rank(docs: Sequence[Any], label: EvalQuery) -> int:
+    for pos, doc in enumerate(docs, start=1):
+        if is_relevant(doc, label):
+            return pos
+    return 0
+
+
+def recall_at_k(ranks: Sequence[int], k: int) -> float:
+    # satu label per query -> recall@k = fraksi query yang chunk relevannya masuk top-k
+    if not ranks:
+        return 0.0
+    return round(sum(1 for r in ranks if 0 < r <= k) / len(ranks), 4)
+
+
+def mean_reciprocal_rank(ranks: Sequence[int]) -> float:
+    if not ranks:
+        return 0.0
+    return round(sum((1.0 / r) if r > 0 else 0.0 for r in ranks) / len(ranks), 4)
+
+
+def stage_percentiles(rows: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    p50 = summarize_stage_timings(rows, pct=0.50)
+    p95 = summarize_stage_timings(rows, pct=0.95)
+    p99 = summarize_stage_timings(rows, pct=0.99)
+    return {
+        stage: {"p50": p50.get(stage, 0.0), "p95": p95.get(stage, 0.0), "p99": p99.get(stage, 0.0)}
+        for stage in sorted(p50)
+    }
+
+
+def write_synthetic_transcript(work_dir: str) -> str:
+    path = os.path.join(work_dir, TRANSCRIPT_TITLE)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Semester", "Kode", "Mata Kuliah", "SKS", "Nilai Huruf", "Bobot"])
+        for semester, kode, nama, sks, grade in _TRANSCRIPT_COURSES:
+            writer.writerow([semester, kode, nama, sks, grade, _GRADE_POINTS[grade]])
+    return path
+
+
+def _fake_document(doc_id: int, title: str, path: str) -> SimpleNamespace:
+    # process_document hanya butuh file.path, title, id, user.id -> tidak perlu row DB
+    return SimpleNamespace(
+        id=doc_id,
+        title=title,
+        file=SimpleNamespace(path=path),
+        user=SimpleNamespace(id=EVAL_USER_ID),
+    )
+
+
+def build_eval_corpus(work_dir: str, include_pdf: bool = True) -> List[SimpleNamespace]:
+    docs: List[SimpleNamespace] = []
+    if include_pdf:
+        pdf_path = os.path.join(str(settings.BASE_DIR), SCHEDULE_PDF_NAME)
+        if os.path.exists(pdf_path):
+            docs.append(_fake_document(1, SCHEDULE_PDF_NAME, pdf_path))
+        else:
+            logger.warning(" RAG_EVAL PDF jadwal tidak ditemukan: %s", pdf_path)
+    docs.append(_fake_document(2, TRANSCRIPT_TITLE, write_synthetic_transcript(work_dir)))
+    return docs
+
+
+@contextmanager
+def _env_override(values: Dict[str, str]) -> Iterator[None]:
+    previous = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, val in previous.items():
+            if val is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = val
+
+
+def ingest_corpus(docs: Sequence[Any]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    # LLM repair dimatikan: hasil ingest harus deterministik dan tidak memanggil jaringan
+    with _env_override({"PDF_HYBRID_LLM_REPAIR": "0"}):
+        for doc in docs:
+            t0 = time.perf_counter()
+            # durasi tahap dari process_document sendiri: trace "ingest" di dalamnya menggantikan
+            # trace pemanggil, jadi stage_breakdown() di luar hanya berisi total
+            ok, stages = process_document_timed(doc, record_metric=False)
+            out.append(
+                {
+                    "source": doc.title,
+                    "ok": bool(ok),
+                    "ms": round((time.perf_counter() - t0) * 1000, 2),
+                    "stages": stages,
+                }
+            )
+    return out
+
+
+def evaluate_query(label: EvalQuery, mode: str, user_id: int = EVAL_USER_ID) -> QueryOutcome:
+    settings_for_mode = _retrieval_settings(mode)
+    with start_trace("rag_eval"):
+        with span("routing"):
+            route = route_query(label.query)
+        result = retrieve_context(
+            user_id=user_id,
+            query=route.query,
+            mode=mode,
+            route=route,
+            settings=settings_for_mode,
+        )
+        stages = stage_breakdown()
+    rank = first_relevant_rank(result.ranked_docs, label)
+    return QueryOutcome(
+        qid=label.qid,
+        query=label.query,
+        rank=rank,
+        ranked_count=len(result.ranked_docs),
+        context_count=len(result.docs),
+        context_hit=first_relevant_rank(result.docs, label) > 0,
+        top_score=round(result.top_score, 4),
+        stages=stages,
+    )
+
+
+def run_retrieval_eval(
+    queries: Sequence[EvalQuery],
+    *,
+    mode: str = "doc_background",
+    ks: Sequence[int] = DEFAULT_KS,
+    include_pdf: bool = True,
+    keep_dir: str = "",
+) -> Dict[str, Any]:
+    """
+    Jalankan ingest corpus + replay query ke Chroma sementara. Return report dict
+    (config, ingest, stages p50/p95/p99, recall@k, MRR, detail per query).
+    """
+    work_dir = keep_dir or tempfile.mkdtemp(prefix="rag_eval_")
+    os.makedirs(work_dir, exist_ok=True)
+    chroma_dir = os.path.join(work_dir, "chroma")
+    try:
+        with override_persist_directory(chroma_dir):
+            docs = build_eval_corpus(work_dir, include_pdf=include_pdf)
+            ingest_report = ingest_corpus(docs)
+            outcomes = [evaluate_query(label, mode=mode) for label in queries]
+    finally:
+        if not keep_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    ranks = [o.rank for o in outcomes]
+    metrics: Dict[str, float] = {f"recall@{int(k)}": recall_at_k(ranks, int(k)) for k in ks}
+    metrics["mrr"] = mean_reciprocal_rank(ranks)
+    metrics["context_hit_rate"] = round(
+        sum(1 for o in outcomes if o.context_hit) / len(outcomes), 4
+    ) if outcomes else 0.0
+
+    mode_settings = _retrieval_settings(mode)
+    return {
+        "config": {
+            "mode": mode,
+            "queries": len(outcomes),
+            "ks": [int(k) for k in ks],
+            "dense_k": mode_settings.dense_k,
+            "bm25_k": mode_settings.bm25_k,
+            "rerank_top_n": mode_settings.rerank_top_n,
+            "hybrid": mode_settings.use_hybrid,
+            "rerank": mode_settings.use_rerank,
+            "query_rewrite": mode_settings.use_query_rewrite,
+            "embedding_model": str(os.environ.get("RAG_EMBEDDING_MODEL", "") or "default"),
+            "work_dir": work_dir if keep_dir else "",
+        },
+        "ingest": ingest_report,
+        "stages": stage_percentiles([o.stages for o in outcomes]),
+        "metrics": metrics,
+        "queries": [
+            {
+                "id": o.qid,
+                "query": o.query,
+                "rank": o.rank,
+                "ranked": o.ranked_count,
+                "context": o.context_count,
+                "context_hit": o.context_hit,
+                "top_score": o.top_score,
+            }
+            for o in outcomes
+        ],
+    }
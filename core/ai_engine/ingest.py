@@ -2,15 +2,34 @@
 
 import os
 import re
+import hashlib
 import pdfplumber
-import pandas as pd
 import logging
+import csv
+import io
+import itertools
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from uuid import uuid4
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from .config import get_vectorstore
+from .config import get_pdf_page_cache_dir, get_repair_cache_dir, get_vectorstore
+from .tracing import span, start_trace, stage_breakdown, format_breakdown
+from .pdf_pages import PageRaw, extract_page_raw, load_pdf_pages
+from .pdf_ocr import load_ocr_pages
+from .repair_cache import RepairCache, row_fingerprint
+from .schedule_table import SCHEDULE_FIELDS, ScheduleTable
+from .stages import StageMeter, batched, meter_or_null
+from .tabular import iter_tabular_sheets
+from .vector_ops import _get_collection
+from .retrieval.doc_index import index_document_title
+from .retrieval.llm import DEFAULT_BASE_URL, get_runtime_openrouter_config
+from ..monitoring import record_ingest_metric
 try:
     from langchain_openai import ChatOpenAI  # type: ignore
 except Exception:  # pragma: no cover - optional dependency for hybrid mode
@@ -123,12 +142,8 @@ _DAY_CANON = {
 # =========================
 def _norm(s: Any) -> str:
     """Normalize whitespace & stringify."""
-    s = "" if s is None else str(s)
-    s = s.replace("\u00a0", " ")  # non-breaking space
-    s = s.replace("\t", " ")
-    s = s.replace("\r", " ")
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+    # str.split() memecah di whitespace unicode yang sama dengan \s (termasuk NBSP, tab, CR)
+    return " ".join(("" if s is None else str(s)).split())
 
 
 def _norm_header(s: Any) -> str:
@@ -334,7 +349,10 @@ def _extract_semester_from_text(s: str) -> Optional[int]:
         return None
 
 
-def _detect_doc_type(detected_columns: Optional[List[str]], schedule_rows: Optional[List[Dict[str, Any]]]) -> str:
+ScheduleRows = Union[ScheduleTable, Sequence[Dict[str, Any]]]
+
+
+def _detect_doc_type(detected_columns: Optional[List[str]], schedule_rows: Optional[ScheduleRows]) -> str:
     cols = [c.lower() for c in (detected_columns or [])]
     if any(c in cols for c in ["hari", "jam", "ruang", "kelas"]):
         return "schedule"
@@ -345,7 +363,7 @@ def _detect_doc_type(detected_columns: Optional[List[str]], schedule_rows: Optio
     return "general"
 
 
-def _schedule_rows_to_csv_text(rows: Optional[List[Dict[str, Any]]]) -> Tuple[str, int, int]:
+def _schedule_rows_to_csv_text(rows: Optional[ScheduleRows]) -> Tuple[str, int, int]:
     """
     Bentuk representasi CSV canonical dari schedule_rows agar konten tabel
     lebih terstruktur untuk RAG.
@@ -353,60 +371,42 @@ def _schedule_rows_to_csv_text(rows: Optional[List[Dict[str, Any]]]) -> Tuple[st
     if not rows:
         return "", 0, 0
 
-    normalized_rows: List[Dict[str, Any]] = []
-    no_counter = 0
-    for r in rows:
-        if not isinstance(r, dict):
-            continue
-        hari = _normalize_day_text(r.get("hari", ""))
-        hari = hari.upper() if hari else ""
-        sesi = _norm(r.get("sesi", ""))
-        jam = _normalize_time_range(r.get("jam", ""))
-        ruang = _norm(r.get("ruang", ""))
-        ruang = re.sub(r"(?<=\d),(?=\d)", ".", ruang)  # 1,10 -> 1.10
-        smt = _norm(r.get("semester", ""))
-        mk = _norm(r.get("mata_kuliah", ""))
-        sks = _norm(r.get("sks", ""))
-        kls = _norm(r.get("kelas", ""))
-        dosen = _norm(r.get("dosen", ""))
+    table = ScheduleTable.from_rows(rows)
+    c_hari, c_sesi, c_jam = table.column("hari"), table.column("sesi"), table.column("jam")
+    c_ruang, c_smt, c_mk = table.column("ruang"), table.column("semester"), table.column("mata_kuliah")
+    c_sks, c_kls, c_dosen, c_kode = table.column("sks"), table.column("kelas"), table.column("dosen"), table.column("kode")
 
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(["NO", "HARI", "SESI", "JAM", "Ruang", "SMT", "MATA_KULIAH", "SKS", "KLS", "DOSEN_PENGAMPU_TEAM_TEACHING"])
+    no_counter = 0
+    for i in range(len(table)):
+        mk = c_mk[i]
         # Hindari row fallback (hasil page-text) yang hanya berisi slot waktu.
         # Untuk CSV canonical, wajib ada mata kuliah atau kode.
-        if not (mk or _norm(r.get("kode", ""))):
+        if not (mk or c_kode[i]):
             continue
-
+        hari = _normalize_day_text(c_hari[i])
+        ruang = c_ruang[i]
+        if "," in ruang:
+            ruang = re.sub(r"(?<=\d),(?=\d)", ".", ruang)  # 1,10 -> 1.10
         no_counter += 1
-        normalized_rows.append({
-            "NO": no_counter,
-            "HARI": hari,
-            "SESI": sesi,
-            "JAM": jam,
-            "Ruang": ruang,
-            "SMT": smt,
-            "MATA_KULIAH": mk,
-            "SKS": sks,
-            "KLS": kls,
-            "DOSEN_PENGAMPU_TEAM_TEACHING": dosen,
-        })
-
-    if not normalized_rows:
+        writer.writerow([
+            no_counter,
+            hari.upper() if hari else "",
+            c_sesi[i],
+            _normalize_time_range(c_jam[i]),
+            ruang,
+            c_smt[i],
+            mk,
+            c_sks[i],
+            c_kls[i],
+            c_dosen[i],
+        ])
+
+    if not no_counter:
         return "", 0, 0
-
-    df = pd.DataFrame(normalized_rows).fillna("")
-    ordered_cols = [
-        "NO",
-        "HARI",
-        "SESI",
-        "JAM",
-        "Ruang",
-        "SMT",
-        "MATA_KULIAH",
-        "SKS",
-        "KLS",
-        "DOSEN_PENGAMPU_TEAM_TEACHING",
-    ]
-    df = df[[c for c in ordered_cols if c in df.columns]]
-    return df.to_csv(index=False), int(len(df.index)), int(len(df.columns))
+    return buf.getvalue(), no_counter, 10
 
 
 def _csv_preview(csv_text: str, max_lines: int = 12, max_chars: int = 3500) -> str:
@@ -424,7 +424,7 @@ def _csv_preview(csv_text: str, max_lines: int = 12, max_chars: int = 3500) -> s
     return preview
 
 
-def _schedule_rows_to_row_chunks(rows: Optional[List[Dict[str, Any]]], limit: int = 2000) -> List[str]:
+def _schedule_rows_to_row_chunks(rows: Optional[ScheduleRows], limit: int = 2000) -> List[str]:
     """
     Row-level chunking berbasis pasangan kolom=nilai supaya query detail
     (hari/jam/kelas/dosen) lebih mudah kena di retrieval.
@@ -432,52 +432,44 @@ def _schedule_rows_to_row_chunks(rows: Optional[List[Dict[str, Any]]], limit: in
     if not rows:
         return []
 
+    table = ScheduleTable.from_rows(rows)
+    canon = [(key, table.column(key)) for key in _SCHEDULE_CANON_ORDER if key in SCHEDULE_FIELDS]
     out: List[str] = []
-    for idx, r in enumerate(rows[:limit], start=1):
-        if not isinstance(r, dict):
-            continue
+    for i in range(min(len(table), limit)):
         cells: List[str] = []
-        for key in _SCHEDULE_CANON_ORDER:
-            val = _norm(r.get(key, ""))
-            if val:
+        for key, col in canon:
+            val = col[i]
+            # nilai di tabel sudah ternormalisasi; page int 0 = kolom tidak ada
+            if val and table.has(i, key):
                 cells.append(f"{key}={val}")
         # tambahan kolom non-canonical
-        for key, value in r.items():
-            if key in _SCHEDULE_CANON_ORDER:
-                continue
-            val = _norm(value)
-            if val:
-                cells.append(f"{key}={val}")
+        extra = table.extra(i)
+        if extra:
+            for key, value in extra.items():
+                val = value if isinstance(value, str) else _norm(value)
+                if val:
+                    cells.append(f"{key}={val}")
         if len(cells) >= 2:
-            out.append(f"CSV_ROW {idx}: " + " | ".join(cells))
+            out.append(f"CSV_ROW {i + 1}: " + " | ".join(cells))
     return out
 
 
-def _schedule_rows_to_parent_chunks(rows: Optional[List[Dict[str, Any]]], target_chars: int = 420) -> List[Dict[str, Any]]:
+def _schedule_rows_to_parent_chunks(rows: Optional[ScheduleRows], target_chars: int = 420) -> List[Dict[str, Any]]:
     """
     Parent chunk: rangkum beberapa row per page+hari agar retrieval punya konteks lebih lebar.
     """
     if not rows:
         return []
+    table = ScheduleTable.from_rows(rows)
+    pages, days = table.column("page"), table.column("hari")
+    fields = [(col, table.column(col)) for col in ["sesi", "jam", "kode", "mata_kuliah", "kelas", "ruang", "dosen", "semester"]]
     grouped: Dict[Tuple[int, str], List[str]] = {}
-    for r in rows:
-        if not isinstance(r, dict):
-            continue
-        page_val = r.get("page", 0)
-        try:
-            page_num = int(page_val or 0)
-        except Exception:
-            page_num = 0
-        day = _norm(r.get("hari", "")) or "-"
-        key = (page_num, day)
-        grouped.setdefault(key, [])
-        cells: List[str] = []
-        for col in ["sesi", "jam", "kode", "mata_kuliah", "kelas", "ruang", "dosen", "semester"]:
-            val = _norm(r.get(col, ""))
-            if val:
-                cells.append(f"{col}={val}")
+    for i in range(len(table)):
+        key = (pages[i], days[i] or "-")
+        lines = grouped.setdefault(key, [])
+        cells = [f"{col}={values[i]}" for col, values in fields if values[i]]
         if cells:
-            grouped[key].append(" | ".join(cells))
+            lines.append(" | ".join(cells))
 
     out: List[Dict[str, Any]] = []
     for (page_num, day), lines in grouped.items():
@@ -494,18 +486,7 @@ def _schedule_rows_to_parent_chunks(rows: Optional[List[Dict[str, Any]]], target
     return out
 
 
-def _build_chunk_payloads(
-    *,
-    doc_type: str,
-    text_content: str,
-    row_chunks: List[str],
-    schedule_rows: Optional[List[Dict[str, Any]]] = None,
-) -> List[Dict[str, Any]]:
-    """
-    Build payload chunk dengan profil per doc_type:
-    - schedule: row + parent + text
-    - others: text only
-    """
+def _chunk_profile(doc_type: str) -> Tuple[bool, int, int]:
     profile_enabled = (os.environ.get("RAG_DOC_CHUNK_PROFILE", "1") or "1").strip().lower() in {"1", "true", "yes"}
     if profile_enabled and doc_type == "schedule":
         text_chunk_size = int(os.environ.get("RAG_SCHEDULE_TEXT_CHUNK_SIZE", "820") or 820)
@@ -513,11 +494,29 @@ def _build_chunk_payloads(
     else:
         text_chunk_size = int(os.environ.get("RAG_TEXT_CHUNK_SIZE", "820") or 820)
         text_chunk_overlap = int(os.environ.get("RAG_TEXT_CHUNK_OVERLAP", "100") or 100)
+    return profile_enabled, max(200, text_chunk_size), max(40, text_chunk_overlap)
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=max(200, text_chunk_size), chunk_overlap=max(40, text_chunk_overlap))
-    text_chunks = [_norm(c) for c in splitter.split_text(text_content or "") if _norm(c)]
 
-    payloads: List[Dict[str, Any]] = []
+def _estimate_chunk_count(*, doc_type: str, text_content: str, row_chunks: List[str]) -> int:
+    # perkiraan kasar (untuk progress job) tanpa memecah teks dua kali
+    _enabled, size, overlap = _chunk_profile(doc_type)
+    return len(row_chunks or []) + len(text_content or "") // max(size - overlap, 1) + 1
+
+
+def _iter_chunk_payloads(
+    *,
+    doc_type: str,
+    text_content: str,
+    row_chunks: List[str],
+    schedule_rows: Optional[ScheduleRows] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Tahap chunk (generator) dengan profil per doc_type:
+    - schedule: row + parent + text
+    - others: text only
+    Row chunk keluar lebih dulu; parent dan teks baru dipecah saat diminta tahap berikutnya.
+    """
+    profile_enabled, text_chunk_size, text_chunk_overlap = _chunk_profile(doc_type)
     seen = set()
 
     for rc in row_chunks or []:
@@ -525,7 +524,7 @@ def _build_chunk_payloads(
         if not val or val in seen:
             continue
         seen.add(val)
-        payloads.append({"text": val, "chunk_kind": "row"})
+        yield {"text": val, "chunk_kind": "row"}
 
     if profile_enabled and doc_type == "schedule":
         for p in _schedule_rows_to_parent_chunks(schedule_rows):
@@ -533,22 +532,37 @@ def _build_chunk_payloads(
             if not txt or txt in seen:
                 continue
             seen.add(txt)
-            payloads.append(
-                {
-                    "text": txt,
-                    "chunk_kind": "parent",
-                    "page": p.get("page"),
-                    "section": p.get("section", ""),
-                }
-            )
-
-    for tc in text_chunks:
-        if tc in seen:
+            yield {
+                "text": txt,
+                "chunk_kind": "parent",
+                "page": p.get("page"),
+                "section": p.get("section", ""),
+            }
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=text_chunk_size, chunk_overlap=text_chunk_overlap)
+    for c in splitter.split_text(text_content or ""):
+        tc = _norm(c)
+        if not tc or tc in seen:
             continue
         seen.add(tc)
-        payloads.append({"text": tc, "chunk_kind": "text"})
+        yield {"text": tc, "chunk_kind": "text"}
 
-    return payloads
+
+def _build_chunk_payloads(
+    *,
+    doc_type: str,
+    text_content: str,
+    row_chunks: List[str],
+    schedule_rows: Optional[ScheduleRows] = None,
+) -> List[Dict[str, Any]]:
+    return list(
+        _iter_chunk_payloads(
+            doc_type=doc_type,
+            text_content=text_content,
+            row_chunks=row_chunks,
+            schedule_rows=schedule_rows,
+        )
+    )
 
 
 def _row_confidence(row: Dict[str, Any]) -> Tuple[float, List[str]]:
@@ -595,6 +609,12 @@ def _row_confidence(row: Dict[str, Any]) -> Tuple[float, List[str]]:
     return max(0.0, min(1.0, score)), issues
 
 
+def _repair_model_name() -> str:
+    return os.environ.get("INGEST_REPAIR_MODEL") or os.environ.get(
+        "OPENROUTER_MODEL", "qwen/qwen3-next-80b-a3b-instruct:free"
+    )
+
+
 def _build_repair_llm() -> Optional[Any]:
     """
     Build LLM client for hybrid repair. Return None if unavailable.
@@ -606,15 +626,16 @@ def _build_repair_llm() -> Optional[Any]:
     if not api_key:
         return None
 
-    model_name = os.environ.get("INGEST_REPAIR_MODEL") or os.environ.get(
-        "OPENROUTER_MODEL", "qwen/qwen3-next-80b-a3b-instruct:free"
-    )
+    try:
+        base_url = str(get_runtime_openrouter_config().get("base_url") or DEFAULT_BASE_URL)
+    except Exception:
+        base_url = DEFAULT_BASE_URL
 
     try:
         return ChatOpenAI(
             openai_api_key=api_key,
-            openai_api_base="https://openrouter.ai/api/v1",
-            model_name=model_name,
+            openai_api_base=base_url,
+            model_name=_repair_model_name(),
             temperature=float(os.environ.get("INGEST_REPAIR_TEMPERATURE", "0.0")),
             request_timeout=int(os.environ.get("INGEST_REPAIR_TIMEOUT", "60")),
             max_retries=int(os.environ.get("INGEST_REPAIR_RETRIES", "1")),
@@ -664,9 +685,113 @@ def _extract_json_from_llm_response(text: str) -> Optional[List[Dict[str, Any]]]
     return None
 
 
-def _repair_rows_with_llm(rows: List[Dict[str, Any]], source: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+_REPAIR_FIELDS = ("hari", "sesi", "jam", "ruang", "semester", "mata_kuliah", "sks", "kelas", "dosen", "kode")
+# naikkan setiap kali prompt/aturan repair berubah supaya hasil cache lama tidak dipakai
+REPAIR_PROMPT_VERSION = "repair-v1"
+
+
+def _repair_fields(row: Dict[str, Any]) -> Dict[str, str]:
+    return {k: _norm(row.get(k, "")) for k in _REPAIR_FIELDS}
+
+
+def _repair_cache() -> Optional[RepairCache]:
+    root = get_repair_cache_dir()
+    return RepairCache(root) if root else None
+
+
+def _repair_prompt(batch: List[Tuple[int, Dict[str, Any], List[str], float]], source: str, run_id: str) -> str:
+    payload: List[Dict[str, Any]] = []
+    for i, row, issues, conf in batch:
+        item_row: Dict[str, Any] = dict(_repair_fields(row))
+        item_row["page"] = int(row.get("page", 0) or 0)
+        payload.append(
+            {
+                "idx": i,
+                "issues": issues,
+                "confidence": round(conf, 3),
+                "row": item_row,
+            }
+        )
+
+    return (
+        "Anda memperbaiki data jadwal kuliah hasil OCR/PDF.\n"
+        "Tugas: perbaiki hanya field yang rusak/kosong. Jangan halusinasi.\n"
+        "Jika tidak yakin, biarkan nilai lama.\n"
+        "Wajib output JSON ARRAY valid tanpa teks tambahan.\n"
+        "Setiap item wajib punya keys: idx, hari, sesi, jam, ruang, semester, mata_kuliah, sks, kelas, dosen, kode.\n"
+        "Format jam wajib HH:MM-HH:MM.\n"
+        "Hari gunakan: SENIN/SELASA/RABU/KAMIS/JUMAT/SABTU/MINGGU jika bahasa Indonesia.\n"
+        f"Source: {source}\n"
+        f"Run: {run_id}\n"
+        f"Input rows:\n{json.dumps(payload, ensure_ascii=True)}"
+    )
+
+
+def _invoke_repair_batch(llm: Any, prompt: str) -> Tuple[Optional[List[Dict[str, Any]]], float]:
+    # dijalankan di thread pool: hanya panggilan LLM + parsing, tanpa menyentuh rows
+    t0 = time.perf_counter()
+    out = llm.invoke(prompt)
+    content = out.content if hasattr(out, "content") else str(out)
+    parsed = _extract_json_from_llm_response(content if isinstance(content, str) else str(content))
+    return parsed, round((time.perf_counter() - t0) * 1000.0, 1)
+
+
+def _apply_repair_items(rows: ScheduleTable, parsed: List[Dict[str, Any]]) -> int:
+    repaired = 0
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        idx = item.get("idx")
+        if not isinstance(idx, int) or idx < 0 or idx >= len(rows):
+            continue
+        row = rows[idx]
+
+        updates = {
+            "hari": _normalize_day_text(item.get("hari", row.get("hari", ""))),
+            "sesi": _norm(item.get("sesi", row.get("sesi", ""))),
+            "jam": _normalize_time_range(item.get("jam", row.get("jam", ""))),
+            "ruang": _norm(item.get("ruang", row.get("ruang", ""))),
+            "semester": _norm(item.get("semester", row.get("semester", ""))),
+            "mata_kuliah": _norm(item.get("mata_kuliah", row.get("mata_kuliah", ""))),
+            "sks": _norm(item.get("sks", row.get("sks", ""))),
+            "kelas": _norm(item.get("kelas", row.get("kelas", ""))),
+            "dosen": _norm(item.get("dosen", row.get("dosen", ""))),
+            "kode": _norm(item.get("kode", row.get("kode", ""))),
+        }
+
+        before_conf, _ = _row_confidence(row)
+        row.update({k: v for k, v in updates.items() if v != ""})
+        after_conf, after_issues = _row_confidence(row)
+        row["_confidence"] = after_conf
+        row["_issues"] = after_issues
+        if after_conf > before_conf:
+            repaired += 1
+    return repaired
+
+
+def _repair_candidates(rows: ScheduleTable, threshold: float) -> List[Tuple[int, Dict[str, Any], List[str], float]]:
+    """Row dengan confidence < threshold yang akan dikirim ke LLM repair (tanpa memanggil LLM)."""
+    mk_col, kode_col = rows.column("mata_kuliah"), rows.column("kode")
+    candidates: List[Tuple[int, Dict[str, Any], List[str], float]] = []
+    for idx, row in enumerate(rows):
+        # skip very weak fallback rows that have no class content
+        if not (mk_col[idx] or kode_col[idx]):
+            continue
+        conf, issues = _row_confidence(row)
+        row["_confidence"] = conf
+        row["_issues"] = issues
+        if conf < threshold:
+            candidates.append((idx, row, issues, conf))
+    return candidates
+
+
+def _repair_rows_with_llm(rows: ScheduleRows, source: str) -> Tuple[ScheduleRows, Dict[str, Any]]:
     """
     Hybrid step: only repair low-confidence rows with LLM strict JSON output.
+
+    Batch dikirim paralel (maks INGEST_REPAIR_CONCURRENCY in-flight) dengan batas waktu total
+    INGEST_REPAIR_DEADLINE detik. Hasil diterapkan berurutan sesuai indeks batch; batch yang
+    gagal atau lewat deadline dilewati tanpa menggagalkan ingest.
     """
     if not rows:
         return rows, {"enabled": False, "checked": 0, "repaired": 0}
@@ -681,20 +806,13 @@ def _repair_rows_with_llm(rows: List[Dict[str, Any]], source: str) -> Tuple[List
 
     threshold = float(os.environ.get("INGEST_REPAIR_THRESHOLD", "0.82"))
     max_rows = int(os.environ.get("INGEST_REPAIR_MAX_ROWS", "220"))
-    batch_size = int(os.environ.get("INGEST_REPAIR_BATCH_SIZE", "25"))
+    batch_size = max(1, int(os.environ.get("INGEST_REPAIR_BATCH_SIZE", "25")))
+    concurrency = max(1, int(os.environ.get("INGEST_REPAIR_CONCURRENCY", "4")))
+    deadline_s = float(os.environ.get("INGEST_REPAIR_DEADLINE", "120"))
 
-    candidates: List[Tuple[int, Dict[str, Any], List[str], float]] = []
-    for idx, row in enumerate(rows):
-        if not isinstance(row, dict):
-            continue
-        # skip very weak fallback rows that have no class content
-        if not (_norm(row.get("mata_kuliah", "")) or _norm(row.get("kode", ""))):
-            continue
-        conf, issues = _row_confidence(row)
-        row["_confidence"] = conf
-        row["_issues"] = issues
-        if conf < threshold:
-            candidates.append((idx, row, issues, conf))
+    # row diubah in-place lewat view ScheduleTable (list dict dikonversi sekali di sini)
+    rows = ScheduleTable.from_rows(rows)
+    candidates = _repair_candidates(rows, threshold)
 
     if not candidates:
         return rows, {"enabled": True, "checked": len(rows), "repaired": 0}
@@ -703,118 +821,242 @@ def _repair_rows_with_llm(rows: List[Dict[str, Any]], source: str) -> Tuple[List
     repaired = 0
     run_id = uuid4().hex[:8]
 
-    for start in range(0, len(candidates), max(1, batch_size)):
-        batch = candidates[start:start + max(1, batch_size)]
-        payload: List[Dict[str, Any]] = []
-        for i, row, issues, conf in batch:
-            payload.append(
-                {
-                    "idx": i,
-                    "issues": issues,
-                    "confidence": round(conf, 3),
-                    "row": {
-                        "hari": _norm(row.get("hari", "")),
-                        "sesi": _norm(row.get("sesi", "")),
-                        "jam": _norm(row.get("jam", "")),
-                        "ruang": _norm(row.get("ruang", "")),
-                        "semester": _norm(row.get("semester", "")),
-                        "mata_kuliah": _norm(row.get("mata_kuliah", "")),
-                        "sks": _norm(row.get("sks", "")),
-                        "kelas": _norm(row.get("kelas", "")),
-                        "dosen": _norm(row.get("dosen", "")),
-                        "kode": _norm(row.get("kode", "")),
-                        "page": int(row.get("page", 0) or 0),
-                    },
-                }
-            )
-
-        prompt = (
-            "Anda memperbaiki data jadwal kuliah hasil OCR/PDF.\n"
-            "Tugas: perbaiki hanya field yang rusak/kosong. Jangan halusinasi.\n"
-            "Jika tidak yakin, biarkan nilai lama.\n"
-            "Wajib output JSON ARRAY valid tanpa teks tambahan.\n"
-            "Setiap item wajib punya keys: idx, hari, sesi, jam, ruang, semester, mata_kuliah, sks, kelas, dosen, kode.\n"
-            "Format jam wajib HH:MM-HH:MM.\n"
-            "Hari gunakan: SENIN/SELASA/RABU/KAMIS/JUMAT/SABTU/MINGGU jika bahasa Indonesia.\n"
-            f"Source: {source}\n"
-            f"Run: {run_id}\n"
-            f"Input rows:\n{json.dumps(payload, ensure_ascii=True)}"
-        )
-
+    # key dihitung dari row sebelum diperbaiki (sama dengan isi yang dikirim ke LLM)
+    model_name = _repair_model_name()
+    keys = {
+        i: row_fingerprint(_repair_fields(row), REPAIR_PROMPT_VERSION, model_name)
+        for i, row, _iss, _c in candidates
+    }
+    cache = _repair_cache()
+    cached: Dict[str, Dict[str, Any]] = {}
+    if cache is not None:
         try:
-            out = llm.invoke(prompt)
-            content = out.content if hasattr(out, "content") else str(out)
-            parsed = _extract_json_from_llm_response(content if isinstance(content, str) else str(content))
-            if not parsed:
-                continue
-
-            for item in parsed:
-                if not isinstance(item, dict):
-                    continue
-                idx = item.get("idx")
-                if not isinstance(idx, int) or idx < 0 or idx >= len(rows):
-                    continue
-                row = rows[idx]
-                if not isinstance(row, dict):
-                    continue
-
-                updates = {
-                    "hari": _normalize_day_text(item.get("hari", row.get("hari", ""))),
-                    "sesi": _norm(item.get("sesi", row.get("sesi", ""))),
-                    "jam": _normalize_time_range(item.get("jam", row.get("jam", ""))),
-                    "ruang": _norm(item.get("ruang", row.get("ruang", ""))),
-                    "semester": _norm(item.get("semester", row.get("semester", ""))),
-                    "mata_kuliah": _norm(item.get("mata_kuliah", row.get("mata_kuliah", ""))),
-                    "sks": _norm(item.get("sks", row.get("sks", ""))),
-                    "kelas": _norm(item.get("kelas", row.get("kelas", ""))),
-                    "dosen": _norm(item.get("dosen", row.get("dosen", ""))),
-                    "kode": _norm(item.get("kode", row.get("kode", ""))),
-                }
-
-                before_conf, _ = _row_confidence(row)
-                row.update({k: v for k, v in updates.items() if v != ""})
-                after_conf, after_issues = _row_confidence(row)
-                row["_confidence"] = after_conf
-                row["_issues"] = after_issues
-                if after_conf > before_conf:
-                    repaired += 1
+            cached = cache.get_many(list(keys.values()))
         except Exception as e:
-            logger.warning(" Hybrid LLM repair batch gagal: %s", e)
+            logger.warning(" REPAIR_CACHE lookup gagal, bypass: %s", e)
+            cached = {}
+
+    misses: List[Tuple[int, Dict[str, Any], List[str], float]] = []
+    cache_hits = 0
+    for cand in candidates:
+        fix = cached.get(keys[cand[0]])
+        if fix is None:
+            misses.append(cand)
+            continue
+        cache_hits += 1
+        if fix:
+            repaired += _apply_repair_items(rows, [dict(fix, idx=cand[0])])
 
-    return rows, {
+    stats: Dict[str, Any] = {
         "enabled": True,
         "checked": len(rows),
         "candidates": len(candidates),
         "repaired": repaired,
         "run_id": run_id,
+        "cache_hits": cache_hits,
+        "cache_misses": len(misses),
+        "batches": [],
+        "timed_out": 0,
+        "latency_ms_max": 0.0,
     }
+    if not misses:
+        if cache is not None:
+            cache.close()
+        return rows, stats
+
+    batches = [misses[i:i + batch_size] for i in range(0, len(misses), batch_size)]
+
+    pool = ThreadPoolExecutor(max_workers=min(concurrency, len(batches)), thread_name_prefix="ingest-repair")
+    try:
+        futures = [pool.submit(_invoke_repair_batch, llm, _repair_prompt(b, source, run_id)) for b in batches]
+        wait(futures, timeout=deadline_s if deadline_s > 0 else None)
+    finally:
+        # batch yang belum jalan dibatalkan; yang sedang jalan dibiarkan selesai sendiri
+        # (dibatasi INGEST_REPAIR_TIMEOUT) dan hasilnya diabaikan
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    batch_stats: List[Dict[str, Any]] = []
+    fresh: List[Tuple[str, Dict[str, Any]]] = []
+    for n, (batch, fut) in enumerate(zip(batches, futures)):
+        info: Dict[str, Any] = {"batch": n, "rows": len(batch), "status": "ok", "latency_ms": None}
+        if not fut.done() or fut.cancelled():
+            info["status"] = "timeout"
+            logger.warning(" Hybrid LLM repair batch=%s lewat deadline %.1fs, dilewati", n, deadline_s)
+        elif fut.exception() is not None:
+            info["status"] = "error"
+            logger.warning(" Hybrid LLM repair batch gagal: %s", fut.exception())
+        else:
+            parsed, latency_ms = fut.result()
+            info["latency_ms"] = latency_ms
+            if parsed is None:
+                # output bukan JSON array: jangan di-cache, coba lagi di ingest berikutnya
+                info["status"] = "empty"
+            else:
+                repaired += _apply_repair_items(rows, parsed)
+                # hanya row yang dijawab LLM (ada item dengan idx-nya) yang di-cache; item tanpa
+                # field perbaikan disimpan sebagai {} supaya tidak dikirim ulang. Row yang dilewati
+                # LLM tidak di-cache dan dicoba lagi di ingest berikutnya.
+                by_idx = {item.get("idx"): item for item in parsed if isinstance(item, dict)}
+                for i, _row, _iss, _c in batch:
+                    item = by_idx.get(i)
+                    if item is not None:
+                        fresh.append((keys[i], {k: item[k] for k in _REPAIR_FIELDS if k in item}))
+        batch_stats.append(info)
+
+    if cache is not None:
+        try:
+            cache.put_many(fresh)
+        except Exception as e:
+            logger.warning(" REPAIR_CACHE simpan gagal: %s", e)
+        finally:
+            cache.close()
+
+    latencies = [b["latency_ms"] for b in batch_stats if b["latency_ms"] is not None]
+    stats.update(
+        {
+            "repaired": repaired,
+            "batches": batch_stats,
+            "timed_out": sum(1 for b in batch_stats if b["status"] == "timeout"),
+            "latency_ms_max": max(latencies) if latencies else 0.0,
+        }
+    )
+    return rows, stats
+
+
+# =========================
+# Tabular (xlsx/xls/csv) streaming
+# =========================
+_SCHEDULE_SIGNAL_KEYS = {"hari", "jam", "sesi", "ruang", "kelas"}
+
+
+def _tabular_max_rows() -> int:
+    try:
+        return max(int(os.environ.get("INGEST_TABULAR_MAX_ROWS", "20000")), 1)
+    except Exception:
+        return 20000
+
+
+def _parse_tabular(file_path: str, ext: str) -> Tuple[str, List[str], ScheduleTable, List[str]]:
+    """
+    Baca spreadsheet baris demi baris (semua sheet), petakan header lewat _canonical_header,
+    dan bentuk row chunk `CSV_ROW` seperti jalur jadwal PDF. Yang ditahan di memori hanya
+    teks row chunk (dibatasi INGEST_TABULAR_MAX_ROWS) dan schedule_rows (dibatasi
+    _MAX_SCHEDULE_ROWS); text_content hanya ringkasan per sheet.
+
+    Return: (text_content, detected_columns, schedule_rows, row_chunks)
+    """
+    max_rows = _tabular_max_rows()
+    text_parts: List[str] = []
+    detected_columns: List[str] = []
+    schedule_rows = ScheduleTable()
+    row_chunks: List[str] = []
+    total = 0
+
+    for sheet, rows in iter_tabular_sheets(file_path, ext):
+        state: Dict[str, Any] = {"header": None, "keys": [], "schedule": False, "rows": 0}
+
+        def _set_header(header: List[str], before: List[List[str]]) -> None:
+            mapping = _canonical_columns_from_header(header)
+            state["header"] = header
+            state["keys"] = [mapping.get(i) or header[i] or f"kolom_{i + 1}" for i in range(len(header))]
+            state["schedule"] = bool(_SCHEDULE_SIGNAL_KEYS & set(mapping.values()))
+            for name in header:
+                if name and name not in detected_columns:
+                    detected_columns.append(name)
+            # baris judul di atas header (mis. "JADWAL SEMESTER GANJIL") ikut sebagai teks
+            text_parts.extend(_row_to_text(r) for r in before)
+            label = f"[SHEET {sheet}]" if sheet else "[TABEL]"
+            text_parts.append(f"{label} kolom: " + " | ".join(h for h in header if h))
+
+        def _add_row(data: List[str]) -> None:
+            nonlocal total
+            if total >= max_rows or data == state["header"] or _is_noise_header_repeat_row(data):
+                return
+            keys = state["keys"]
+            record: Dict[str, Any] = {}
+            for i, val in enumerate(data):
+                key = keys[i] if i < len(keys) else f"kolom_{i + 1}"
+                if val and key not in record:
+                    record[key] = val
+            if not record:
+                return
+            total += 1
+            state["rows"] += 1
+            if len(record) >= 2 or len(keys) == 1:
+                cells = [f"sheet={sheet}"] if sheet else []
+                cells.extend(f"{k}={record[k]}" for k in _SCHEDULE_CANON_ORDER if k in record)
+                cells.extend(f"{k}={v}" for k, v in record.items() if k not in _SCHEDULE_CANON_ORDER)
+                row_chunks.append(f"CSV_ROW {total}: " + " | ".join(cells))
+            if state["schedule"] and len(schedule_rows) < _MAX_SCHEDULE_ROWS:
+                schedule_rows.append({k: v for k, v in record.items() if k in _SCHEDULE_CANON_ORDER})
+
+        # header = baris pertama (dari 10 baris non-kosong awal) yang mirip header jadwal;
+        # kalau tidak ada, baris non-kosong pertama
+        head: List[List[str]] = []
+        for raw in rows:
+            row = [_norm(c) for c in raw]
+            if not any(row):
+                continue
+            if state["header"] is None:
+                head.append(row)
+                if _looks_like_header_row(row):
+                    _set_header(row, head[:-1])
+                    head = []
+                elif len(head) >= 10:
+                    _set_header(head[0], [])
+                    for data in head[1:]:
+                        _add_row(data)
+                    head = []
+            else:
+                _add_row(row)
+            if total >= max_rows:
+                logger.warning(
+                    " Tabular %s: batas INGEST_TABULAR_MAX_ROWS=%s tercapai, sisa baris dilewati",
+                    os.path.basename(file_path),
+                    max_rows,
+                )
+                break
+
+        if state["header"] is None and head:
+            _set_header(head[0], [])
+            for data in head[1:]:
+                _add_row(data)
+        if state["header"] is not None:
+            text_parts.append(f"baris data: {state['rows']}")
+        if total >= max_rows:
+            break
+
+    logger.debug(" Tabular Parsed: %s baris data, kolom=%s", total, len(detected_columns))
+    return "\n".join(p for p in text_parts if p).strip(), detected_columns, schedule_rows, row_chunks
 
 
 # =========================
 # PDF extraction
 # =========================
 def _extract_pdf_tables(pdf: pdfplumber.PDF) -> Tuple[str, List[str], List[Dict[str, Any]]]:
+    return _merge_pdf_pages([extract_page_raw(page) for page in pdf.pages])
+
+
+def _merge_pdf_pages(pages_raw: List[PageRaw]) -> Tuple[str, List[str], ScheduleTable]:
     """
-    Return:
+    Gabungkan raw per halaman (urut halaman) menjadi:
     - text_from_tables: string gabungan tabel untuk RAG
     - detected_columns: list kolom hasil deteksi header tabel (unik)
-    - schedule_rows: list row ringkas jadwal (best-effort)
+    - schedule_rows: ScheduleTable row ringkas jadwal (best-effort)
+
+    Carry-forward hari/sesi/jam lintas halaman hanya dikerjakan di sini (sequential),
+    jadi hasilnya sama persis untuk ekstraksi raw sequential maupun paralel.
     """
     detected_columns: List[str] = []
-    schedule_rows: List[Dict[str, Any]] = []
+    schedule_rows = ScheduleTable()
     text_parts: List[str] = []
     carry_day = ""
     carry_sesi = ""
     carry_jam = ""
 
-    for page_idx, page in enumerate(pdf.pages, start=1):
-        # --- 1) extract tables ---
-        try:
-            tables = page.extract_tables() or []
-        except Exception:
-            tables = []
-
-        for table in tables:
+    for page_idx, (tables, page_text) in enumerate(pages_raw, start=1):
+        # --- 1) tables (raw dari extract_page_raw) ---
+        for table in tables or []:
             if not table:
                 continue
 
@@ -975,11 +1217,6 @@ def _extract_pdf_tables(pdf: pdfplumber.PDF) -> Tuple[str, List[str], List[Dict[
 
         # --- 3) fallback from page text (very important) ---
         # beberapa PDF tabelnya sulit, tapi textnya mengandung pola hari+jam
-        try:
-            page_text = (page.extract_text() or "").strip()
-        except Exception:
-            page_text = ""
-
         if page_text:
             # normalize
             t = _normalize_time_range(page_text)
@@ -1006,13 +1243,12 @@ def _extract_pdf_tables(pdf: pdfplumber.PDF) -> Tuple[str, List[str], List[Dict[
                     jam = _normalize_time_range(jam)
 
                     # simpan minimal fallback jika belum ada row identik
-                    key = (str(page_idx), day_found, jam)
-                    # dedup sederhana
-                    exists = False
-                    for r in schedule_rows[-60:]:
-                        if str(r.get("page")) == str(page_idx) and (r.get("hari") or "").lower() == day_found and (r.get("jam") or "") == jam:
-                            exists = True
-                            break
+                    # dedup sederhana (60 row terakhir)
+                    pages, days, jams = schedule_rows.column("page"), schedule_rows.column("hari"), schedule_rows.column("jam")
+                    exists = any(
+                        pages[i] == page_idx and jams[i] == jam and days[i].lower() == day_found
+                        for i in range(max(len(schedule_rows) - 60, 0), len(schedule_rows))
+                    )
                     if not exists:
                         schedule_rows.append({
                             "page": page_idx,
@@ -1028,19 +1264,18 @@ def _extract_pdf_tables(pdf: pdfplumber.PDF) -> Tuple[str, List[str], List[Dict[
                         })
 
     # --- Post-process schedule_rows: clean & dedup ---
-    out_rows: List[Dict[str, Any]] = []
+    # nilai di ScheduleTable sudah dinormalisasi spasi saat append, jadi tidak perlu _norm ulang
+    out_rows = ScheduleTable()
     seen = set()
-    for r in schedule_rows:
-        if not isinstance(r, dict):
-            continue
-        hari = _norm(r.get("hari", ""))
-        hari = _normalize_day_text(hari)
-        jam = _normalize_time_range(r.get("jam", ""))
-        kode = _norm(r.get("kode", ""))
-        mk = _norm(r.get("mata_kuliah", ""))
-        kelas = _norm(r.get("kelas", ""))
-        ruang = _norm(r.get("ruang", ""))
-        page = int(r.get("page", 0) or 0)
+    cols = {name: schedule_rows.column(name) for name in ("page", "hari", "jam", "kode", "mata_kuliah", "kelas", "ruang")}
+    for i in range(len(schedule_rows)):
+        hari = _normalize_day_text(cols["hari"][i])
+        jam = _normalize_time_range(cols["jam"][i])
+        kode = cols["kode"][i]
+        mk = cols["mata_kuliah"][i]
+        kelas = cols["kelas"][i]
+        ruang = cols["ruang"][i]
+        page = cols["page"][i]
 
         # normalisasi hari (kalau ada)
         hari_l = hari.lower()
@@ -1054,7 +1289,7 @@ def _extract_pdf_tables(pdf: pdfplumber.PDF) -> Tuple[str, List[str], List[Dict[
             continue
         seen.add(key)
 
-        r2 = dict(r)
+        r2 = schedule_rows.row_dict(i)
         r2["page"] = page
         if hari:
             r2["hari"] = hari
@@ -1065,7 +1300,235 @@ def _extract_pdf_tables(pdf: pdfplumber.PDF) -> Tuple[str, List[str], List[Dict[
     return "\n".join(text_parts).strip(), detected_columns, out_rows
 
 
-def process_document(doc_instance) -> bool:
+# =========================
+# Deterministic chunk IDs + incremental sync
+# =========================
+_INGEST_STATS: ContextVar[Optional[Dict[str, int]]] = ContextVar("ingest_chunk_stats", default=None)
+_BATCH_LISTENER: ContextVar[Optional[Callable[[int, int], None]]] = ContextVar("ingest_batch_listener", default=None)
+
+
+@contextmanager
+def collect_ingest_stats() -> Iterator[Dict[str, int]]:
+    """
+    Kumpulkan statistik sinkronisasi chunk (embedded/skipped/updated/deleted) dari semua
+    process_document() yang dijalankan di dalam blok ini (diakumulasi per dokumen).
+    """
+    stats: Dict[str, int] = {"embedded": 0, "skipped": 0, "updated": 0, "deleted": 0}
+    token = _INGEST_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _INGEST_STATS.reset(token)
+
+
+def _chunk_id(doc_id: str, payload: Dict[str, Any], seen: Dict[str, int]) -> str:
+    # id = doc_id + chunk_kind + hash isi; teks kembar di dokumen yang sama diberi suffix urutan
+    kind = str(payload.get("chunk_kind") or "text")
+    digest = hashlib.sha256(str(payload.get("text") or "").encode("utf-8")).hexdigest()[:24]
+    base = f"{doc_id}:{kind}:{digest}"
+    n = seen.get(base, 0)
+    seen[base] = n + 1
+    return base if n == 0 else f"{base}:{n}"
+
+
+def _chunk_ids(doc_id: str, payloads: List[Dict[str, Any]]) -> List[str]:
+    seen: Dict[str, int] = {}
+    return [_chunk_id(doc_id, payload, seen) for payload in payloads]
+
+
+@contextmanager
+def on_embed_batch(listener: Callable[[int, int], None]) -> Iterator[None]:
+    """
+    Daftarkan listener `listener(done, total)` yang dipanggil setiap satu batch chunk selesai
+    di-embed + ditulis (mis. update progress/heartbeat job ingest).
+    """
+    token = _BATCH_LISTENER.set(listener)
+    try:
+        yield
+    finally:
+        _BATCH_LISTENER.reset(token)
+
+
+def _embed_batch_size() -> int:
+    try:
+        return max(int(os.environ.get("RAG_EMBED_BATCH_SIZE", "64")), 1)
+    except Exception:
+        return 64
+
+
+def _chunk_metadata(base_meta: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    meta = dict(base_meta)
+    meta["chunk_kind"] = str(payload.get("chunk_kind") or "text")
+    if payload.get("page") is not None and str(payload.get("page")).strip():
+        try:
+            meta["page"] = int(payload.get("page"))
+        except Exception:
+            pass
+    section = str(payload.get("section") or "").strip()
+    if section:
+        meta["section"] = section
+    return meta
+
+
+def _meta_fingerprint(meta: Optional[Dict[str, Any]]) -> str:
+    raw = json.dumps(dict(meta or {}), sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _existing_chunk_fingerprints(col, user_id: str, doc_id: str, page_size: int) -> Dict[str, str]:
+    # metadata lama dibaca per halaman dan langsung diringkas jadi fingerprint, supaya
+    # metadata berat (schedule_rows) tidak ikut tertahan di memori untuk semua chunk
+    where = {"$and": [{"user_id": user_id}, {"doc_id": doc_id}]}
+    out: Dict[str, str] = {}
+    offset = 0
+    while True:
+        got = col.get(where=where, include=["metadatas"], limit=page_size, offset=offset) or {}
+        ids = got.get("ids") or []
+        for cid, meta in zip(ids, got.get("metadatas") or []):
+            out[cid] = _meta_fingerprint(meta)
+        if len(ids) < page_size:
+            return out
+        offset += len(ids)
+
+
+def _embed_and_store(vectorstore, col, texts: List[str], metas: List[Dict[str, Any]], ids: List[str], meter: StageMeter) -> None:
+    # embed dan tulis dipisah supaya durasinya tercatat sendiri-sendiri; vectorstore tanpa
+    # fungsi embedding/collection (mis. fake di test) tetap lewat add_texts
+    embedder = getattr(vectorstore, "embeddings", None) if col is not None else None
+    if embedder is None:
+        with meter.stage("embed"):
+            vectorstore.add_texts(texts=texts, metadatas=metas, ids=ids)
+        return
+    with meter.stage("embed"):
+        vectors = embedder.embed_documents(texts)
+    with meter.stage("store"):
+        col.upsert(ids=ids, embeddings=vectors, metadatas=metas, documents=texts)
+
+
+def _sync_chunks(
+    vectorstore,
+    *,
+    base_meta: Dict[str, Any],
+    payloads: Iterable[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    total: Optional[int] = None,
+    meter: Optional[StageMeter] = None,
+) -> Dict[str, int]:
+    """
+    Diff chunk baru terhadap isi Chroma untuk dokumen ini, diproses per batch
+    (RAG_EMBED_BATCH_SIZE) supaya teks, metadata, dan vektor yang dipegang sekaligus terbatas:
+    - id baru -> embed + simpan
+    - id sama, metadata beda -> update metadata saja (tanpa embed ulang), setelah semua batch berhasil
+    - id hilang (termasuk vector lama ber-id acak) -> hapus, setelah semua batch berhasil
+    Kalau satu batch gagal, chunk yang sudah ditambahkan di run ini dihapus lagi sehingga
+    isi lama dokumen (teks + metadata) tetap utuh.
+
+    `payloads` boleh berupa generator: batch berikutnya baru ditarik setelah batch sebelumnya
+    tertulis. `total` (perkiraan jumlah chunk) hanya dipakai untuk listener progress.
+    """
+    meter = meter_or_null(meter)
+    user_id = str(base_meta["user_id"])
+    doc_id = str(base_meta["doc_id"])
+    size = int(batch_size or _embed_batch_size())
+    if total is None and isinstance(payloads, Sequence):
+        total = len(payloads)
+    listener = _BATCH_LISTENER.get()
+    col = _get_collection(vectorstore)
+    with meter.stage("store"):
+        existing = _existing_chunk_fingerprints(col, user_id, doc_id, max(size, 256)) if col is not None else {}
+
+    stats = {"embedded": 0, "skipped": 0, "updated": 0, "deleted": 0, "batches": 0}
+    seen: Dict[str, int] = {}
+    wanted: set = set()
+    added: List[str] = []
+    # update metadata ditunda sampai semua batch berhasil, sama seperti hapus stale
+    pending_ids: List[str] = []
+    pending_metas: List[Dict[str, Any]] = []
+    done = 0
+    try:
+        for batch in batched(payloads, size):
+            ids = [_chunk_id(doc_id, payload, seen) for payload in batch]
+            wanted.update(ids)
+            metas = [_chunk_metadata(base_meta, payload) for payload in batch]
+            texts = [str(payload.get("text") or "") for payload in batch]
+            if col is None:
+                with meter.stage("embed"):
+                    vectorstore.add_texts(texts=texts, metadatas=metas)
+                stats["embedded"] += len(metas)
+            else:
+                new_idx = [i for i, cid in enumerate(ids) if cid not in existing]
+                changed = [
+                    i for i, cid in enumerate(ids)
+                    if cid in existing and existing[cid] != _meta_fingerprint(metas[i])
+                ]
+                pending_ids.extend(ids[i] for i in changed)
+                pending_metas.extend(metas[i] for i in changed)
+                if new_idx:
+                    batch_ids = [ids[i] for i in new_idx]
+                    _embed_and_store(
+                        vectorstore,
+                        col,
+                        [texts[i] for i in new_idx],
+                        [metas[i] for i in new_idx],
+                        batch_ids,
+                        meter,
+                    )
+                    added.extend(batch_ids)
+                stats["embedded"] += len(new_idx)
+                stats["skipped"] += len(metas) - len(new_idx)
+                stats["updated"] += len(changed)
+            stats["batches"] += 1
+            meter.sample_rss()
+            done += len(batch)
+            if listener is not None:
+                try:
+                    listener(done, max(int(total or 0), done))
+                except Exception:
+                    pass
+        with meter.stage("store"):
+            for start in range(0, len(pending_ids), max(size, 256)):
+                end = start + max(size, 256)
+                col.update(ids=pending_ids[start:end], metadatas=pending_metas[start:end])
+    except Exception:
+        if added:
+            try:
+                col.delete(ids=added)
+            except Exception as e:
+                logger.warning(" INGEST_SYNC cleanup gagal doc_id=%s added=%s err=%s", doc_id, len(added), e)
+        raise
+
+    stale = [cid for cid in existing if cid not in wanted]
+    with meter.stage("store"):
+        for start in range(0, len(stale), max(size, 256)):
+            col.delete(ids=stale[start:start + max(size, 256)])
+    stats["deleted"] = len(stale)
+    return stats
+
+
+@dataclass
+class ParsedDocument:
+    """Hasil tahap parse: teks + struktur tabel yang dipakai tahap chunk dan metadata."""
+
+    ext: str
+    text_content: str = ""
+    row_chunks: List[str] = field(default_factory=list)
+    detected_columns: Optional[List[str]] = None
+    schedule_rows: Optional[ScheduleTable] = None
+    semester_num: Optional[int] = None
+
+
+@dataclass
+class PreparedDocument:
+    """Hasil tahap parse + chunk: cukup untuk tahap embed + store."""
+
+    base_meta: Dict[str, Any]
+    # generator (jalur streaming process_document) atau list (dikirim antar proses)
+    payloads: Iterable[Dict[str, Any]]
+    # perkiraan jumlah chunk untuk progress embed
+    total: int
+
+
+def process_document(doc_instance, *, record_metric: bool = True) -> bool:
     """
     Membaca file PDF/Excel/CSV/MD/TXT, memecahnya, dan menyimpan ke ChromaDB
     dengan metadata:
@@ -1074,215 +1537,441 @@ def process_document(doc_instance) -> bool:
     - source, file_type
     - columns (schema) termasuk PDF
     - schedule_rows (khusus KRS/Jadwal; ringkas & dibatasi)
+
+    Pipeline bertahap parse -> chunk -> embed -> store; durasi tiap tahap, jumlah chunk,
+    ukuran, dan peak RSS dicatat ke IngestDocumentMetric (record_metric=False untuk eval).
     """
-    file_path = doc_instance.file.path
-    ext = file_path.split(".")[-1].lower()
-    text_content = ""
-    row_chunks: List[str] = []
+    return process_document_timed(doc_instance, record_metric=record_metric)[0]
 
+
+def process_document_timed(doc_instance, *, record_metric: bool = True) -> Tuple[bool, Dict[str, float]]:
+    """
+    Sama dengan process_document, tapi juga mengembalikan durasi per tahap (ms) yang dicatat
+    _finish_ingest (parse/chunk/embed/store + span seperti pdf_tables, plus `total`).
+    Dipakai rag_eval: trace "ingest" di sini menggantikan trace milik pemanggil.
+    """
+    meter = StageMeter()
+    report: Dict[str, Any] = {}
+    t0 = time.perf_counter()
+    with start_trace("ingest"):
+        ok = _process_document(doc_instance, meter, report)
+        stages = stage_breakdown()
+        if stages:
+            logger.info(
+                " INGEST_TRACE source=%s ok=%s %s",
+                getattr(doc_instance, "title", "-"),
+                ok,
+                format_breakdown(stages),
+            )
+    timings = _merge_stage_timings({}, stages, meter)
+    _finish_ingest(doc_instance, ok, report, timings, (time.perf_counter() - t0) * 1000.0, record_metric)
+    return ok, timings
+
+
+def prepare_document(doc_instance) -> Tuple[Optional["PreparedDocument"], Dict[str, Any]]:
+    """
+    Tahap parse + chunk saja (dipakai worker proses `reingest_docs --workers`, tanpa model
+    embedding). Payload dimaterialisasi jadi list agar bisa di-pickle ke proses utama;
+    report membawa durasi tahap untuk store_prepared_document.
+    """
+    meter = StageMeter()
+    report: Dict[str, Any] = {}
+    t0 = time.perf_counter()
+    prepared: Optional[PreparedDocument] = None
+    with start_trace("ingest"):
+        try:
+            prepared = _prepare_document(doc_instance, meter, report, materialize=True)
+        except Exception as e:
+            logger.error(" CRITICAL ERROR di ingest.py pada file %s: %s", doc_instance.title, str(e), exc_info=True)
+            report["error"] = repr(e)
+        stages = stage_breakdown()
+    report["stage_timings"] = _merge_stage_timings({}, stages, meter)
+    report["prepare_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+    report["peak_rss_mb"] = meter.peak_rss_mb
+    return prepared, report
+
+
+def store_prepared_document(
+    doc_instance,
+    prepared: Optional["PreparedDocument"],
+    report: Dict[str, Any],
+    *,
+    record_metric: bool = True,
+) -> bool:
+    """Tahap embed + store untuk hasil prepare_document, di proses yang memegang model embedding."""
+    report = dict(report)
+    timings = dict(report.pop("stage_timings", None) or {})
+    prepare_ms = float(report.pop("prepare_ms", 0.0) or 0.0)
+    meter = StageMeter()
+    ok = False
+    t0 = time.perf_counter()
+    with start_trace("ingest"):
+        if prepared is not None:
+            try:
+                ok = _store_document(doc_instance, prepared, meter, report)
+            except Exception as e:
+                logger.error(" CRITICAL ERROR di ingest.py pada file %s: %s", doc_instance.title, str(e), exc_info=True)
+                report["error"] = repr(e)
+        stages = stage_breakdown()
+    timings = _merge_stage_timings(timings, stages, meter)
+    _finish_ingest(doc_instance, ok, report, timings, prepare_ms + (time.perf_counter() - t0) * 1000.0, record_metric)
+    return ok
+
+
+def _merge_stage_timings(
+    timings: Dict[str, float], stages: Dict[str, float], meter: StageMeter
+) -> Dict[str, float]:
+    # span tracing (pdf_tables, llm_repair, ...) + tahap meter (parse/chunk/embed/store)
+    for source in (stages, meter.breakdown()):
+        for key, value in source.items():
+            if key != "total":
+                timings[key] = round(timings.get(key, 0.0) + value, 2)
+    return timings
+
+
+def _finish_ingest(
+    doc_instance,
+    ok: bool,
+    report: Dict[str, Any],
+    timings: Dict[str, float],
+    total_ms: float,
+    record_metric: bool,
+) -> None:
+    timings["total"] = round(total_ms, 2)
+    logger.info(
+        " INGEST_METRIC source=%s ok=%s chunks=%s bytes=%s %s",
+        getattr(doc_instance, "title", "-"),
+        ok,
+        report.get("chunks", 0),
+        report.get("bytes_in", 0),
+        format_breakdown({k: timings[k] for k in ("parse", "chunk", "embed", "store", "total") if k in timings}),
+    )
+    if record_metric:
+        record_ingest_metric(
+            user_id=getattr(getattr(doc_instance, "user", None), "id", None),
+            doc_id=getattr(doc_instance, "id", None),
+            file_name=str(getattr(doc_instance, "title", "") or ""),
+            ok=ok,
+            total_ms=total_ms,
+            stage_timings=timings,
+            **report,
+        )
+
+
+def _fill_semester(rows: ScheduleTable, semester_num: Optional[int]) -> None:
+    # row tanpa kolom semester (fallback page-text / tabel tanpa kolom SMT) ikut semester dokumen
+    if semester_num is None:
+        return
+    value = str(semester_num)
+    for i in range(len(rows)):
+        if not rows.has(i, "semester"):
+            rows.set(i, "semester", value)
+
+
+def _parse_pdf(doc_instance, file_path: str, semester_num: Optional[int]) -> ParsedDocument:
+    text_content = ""
+    row_chunks: List[str] = []
     detected_columns: Optional[List[str]] = None
-    schedule_rows: Optional[List[Dict[str, Any]]] = None
-    semester_num: Optional[int] = _extract_semester_from_text(getattr(doc_instance, "title", ""))
+    schedule_rows: Optional[ScheduleTable] = None
 
-    logger.info(" MULAI PARSING: %s (Type: %s)", doc_instance.title, ext)
+    with span("pdf_tables"):
+        pages_raw = load_pdf_pages(file_path, cache_dir=get_pdf_page_cache_dir())
 
-    try:
-        # =========================
-        # 1) PARSING
-        # =========================
-        if ext == "pdf":
-            with pdfplumber.open(file_path) as pdf:
-                table_text, pdf_columns, pdf_schedule_rows = _extract_pdf_tables(pdf)
-
-                if pdf_columns:
-                    detected_columns = pdf_columns
-
-                if pdf_schedule_rows:
-                    schedule_rows = pdf_schedule_rows
-                    schedule_rows, repair_stats = _repair_rows_with_llm(schedule_rows, doc_instance.title)
-                    if repair_stats.get("enabled"):
-                        logger.info(
-                            " HYBRID_REPAIR source=%s checked=%s candidates=%s repaired=%s run=%s",
-                            doc_instance.title,
-                            repair_stats.get("checked", 0),
-                            repair_stats.get("candidates", 0),
-                            repair_stats.get("repaired", 0),
-                            repair_stats.get("run_id", "-"),
-                        )
-                    row_chunks = _schedule_rows_to_row_chunks(schedule_rows)
-                    csv_repr, csv_rows, csv_cols = _schedule_rows_to_csv_text(schedule_rows)
-                    if csv_repr:
-                        text_content += "\n[CSV_CANONICAL]\n" + csv_repr + "\n"
-                        preview_lines = int(os.getenv("CSV_REVIEW_PREVIEW_LINES", "12") or 12)
-                        preview = _csv_preview(csv_repr, max_lines=max(3, preview_lines))
-                        logger.info(
-                            " CSV canonical review source=%s rows=%s cols=%s\n%s",
-                            doc_instance.title,
-                            csv_rows,
-                            csv_cols,
-                            preview,
-                        )
-                    # Simpan JSON canonical ringkas untuk retrieval dengan format terstruktur.
-                    json_preview_limit = int(os.getenv("JSON_CANONICAL_EMBED_ROWS", "300") or 300)
-                    if schedule_rows:
-                        try:
-                            json_blob = json.dumps(schedule_rows[:max(20, json_preview_limit)], ensure_ascii=True)
-                            text_content += "\n[JSON_CANONICAL]\n" + json_blob + "\n"
-                        except Exception:
-                            pass
-
-                if table_text:
-                    text_content += table_text + "\n"
-
-                # text biasa
-                for page in pdf.pages:
-                    t = page.extract_text() or ""
-                    t = t.strip()
-                    if t:
-                        text_content += t + "\n"
-                        if semester_num is None:
-                            semester_num = _extract_semester_from_text(t)
-
-            logger.debug(" PDF Parsed. columns=%s schedule_rows=%s",
-                         len(detected_columns or []), len(schedule_rows or []))
-
-            # OCR fallback (optional) jika text kosong
-            if not (text_content or "").strip():
-                try:
-                    from pdf2image import convert_from_path  # type: ignore
-                    import pytesseract  # type: ignore
-                    logger.warning(" PDF text kosong -> mencoba OCR fallback")
-                    images = convert_from_path(file_path, first_page=1, last_page=min(2, len(pdf.pages)))
-                    ocr_texts = []
-                    for img in images:
-                        ocr_texts.append(pytesseract.image_to_string(img))
-                    ocr_blob = "\n".join([t.strip() for t in ocr_texts if t and t.strip()])
-                    if ocr_blob:
-                        text_content += ocr_blob + "\n"
-                        if semester_num is None:
-                            semester_num = _extract_semester_from_text(ocr_blob)
-                except Exception as e:
-                    logger.warning(" OCR fallback gagal/tdk tersedia: %s", e)
-
-        elif ext in ["xlsx", "xls"]:
+    # PDF hasil scan (tanpa teks/tabel di semua halaman) -> OCR semua halaman, lalu
+    # hasilnya lewat merge/repair/chunking yang sama dengan PDF biasa
+    if pages_raw and not any(tables or (text or "").strip() for tables, text in pages_raw):
+        if (os.environ.get("PDF_OCR_ENABLED", "1") or "1").strip().lower() in {"1", "true", "yes", "on"}:
+            logger.warning(" PDF text kosong -> OCR fallback %s halaman", len(pages_raw))
             try:
-                df = pd.read_excel(file_path).fillna("")
-                detected_columns = [str(c).strip() for c in list(df.columns) if str(c).strip()]
-                text_content = df.to_markdown(index=False)
-                logger.debug(" Excel Parsed: %s baris data.", len(df))
+                with span("ocr"):
+                    pages_raw, ocr_stats = load_ocr_pages(
+                        file_path, len(pages_raw), cache_dir=get_pdf_page_cache_dir()
+                    )
+                logger.info(
+                    " OCR_FALLBACK source=%s pages=%s cached=%s ocr=%s timeout=%s error=%s skipped=%s",
+                    doc_instance.title,
+                    ocr_stats.get("pages", 0),
+                    ocr_stats.get("cached", 0),
+                    ocr_stats.get("ocr", 0),
+                    ocr_stats.get("timeout", 0),
+                    ocr_stats.get("error", 0),
+                    ocr_stats.get("skipped", 0),
+                )
             except Exception as e:
-                logger.error(" Gagal baca Excel %s: %s", doc_instance.title, e, exc_info=True)
-                return False
+                logger.warning(" OCR fallback gagal/tdk tersedia: %s", e)
+
+    with span("pdf_merge"):
+        table_text, pdf_columns, pdf_schedule_rows = _merge_pdf_pages(pages_raw)
+
+    if pdf_columns:
+        detected_columns = pdf_columns
+
+    if semester_num is None:
+        for _tables, t in pages_raw:
+            semester_num = _extract_semester_from_text(t) if t else None
+            if semester_num is not None:
+                break
+
+    if pdf_schedule_rows:
+        schedule_rows = pdf_schedule_rows
+        with span("llm_repair"):
+            schedule_rows, repair_stats = _repair_rows_with_llm(schedule_rows, doc_instance.title)
+        if repair_stats.get("enabled"):
+            logger.info(
+                " HYBRID_REPAIR source=%s checked=%s candidates=%s repaired=%s run=%s cache_hits=%s cache_misses=%s "
+                "batches=%s timed_out=%s latency_ms=%s",
+                doc_instance.title,
+                repair_stats.get("checked", 0),
+                repair_stats.get("candidates", 0),
+                repair_stats.get("repaired", 0),
+                repair_stats.get("run_id", "-"),
+                repair_stats.get("cache_hits", 0),
+                repair_stats.get("cache_misses", 0),
+                len(repair_stats.get("batches") or []),
+                repair_stats.get("timed_out", 0),
+                ",".join(
+                    "-" if b.get("latency_ms") is None else f"{b['latency_ms']:.0f}"
+                    for b in repair_stats.get("batches") or []
+                ) or "-",
+            )
+        # Simpan JSON canonical ringkas untuk retrieval dengan format terstruktur.
+        # Teks yang di-embed tetap list of dict (nama field ada di tiap row) supaya potongan
+        # splitter di tengah blok masih bermakna; format compact hanya untuk metadata.
+        json_preview_limit = int(os.getenv("JSON_CANONICAL_EMBED_ROWS", "300") or 300)
+        with span("canonical_rows"):
+            row_chunks = _schedule_rows_to_row_chunks(schedule_rows)
+            csv_repr, csv_rows, csv_cols = _schedule_rows_to_csv_text(schedule_rows)
+            json_blob = json.dumps(schedule_rows.to_dicts(max(20, json_preview_limit)), ensure_ascii=True)
+        if csv_repr:
+            text_content += "\n[CSV_CANONICAL]\n" + csv_repr + "\n"
+            preview_lines = int(os.getenv("CSV_REVIEW_PREVIEW_LINES", "12") or 12)
+            preview = _csv_preview(csv_repr, max_lines=max(3, preview_lines))
+            logger.info(
+                " CSV canonical review source=%s rows=%s cols=%s\n%s",
+                doc_instance.title,
+                csv_rows,
+                csv_cols,
+                preview,
+            )
+        text_content += "\n[JSON_CANONICAL]\n" + json_blob + "\n"
+
+    if table_text:
+        text_content += table_text + "\n"
+
+    # text biasa (sudah diekstrak bersama tabel per halaman)
+    with span("pdf_text"):
+        for _tables, t in pages_raw:
+            if t:
+                text_content += t + "\n"
+
+    logger.debug(" PDF Parsed. columns=%s schedule_rows=%s",
+                 len(detected_columns or []), len(schedule_rows or []))
+
+    return ParsedDocument(
+        ext="pdf",
+        text_content=text_content,
+        row_chunks=row_chunks,
+        detected_columns=detected_columns,
+        schedule_rows=schedule_rows,
+        semester_num=semester_num,
+    )
+
+
+def _parse_document(doc_instance, file_path: str, ext: str) -> Optional[ParsedDocument]:
+    """Tahap parse. None = tipe tidak didukung / file tabel gagal dibaca."""
+    semester_num = _extract_semester_from_text(getattr(doc_instance, "title", ""))
+
+    if ext == "pdf":
+        return _parse_pdf(doc_instance, file_path, semester_num)
+
+    if ext in ["xlsx", "xls", "csv"]:
+        try:
+            with span("tabular"):
+                text_content, tab_columns, tab_rows, row_chunks = _parse_tabular(file_path, ext)
+        except Exception as e:
+            logger.error(" Gagal baca tabel %s: %s", doc_instance.title, e, exc_info=True)
+            return None
+        return ParsedDocument(
+            ext=ext,
+            text_content=text_content,
+            row_chunks=row_chunks,
+            detected_columns=tab_columns or None,
+            schedule_rows=tab_rows or None,
+            semester_num=semester_num,
+        )
+
+    if ext in ["md", "txt"]:
+        with open(file_path, "r", encoding="utf-8") as f:
+            text_content = f.read()
+        logger.debug(" Text Parsed.")
+        return ParsedDocument(ext=ext, text_content=text_content, semester_num=semester_num)
+
+    logger.warning(" Tipe file tidak didukung: %s", ext)
+    return None
 
-        elif ext == "csv":
-            try:
-                df = pd.read_csv(file_path)
-            except Exception as e_comma:
-                logger.warning(" Gagal baca CSV pakai koma, mencoba titik-koma... (%s)", e_comma)
-                try:
-                    df = pd.read_csv(file_path, sep=";")
-                except Exception as e_semi:
-                    logger.warning(" Gagal baca CSV pakai titik-koma, mencoba encoding latin-1... (%s)", e_semi)
-                    try:
-                        df = pd.read_csv(file_path, sep=None, engine="python", encoding="latin-1")
-                    except Exception as e_final:
-                        logger.error(" CSV GAGAL TOTAL: %s. Error: %s", doc_instance.title, e_final, exc_info=True)
-                        return False
-
-            df = df.fillna("")
-            detected_columns = [str(c).strip() for c in list(df.columns) if str(c).strip()]
-            text_content = df.to_markdown(index=False)
-            logger.debug(" CSV Parsed: %s baris data.", len(df))
-
-        elif ext in ["md", "txt"]:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text_content = f.read()
-            logger.debug(" Text Parsed.")
-
-        else:
-            logger.warning(" Tipe file tidak didukung: %s", ext)
-            return False
 
-        if not (text_content or "").strip():
-            logger.warning(" FILE KOSONG: %s tidak mengandung teks yang bisa dibaca.", doc_instance.title)
-            return False
+def _document_meta(doc_instance, parsed: ParsedDocument, doc_type: str) -> Dict[str, Any]:
+    base_meta: Dict[str, Any] = {
+        "user_id": str(doc_instance.user.id),
+        "doc_id": str(doc_instance.id),
+        "source": doc_instance.title,
+        "file_type": parsed.ext,
+    }
 
-        doc_type = _detect_doc_type(detected_columns, schedule_rows)
-
-        # =========================
-        # 2) CHUNKING
-        # =========================
-        chunk_payloads_all = _build_chunk_payloads(
-            doc_type=doc_type,
-            text_content=text_content,
-            row_chunks=row_chunks,
-            schedule_rows=schedule_rows,
-        )
-        chunk_payloads = [x for x in chunk_payloads_all if str(x.get("text") or "").strip()]
-        chunks = [str(x.get("text") or "") for x in chunk_payloads]
-
-        if not chunk_payloads:
-            logger.warning(" CHUNKING GAGAL: Tidak ada potongan teks untuk %s.", doc_instance.title)
-            return False
-
-        # =========================
-        # 3) EMBEDDING & STORAGE
-        # =========================
-        vectorstore = get_vectorstore()
-
-        base_meta: Dict[str, Any] = {
-            "user_id": str(doc_instance.user.id),
-            "doc_id": str(doc_instance.id),          
-            "source": doc_instance.title,
-            "file_type": ext,
-        }
-
-        if detected_columns:
-            # Chroma metadata hanya menerima primitive -> simpan sebagai JSON string
-            base_meta["columns"] = json.dumps(detected_columns, ensure_ascii=True)
-
-        if schedule_rows:
-            if semester_num is not None:
-                for r in schedule_rows:
-                    if isinstance(r, dict) and "semester" not in r:
-                        r["semester"] = str(semester_num)
-            # simpan lebih banyak agar dokumen jadwal besar tidak banyak terpotong.
-            base_meta["schedule_rows"] = json.dumps(schedule_rows[:1200], ensure_ascii=True)
-            # Tandai mode hybrid agar mudah audit hasil ingest.
-            hybrid_enabled = (os.environ.get("PDF_HYBRID_LLM_REPAIR", "1") or "1").strip() in {"1", "true", "yes"}
-            base_meta["hybrid_repair"] = "on" if hybrid_enabled else "off"
-
-        if semester_num is not None:
-            base_meta["semester"] = int(semester_num)
-
-        base_meta["doc_type"] = doc_type
-        if row_chunks:
-            base_meta["table_format"] = "csv_canonical"
-        chunk_profile_enabled = (os.environ.get("RAG_DOC_CHUNK_PROFILE", "1") or "1").strip().lower() in {"1", "true", "yes"}
-        base_meta["chunk_profile"] = "on" if chunk_profile_enabled else "off"
-
-        metadatas: List[Dict[str, Any]] = []
-        for payload in chunk_payloads:
-            meta = dict(base_meta)
-            meta["chunk_kind"] = str(payload.get("chunk_kind") or "text")
-            if payload.get("page") is not None and str(payload.get("page")).strip():
-                try:
-                    meta["page"] = int(payload.get("page"))
-                except Exception:
-                    pass
-            section = str(payload.get("section") or "").strip()
-            if section:
-                meta["section"] = section
-            metadatas.append(meta)
-
-        logger.debug(" Menyimpan ke ChromaDB... chunks=%s cols=%s schedule_rows=%s",
-                     len(chunks), len(detected_columns or []), len(schedule_rows or []))
+    if parsed.detected_columns:
+        # Chroma metadata hanya menerima primitive -> simpan sebagai JSON string
+        base_meta["columns"] = json.dumps(parsed.detected_columns, ensure_ascii=True)
 
-        vectorstore.add_texts(texts=chunks, metadatas=metadatas)
+    schedule_rows = parsed.schedule_rows
+    if schedule_rows:
+        _fill_semester(schedule_rows, parsed.semester_num)
+        # simpan lebih banyak agar dokumen jadwal besar tidak banyak terpotong;
+        # format compact (ScheduleTable.encode), dibaca dengan schedule_table.decode_rows.
+        base_meta["schedule_rows"] = schedule_rows.encode(1200)[0]
+        # Tandai mode hybrid agar mudah audit hasil ingest.
+        hybrid_enabled = (os.environ.get("PDF_HYBRID_LLM_REPAIR", "1") or "1").strip() in {"1", "true", "yes"}
+        base_meta["hybrid_repair"] = "on" if hybrid_enabled else "off"
+
+    if parsed.semester_num is not None:
+        base_meta["semester"] = int(parsed.semester_num)
+
+    base_meta["doc_type"] = doc_type
+    if parsed.row_chunks:
+        base_meta["table_format"] = "csv_canonical"
+    chunk_profile_enabled = (os.environ.get("RAG_DOC_CHUNK_PROFILE", "1") or "1").strip().lower() in {"1", "true", "yes"}
+    base_meta["chunk_profile"] = "on" if chunk_profile_enabled else "off"
+    return base_meta
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return int(os.path.getsize(file_path))
+    except OSError:
+        return 0
 
-        logger.info(" INGEST SELESAI: %s berhasil masuk Knowledge Base.", doc_instance.title)
-        return True
 
+def _process_document(doc_instance, meter: StageMeter, report: Dict[str, Any]) -> bool:
+    try:
+        prepared = _prepare_document(doc_instance, meter, report)
+        if prepared is None:
+            return False
+        return _store_document(doc_instance, prepared, meter, report)
     except Exception as e:
         logger.error(" CRITICAL ERROR di ingest.py pada file %s: %s", doc_instance.title, str(e), exc_info=True)
+        report["error"] = repr(e)
         return False
+
+
+def _prepare_document(
+    doc_instance,
+    meter: StageMeter,
+    report: Dict[str, Any],
+    *,
+    materialize: bool = False,
+) -> Optional[PreparedDocument]:
+    file_path = doc_instance.file.path
+    ext = file_path.split(".")[-1].lower()
+    report.update({"file_type": ext, "bytes_in": _file_size(file_path)})
+
+    logger.info(" MULAI PARSING: %s (Type: %s)", doc_instance.title, ext)
+
+    # =========================
+    # 1) PARSE
+    # =========================
+    with meter.stage("parse"):
+        parsed = _parse_document(doc_instance, file_path, ext)
+    if parsed is None:
+        return None
+    report["text_chars"] = len(parsed.text_content or "")
+    meter.sample_rss()
+
+    if not (parsed.text_content or "").strip():
+        logger.warning(" FILE KOSONG: %s tidak mengandung teks yang bisa dibaca.", doc_instance.title)
+        return None
+
+    doc_type = _detect_doc_type(parsed.detected_columns, parsed.schedule_rows)
+
+    # =========================
+    # 2) CHUNK
+    # =========================
+    # Chunk keluar dari generator dan ditarik per batch oleh _sync_chunks, jadi
+    # pemecahan teks, embedding, dan penulisan berjalan bergantian (backpressure).
+    report["chunk_bytes"] = 0
+
+    def _tally(payloads: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for payload in payloads:
+            report["chunk_bytes"] += len(payload["text"].encode("utf-8"))
+            yield payload
+
+    chunks = meter.iterate(
+        "chunk",
+        _iter_chunk_payloads(
+            doc_type=doc_type,
+            text_content=parsed.text_content,
+            row_chunks=parsed.row_chunks,
+            schedule_rows=parsed.schedule_rows,
+        ),
+    )
+    with span("chunking"):
+        first = next(chunks, None)
+    if first is None:
+        logger.warning(" CHUNKING GAGAL: Tidak ada potongan teks untuk %s.", doc_instance.title)
+        return None
+
+    base_meta = _document_meta(doc_instance, parsed, doc_type)
+    logger.debug(" Menyimpan ke ChromaDB... cols=%s schedule_rows=%s",
+                 len(parsed.detected_columns or []), len(parsed.schedule_rows or []))
+
+    payloads: Iterable[Dict[str, Any]] = _tally(itertools.chain([first], chunks))
+    total = _estimate_chunk_count(doc_type=doc_type, text_content=parsed.text_content, row_chunks=parsed.row_chunks)
+    if materialize:
+        with span("chunking"):
+            payloads = list(payloads)
+        total = len(payloads)
+        meter.sample_rss()
+        report["chunks"] = total
+    return PreparedDocument(base_meta=base_meta, payloads=payloads, total=total)
+
+
+def _store_document(doc_instance, prepared: PreparedDocument, meter: StageMeter, report: Dict[str, Any]) -> bool:
+    # =========================
+    # 3) EMBED + STORE
+    # =========================
+    vectorstore = get_vectorstore(user_id=doc_instance.user_id)
+    with span("embed_store"):
+        sync = _sync_chunks(
+            vectorstore,
+            base_meta=prepared.base_meta,
+            payloads=prepared.payloads,
+            total=prepared.total,
+            meter=meter,
+        )
+    collector = _INGEST_STATS.get()
+    if collector is not None:
+        for key in ("embedded", "skipped", "updated", "deleted"):
+            collector[key] = collector.get(key, 0) + int(sync.get(key, 0))
+
+    # peak tahap prepare bisa datang dari proses worker (report), tahap store dari meter ini
+    peaks = [p for p in (report.get("peak_rss_mb"), meter.peak_rss_mb) if p is not None]
+    peak_rss = max(peaks) if peaks else None
+    n_chunks = meter.items.get("chunk") or int(report.get("chunks", 0) or 0)
+    report.update({key: sync[key] for key in ("embedded", "skipped", "updated", "deleted", "batches")})
+    report["chunks"] = n_chunks
+    report["peak_rss_mb"] = peak_rss
+    logger.info(
+        " INGEST_SYNC source=%s chunks=%s embedded=%s skipped=%s updated=%s deleted=%s batches=%s peak_rss_mb=%s",
+        doc_instance.title,
+        n_chunks,
+        sync["embedded"],
+        sync["skipped"],
+        sync["updated"],
+        sync["deleted"],
+        sync["batches"],
+        peak_rss if peak_rss is not None else "-",
+    )
+    logger.info(" INGEST SELESAI: %s berhasil masuk Knowledge Base.", doc_instance.title)
+    try:
+        index_document_title(doc_instance.user.id, doc_instance.id, doc_instance.title)
+    except Exception:
+        pass
+    return True
@@ -0,0 +1,532 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Exact-search vector backend (memmap int8 + rescore)
+# =========================
+# Alternatif Chroma untuk korpus per user yang kecil (ribuan chunk): brute-force dot product
+# di matrix kontigu lebih murah daripada HNSW + filter metadata SQLite. Per collection (= per user):
+#   codes.<gen>.i8     N x dim int8, dikuantisasi per row (scale = max|x| / 127)
+#   rowinfo.<gen>.f32  N x 2 float32: (scale, ||x||^2)
+#   vectors.<gen>.f32  N x dim float32 asli, hanya dibaca untuk rescore kandidat teratas
+#   index.sqlite3      id -> slot, dokumen, metadata JSON, + state (dim, gen, next_slot, version)
+# Slot hanya ditambah di ujung (upsert = slot baru + slot lama jadi mati), jadi pembaca tidak
+# pernah melihat row yang sedang ditulis. Compaction menulis generasi file baru lalu commit;
+# memmap lama tetap valid untuk pembaca yang masih memegangnya.
+# Jarak yang dikembalikan = squared L2 (sama dengan default collection Chroma), jadi skor di
+# retrieval tidak berubah maknanya.
+
+_QUANT_MAX = 127.0
+_SCAN_BLOCK = 4096
+_SQL_BATCH = 500
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+
+
+def quantize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """int8 simetris per row; return (codes, scale) dengan x ≈ codes * scale."""
+    v = np.asarray(vectors, dtype=np.float32)
+    scale = np.abs(v).max(axis=1) / _QUANT_MAX
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(v / scale[:, None]), -_QUANT_MAX, _QUANT_MAX).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+# ---------- where filter (subset sintaks Chroma) ----------
+def _cmp(column: np.ndarray, fn) -> np.ndarray:
+    def safe(v):
+        try:
+            return v is not None and bool(fn(v))
+        except TypeError:
+            return False
+
+    return np.fromiter((safe(v) for v in column), dtype=bool, count=len(column))
+
+
+def _cond_mask(column: np.ndarray, cond: Any) -> np.ndarray:
+    if not isinstance(cond, dict):
+        cond = {"$eq": cond}
+    mask = np.ones(len(column), dtype=bool)
+    for op, value in cond.items():
+        if op == "$eq":
+            mask &= _cmp(column, lambda v, x=value: v == x)
+        elif op == "$ne":
+            mask &= ~_cmp(column, lambda v, x=value: v == x)
+        elif op == "$in":
+            allowed = set(value or [])
+            mask &= _cmp(column, lambda v, s=allowed: v in s)
+        elif op == "$nin":
+            banned = set(value or [])
+            mask &= ~_cmp(column, lambda v, s=banned: v in s)
+        elif op == "$gt":
+            mask &= _cmp(column, lambda v, x=value: v > x)
+        elif op == "$gte":
+            mask &= _cmp(column, lambda v, x=value: v >= x)
+        elif op == "$lt":
+            mask &= _cmp(column, lambda v, x=value: v < x)
+        elif op == "$lte":
+            mask &= _cmp(column, lambda v, x=value: v <= x)
+        else:
+            raise ValueError(f"Operator filter tidak didukung: {op}")
+    return mask
+
+
+@dataclass
+class _Snapshot:
+    epoch: int
+    version: int
+    gen: int
+    dim: int
+    slots: np.ndarray
+    ids: List[str]
+    metadatas: List[Dict[str, Any]]
+    codes: Optional[np.ndarray] = None
+    rowinfo: Optional[np.ndarray] = None
+    vectors: Optional[np.ndarray] = None
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def column(self, key: str) -> np.ndarray:
+        col = self.columns.get(key)
+        if col is None:
+            col = np.empty(len(self.metadatas), dtype=object)
+            col[:] = [m.get(key) for m in self.metadatas]
+            self.columns[key] = col
+        return col
+
+    def where_mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        mask = np.ones(len(self.slots), dtype=bool)
+        for key, cond in (where or {}).items():
+            if key == "$and":
+                for sub in cond or []:
+                    mask &= self.where_mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(len(self.slots), dtype=bool)
+                for sub in cond or []:
+                    any_mask |= self.where_mask(sub)
+                mask &= any_mask
+            else:
+                mask &= _cond_mask(self.column(key), cond)
+        return mask
+
+
+# snapshot dibagi antar instance dalam satu proses (get_vectorstore dipanggil per request)
+_SNAPSHOTS: Dict[str, _Snapshot] = {}
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+class MemmapCollection:
+    """Subset API collection Chroma yang dipakai ingest/vector_ops: get/upsert/update/delete/count."""
+
+    def __init__(self, directory: str, name: str):
+        self.dir = directory
+        self.name = name
+        self.metadata = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # ---------- storage ----------
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.dir, exist_ok=True)
+            db = sqlite3.connect(
+                os.path.join(self.dir, "index.sqlite3"),
+                timeout=30.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                "id TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, document TEXT, metadata TEXT NOT NULL)"
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # epoch membedakan collection yang di-drop lalu dibuat ulang (version mulai dari 0 lagi)
+            db.execute("INSERT OR IGNORE INTO state (key, value) VALUES ('epoch', ?)", (random.getrandbits(31),))
+            self._db = db
+        return self._db
+
+    def _state(self, db: sqlite3.Connection) -> Dict[str, int]:
+        state = {"dim": 0, "gen": 0, "next_slot": 0, "version": 0, "dead": 0, "epoch": 0}
+        state.update({k: int(v) for k, v in db.execute("SELECT key, value FROM state")})
+        return state
+
+    def _save_state(self, db: sqlite3.Connection, state: Dict[str, int]) -> None:
+        db.executemany("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", list(state.items()))
+
+    def _path(self, kind: str, gen: int) -> str:
+        ext = "i8" if kind == "codes" else "f32"
+        return os.path.join(self.dir, f"{kind}.{gen}.{ext}")
+
+    def _write_rows(self, gen: int, start_slot: int, dim: int, vectors: np.ndarray) -> None:
+        codes, scale = quantize_rows(vectors)
+        rowinfo = np.stack([scale, np.einsum("ij,ij->i", vectors, vectors)], axis=1).astype(np.float32)
+        for kind, arr, row_bytes in (
+            ("codes", codes, dim),
+            ("rowinfo", rowinfo, 8),
+            ("vectors", vectors, dim * 4),
+        ):
+            path = self._path(kind, gen)
+            with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+                # sisa tulisan dari transaksi yang gagal (di luar next_slot) ditimpa
+                f.seek(start_slot * row_bytes)
+                f.write(np.ascontiguousarray(arr).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _snapshot(self) -> _Snapshot:
+        db = self._connect()
+        with self._lock:
+            # state + rows dibaca dalam satu transaksi baca supaya konsisten dengan generasi file
+            db.execute("BEGIN")
+            try:
+                state = self._state(db)
+                with _SNAPSHOT_LOCK:
+                    snap = _SNAPSHOTS.get(self.dir)
+                if snap is not None and (snap.epoch, snap.version) == (state["epoch"], state["version"]):
+                    return snap
+                rows = db.execute("SELECT slot, id, metadata FROM rows ORDER BY slot").fetchall()
+            finally:
+                db.execute("COMMIT")
+        snap = _Snapshot(
+            epoch=state["epoch"],
+            version=state["version"],
+            gen=state["gen"],
+            dim=state["dim"],
+            slots=np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+            ids=[r[1] for r in rows],
+            metadatas=[json.loads(r[2]) for r in rows],
+        )
+        if rows and snap.dim:
+            n_rows = int(snap.slots[-1]) + 1
+            snap.codes = np.memmap(self._path("codes", snap.gen), dtype=np.int8, mode="r", shape=(n_rows, snap.dim))
+            snap.rowinfo = np.memmap(self._path("rowinfo", snap.gen), dtype=np.float32, mode="r", shape=(n_rows, 2))
+            snap.vectors = np.memmap(self._path("vectors", snap.gen), dtype=np.float32, mode="r", shape=(n_rows, snap.dim))
+        with _SNAPSHOT_LOCK:
+            _SNAPSHOTS[self.dir] = snap
+        return snap
+
+    # ---------- write ----------
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Any,
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+        documents: Optional[Sequence[Optional[str]]] = None,
+    ) -> None:
+        ids = [str(x) for x in ids]
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        metadatas = list(metadatas or [None] * len(ids))
+        documents = list(documents or [None] * len(ids))
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                state = self._state(db)
+                if state["dim"] == 0:
+                    state["dim"] = int(vectors.shape[1])
+                elif vectors.shape[1] != state["dim"]:
+                    raise ValueError(f"Dimensi embedding {vectors.shape[1]} != {state['dim']}")
+                replaced = self._delete_ids(db, ids)
+                start = state["next_slot"]
+                self._write_rows(state["gen"], start, state["dim"], vectors)
+                db.executemany(
+                    "INSERT INTO rows (id, slot, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (vid, start + i, documents[i], json.dumps(metadatas[i] or {}, ensure_ascii=False))
+                        for i, vid in enumerate(ids)
+                    ],
+                )
+                state["next_slot"] = start + len(ids)
+                state["dead"] += replaced
+                state["version"] += 1
+                self._save_state(db, state)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    add = upsert
+
+    def update(
+        self,
+        ids: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        documents: Optional[Sequence[str]] = None,
+        embeddings: Any = None,
+    ) -> None:
+        ids = [str(x) for x in ids]
+        if embeddings is not None:
+            current = self.get(ids=ids, include=["metadatas", "documents"])
+            by_id = {vid: i for i, vid in enumerate(current["ids"])}
+            metas = [
+                (metadatas[i] if metadatas is not None else current["metadatas"][by_id[vid]]) for i, vid in enumerate(ids)
+            ]
+            docs = [
+                (documents[i] if documents is not None else current["documents"][by_id[vid]]) for i, vid in enumerate(ids)
+            ]
+            self.upsert(ids, embeddings, metas, docs)
+            return
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                for i, vid in enumerate(ids):
+                    if metadatas is not None:
+                        db.execute("UPDATE rows SET metadata = ? WHERE id = ?", (json.dumps(metadatas[i] or {}, ensure_ascii=False), vid))
+                    if documents is not None:
+                        db.execute("UPDATE rows SET document = ? WHERE id = ?", (documents[i], vid))
+                state = self._state(db)
+                state["version"] += 1
+                self._save_state(db, state)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _delete_ids(self, db: sqlite3.Connection, ids: Sequence[str]) -> int:
+        deleted = 0
+        for i in range(0, len(ids), _SQL_BATCH):
+            part = list(ids[i:i + _SQL_BATCH])
+            marks = ",".join("?" * len(part))
+            deleted += db.execute(f"DELETE FROM rows WHERE id IN ({marks})", part).rowcount
+        return deleted
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        if ids is None and where is None:
+            return
+        targets = [str(x) for x in ids] if ids is not None else []
+        if where is not None:
+            matched = self.get(where=where, include=[])["ids"]
+            wanted = set(targets)
+            targets = [x for x in matched if ids is None or x in wanted]
+        if not targets:
+            return
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                state = self._state(db)
+                state["dead"] += self._delete_ids(db, targets)
+                state["version"] += 1
+                self._save_state(db, state)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        self.maybe_compact()
+
+    def maybe_compact(self) -> bool:
+        db = self._connect()
+        state = self._state(db)
+        min_dead = max(_env_int("RAG_MEMMAP_COMPACT_MIN_DEAD", 256), 1)
+        if state["dead"] < min_dead or state["dead"] * 4 < state["next_slot"]:
+            return False
+        self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Tulis ulang row hidup ke generasi file baru (slot dirapatkan), lalu hapus generasi lama."""
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                state = self._state(db)
+                old_gen, dim = state["gen"], state["dim"]
+                rows = db.execute("SELECT id, slot FROM rows ORDER BY slot").fetchall()
+                new_gen = old_gen + 1
+                for kind in ("codes", "rowinfo", "vectors"):
+                    try:
+                        os.remove(self._path(kind, new_gen))
+                    except FileNotFoundError:
+                        pass
+                if rows and dim:
+                    old = np.memmap(self._path("vectors", old_gen), dtype=np.float32, mode="r", shape=(rows[-1][1] + 1, dim))
+                    for start in range(0, len(rows), _SCAN_BLOCK):
+                        part = rows[start:start + _SCAN_BLOCK]
+                        self._write_rows(new_gen, start, dim, np.asarray(old[[s for _id, s in part]], dtype=np.float32))
+                    del old
+                db.executemany("UPDATE rows SET slot = ? WHERE id = ?", [(-(i + 1), vid) for i, (vid, _s) in enumerate(rows)])
+                db.execute("UPDATE rows SET slot = -slot - 1")
+                state.update({"gen": new_gen, "next_slot": len(rows), "dead": 0, "version": state["version"] + 1})
+                self._save_state(db, state)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        for kind in ("codes", "rowinfo", "vectors"):
+            try:
+                os.remove(self._path(kind, old_gen))
+            except OSError:
+                # Windows: file masih di-mmap pembaca lain; dibersihkan compaction berikutnya
+                pass
+        logger.info(" MEMMAP compact collection=%s rows=%s gen=%s", self.name, len(rows), new_gen)
+
+    def drop(self) -> None:
+        with _SNAPSHOT_LOCK:
+            _SNAPSHOTS.pop(self.dir, None)
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    # ---------- read ----------
+    def row_bytes(self) -> int:
+        """Bytes file per row: codes int8 + rowinfo (scale, ||x||²) + vector float32 untuk rescore."""
+        dim = self._state(self._connect())["dim"]
+        return dim + 8 + dim * 4
+
+    def count(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM rows").fetchone()[0])
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        include = set(["metadatas", "documents"] if include is None else include)
+        snap = self._snapshot()
+        mask = snap.where_mask(where)
+        if ids is not None:
+            wanted = {str(x) for x in ids}
+            mask &= np.fromiter((vid in wanted for vid in snap.ids), dtype=bool, count=len(snap.ids))
+        positions = np.flatnonzero(mask)
+        start = int(offset or 0)
+        positions = positions[start:start + int(limit)] if limit is not None else positions[start:]
+        out: Dict[str, Any] = {"ids": [snap.ids[p] for p in positions]}
+        if "metadatas" in include:
+            out["metadatas"] = [snap.metadatas[p] for p in positions]
+        if "documents" in include:
+            out["documents"] = self._documents([snap.ids[p] for p in positions])
+        if "embeddings" in include:
+            out["embeddings"] = (
+                np.asarray(snap.vectors[snap.slots[positions]], dtype=np.float32)
+                if len(positions)
+                else np.zeros((0, snap.dim), dtype=np.float32)
+            )
+        return out
+
+    def _documents(self, ids: Sequence[str]) -> List[Optional[str]]:
+        db = self._connect()
+        found: Dict[str, Optional[str]] = {}
+        for i in range(0, len(ids), _SQL_BATCH):
+            part = list(ids[i:i + _SQL_BATCH])
+            marks = ",".join("?" * len(part))
+            found.update(db.execute(f"SELECT id, document FROM rows WHERE id IN ({marks})", part).fetchall())
+        return [found.get(vid) for vid in ids]
+
+    def search(
+        self, vector: Sequence[float], k: int, where: Optional[Dict[str, Any]] = None, rescore: Optional[int] = None
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Top-k squared L2. Scan memakai codes int8 (skor ≈ 2·scale·(c·q) − ||x||²), lalu
+        `rescore`·k kandidat teratas dihitung ulang dengan vector float32 asli.
+        """
+        snap = self._snapshot()
+        if snap.codes is None or not len(snap.slots):
+            return []
+        positions = np.flatnonzero(snap.where_mask(where))
+        if not len(positions):
+            return []
+        q = np.asarray(vector, dtype=np.float32).reshape(-1)
+        slots = snap.slots[positions]
+        approx = np.empty(len(slots), dtype=np.float32)
+        for start in range(0, len(slots), _SCAN_BLOCK):
+            part = slots[start:start + _SCAN_BLOCK]
+            info = snap.rowinfo[part]
+            approx[start:start + len(part)] = 2.0 * info[:, 0] * (snap.codes[part] @ q) - info[:, 1]
+
+        k = max(1, int(k))
+        factor = max(_env_int("RAG_MEMMAP_RESCORE", 4), 0) if rescore is None else max(int(rescore), 0)
+        n_cand = min(len(slots), max(k * factor, k + 32) if factor else k)
+        top = np.argpartition(-approx, n_cand - 1)[:n_cand] if n_cand < len(slots) else np.arange(len(slots))
+        q_norm = float(q @ q)
+        if factor:
+            diff = np.asarray(snap.vectors[slots[top]], dtype=np.float32) - q
+            dist = np.einsum("ij,ij->i", diff, diff)
+        else:
+            dist = q_norm - approx[top]
+        order = np.argsort(dist, kind="stable")[:k]
+        return [
+            (snap.ids[positions[top[i]]], snap.metadatas[positions[top[i]]], float(max(dist[i], 0.0)))
+            for i in order
+        ]
+
+
+class MemmapVectorStore:
+    """
+    Pengganti langchain Chroma untuk RAG_VECTOR_BACKEND=memmap: API yang dipakai retrieval,
+    ingest dan vector_ops (similarity_search*, add_texts, _collection, persist, delete_collection).
+    """
+
+    def __init__(self, directory: str, embedding_function: Any, collection_name: str):
+        self._embedding_function = embedding_function
+        self._collection = MemmapCollection(os.path.join(directory, collection_name), collection_name)
+
+    @property
+    def embeddings(self) -> Any:
+        return self._embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = [str(x) for x in ids] if ids else [uuid4().hex for _ in texts]
+        vectors = self._embedding_function.embed_documents(texts)
+        self._collection.upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts)
+        return ids
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: Sequence[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        hits = self._collection.search(embedding, k=k, where=filter or None)
+        docs = self._collection._documents([vid for vid, _m, _d in hits])
+        return [
+            (Document(page_content=text or "", metadata=dict(meta), id=vid), dist)
+            for (vid, meta, dist), text in zip(hits, docs)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        vector = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(vector, k=k, filter=filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _score in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def persist(self) -> None:
+        # setiap upsert/delete sudah di-commit dan di-fsync
+        return None
+
+    def delete_collection(self) -> None:
+        self._collection.drop()
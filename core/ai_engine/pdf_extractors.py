@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pdfplumber
+
+from . import pdf_pages
+from .pdf_pages import EXTRACTOR_VERSION, PageRaw, RawTable
+
+try:
+    import camelot  # type: ignore
+except Exception:  # pragma: no cover - optional dependency (lihat requirement.txt)
+    camelot = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Backend ekstraksi tabel PDF
+# =========================
+# Semua backend mengembalikan format yang sama dengan pdf_pages.extract_page_raw:
+# list per halaman berisi (tabel raw = list row = list cell string, teks halaman),
+# jadi _merge_pdf_pages / repair / chunking tidak perlu tahu backend mana yang dipakai.
+# Modul ini tidak mengimpor Django (sama seperti pdf_pages).
+#
+# - pdfplumber: default, jalan untuk semua PDF (mendukung process pool per halaman).
+# - camelot (lattice): membaca garis tabel; untuk PDF jadwal bergaris hasilnya lebih bersih
+#   (header multi-baris tidak pecah jadi row noise), teks halaman tetap dari pdfplumber.
+#
+# PDF_TABLE_EXTRACTOR=auto (default) memilih backend lewat probe murah: hitung operator
+# rectangle/line di content stream halaman pertama tanpa layout analysis.
+
+_PROBE_OP_RE = re.compile(rb"\s(re|l)\s")
+
+
+class PdfTableExtractor:
+    """Interface backend: `extract` -> raw (tabel, teks) per halaman, urut halaman."""
+
+    name = ""
+
+    @property
+    def version(self) -> str:
+        # disimpan di page cache; cache dari backend/versi lain dianggap miss
+        raise NotImplementedError
+
+    def available(self) -> bool:
+        return True
+
+    def extract(self, file_path: str, max_pages: Optional[int] = None) -> List[PageRaw]:
+        raise NotImplementedError
+
+
+class PdfplumberExtractor(PdfTableExtractor):
+    name = "pdfplumber"
+
+    @property
+    def version(self) -> str:
+        return EXTRACTOR_VERSION
+
+    def extract(self, file_path: str, max_pages: Optional[int] = None) -> List[PageRaw]:
+        return pdf_pages.extract_pdf_pages(file_path, max_pages=max_pages)
+
+
+class CamelotExtractor(PdfTableExtractor):
+    name = "camelot"
+
+    @property
+    def version(self) -> str:
+        return f"camelot-{getattr(camelot, '__version__', '0')}-lattice-r1"
+
+    def available(self) -> bool:
+        return camelot is not None
+
+    def extract(self, file_path: str, max_pages: Optional[int] = None) -> List[PageRaw]:
+        texts: List[str] = []
+        with pdfplumber.open(file_path) as pdf:
+            pages = list(pdf.pages)
+            if max_pages is not None:
+                pages = pages[: max(int(max_pages), 0)]
+            for page in pages:
+                try:
+                    texts.append((page.extract_text() or "").strip())
+                except Exception:
+                    texts.append("")
+        if not texts:
+            return []
+
+        tables = camelot.read_pdf(file_path, pages=f"1-{len(texts)}", flavor="lattice", suppress_stdout=True)
+        by_page: Dict[int, List[RawTable]] = {}
+        for table in tables:
+            rows = [["" if cell is None else str(cell) for cell in row] for row in table.df.values.tolist()]
+            if rows:
+                by_page.setdefault(int(table.page), []).append(rows)
+        return [(by_page.get(i, []), text) for i, text in enumerate(texts, start=1)]
+
+
+_EXTRACTORS: Dict[str, PdfTableExtractor] = {
+    e.name: e for e in (PdfplumberExtractor(), CamelotExtractor())
+}
+
+
+def get_extractor(name: str) -> PdfTableExtractor:
+    try:
+        return _EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"PDF table extractor tidak dikenal: {name}") from None
+
+
+def _mode() -> str:
+    return str(os.environ.get("PDF_TABLE_EXTRACTOR", "auto") or "auto").strip().lower()
+
+
+def cache_versions() -> List[str]:
+    """
+    Versi page cache yang boleh dipakai. Mode auto menerima hasil backend mana pun (PDF
+    yang sudah diparse tidak diekstrak ulang); mode paksa hanya menerima backend itu.
+    """
+    mode = _mode()
+    if mode in _EXTRACTORS and _EXTRACTORS[mode].available():
+        return [_EXTRACTORS[mode].version]
+    if mode != "auto":
+        return [EXTRACTOR_VERSION]
+    return [e.version for e in _EXTRACTORS.values() if e.available()]
+
+
+def _probe_min_ops() -> int:
+    try:
+        return max(int(os.environ.get("PDF_EXTRACTOR_PROBE_MIN_OPS", "40")), 1)
+    except ValueError:
+        return 40
+
+
+def probe_ruled_ops(file_path: str) -> int:
+    """
+    Jumlah operator rectangle (`re`) + line (`l`) di content stream halaman pertama.
+    Tidak ada layout analysis (karakter/objek), jadi jauh lebih murah dari page.rects.
+    """
+    with pdfplumber.open(file_path, pages=[1]) as pdf:
+        if not pdf.pages:
+            return 0
+        contents = pdf.pages[0].page_obj.contents or []
+        data = b"".join(stream.get_data() for stream in contents if hasattr(stream, "get_data"))
+    return len(_PROBE_OP_RE.findall(data))
+
+
+def select_extractor(file_path: str) -> Tuple[PdfTableExtractor, str]:
+    """
+    Pilih backend untuk satu dokumen. Return (extractor, alasan) untuk log/benchmark.
+    PDF_TABLE_EXTRACTOR: auto (default) | pdfplumber | camelot.
+    """
+    mode = _mode()
+    plumber = _EXTRACTORS["pdfplumber"]
+    if mode != "auto":
+        try:
+            chosen = get_extractor(mode)
+        except ValueError:
+            logger.warning(" PDF_TABLE_EXTRACTOR=%s tidak dikenal, pakai pdfplumber", mode)
+            return plumber, "invalid_mode"
+        if not chosen.available():
+            return plumber, f"{mode}_unavailable"
+        return chosen, "forced"
+
+    lattice = _EXTRACTORS["camelot"]
+    if not lattice.available():
+        return plumber, "camelot_unavailable"
+    try:
+        ops = probe_ruled_ops(file_path)
+    except Exception as e:
+        logger.warning(" PDF extractor probe gagal, pakai pdfplumber: %s", e)
+        return plumber, "probe_error"
+    if ops >= _probe_min_ops():
+        return lattice, f"ruled_ops={ops}"
+    return plumber, f"ruled_ops={ops}"
+
+
+def extract_with_fallback(
+    extractor: PdfTableExtractor, file_path: str, max_pages: Optional[int] = None
+) -> Tuple[List[PageRaw], PdfTableExtractor]:
+    """Backend selain pdfplumber yang error/tidak menemukan tabel -> ulang dengan pdfplumber."""
+    plumber = _EXTRACTORS["pdfplumber"]
+    if extractor is plumber:
+        return plumber.extract(file_path, max_pages=max_pages), plumber
+    try:
+        pages = extractor.extract(file_path, max_pages=max_pages)
+        if any(tables for tables, _text in pages):
+            return pages, extractor
+        logger.info(" PDF extractor %s tidak menemukan tabel, fallback pdfplumber", extractor.name)
+    except Exception as e:
+        logger.warning(" PDF extractor %s gagal, fallback pdfplumber: %s", extractor.name, e)
+    return plumber.extract(file_path, max_pages=max_pages), plumber
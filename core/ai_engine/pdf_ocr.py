@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .pdf_pages import PageRaw, file_sha256, parallel_workers
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# OCR fallback per halaman (process pool)
+# =========================
+# Dipakai kalau PDF tidak punya teks/tabel sama sekali (hasil scan). Tiap halaman
+# dirender (pdf2image) lalu di-OCR (pytesseract) di pool proses khusus OCR (ukuran tetap,
+# tidak dibangun ulang per dokumen). Hasil per halaman disimpan di cache disk (sha256 file + versi +
+# dpi + bahasa), jadi halaman yang timeout bisa dicoba lagi tanpa mengulang yang sukses.
+# Output berupa PageRaw ([], teks) supaya masuk ke _merge_pdf_pages seperti PDF biasa.
+
+# naikkan kalau ocr_page berubah supaya cache lama otomatis tidak terpakai
+OCR_VERSION = "tesseract-r1"
+
+_OCR_POOL: Optional[ProcessPoolExecutor] = None
+_OCR_POOL_WORKERS = 0
+_OCR_POOL_LOCK = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+
+
+def ocr_workers() -> int:
+    """
+    PDF_OCR_WORKERS: `auto` = jumlah core, N = N proses, 0/1 = sequential.
+    Kosong = ikut PDF_PARALLEL_WORKERS (default sequential; paralel harus opt-in).
+    """
+    raw = str(os.environ.get("PDF_OCR_WORKERS", "") or "").strip().lower()
+    if not raw:
+        return max(parallel_workers(), 1)
+    if raw == "auto":
+        return max(os.cpu_count() or 1, 1)
+    try:
+        return max(int(raw), 1)
+    except ValueError:
+        return 1
+
+
+def ocr_settings() -> Dict[str, object]:
+    return {
+        "dpi": max(_env_int("PDF_OCR_DPI", 200), 72),
+        "lang": str(os.environ.get("PDF_OCR_LANG", "ind+eng") or "ind+eng").strip(),
+        "page_timeout": max(_env_int("PDF_OCR_PAGE_TIMEOUT", 60), 1),
+        "max_pages": max(_env_int("PDF_OCR_MAX_PAGES", 50), 1),
+        "workers": ocr_workers(),
+    }
+
+
+def ocr_page(file_path: str, page_number: int, dpi: int, lang: str, timeout_s: int) -> Tuple[int, str, str]:
+    """
+    Render + OCR satu halaman (1-based). Dijalankan di proses worker.
+    Return (page_number, teks, status) dengan status ok/timeout/error.
+    """
+    try:
+        from pdf2image import convert_from_path  # type: ignore
+        import pytesseract  # type: ignore
+
+        images = convert_from_path(
+            file_path,
+            dpi=dpi,
+            first_page=page_number,
+            last_page=page_number,
+            timeout=timeout_s,
+        )
+        parts = []
+        for img in images:
+            parts.append(pytesseract.image_to_string(img, lang=lang or None, timeout=timeout_s))
+        return page_number, "\n".join(p.strip() for p in parts if p and p.strip()), "ok"
+    except RuntimeError as e:
+        # pytesseract: "Tesseract process timeout"
+        status = "timeout" if "timeout" in str(e).lower() else "error"
+        return page_number, "", status
+    except Exception as e:
+        logger.warning(" OCR halaman %s gagal: %s", page_number, e)
+        return page_number, "", "error"
+
+
+def _cache_file(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, "ocr", digest[:2], f"{digest}.json")
+
+
+def _cache_key(settings: Dict[str, object]) -> str:
+    return f"{OCR_VERSION}:{settings['dpi']}:{settings['lang']}"
+
+
+def read_cached_ocr(cache_dir: str, digest: str, key: str) -> Dict[int, str]:
+    try:
+        with open(_cache_file(cache_dir, digest), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("ocr") != key:
+        return {}
+    pages = payload.get("pages") or {}
+    if not isinstance(pages, dict):
+        return {}
+    out: Dict[int, str] = {}
+    for page, text in pages.items():
+        try:
+            out[int(page)] = str(text or "")
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+def write_cached_ocr(cache_dir: str, digest: str, key: str, pages: Dict[int, str]) -> None:
+    path = _cache_file(cache_dir, digest)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"ocr": key, "pages": {str(k): v for k, v in sorted(pages.items())}}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(" OCR cache gagal ditulis: %s", e)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _shutdown_ocr_pool() -> None:
+    global _OCR_POOL, _OCR_POOL_WORKERS
+    with _OCR_POOL_LOCK:
+        if _OCR_POOL is not None:
+            _OCR_POOL.shutdown(wait=False, cancel_futures=True)
+        _OCR_POOL = None
+        _OCR_POOL_WORKERS = 0
+
+
+atexit.register(_shutdown_ocr_pool)
+
+
+def _get_ocr_pool(workers: int) -> ProcessPoolExecutor:
+    # ukuran = PDF_OCR_WORKERS (bukan jumlah halaman), jadi pool tidak dibangun ulang per dokumen
+    # dan tidak berbagi dengan pool ekstraksi pdf_pages yang ukurannya berbeda
+    global _OCR_POOL, _OCR_POOL_WORKERS
+    with _OCR_POOL_LOCK:
+        if _OCR_POOL is None or _OCR_POOL_WORKERS != workers:
+            if _OCR_POOL is not None:
+                # hanya saat konfigurasi berubah; job yang sudah jalan dibiarkan selesai
+                _OCR_POOL.shutdown(wait=False)
+            method = str(os.environ.get("PDF_PARALLEL_START_METHOD", "spawn") or "spawn").strip()
+            _OCR_POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _OCR_POOL_WORKERS = workers
+        return _OCR_POOL
+
+
+def _run_ocr(file_path: str, page_numbers: List[int], settings: Dict[str, object]) -> List[Tuple[int, str, str]]:
+    args = (settings["dpi"], settings["lang"], settings["page_timeout"])
+    workers = int(settings["workers"])
+    if workers > 1 and len(page_numbers) > 1:
+        try:
+            pool = _get_ocr_pool(workers)
+            futures = [pool.submit(ocr_page, file_path, n, *args) for n in page_numbers]
+            return [fut.result() for fut in futures]
+        except Exception as e:
+            # BrokenProcessPool, CancelledError, gagal start proses, dll.
+            _shutdown_ocr_pool()
+            logger.warning(" OCR pool gagal (%r), fallback sequential", e)
+    return [ocr_page(file_path, n, *args) for n in page_numbers]
+
+
+def load_ocr_pages(file_path: str, n_pages: int, cache_dir: str = "") -> Tuple[List[PageRaw], Dict[str, int]]:
+    """
+    OCR semua halaman (maks PDF_OCR_MAX_PAGES) lewat cache per halaman.
+    Return (pages_raw, stats); halaman di atas batas / gagal berisi teks kosong.
+    """
+    settings = ocr_settings()
+    limit = min(int(n_pages), int(settings["max_pages"]))
+    key = _cache_key(settings)
+    digest = ""
+    done: Dict[int, str] = {}
+    if cache_dir:
+        try:
+            digest = file_sha256(file_path)
+        except OSError:
+            digest = ""
+        if digest:
+            done = read_cached_ocr(cache_dir, digest, key)
+
+    todo = [n for n in range(1, limit + 1) if n not in done]
+    stats = {
+        "pages": limit,
+        "cached": limit - len(todo),
+        "ocr": 0,
+        "timeout": 0,
+        "error": 0,
+        "skipped": max(int(n_pages) - limit, 0),
+    }
+    if todo:
+        fresh: Dict[int, str] = {}
+        for page_number, text, status in _run_ocr(file_path, todo, settings):
+            if status == "ok":
+                fresh[page_number] = text
+                stats["ocr"] += 1
+            else:
+                stats[status] = stats.get(status, 0) + 1
+        done.update(fresh)
+        if digest and fresh:
+            write_cached_ocr(cache_dir, digest, key, done)
+
+    if stats["skipped"]:
+        logger.warning(" OCR dibatasi PDF_OCR_MAX_PAGES=%s, %s halaman dilewati", limit, stats["skipped"])
+    pages: List[PageRaw] = [([], done.get(n, "")) for n in range(1, int(n_pages) + 1)]
+    return pages, stats
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, List, Optional, Sequence, Tuple
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Per-page raw PDF extraction (process pool)
+# =========================
+# Modul ini sengaja tidak mengimpor Django supaya bisa di-load oleh proses worker
+# `spawn`. Worker hanya mengembalikan data mentah per halaman (tabel + teks);
+# normalisasi, carry-forward hari/sesi/jam, dan dedup tetap dikerjakan berurutan
+# di ingest._merge_pdf_pages agar output identik dengan jalur sequential.
+#
+# Hasil raw per halaman juga disimpan ke cache di disk, di-key oleh sha256 isi file +
+# versi extractor. Ingest, reingest, dan profile extractor planner membaca dari cache
+# yang sama, jadi satu PDF cukup diparse sekali.
+#
+# Backend tabel (pdfplumber / camelot) dipilih per dokumen di pdf_extractors; cache mencatat
+# versi backend yang menghasilkannya.
+
+# naikkan kalau extract_page_raw berubah supaya cache lama otomatis tidak terpakai
+EXTRACTOR_VERSION = f"pdfplumber-{getattr(pdfplumber, '__version__', '0')}-r1"
+
+RawTable = List[List[Any]]
+PageRaw = Tuple[List[RawTable], str]
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def extract_page_raw(page) -> PageRaw:
+    try:
+        tables = page.extract_tables() or []
+    except Exception:
+        tables = []
+    try:
+        text = (page.extract_text() or "").strip()
+    except Exception:
+        text = ""
+    return tables, text
+
+
+def extract_pages_raw(file_path: str, page_numbers: Sequence[int]) -> List[Tuple[int, List[RawTable], str]]:
+    """
+    Buka PDF hanya untuk halaman `page_numbers` (1-based) dan ekstrak raw tabel + teks.
+    Dijalankan di proses worker.
+    """
+    out: List[Tuple[int, List[RawTable], str]] = []
+    with pdfplumber.open(file_path, pages=list(page_numbers)) as pdf:
+        for page in pdf.pages:
+            tables, text = extract_page_raw(page)
+            out.append((int(page.page_number), tables, text))
+            close = getattr(page, "close", None)
+            if callable(close):
+                close()
+    return out
+
+
+def extract_pdf_pages(file_path: str, max_pages: Optional[int] = None) -> List[PageRaw]:
+    """
+    Ekstrak raw semua halaman (atau `max_pages` pertama). Pakai process pool kalau
+    PDF_PARALLEL_WORKERS > 1 dan halaman cukup banyak; gagal di pool -> sequential.
+    """
+    with pdfplumber.open(file_path) as pdf:
+        pages = list(pdf.pages)
+        if max_pages is not None:
+            pages = pages[: max(int(max_pages), 0)]
+        n_pages = len(pages)
+        workers = min(parallel_workers(), n_pages)
+        if workers > 1 and n_pages >= parallel_min_pages():
+            try:
+                return extract_pdf_pages_parallel(file_path, n_pages, workers)
+            except Exception as e:
+                logger.warning(" PDF parallel extract gagal, fallback sequential: %s", e)
+        return [extract_page_raw(page) for page in pages]
+
+
+def file_sha256(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_file(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, digest[:2], f"{digest}.json")
+
+
+def read_cached_pages(cache_dir: str, digest: str, versions: Sequence[str] = (EXTRACTOR_VERSION,)) -> Optional[List[PageRaw]]:
+    try:
+        with open(_cache_file(cache_dir, digest), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("extractor") not in versions:
+        return None
+    pages = payload.get("pages")
+    if not isinstance(pages, list):
+        return None
+    return [(list(p.get("tables") or []), str(p.get("text") or "")) for p in pages if isinstance(p, dict)]
+
+
+def write_cached_pages(cache_dir: str, digest: str, pages: List[PageRaw], extractor: str = EXTRACTOR_VERSION) -> None:
+    path = _cache_file(cache_dir, digest)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    payload = {
+        "extractor": extractor,
+        "pages": [{"tables": tables, "text": text} for tables, text in pages],
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(" PDF page cache gagal ditulis: %s", e)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_pdf_pages(file_path: str, cache_dir: str = "", max_pages: Optional[int] = None) -> List[PageRaw]:
+    """
+    Raw (tables, text) per halaman lewat cache disk. `cache_dir` kosong = tanpa cache.
+    Dengan `max_pages`, cache miss hanya mengekstrak halaman awal dan tidak ditulis ke cache
+    (cache selalu berisi dokumen utuh).
+    """
+    from .pdf_extractors import cache_versions, extract_with_fallback, select_extractor
+
+    digest = ""
+    if cache_dir:
+        try:
+            digest = file_sha256(file_path)
+        except OSError:
+            digest = ""
+        if digest:
+            cached = read_cached_pages(cache_dir, digest, cache_versions())
+            if cached is not None:
+                logger.debug(" PDF page cache hit: %s pages=%s", digest[:12], len(cached))
+                return cached[:max_pages] if max_pages is not None else cached
+
+    extractor, reason = select_extractor(file_path)
+    pages, used = extract_with_fallback(extractor, file_path, max_pages=max_pages)
+    logger.info(" PDF extractor=%s pilihan=%s alasan=%s pages=%s", used.name, extractor.name, reason, len(pages))
+    if digest and max_pages is None:
+        write_cached_pages(cache_dir, digest, pages, used.version)
+    return pages
+
+
+def parallel_workers() -> int:
+    """
+    PDF_PARALLEL_WORKERS: 0/1 = sequential (default), `auto` = jumlah core, N = N proses.
+    """
+    raw = str(os.environ.get("PDF_PARALLEL_WORKERS", "0") or "0").strip().lower()
+    if raw == "auto":
+        return max(os.cpu_count() or 1, 1)
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        return 0
+
+
+def parallel_min_pages() -> int:
+    try:
+        return max(int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "8")), 1)
+    except ValueError:
+        return 8
+
+
+def chunk_page_numbers(n_pages: int, workers: int, chunks_per_worker: int = 3) -> List[List[int]]:
+    # potongan kontigu; beberapa potongan per worker agar halaman berat tidak menumpuk di satu proses
+    n_chunks = max(1, min(n_pages, workers * max(1, chunks_per_worker)))
+    size, rem = divmod(n_pages, n_chunks)
+    out: List[List[int]] = []
+    start = 1
+    for i in range(n_chunks):
+        end = start + size + (1 if i < rem else 0)
+        if end > start:
+            out.append(list(range(start, end)))
+        start = end
+    return out
+
+
+def _shutdown_pool() -> None:
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+        _POOL_WORKERS = 0
+
+
+atexit.register(_shutdown_pool)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # pool dipakai ulang antar dokumen: biaya start proses spawn hanya dibayar sekali
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            method = str(os.environ.get("PDF_PARALLEL_START_METHOD", "spawn") or "spawn").strip()
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def extract_pdf_pages_parallel(file_path: str, n_pages: int, workers: int) -> List[PageRaw]:
+    """
+    Return raw (tables, text) per halaman, urut sesuai nomor halaman.
+    Raise kalau pool gagal; pemanggil fallback ke jalur sequential.
+    """
+    chunks = chunk_page_numbers(n_pages, workers)
+    pool = _get_pool(workers)
+    try:
+        futures = [pool.submit(extract_pages_raw, file_path, chunk) for chunk in chunks]
+        by_page = {}
+        for fut in futures:
+            for page_number, tables, text in fut.result():
+                by_page[page_number] = (tables, text)
+    except BrokenProcessPool:
+        _shutdown_pool()
+        raise
+    return [by_page.get(i, ([], "")) for i in range(1, n_pages + 1)]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Persistent cache hasil LLM row repair
+# =========================
+# Key = hash (versi prompt repair + model + field row yang sudah dinormalisasi), value = field
+# hasil perbaikan LLM untuk row itu ({} = LLM tidak memberi perbaikan). Reingest PDF yang sama
+# mengirim row low-confidence yang sama, jadi hasilnya bisa dipakai ulang tanpa panggilan LLM.
+
+_SQL_BATCH = 500
+
+
+def row_fingerprint(fields: Dict[str, Any], prompt_version: str, model_name: str) -> str:
+    raw = json.dumps(
+        {"v": prompt_version, "model": model_name, "row": fields},
+        sort_keys=True,
+        ensure_ascii=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RepairCache:
+    def __init__(self, root_dir: str):
+        self.path = os.path.join(root_dir, "repair_cache.sqlite3")
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS repairs ("
+                "key TEXT PRIMARY KEY, fields TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db = db
+        return self._db
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        uniq = list(dict.fromkeys(keys))
+        out: Dict[str, Dict[str, Any]] = {}
+        if not uniq:
+            return out
+        with self._lock:
+            db = self._connect()
+            for i in range(0, len(uniq), _SQL_BATCH):
+                part = uniq[i:i + _SQL_BATCH]
+                marks = ",".join("?" * len(part))
+                for key, raw in db.execute(f"SELECT key, fields FROM repairs WHERE key IN ({marks})", part):
+                    try:
+                        value = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if isinstance(value, dict):
+                        out[key] = value
+        return out
+
+    def put_many(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(fields, ensure_ascii=True), now) for key, fields in items]
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.executemany("INSERT OR REPLACE INTO repairs (key, fields, created_at) VALUES (?, ?, ?)", rows)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,166 @@
+import bisect
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+from core.models import AcademicDocument
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Per-user document title index
+# =========================
+# Index judul dokumen yang sudah dinormalisasi, disimpan di Django cache supaya
+# resolusi @mention dan autocomplete tidak perlu query + regex per judul setiap
+# request. Ingest / delete hanya menghapus key (cache.delete); read berikutnya
+# membangun ulang dari DB. Sengaja tidak read-modify-write: dengan LocMemCache per
+# proses / write bersamaan, update in-place bisa basi atau kehilangan entry.
+
+_EXT_RE = re.compile(r"\.(pdf|xlsx|xls|csv|md|txt)$")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+
+
+def _normalize_doc_key(text: str) -> str:
+    t = str(text or "").strip().lower()
+    t = _EXT_RE.sub("", t)
+    t = _NON_ALNUM_RE.sub(" ", t)
+    return _MULTI_SPACE_RE.sub(" ", t).strip()
+
+
+def _cache_ttl() -> int:
+    try:
+        return max(int(os.environ.get("RAG_DOC_INDEX_TTL", "600")), 1)
+    except Exception:
+        return 600
+
+
+def _cache_key(user_id: int) -> str:
+    return f"rag:doc_title_index:{int(user_id)}"
+
+
+DocEntry = Tuple[int, str, str]  # (doc_id, title, normalized key)
+
+
+@dataclass(frozen=True)
+class DocTitleIndex:
+    # diurutkan berdasarkan normalized key agar prefix lookup bisa pakai bisect
+    entries: Tuple[DocEntry, ...] = ()
+    _keys: Tuple[str, ...] = field(default=(), repr=False)
+    _by_key: Dict[str, Tuple[int, ...]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, docs: List[Tuple[int, str]]) -> "DocTitleIndex":
+        entries = sorted(
+            ((int(did), str(title or ""), _normalize_doc_key(title)) for did, title in docs),
+            key=lambda x: (x[2], x[0]),
+        )
+        by_key: Dict[str, List[int]] = {}
+        for pos, (_did, _title, nk) in enumerate(entries):
+            by_key.setdefault(nk, []).append(pos)
+        return cls(
+            entries=tuple(entries),
+            _keys=tuple(nk for _did, _title, nk in entries),
+            _by_key={k: tuple(v) for k, v in by_key.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def doc_pairs(self) -> List[Tuple[int, str]]:
+        return [(did, title) for did, title, _nk in self.entries]
+
+    def exact(self, key: str) -> List[Tuple[int, str]]:
+        return [(self.entries[pos][0], self.entries[pos][1]) for pos in self._by_key.get(key, ())]
+
+    def prefix(self, key: str) -> List[Tuple[int, str]]:
+        out: List[Tuple[int, str]] = []
+        pos = bisect.bisect_left(self._keys, key)
+        while pos < len(self._keys) and self._keys[pos].startswith(key):
+            out.append((self.entries[pos][0], self.entries[pos][1]))
+            pos += 1
+        return out
+
+    def contains(self, key: str) -> List[Tuple[int, str]]:
+        # semantik sama dengan resolusi mention lama: mention di dalam judul atau sebaliknya
+        return [(did, title) for did, title, nk in self.entries if key in nk or nk in key]
+
+    def resolve(self, mention: str) -> Tuple[str, List[Tuple[int, str]]]:
+        """
+        Return (status, matches) dengan status `resolved` / `ambiguous` / `unresolved`.
+        """
+        mk = _normalize_doc_key(mention)
+        if not mk:
+            return "unresolved", []
+        exact = self.exact(mk)
+        if len(exact) == 1:
+            return "resolved", exact
+        if len(exact) > 1:
+            return "ambiguous", exact
+        contains = self.contains(mk)
+        if len(contains) == 1:
+            return "resolved", contains
+        if len(contains) > 1:
+            return "ambiguous", contains
+        return "unresolved", []
+
+    def suggest(self, text: str, limit: int = 8) -> List[Tuple[int, str]]:
+        # autocomplete: prefix judul dulu, lalu prefix kata, lalu substring
+        key = _normalize_doc_key(text)
+        limit = max(int(limit), 1)
+        if not key:
+            return self.doc_pairs()[:limit]
+        out: List[Tuple[int, str]] = list(self.prefix(key))
+        seen = {did for did, _t in out}
+        if len(out) < limit:
+            word_key = " " + key
+            for did, title, nk in self.entries:
+                if did not in seen and word_key in nk:
+                    out.append((did, title))
+                    seen.add(did)
+        if len(out) < limit:
+            for did, title, nk in self.entries:
+                if did not in seen and key in nk:
+                    out.append((did, title))
+                    seen.add(did)
+        return out[:limit]
+
+
+def _load_index_from_db(user_id: int) -> DocTitleIndex:
+    rows = AcademicDocument.objects.filter(user_id=user_id).values("id", "title")
+    return DocTitleIndex.build([(int(r["id"]), str(r.get("title") or "")) for r in rows])
+
+
+def get_user_title_index(user_id: int) -> DocTitleIndex:
+    ck = _cache_key(user_id)
+    try:
+        cached = cache.get(ck)
+        if isinstance(cached, DocTitleIndex):
+            return cached
+    except Exception:
+        cached = None
+    index = _load_index_from_db(user_id)
+    try:
+        cache.set(ck, index, _cache_ttl())
+    except Exception:
+        pass
+    return index
+
+
+def index_document_title(user_id: int, doc_id: int, title: str) -> None:
+    # doc_id/title tidak dipakai langsung: index dibangun ulang dari DB saat read berikutnya
+    invalidate_user_title_index(user_id)
+
+
+def remove_document_title(user_id: int, doc_id: int) -> None:
+    invalidate_user_title_index(user_id)
+
+
+def invalidate_user_title_index(user_id: int) -> None:
+    try:
+        cache.delete(_cache_key(user_id))
+    except Exception as e:
+        logger.warning(" DOC_INDEX invalidate gagal user_id=%s err=%s", user_id, e)
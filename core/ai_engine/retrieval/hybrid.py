@@ -3,6 +3,8 @@ from typing import Any, Dict, List, Sequence, Tuple
 
 from rank_bm25 import BM25Okapi
 
+from ..tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +26,16 @@ def _tokenize(text: str) -> List[str]:
 
 def retrieve_dense(vectorstore: Any, query: str, k: int, filter_where: Dict[str, Any] | None = None) -> List[DocScore]:
     try:
-        return vectorstore.similarity_search_with_score(query, k=max(1, int(k)), filter=filter_where or {})
+        # Embedding query dipisah dari query Chroma supaya durasi keduanya terlihat di trace.
+        embedder = getattr(vectorstore, "embeddings", None)
+        search_by_vector = getattr(vectorstore, "similarity_search_by_vector_with_relevance_scores", None)
+        if embedder is not None and callable(search_by_vector):
+            with span("embed_query"):
+                query_vector = embedder.embed_query(query)
+            with span("chroma_query"):
+                return search_by_vector(query_vector, k=max(1, int(k)), filter=filter_where or {})
+        with span("chroma_query"):
+            return vectorstore.similarity_search_with_score(query, k=max(1, int(k)), filter=filter_where or {})
     except Exception:
         return []
 
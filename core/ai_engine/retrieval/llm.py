@@ -4,6 +4,7 @@ from django.db import OperationalError, ProgrammingError
 
 from langchain_openai import ChatOpenAI
 
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
 DEFAULT_MODEL = "qwen/qwen3-next-80b-a3b-instruct:free"
 DEFAULT_BACKUP_MODELS = [
     "nvidia/nemotron-3-nano-30b-a3b:free",
@@ -28,6 +29,7 @@ def get_runtime_openrouter_config() -> Dict[str, Any]:
 
     cfg: Dict[str, Any] = {
         "api_key": os.environ.get("OPENROUTER_API_KEY", "").strip(),
+        "base_url": os.environ.get("OPENROUTER_BASE_URL", "").strip() or DEFAULT_BASE_URL,
         "model": os.environ.get("OPENROUTER_MODEL", DEFAULT_MODEL).strip() or DEFAULT_MODEL,
         "backup_models": env_backups,
         "timeout": int(os.environ.get("OPENROUTER_TIMEOUT", "45")),
@@ -45,6 +47,8 @@ def get_runtime_openrouter_config() -> Dict[str, Any]:
         if db_cfg:
             if (db_cfg.openrouter_api_key or "").strip():
                 cfg["api_key"] = db_cfg.openrouter_api_key.strip()
+            if (getattr(db_cfg, "openrouter_base_url", "") or "").strip():
+                cfg["base_url"] = db_cfg.openrouter_base_url.strip()
             if (db_cfg.openrouter_model or "").strip():
                 cfg["model"] = db_cfg.openrouter_model.strip()
             db_backups = _parse_models(getattr(db_cfg, "openrouter_backup_models", ""))
@@ -76,7 +80,7 @@ def get_backup_models(primary_model: str, configured_backup_models: list[str] |
 def build_llm(model_name: str, cfg: Dict[str, Any]) -> ChatOpenAI:
     return ChatOpenAI(
         openai_api_key=cfg.get("api_key"),
-        openai_api_base="https://openrouter.ai/api/v1",
+        openai_api_base=str(cfg.get("base_url") or DEFAULT_BASE_URL),
         model_name=model_name,
         temperature=float(cfg.get("temperature", 0.2)),
         request_timeout=int(cfg.get("timeout", 45)),
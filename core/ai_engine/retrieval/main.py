@@ -2,6 +2,7 @@ import os
 import re
 import time
 import logging
+from dataclasses import dataclass, field
 from typing import Dict, Any, List
 
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
@@ -10,12 +11,24 @@ from django.core.cache import cache
 from core.models import AcademicDocument
 
 from ..config import get_vectorstore
+from ..vector_ops import exclude_tombstoned, tombstoned_doc_ids
+from .doc_index import _normalize_doc_key, get_user_title_index
 from .hybrid import retrieve_dense, retrieve_sparse_bm25, fuse_rrf
 from .rerank import rerank_documents
+from .router import (
+    CRIME_PATTERNS,
+    DOC_INTENT_MARKERS,
+    PERSONAL_MARKERS,
+    POLITICAL_PERSUASION_PATTERNS,
+    WEIRD_MARKERS,
+    QueryRoute,
+    route_query,
+)
 from .rules import _SEMESTER_RE, infer_doc_type
 from .utils import build_sources_from_docs, looks_like_markdown_table, has_interactive_sections
 from .llm import get_runtime_openrouter_config, get_backup_models, build_llm, invoke_text, llm_fallback_message
 from .prompt import CHATBOT_SYSTEM_PROMPT
+from ..tracing import span, start_trace, stage_breakdown, format_breakdown
 from ...monitoring import record_rag_metric
 
 logger = logging.getLogger(__name__)
@@ -34,17 +47,27 @@ def _env_int(name: str, default: int) -> int:
         return int(default)
 
 
-def _build_chroma_filter(user_id: int, query: str, doc_ids: List[int] | None = None) -> Dict[str, Any]:
+def _build_chroma_filter(
+    user_id: int,
+    query: str,
+    doc_ids: List[int] | None = None,
+    route: QueryRoute | None = None,
+) -> Dict[str, Any]:
     base_filter: Dict[str, Any] = {"user_id": str(user_id)}
     if doc_ids:
         base_filter["doc_id"] = {"$in": [str(x) for x in doc_ids]}
-    sem_match = _SEMESTER_RE.search(query)
-    if sem_match:
-        try:
-            base_filter["semester"] = int(sem_match.group(1))
-        except Exception:
-            pass
-    doc_type = infer_doc_type(query)
+    if route is not None:
+        if route.semester is not None:
+            base_filter["semester"] = route.semester
+        doc_type = route.doc_type
+    else:
+        sem_match = _SEMESTER_RE.search(query)
+        if sem_match:
+            try:
+                base_filter["semester"] = int(sem_match.group(1))
+            except Exception:
+                pass
+        doc_type = infer_doc_type(query)
     if doc_type:
         base_filter["doc_type"] = doc_type
     if len(base_filter) == 1:
@@ -76,13 +99,6 @@ def _extract_doc_mentions(query: str) -> tuple[str, List[str]]:
     return clean_q, list(dict.fromkeys(raw_mentions))
 
 
-def _normalize_doc_key(text: str) -> str:
-    t = str(text or "").strip().lower()
-    t = re.sub(r"\.(pdf|xlsx|xls|csv|md|txt)$", "", t)
-    t = re.sub(r"[^a-z0-9]+", " ", t)
-    return re.sub(r"\s{2,}", " ", t).strip()
-
-
 def _has_user_documents(user_id: int) -> bool:
     ck = f"rag:user_has_docs:{int(user_id)}"
     try:
@@ -107,45 +123,24 @@ def _resolve_user_doc_mentions(user_id: int, mentions: List[str]) -> Dict[str, A
         return out
 
     try:
-        docs = list(
-            AcademicDocument.objects.filter(user_id=user_id).values("id", "title")
-        )
+        index = get_user_title_index(user_id)
     except Exception:
-        docs = []
-    if not docs:
+        index = None
+    if not index:
         out["unresolved_mentions"] = mentions
         return out
 
-    doc_norm = []
-    for d in docs:
-        title = str(d.get("title") or "")
-        doc_norm.append((int(d["id"]), title, _normalize_doc_key(title)))
-
     resolved_ids: List[int] = []
     resolved_titles: List[str] = []
     unresolved: List[str] = []
     ambiguous: List[str] = []
 
     for m in mentions:
-        mk = _normalize_doc_key(m)
-        if not mk:
-            unresolved.append(m)
-            continue
-
-        exact = [(did, title) for (did, title, nk) in doc_norm if nk == mk]
-        if len(exact) == 1:
-            resolved_ids.append(exact[0][0])
-            resolved_titles.append(exact[0][1])
-            continue
-        if len(exact) > 1:
-            ambiguous.append(m)
-            continue
-
-        contains = [(did, title) for (did, title, nk) in doc_norm if mk in nk or nk in mk]
-        if len(contains) == 1:
-            resolved_ids.append(contains[0][0])
-            resolved_titles.append(contains[0][1])
-        elif len(contains) > 1:
+        status, matches = index.resolve(m)
+        if status == "resolved":
+            resolved_ids.append(matches[0][0])
+            resolved_titles.append(matches[0][1])
+        elif status == "ambiguous":
             ambiguous.append(m)
         else:
             unresolved.append(m)
@@ -159,11 +154,7 @@ def _resolve_user_doc_mentions(user_id: int, mentions: List[str]) -> Dict[str, A
 
 def _classify_query_intent(query: str) -> str:
     ql = (query or "").lower()
-    doc_markers = [
-        "rekap nilai", "nilai saya", "ipk saya", "ips saya", "transkrip",
-        "jadwal saya", "jadwal kelas", "mata kuliah", "khs", "krs", "sks",
-        "ruang", "jam", "semester",
-    ]
+    doc_markers = DOC_INTENT_MARKERS
     return "doc_targeted" if any(x in ql for x in doc_markers) else "general_academic"
 
 
@@ -224,17 +215,7 @@ def _needs_doc_grounding(query: str) -> bool:
 
 def _is_personal_document_query(query: str) -> bool:
     ql = (query or "").lower()
-    personal_markers = [
-        "saya",
-        "aku",
-        "punya saya",
-        "milik saya",
-        "ipk saya",
-        "ips saya",
-        "transkrip saya",
-        "jadwal saya",
-        "nilai saya",
-    ]
+    personal_markers = PERSONAL_MARKERS
     return any(m in ql for m in personal_markers)
 
 
@@ -252,30 +233,8 @@ def _classify_query_safety(query: str) -> Dict[str, Any]:
     if not q:
         return {"decision": "allow", "reason": "empty_query", "tags": []}
 
-    crime_patterns = [
-        r"\bjudi\b",
-        r"\bjudi online\b",
-        r"\bslot\b",
-        r"\btaruhan\b",
-        r"\bphishing\b",
-        r"\bcarding\b",
-        r"\bscam\b",
-        r"\bpenipuan\b",
-        r"\bhack(?:ing)?\b",
-        r"\bmeretas?\b",
-        r"\bbobol\b",
-        r"\bbypass\b",
-        r"\bexploit\b",
-        r"\bnarkoba\b",
-    ]
-    political_persuasion_patterns = [
-        r"\bkampanye\b",
-        r"\bpropaganda\b",
-        r"\bmanipulasi opini\b",
-        r"\bblack campaign\b",
-        r"\bmenangkan calon\b",
-        r"\bserang lawan politik\b",
-    ]
+    crime_patterns = list(CRIME_PATTERNS)
+    political_persuasion_patterns = list(POLITICAL_PERSUASION_PATTERNS)
 
     crime_hits = _contains_any_pattern(ql, crime_patterns)
     if crime_hits:
@@ -286,13 +245,7 @@ def _classify_query_safety(query: str) -> Dict[str, Any]:
         return {"decision": "refuse_political", "reason": "political_persuasion_request", "tags": political_hits}
 
     # Redirect pertanyaan absurd/non-akademik yang biasanya tidak bernilai untuk asisten kampus.
-    weird_markers = [
-        "ramalan hoki",
-        "cara jadi dukun",
-        "santet",
-        "pesugihan",
-        "cara hipnotis orang",
-    ]
+    weird_markers = list(WEIRD_MARKERS)
     if any(m in ql for m in weird_markers):
         return {"decision": "redirect_weird", "reason": "out_of_scope_weird_query", "tags": weird_markers}
 
@@ -355,7 +308,171 @@ def _polish_answer_text(answer: str) -> str:
     return text.strip()
 
 
-def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
+@dataclass(frozen=True)
+class RetrievalSettings:
+    dense_k: int
+    bm25_k: int
+    rerank_top_n: int
+    use_hybrid: bool
+    use_rerank: bool
+    use_query_rewrite: bool
+    rerank_model: str
+
+
+@dataclass
+class RetrievalResult:
+    docs: List[Any] = field(default_factory=list)
+    ranked_docs: List[Any] = field(default_factory=list)
+    dense_docs: List[Any] = field(default_factory=list)
+    bm25_hits: int = 0
+    top_score: float = 0.0
+    retrieval_ms: int = 0
+    rerank_ms: int = 0
+
+
+def _retrieval_settings(mode: str) -> RetrievalSettings:
+    dense_k = _env_int("RAG_DENSE_K", 30)
+    bm25_k = _env_int("RAG_BM25_K", 40)
+    rerank_top_n = _env_int("RAG_RERANK_TOP_N", 8)
+    use_hybrid = _env_bool("RAG_HYBRID_RETRIEVAL", default=False)
+    use_rerank = _env_bool("RAG_RERANK_ENABLED", default=False)
+    use_query_rewrite = _env_bool("RAG_QUERY_REWRITE", default=False)
+
+    if mode == "doc_background":
+        dense_k = _env_int("RAG_GENERAL_DENSE_K", 6)
+        bm25_k = _env_int("RAG_GENERAL_BM25_K", 8)
+        rerank_top_n = _env_int("RAG_GENERAL_RERANK_TOP_N", 4)
+        use_hybrid = _env_bool("RAG_GENERAL_HYBRID_RETRIEVAL", default=False)
+        use_rerank = _env_bool("RAG_GENERAL_RERANK_ENABLED", default=False)
+        use_query_rewrite = _env_bool("RAG_GENERAL_QUERY_REWRITE", default=False)
+    elif mode == "doc_referenced":
+        dense_k = _env_int("RAG_DOC_DENSE_K", 12)
+        bm25_k = _env_int("RAG_DOC_BM25_K", 20)
+        rerank_top_n = _env_int("RAG_DOC_RERANK_TOP_N", 4)
+        use_hybrid = _env_bool("RAG_DOC_HYBRID_RETRIEVAL", default=False)
+        use_rerank = _env_bool("RAG_DOC_RERANK_ENABLED", default=True)
+        use_query_rewrite = _env_bool("RAG_DOC_QUERY_REWRITE", default=False)
+
+    return RetrievalSettings(
+        dense_k=dense_k,
+        bm25_k=bm25_k,
+        rerank_top_n=rerank_top_n,
+        use_hybrid=use_hybrid,
+        use_rerank=use_rerank,
+        use_query_rewrite=use_query_rewrite,
+        rerank_model=str(os.environ.get("RAG_RERANK_MODEL", "BAAI/bge-reranker-v2-m3")).strip(),
+    )
+
+
+def retrieve_context(
+    *,
+    user_id,
+    query: str,
+    mode: str,
+    route: QueryRoute,
+    settings: RetrievalSettings,
+    resolved_doc_ids: List[int] | None = None,
+    vectorstore: Any = None,
+) -> RetrievalResult:
+    """
+    Bagian retrieval dari ask_bot (dense -> fallback filter -> BM25/RRF -> rerank)
+    tanpa LLM. Dipakai juga oleh harness evaluasi offline (`rag_eval`).
+    """
+    q = query
+    dense_k = settings.dense_k
+    bm25_k = settings.bm25_k
+    out = RetrievalResult()
+    if mode == "llm_only":
+        return out
+
+    dense_all: List[Any] = []
+    dense_scored = []
+    final_scored: List[Any] = []
+
+    vectorstore = vectorstore if vectorstore is not None else get_vectorstore(user_id=user_id)
+    # dokumen yang baru dihapus (vector belum di-compact) langsung dikecualikan dari hasil
+    dead_doc_ids = tombstoned_doc_ids(user_id)
+    chroma_where = exclude_tombstoned(
+        _build_chroma_filter(
+            user_id=user_id,
+            query=q,
+            doc_ids=resolved_doc_ids if resolved_doc_ids else None,
+            route=route,
+        ),
+        user_id,
+        dead_doc_ids,
+    )
+    fallback_where = exclude_tombstoned({"user_id": str(user_id)}, user_id, dead_doc_ids)
+
+    retrieval_t0 = time.time()
+    with span("retrieval"):
+        query_variants = list(route.query_variants) if settings.use_query_rewrite else [q]
+        with span("dense"):
+            for query_variant in query_variants:
+                scored = retrieve_dense(vectorstore=vectorstore, query=query_variant, k=dense_k, filter_where=chroma_where)
+                if scored:
+                    dense_scored.extend(scored)
+        dense_docs = [d for d, _ in dense_scored]
+        dense_docs = _dedup_docs(dense_docs)
+        dense_all.extend(dense_docs)
+
+        if not dense_all and chroma_where != fallback_where:
+            with span("dense_fallback"):
+                fallback_scored = retrieve_dense(
+                    vectorstore=vectorstore,
+                    query=q,
+                    k=dense_k,
+                    filter_where=fallback_where,
+                )
+            dense_all = _dedup_docs([d for d, _ in fallback_scored])
+            dense_scored = fallback_scored
+
+        final_docs = list(dense_all)
+        final_scored = list(dense_scored)
+        if settings.use_hybrid and dense_all:
+            with span("bm25"):
+                sparse_scored = retrieve_sparse_bm25(query=q, docs_pool=dense_all, k=bm25_k)
+            out.bm25_hits = len(sparse_scored)
+            with span("rrf"):
+                fused = fuse_rrf(dense_docs=dense_scored, sparse_docs=sparse_scored, k=max(dense_k, bm25_k))
+            final_docs = [d for d, _ in fused]
+            final_scored = list(fused)
+
+    out.retrieval_ms = int((time.time() - retrieval_t0) * 1000)
+
+    if settings.use_rerank and final_docs:
+        rerank_t0 = time.time()
+        with span("rerank"):
+            final_docs = rerank_documents(
+                query=q,
+                docs=final_docs[: max(dense_k, bm25_k)],
+                model_name=settings.rerank_model,
+                top_n=settings.rerank_top_n,
+            )
+        out.rerank_ms = int((time.time() - rerank_t0) * 1000)
+
+    final_limit = settings.rerank_top_n if settings.use_rerank else dense_k
+    out.dense_docs = dense_all
+    out.ranked_docs = final_docs
+    out.docs = final_docs[: max(1, final_limit)]
+    out.top_score = float(final_scored[0][1]) if final_scored else 0.0
+    if mode == "doc_background" and route.intent == "general_academic":
+        low_rel_threshold = float(os.environ.get("RAG_GENERAL_RELEVANCE_THRESHOLD", "0.18"))
+        if out.top_score < low_rel_threshold:
+            out.docs = []
+    return out
+
+
+def ask_bot(user_id, query, request_id: str = "-", route: QueryRoute | None = None) -> Dict[str, Any]:
+    """
+    `route` opsional: hasil `route_query(query)` dari caller (mis. chat_and_save)
+    supaya query tidak di-routing dua kali.
+    """
+    with start_trace("rag"):
+        return _ask_bot(user_id, query, request_id=request_id, route=route)
+
+
+def _ask_bot(user_id, query, request_id: str = "-", route: QueryRoute | None = None) -> Dict[str, Any]:
     runtime_cfg = get_runtime_openrouter_config()
     api_key = (runtime_cfg.get("api_key") or "").strip()
     if not api_key:
@@ -374,6 +491,7 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
             fallback_used=False,
             source_count=0,
             status_code=503,
+            stage_timings=stage_breakdown(),
         )
         return {
             "answer": "OpenRouter API key belum di-set. Atur di Django Admin (LLM Configuration) atau .env.",
@@ -381,19 +499,24 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
         }
 
     q_raw = (query or "").strip()
-    q, mentions = _extract_doc_mentions(q_raw)
+    with span("mention_parse"):
+        q, mentions = _extract_doc_mentions(q_raw)
     if not q:
         q = q_raw
     # Safety harus mengevaluasi query mentah supaya mention @... tidak menutupi niat berbahaya.
-    safety = _classify_query_safety(q_raw)
-    decision = str(safety.get("decision") or "allow")
+    with span("routing"):
+        raw_route = route if (route is not None and route.query == q_raw) else route_query(q_raw)
+        route = raw_route if q == q_raw else route_query(q)
+    safety = raw_route.safety()
+    decision = raw_route.safety_decision
 
     if decision in {"refuse_crime", "refuse_political", "redirect_weird"}:
         if decision == "redirect_weird":
             answer = _build_redirect_response(q)
         else:
             answer = _build_refusal_response(decision, q)
-        answer = _polish_answer_text(answer)
+        with span("polish"):
+            answer = _polish_answer_text(answer)
 
         logger.info(
             " RAG guard hit decision=%s reason=%s tags=%s",
@@ -417,10 +540,12 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
             fallback_used=False,
             source_count=0,
             status_code=200,
+            stage_timings=stage_breakdown(),
         )
         return {"answer": answer, "sources": [], "meta": {"mode": "guard"}}
 
-    mention_resolution = _resolve_user_doc_mentions(user_id, mentions)
+    with span("mention_resolution"):
+        mention_resolution = _resolve_user_doc_mentions(user_id, mentions)
     resolved_doc_ids = mention_resolution.get("resolved_doc_ids", [])
     unresolved_mentions = mention_resolution.get("unresolved_mentions", [])
     ambiguous_mentions = mention_resolution.get("ambiguous_mentions", [])
@@ -444,6 +569,7 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
             fallback_used=False,
             source_count=0,
             status_code=200,
+            stage_timings=stage_breakdown(),
         )
         return {
             "answer": answer,
@@ -456,46 +582,25 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
         }
 
     t0 = time.time()
-    has_docs = _has_user_documents(user_id)
-    query_intent = _classify_query_intent(q)
+    with span("has_user_documents"):
+        has_docs = _has_user_documents(user_id)
+    query_intent = route.intent
     mode = "llm_only"
     if has_docs and resolved_doc_ids:
         mode = "doc_referenced"
     elif has_docs:
         mode = "doc_background"
 
-    dense_k = _env_int("RAG_DENSE_K", 30)
-    bm25_k = _env_int("RAG_BM25_K", 40)
-    rerank_top_n = _env_int("RAG_RERANK_TOP_N", 8)
-    use_hybrid = _env_bool("RAG_HYBRID_RETRIEVAL", default=False)
-    use_rerank = _env_bool("RAG_RERANK_ENABLED", default=False)
-    use_query_rewrite = _env_bool("RAG_QUERY_REWRITE", default=False)
-
-    if mode == "doc_background":
-        dense_k = _env_int("RAG_GENERAL_DENSE_K", 6)
-        bm25_k = _env_int("RAG_GENERAL_BM25_K", 8)
-        rerank_top_n = _env_int("RAG_GENERAL_RERANK_TOP_N", 4)
-        use_hybrid = _env_bool("RAG_GENERAL_HYBRID_RETRIEVAL", default=False)
-        use_rerank = _env_bool("RAG_GENERAL_RERANK_ENABLED", default=False)
-        use_query_rewrite = _env_bool("RAG_GENERAL_QUERY_REWRITE", default=False)
-    elif mode == "doc_referenced":
-        dense_k = _env_int("RAG_DOC_DENSE_K", 12)
-        bm25_k = _env_int("RAG_DOC_BM25_K", 20)
-        rerank_top_n = _env_int("RAG_DOC_RERANK_TOP_N", 4)
-        use_hybrid = _env_bool("RAG_DOC_HYBRID_RETRIEVAL", default=False)
-        use_rerank = _env_bool("RAG_DOC_RERANK_ENABLED", default=True)
-        use_query_rewrite = _env_bool("RAG_DOC_QUERY_REWRITE", default=False)
-
-    rerank_model = str(os.environ.get("RAG_RERANK_MODEL", "BAAI/bge-reranker-v2-m3")).strip()
+    settings = _retrieval_settings(mode)
     query_preview = q if len(q) <= 140 else q[:140] + "..."
 
-    rag_mode = mode if mode == "llm_only" else ("hybrid" if use_hybrid else "dense")
+    rag_mode = mode if mode == "llm_only" else ("hybrid" if settings.use_hybrid else "dense")
     logger.info(
         " RAG start user_id=%s dense_k=%s bm25_k=%s rerank_n=%s mode=%s intent=%s mentions=%s resolved=%s q='%s'",
         user_id,
-        dense_k,
-        bm25_k,
-        rerank_top_n,
+        settings.dense_k,
+        settings.bm25_k,
+        settings.rerank_top_n,
         rag_mode,
         query_intent,
         len(mentions),
@@ -504,66 +609,20 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
         extra={"request_id": request_id},
     )
 
-    dense_all: List[Any] = []
-    dense_scored = []
-    final_docs: List[Any] = []
-    final_scored: List[Any] = []
-    bm25_hits = 0
-    retrieval_ms = 0
-    rerank_ms = 0
-
-    if mode != "llm_only":
-        vectorstore = get_vectorstore()
-        chroma_where = _build_chroma_filter(user_id=user_id, query=q, doc_ids=resolved_doc_ids if resolved_doc_ids else None)
-
-        retrieval_t0 = time.time()
-        query_variants = _rewrite_queries(q) if use_query_rewrite else [q]
-        for query_variant in query_variants:
-            scored = retrieve_dense(vectorstore=vectorstore, query=query_variant, k=dense_k, filter_where=chroma_where)
-            if scored:
-                dense_scored.extend(scored)
-        dense_docs = [d for d, _ in dense_scored]
-        dense_docs = _dedup_docs(dense_docs)
-        dense_all.extend(dense_docs)
-
-        if not dense_all and isinstance(chroma_where, dict) and "$and" in chroma_where:
-            fallback_scored = retrieve_dense(
-                vectorstore=vectorstore,
-                query=q,
-                k=dense_k,
-                filter_where={"user_id": str(user_id)},
-            )
-            dense_all = _dedup_docs([d for d, _ in fallback_scored])
-            dense_scored = fallback_scored
-
-        final_docs = list(dense_all)
-        final_scored = list(dense_scored)
-        if use_hybrid and dense_all:
-            sparse_scored = retrieve_sparse_bm25(query=q, docs_pool=dense_all, k=bm25_k)
-            bm25_hits = len(sparse_scored)
-            fused = fuse_rrf(dense_docs=dense_scored, sparse_docs=sparse_scored, k=max(dense_k, bm25_k))
-            final_docs = [d for d, _ in fused]
-            final_scored = list(fused)
-
-        retrieval_ms = int((time.time() - retrieval_t0) * 1000)
-
-        if use_rerank and final_docs:
-            rerank_t0 = time.time()
-            final_docs = rerank_documents(
-                query=q,
-                docs=final_docs[: max(dense_k, bm25_k)],
-                model_name=rerank_model,
-                top_n=rerank_top_n,
-            )
-            rerank_ms = int((time.time() - rerank_t0) * 1000)
-
-    final_limit = rerank_top_n if use_rerank else dense_k
-    docs = final_docs[: max(1, final_limit)]
-    top_score = float(final_scored[0][1]) if final_scored else 0.0
-    if mode == "doc_background" and query_intent == "general_academic":
-        low_rel_threshold = float(os.environ.get("RAG_GENERAL_RELEVANCE_THRESHOLD", "0.18"))
-        if top_score < low_rel_threshold:
-            docs = []
+    retrieved = retrieve_context(
+        user_id=user_id,
+        query=q,
+        mode=mode,
+        route=route,
+        settings=settings,
+        resolved_doc_ids=resolved_doc_ids,
+    )
+    docs = retrieved.docs
+    dense_all = retrieved.dense_docs
+    bm25_hits = retrieved.bm25_hits
+    retrieval_ms = retrieved.retrieval_ms
+    rerank_ms = retrieved.rerank_ms
+    top_score = retrieved.top_score
 
     sources = build_sources_from_docs(docs)
 
@@ -621,7 +680,8 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
                     "Instruksi: prioritaskan dokumen rujukan ini sebagai sumber utama; "
                     "jika tidak cukup, jelaskan batasannya lalu beri fallback umum."
                 )
-            result = qa_chain.invoke({"input": q_for_prompt, "context": docs})
+            with span("llm_generate"):
+                result = qa_chain.invoke({"input": q_for_prompt, "context": docs})
 
             if isinstance(result, dict):
                 answer = result.get("answer") or result.get("output_text") or ""
@@ -635,11 +695,12 @@ def ask_bot(user_id, query, request_id: str = "-") -> Dict[str, Any]:
                     "berdasarkan konteks yang sama. Jangan tambah fakta baru.\n\n"
                     f"Jawaban saat ini:\n{answer}"
                 )
-                cited = invoke_text(llm, citation_prompt).strip()
+                with span("citation_repair"):
+                    cited = invoke_text(llm, citation_prompt).strip()
                 if cited and _has_citation(cited):
                     answer = cited
 
-            if (not docs) and _needs_doc_grounding(q) and _is_personal_document_query(q):
+            if (not docs) and route.needs_doc_grounding and route.is_personal:
                 answer = (
                     f"{answer}\n\n"
                     "Catatan: untuk analisis personal yang akurat (jadwal/nilai milikmu), "
@@ -666,11 +727,13 @@ Aturan:
 JAWABAN:
 {answer}
 """
-                enriched = invoke_text(llm, enrich_prompt).strip()
+                with span("table_enrichment"):
+                    enriched = invoke_text(llm, enrich_prompt).strip()
                 if enriched:
                     answer = enriched
 
-            answer = _polish_answer_text(answer)
+            with span("polish"):
+                answer = _polish_answer_text(answer)
 
             model_dur = round(time.time() - model_t0, 2)
             total_dur = round(time.time() - t0, 2)
@@ -681,6 +744,13 @@ JAWABAN:
             )
             llm_model_name = model_name
             llm_time_ms = int((time.time() - model_t0) * 1000)
+            stage_timings = stage_breakdown()
+            if stage_timings:
+                logger.info(
+                    " RAG stages %s",
+                    format_breakdown(stage_timings),
+                    extra={"request_id": request_id},
+                )
 
             if idx > 0:
                 logger.warning(
@@ -705,6 +775,7 @@ JAWABAN:
                 fallback_used=fallback_used,
                 source_count=len(sources),
                 status_code=200,
+                stage_timings=stage_timings,
             )
 
             if mode == "doc_referenced" and not docs:
@@ -769,6 +840,7 @@ JAWABAN:
         fallback_used=fallback_used,
         source_count=len(sources),
         status_code=500,
+        stage_timings=stage_breakdown(),
     )
 
     return llm_fallback_message(last_error)
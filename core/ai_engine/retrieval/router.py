@@ -0,0 +1,324 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .rules import _GRADE_KEYWORDS, _SEMESTER_RE, _TARGET_LETTER_RE, _TARGET_NUM_RE
+
+# =========================
+# Query router (single pass)
+# =========================
+# Semua tabel keyword yang sebelumnya dicek terpisah (safety, intent, doc type,
+# grade rescue, personal query, query rewrite) digabung jadi satu regex literal.
+# Query cukup di-scan sekali; hasilnya berupa himpunan label yang dipakai untuk
+# membangun keputusan routing.
+
+CRIME_PATTERNS: Tuple[str, ...] = (
+    r"\bjudi\b",
+    r"\bjudi online\b",
+    r"\bslot\b",
+    r"\btaruhan\b",
+    r"\bphishing\b",
+    r"\bcarding\b",
+    r"\bscam\b",
+    r"\bpenipuan\b",
+    r"\bhack(?:ing)?\b",
+    r"\bmeretas?\b",
+    r"\bbobol\b",
+    r"\bbypass\b",
+    r"\bexploit\b",
+    r"\bnarkoba\b",
+)
+POLITICAL_PERSUASION_PATTERNS: Tuple[str, ...] = (
+    r"\bkampanye\b",
+    r"\bpropaganda\b",
+    r"\bmanipulasi opini\b",
+    r"\bblack campaign\b",
+    r"\bmenangkan calon\b",
+    r"\bserang lawan politik\b",
+)
+# Ekspansi literal dari pattern di atas; setiap literal dicocokkan dengan batas kata.
+_PATTERN_LITERALS: Dict[str, Tuple[str, ...]] = {
+    r"\bhack(?:ing)?\b": ("hack", "hacking"),
+    r"\bmeretas?\b": ("mereta", "meretas"),
+}
+WEIRD_MARKERS: Tuple[str, ...] = (
+    "ramalan hoki",
+    "cara jadi dukun",
+    "santet",
+    "pesugihan",
+    "cara hipnotis orang",
+)
+DOC_INTENT_MARKERS: Tuple[str, ...] = (
+    "rekap nilai", "nilai saya", "ipk saya", "ips saya", "transkrip",
+    "jadwal saya", "jadwal kelas", "mata kuliah", "khs", "krs", "sks",
+    "ruang", "jam", "semester",
+)
+PERSONAL_MARKERS: Tuple[str, ...] = (
+    "saya",
+    "aku",
+    "punya saya",
+    "milik saya",
+    "ipk saya",
+    "ips saya",
+    "transkrip saya",
+    "jadwal saya",
+    "nilai saya",
+)
+SCHEDULE_KEYWORDS: Tuple[str, ...] = ("jadwal", "jam", "hari", "ruang", "kelas")
+TRANSCRIPT_KEYWORDS: Tuple[str, ...] = ("transkrip", "nilai", "grade", "bobot", "ipk", "ips")
+ASSESSMENT_KEYWORDS: Tuple[str, ...] = ("uts", "uas", "quiz", "tugas", "nilai")
+WEIGHT_KEYWORDS: Tuple[str, ...] = ("bobot", "weight")
+# Kata pemicu regex struktural (dicek hanya kalau pemicunya muncul di query).
+_TARGET_NUM_TRIGGERS: Tuple[str, ...] = ("final",)
+_TARGET_LETTER_TRIGGERS: Tuple[str, ...] = ("supaya", "agar")
+# (kata pemicu, kata penghalang, suffix) untuk query rewrite.
+REWRITE_RULES: Tuple[Tuple[str, str, str], ...] = (
+    ("jam", "waktu", " waktu kuliah"),
+    ("hari", "day", " day schedule"),
+    ("kelas", "ruang", " ruang kelas"),
+)
+
+_WORD_RE = re.compile(r"\w")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    # Alternation berbentuk trie: di tiap posisi sre cukup membandingkan satu karakter per
+    # cabang, dan quantifier greedy menghasilkan literal terpanjang lebih dulu.
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _keyword_entries() -> List[Tuple[str, str, bool]]:
+    # (label, literal, butuh batas kata)
+    entries: List[Tuple[str, str, bool]] = []
+    for group, patterns in (("crime", CRIME_PATTERNS), ("political", POLITICAL_PERSUASION_PATTERNS)):
+        for p in patterns:
+            literals = _PATTERN_LITERALS.get(p) or (p[2:-2],)
+            for lit in literals:
+                entries.append((f"{group}:{p}", lit, True))
+    tables = (
+        ("weird", WEIRD_MARKERS),
+        ("intent", DOC_INTENT_MARKERS),
+        ("personal", PERSONAL_MARKERS),
+        ("schedule", SCHEDULE_KEYWORDS + ("krs",)),
+        ("transcript", TRANSCRIPT_KEYWORDS),
+        ("grade", tuple(_GRADE_KEYWORDS)),
+        ("assessment", ASSESSMENT_KEYWORDS),
+        ("weight", WEIGHT_KEYWORDS),
+        ("target", ("target",)),
+        ("target_num", _TARGET_NUM_TRIGGERS),
+        ("target_letter", _TARGET_LETTER_TRIGGERS),
+        ("semester", ("semester",)),
+    )
+    for group, words in tables:
+        for w in words:
+            entries.append((f"{group}:{w}", w, False))
+    for trigger, blocker, _suffix in REWRITE_RULES:
+        entries.append((f"word:{trigger}", trigger, False))
+        entries.append((f"word:{blocker}", blocker, False))
+    return entries
+
+
+class KeywordScanner:
+    """
+    Multi-keyword matcher satu pass berbasis regex lookahead.
+
+    Lookahead membuat regex dicoba di setiap posisi (match boleh overlap). Di satu
+    posisi regex hanya melaporkan literal terpanjang, jadi literal lain yang berada
+    di dalam literal tersebut diturunkan lewat tabel `_actions` yang dihitung saat
+    build. Hasilnya setara dengan `kw in text` / `re.search(r"\\bkw\\b", text)` per
+    keyword.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, bool]]):
+        sub_labels: Dict[str, Set[str]] = {}
+        bnd_labels: Dict[str, Set[str]] = {}
+        for label, literal, boundary in entries:
+            literal = literal.lower()
+            if boundary and not (_WORD_RE.match(literal[0]) and _WORD_RE.match(literal[-1])):
+                raise ValueError(f"literal batas kata harus diawali/diakhiri huruf: {literal!r}")
+            target = bnd_labels if boundary else sub_labels
+            target.setdefault(literal, set()).add(label)
+            sub_labels.setdefault(literal, set())
+            bnd_labels.setdefault(literal, set())
+
+        literals = sorted(sub_labels, key=lambda x: (-len(x), x))
+
+        # Per literal: label substring yang ikut ter-match (tanpa syarat) + daftar
+        # (offset, panjang, label) untuk literal batas kata yang perlu dicek di teks.
+        self._actions: Dict[str, Tuple[FrozenSet[str], Tuple[Tuple[int, int, FrozenSet[str]], ...]]] = {}
+        for outer in literals:
+            sub: Set[str] = set()
+            bounded: List[Tuple[int, int, FrozenSet[str]]] = []
+            for inner in literals:
+                if len(inner) > len(outer):
+                    continue
+                off = outer.find(inner)
+                if off < 0:
+                    continue
+                sub |= sub_labels[inner]
+                while off >= 0 and bnd_labels[inner]:
+                    bounded.append((off, len(inner), frozenset(bnd_labels[inner])))
+                    off = outer.find(inner, off + 1)
+            self._actions[outer] = (frozenset(sub), tuple(bounded))
+
+        self._re = re.compile(f"(?=({_trie_pattern(literals)}))")
+
+    @staticmethod
+    def _at_boundary(text: str, start: int, end: int) -> bool:
+        if start > 0 and _WORD_RE.match(text[start - 1]):
+            return False
+        if end < len(text) and _WORD_RE.match(text[end]):
+            return False
+        return True
+
+    def scan(self, text: str) -> Set[str]:
+        labels: Set[str] = set()
+        for m in self._re.finditer(text):
+            sub_labels, bounded = self._actions[m.group(1)]
+            labels |= sub_labels
+            if bounded:
+                pos = m.start()
+                for off, size, bnd_labels in bounded:
+                    if self._at_boundary(text, pos + off, pos + off + size):
+                        labels |= bnd_labels
+        return labels
+
+
+_SCANNER = KeywordScanner(_keyword_entries())
+
+
+def _labels(group: str, words: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(f"{group}:{w}" for w in words)
+
+
+_WEIRD_LABELS = _labels("weird", WEIRD_MARKERS)
+_INTENT_LABELS = _labels("intent", DOC_INTENT_MARKERS)
+_PERSONAL_LABELS = _labels("personal", PERSONAL_MARKERS)
+_SCHEDULE_LABELS = _labels("schedule", SCHEDULE_KEYWORDS)
+_TRANSCRIPT_LABELS = _labels("transcript", TRANSCRIPT_KEYWORDS)
+_GRADE_LABELS = _labels("grade", _GRADE_KEYWORDS)
+_ASSESSMENT_LABELS = _labels("assessment", ASSESSMENT_KEYWORDS)
+_WEIGHT_LABELS = _labels("weight", WEIGHT_KEYWORDS)
+_TARGET_NUM_LABELS = _labels("target_num", _TARGET_NUM_TRIGGERS)
+_TARGET_LETTER_LABELS = _labels("target_letter", _TARGET_LETTER_TRIGGERS)
+_CRIME_LABELS = tuple((p, f"crime:{p}") for p in CRIME_PATTERNS)
+_POLITICAL_LABELS = tuple((p, f"political:{p}") for p in POLITICAL_PERSUASION_PATTERNS)
+_REWRITE_LABELS = tuple((f"word:{t}", f"word:{b}", suffix) for t, b, suffix in REWRITE_RULES)
+
+
+@dataclass(frozen=True)
+class QueryRoute:
+    query: str
+    safety_decision: str
+    safety_reason: str
+    safety_tags: Tuple[str, ...]
+    intent: str
+    doc_type: Optional[str]
+    semester: Optional[int]
+    is_grade_rescue: bool
+    is_personal: bool
+    query_variants: Tuple[str, ...]
+
+    @property
+    def needs_doc_grounding(self) -> bool:
+        return self.doc_type in {"schedule", "transcript"}
+
+    @property
+    def is_blocked(self) -> bool:
+        return self.safety_decision in {"refuse_crime", "refuse_political", "redirect_weird"}
+
+    def safety(self) -> Dict[str, Any]:
+        return {"decision": self.safety_decision, "reason": self.safety_reason, "tags": list(self.safety_tags)}
+
+
+def _route_safety(q: str, labels: Set[str]) -> Tuple[str, str, Tuple[str, ...]]:
+    if not q:
+        return "allow", "empty_query", ()
+    crime_hits = tuple(p for p, label in _CRIME_LABELS if label in labels)
+    if crime_hits:
+        return "refuse_crime", "crime_or_harmful_request", crime_hits
+    political_hits = tuple(p for p, label in _POLITICAL_LABELS if label in labels)
+    if political_hits:
+        return "refuse_political", "political_persuasion_request", political_hits
+    if not labels.isdisjoint(_WEIRD_LABELS):
+        return "redirect_weird", "out_of_scope_weird_query", WEIRD_MARKERS
+    return "allow", "safe", ()
+
+
+def _route_doc_type(labels: Set[str]) -> Optional[str]:
+    if not labels.isdisjoint(_SCHEDULE_LABELS):
+        return "schedule"
+    if not labels.isdisjoint(_TRANSCRIPT_LABELS):
+        return "transcript"
+    if "schedule:krs" in labels:
+        return "schedule"
+    return None
+
+
+def _route_grade_rescue(ql: str, labels: Set[str]) -> bool:
+    if not labels.isdisjoint(_GRADE_LABELS):
+        return True
+    if labels.isdisjoint(_ASSESSMENT_LABELS) and labels.isdisjoint(_WEIGHT_LABELS):
+        return False
+    if "target:target" in labels:
+        return True
+    if not labels.isdisjoint(_TARGET_NUM_LABELS) and _TARGET_NUM_RE.search(ql):
+        return True
+    if not labels.isdisjoint(_TARGET_LETTER_LABELS) and _TARGET_LETTER_RE.search(ql):
+        return True
+    return False
+
+
+def _route_semester(q: str, labels: Set[str]) -> Optional[int]:
+    if "semester:semester" not in labels:
+        return None
+    m = _SEMESTER_RE.search(q)
+    if not m:
+        return None
+    try:
+        return int(m.group(1))
+    except Exception:
+        return None
+
+
+def _route_query_variants(q: str, labels: Set[str]) -> Tuple[str, ...]:
+    if not q:
+        return ()
+    variants = [q]
+    for trigger, blocker, suffix in _REWRITE_LABELS:
+        if trigger in labels and blocker not in labels:
+            variants.append(q + suffix)
+    return tuple(dict.fromkeys([v.strip() for v in variants if v.strip()]))[:3]
+
+
+def route_query(query: str) -> QueryRoute:
+    q = (query or "").strip()
+    ql = q.lower()
+    labels = _SCANNER.scan(ql) if ql else set()
+    decision, reason, tags = _route_safety(q, labels)
+    return QueryRoute(
+        query=q,
+        safety_decision=decision,
+        safety_reason=reason,
+        safety_tags=tags,
+        intent="general_academic" if labels.isdisjoint(_INTENT_LABELS) else "doc_targeted",
+        doc_type=_route_doc_type(labels),
+        semester=_route_semester(q, labels),
+        is_grade_rescue=_route_grade_rescue(ql, labels),
+        is_personal=not labels.isdisjoint(_PERSONAL_LABELS),
+        query_variants=_route_query_variants(q, labels),
+    )
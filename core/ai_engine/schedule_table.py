@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import json
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+# =========================
+# Columnar schedule table
+# =========================
+# Row jadwal disimpan per kolom (list per field canonical) alih-alih satu dict per row.
+# Nilai string dinormalisasi spasi sekali saat masuk, jadi tahap berikutnya (repair, row/
+# parent chunk, CSV canonical) tidak perlu _norm ulang. Nilai berulang (hari, jam, sesi,
+# ruang, ...) di-intern per tabel sehingga ribuan row berbagi objek string yang sama.
+# Field di luar SCHEDULE_FIELDS (raw, fallback, _confidence, ...) disimpan apa adanya di
+# dict `extra` yang hanya dibuat untuk row yang membutuhkannya.
+
+SCHEDULE_FIELDS: Tuple[str, ...] = (
+    "page",
+    "hari",
+    "sesi",
+    "jam",
+    "kode",
+    "mata_kuliah",
+    "sks",
+    "dosen",
+    "kelas",
+    "ruang",
+    "semester",
+)
+_FIELD_BIT = {name: 1 << i for i, name in enumerate(SCHEDULE_FIELDS)}
+_INTERNED_FIELDS = frozenset({"hari", "sesi", "jam", "sks", "kelas", "ruang", "semester"})
+_MISSING = object()
+
+# versi format serialisasi compact metadata `schedule_rows` (blok teks JSON_CANONICAL tetap list of dict)
+SERIAL_VERSION = 1
+
+
+def clean_text(value: Any) -> str:
+    # setara ingest._norm: str.split() memecah di whitespace unicode yang sama dengan \s
+    text = "" if value is None else str(value)
+    cleaned = " ".join(text.split())
+    # string yang sudah bersih dipakai apa adanya (tidak menahan salinan baru)
+    return text if cleaned == text else cleaned
+
+
+class ScheduleRow(MutableMapping):
+    """View satu row di ScheduleTable; perilakunya seperti dict (get/[]/in/update/items)."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ScheduleTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._table.value(self._index, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._table.value(self._index, key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._table.set(self._index, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._table.unset(self._index, key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._table.has(self._index, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.row_keys(self._index))
+
+    def __len__(self) -> int:
+        return len(self._table.row_keys(self._index))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ScheduleRow({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._table.row_dict(self._index)
+
+
+class ScheduleTable:
+    __slots__ = ("_cols", "_mask", "_extra", "_pool")
+
+    def __init__(self, rows: Optional[Iterable[Mapping[str, Any]]] = None):
+        self._cols: Dict[str, List[Any]] = {name: [] for name in SCHEDULE_FIELDS}
+        # bit field mana yang terisi per row (unsigned short, tanpa objek int per row)
+        self._mask = array("H")
+        self._extra: List[Optional[Dict[str, Any]]] = []
+        self._pool: Dict[str, str] = {}
+        for row in rows or ():
+            self.append(row)
+
+    @classmethod
+    def from_rows(cls, rows: Union["ScheduleTable", Iterable[Mapping[str, Any]], None]) -> "ScheduleTable":
+        if isinstance(rows, ScheduleTable):
+            return rows
+        return cls(r for r in (rows or ()) if isinstance(r, Mapping))
+
+    # ---------- write ----------
+    def _store(self, key: str, value: Any) -> Any:
+        if key == "page":
+            try:
+                return int(value or 0)
+            except (TypeError, ValueError):
+                return 0
+        if not (value is None or isinstance(value, (str, int, float))):
+            return value
+        value = clean_text(value)
+        if key in _INTERNED_FIELDS:
+            return self._pool.setdefault(value, value)
+        return value
+
+    def append(self, fields: Mapping[str, Any]) -> int:
+        index = len(self._mask)
+        mask = 0
+        extra: Optional[Dict[str, Any]] = None
+        for name in SCHEDULE_FIELDS:
+            value = fields.get(name, _MISSING)
+            if value is _MISSING:
+                self._cols[name].append(0 if name == "page" else "")
+            else:
+                self._cols[name].append(self._store(name, value))
+                mask |= _FIELD_BIT[name]
+        for key, value in fields.items():
+            if key not in _FIELD_BIT:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._mask.append(mask)
+        self._extra.append(extra)
+        return index
+
+    def set(self, index: int, key: str, value: Any) -> None:
+        bit = _FIELD_BIT.get(key)
+        if bit is None:
+            extra = self._extra[index]
+            if extra is None:
+                extra = self._extra[index] = {}
+            extra[key] = value
+            return
+        self._cols[key][index] = self._store(key, value)
+        self._mask[index] |= bit
+
+    def unset(self, index: int, key: str) -> None:
+        bit = _FIELD_BIT.get(key)
+        if bit is None:
+            extra = self._extra[index]
+            if not extra or key not in extra:
+                raise KeyError(key)
+            del extra[key]
+            return
+        if not self._mask[index] & bit:
+            raise KeyError(key)
+        self._cols[key][index] = 0 if key == "page" else ""
+        self._mask[index] &= ~bit
+
+    # ---------- read ----------
+    def __len__(self) -> int:
+        return len(self._mask)
+
+    def __bool__(self) -> bool:
+        return bool(self._mask)
+
+    def __iter__(self) -> Iterator[ScheduleRow]:
+        for i in range(len(self._mask)):
+            yield ScheduleRow(self, i)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [ScheduleRow(self, i) for i in range(*index.indices(len(self._mask)))]
+        if index < 0:
+            index += len(self._mask)
+        if not 0 <= index < len(self._mask):
+            raise IndexError(index)
+        return ScheduleRow(self, index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ScheduleTable):
+            return self.to_dicts() == other.to_dicts()
+        if isinstance(other, list):
+            return self.to_dicts() == [dict(r) for r in other]
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ScheduleTable(rows={len(self)})"
+
+    def column(self, name: str) -> List[Any]:
+        """Kolom canonical apa adanya (jangan dimodifikasi); nilai kosong = ""."""
+        return self._cols[name]
+
+    def extra(self, index: int) -> Optional[Dict[str, Any]]:
+        return self._extra[index]
+
+    def has(self, index: int, key: str) -> bool:
+        bit = _FIELD_BIT.get(key)
+        if bit is not None:
+            return bool(self._mask[index] & bit)
+        extra = self._extra[index]
+        return bool(extra) and key in extra
+
+    def value(self, index: int, key: str, default: Any = "") -> Any:
+        bit = _FIELD_BIT.get(key)
+        if bit is not None:
+            return self._cols[key][index] if self._mask[index] & bit else default
+        extra = self._extra[index]
+        if extra and key in extra:
+            return extra[key]
+        return default
+
+    def row_keys(self, index: int) -> List[str]:
+        mask = self._mask[index]
+        keys = [name for name in SCHEDULE_FIELDS if mask & _FIELD_BIT[name]]
+        extra = self._extra[index]
+        if extra:
+            keys.extend(extra)
+        return keys
+
+    def row_dict(self, index: int) -> Dict[str, Any]:
+        return {key: self.value(index, key) for key in self.row_keys(index)}
+
+    def to_dicts(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        n = len(self) if limit is None else min(len(self), max(int(limit), 0))
+        return [self.row_dict(i) for i in range(n)]
+
+    # ---------- serialization ----------
+    def encode(self, *limits: int) -> List[str]:
+        """
+        Serialisasi compact `{"v", "columns", "rows": [[...], ...]}` untuk beberapa batas
+        jumlah row sekaligus; tiap row di-encode satu kali dan dipakai ulang di semua output.
+        """
+        n = min(len(self), max((int(x) for x in limits), default=0))
+        extra_keys: List[str] = []
+        seen = set()
+        for i in range(n):
+            extra = self._extra[i]
+            if extra:
+                for key in extra:
+                    if key not in seen:
+                        seen.add(key)
+                        extra_keys.append(key)
+        columns = list(SCHEDULE_FIELDS) + extra_keys
+        cols = [self._cols[name] for name in SCHEDULE_FIELDS]
+        dumps = json.JSONEncoder(ensure_ascii=True, separators=(",", ":"), default=str).encode
+        encoded: List[str] = []
+        for i in range(n):
+            values = [col[i] for col in cols]
+            if extra_keys:
+                extra = self._extra[i] or {}
+                values.extend(extra.get(key, "") for key in extra_keys)
+            encoded.append(dumps(values))
+        head = '{"v":%d,"columns":%s,"rows":[' % (SERIAL_VERSION, dumps(columns))
+        return [head + ",".join(encoded[: max(int(x), 0)]) + "]}" for x in limits]
+
+
+def decode_rows(payload: str) -> List[Dict[str, Any]]:
+    """Kebalikan ScheduleTable.encode untuk pembaca metadata (kolom kosong tidak dibuang)."""
+    data = json.loads(payload or "{}")
+    if isinstance(data, list):  # format lama: list of dict
+        return [r for r in data if isinstance(r, dict)]
+    columns = data.get("columns") or []
+    return [dict(zip(columns, row)) for row in data.get("rows") or []]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    psutil = None  # type: ignore
+
+T = TypeVar("T")
+
+# =========================
+# Stage meter untuk pipeline generator
+# =========================
+# Tahap ingest disambung sebagai generator (parse -> chunk -> batch -> embed -> store).
+# Generator bersifat pull: tahap hilir baru meminta item berikutnya setelah batch sebelumnya
+# selesai ditulis, jadi tahap hulu tidak pernah berjalan lebih dari satu batch di depan
+# (backpressure alami tanpa antrian). Karena tahap saling menyela, durasi dihitung
+# eksklusif: waktu selalu dibebankan ke tahap yang sedang aktif di puncak stack.
+#
+# Meter juga menyimpan peak RSS per dokumen: RSS saat ini (psutil) disampling per batch dan
+# diambil max-nya. ru_maxrss tidak dipakai karena itu high-water mark seumur proses.
+
+
+class StageMeter:
+    __slots__ = ("timings", "items", "peak_rss_mb", "_stack", "_t")
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.items: Dict[str, int] = {}
+        self.peak_rss_mb: Optional[float] = None
+        self._stack: List[str] = []
+        self._t = time.perf_counter()
+
+    def _charge(self) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            name = self._stack[-1]
+            self.timings[name] = self.timings.get(name, 0.0) + (now - self._t) * 1000.0
+        self._t = now
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._charge()
+        self._stack.append(name)
+        self.timings.setdefault(name, 0.0)
+        try:
+            yield
+        finally:
+            self._charge()
+            self._stack.pop()
+
+    def iterate(self, name: str, source: Iterable[T]) -> Iterator[T]:
+        """Bungkus generator tahap `name`: waktu tiap next() + jumlah item dicatat ke tahap itu."""
+        it = iter(source)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            self.items[name] = self.items.get(name, 0) + 1
+            yield item
+
+    def sample_rss(self) -> None:
+        if psutil is None:
+            return
+        try:
+            current = round(psutil.Process().memory_info().rss / (1024.0 * 1024.0), 1)
+        except Exception:
+            return
+        if self.peak_rss_mb is None or current > self.peak_rss_mb:
+            self.peak_rss_mb = current
+
+    def breakdown(self) -> Dict[str, float]:
+        return {k: round(v, 2) for k, v in self.timings.items()}
+
+
+class _NullMeter(StageMeter):
+    __slots__ = ()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def iterate(self, name: str, source: Iterable[T]) -> Iterator[T]:
+        return iter(source)
+
+    def sample_rss(self) -> None:
+        return None
+
+
+NULL_METER = _NullMeter()
+
+
+def batched(source: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Kelompokkan item jadi list maksimal `size`; hanya satu batch yang dipegang sekaligus."""
+    size = max(int(size), 1)
+    batch: List[T] = []
+    for item in source:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def meter_or_null(meter: Optional[StageMeter]) -> StageMeter:
+    return meter if meter is not None else NULL_METER
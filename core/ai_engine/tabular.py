@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import datetime as dt
+import logging
+from typing import Any, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Streaming reader spreadsheet (xlsx/xls/csv)
+# =========================
+# Baris dibaca satu per satu sebagai list[str] (tanpa DataFrame) supaya file besar tidak
+# dimuat utuh ke memori. Pemetaan header -> kolom canonical dan pembentukan chunk row/parent
+# tetap dikerjakan di ingest._parse_tabular.
+
+SheetRows = Tuple[str, Iterator[List[str]]]
+
+_SNIFF_BYTES = 64 * 1024
+_CSV_DELIMITERS = ",;\t|"
+
+
+def cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        return str(int(value)) if value.is_integer() else str(value)
+    if isinstance(value, dt.datetime):
+        return value.isoformat(sep=" ", timespec="minutes") if (value.hour or value.minute) else value.date().isoformat()
+    if isinstance(value, dt.time):
+        return value.strftime("%H:%M")
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def sniff_csv(file_path: str) -> Tuple[str, Any]:
+    """
+    Tentukan encoding + dialect dari potongan awal file (sekali baca), menggantikan
+    percobaan read_csv berulang dengan separator/encoding berbeda.
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(_SNIFF_BYTES)
+
+    encoding = "utf-8-sig"
+    try:
+        # incremental decoder: karakter multi-byte yang terpotong di akhir sampel tidak dianggap error
+        text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    except UnicodeDecodeError:
+        encoding = "latin-1"
+        text = sample.decode(encoding)
+
+    try:
+        dialect = csv.Sniffer().sniff(text, delimiters=_CSV_DELIMITERS)
+    except csv.Error:
+        first_line = text.splitlines()[0] if text else ""
+        delimiter = max(_CSV_DELIMITERS, key=first_line.count) if first_line else ","
+        if not first_line.count(delimiter):
+            delimiter = ","
+
+        class _Fallback(csv.excel):
+            pass
+
+        _Fallback.delimiter = delimiter
+        dialect = _Fallback
+    return encoding, dialect
+
+
+def iter_csv_rows(file_path: str) -> Iterator[List[str]]:
+    encoding, dialect = sniff_csv(file_path)
+    with open(file_path, "r", encoding=encoding, errors="replace", newline="") as f:
+        for row in csv.reader(f, dialect):
+            yield [cell_text(c) for c in row]
+
+
+def _iter_xlsx_sheet(ws) -> Iterator[List[str]]:
+    for row in ws.iter_rows(values_only=True):
+        yield [cell_text(c) for c in row]
+
+
+def iter_xlsx_sheets(file_path: str) -> Iterator[SheetRows]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield str(ws.title or ""), _iter_xlsx_sheet(ws)
+    finally:
+        wb.close()
+
+
+def iter_xls_sheets(file_path: str) -> Iterator[SheetRows]:
+    # format .xls lama tidak didukung openpyxl; baca per sheet lewat pandas (butuh xlrd)
+    import pandas as pd
+
+    book = pd.ExcelFile(file_path)
+    try:
+        for name in book.sheet_names:
+            df = book.parse(name, header=None, dtype=object)
+            yield str(name), ([cell_text(c) for c in row] for row in df.itertuples(index=False, name=None))
+    finally:
+        book.close()
+
+
+def iter_tabular_sheets(file_path: str, ext: str) -> Iterator[SheetRows]:
+    """
+    Yield (nama_sheet, iterator baris) untuk csv/xlsx/xls. CSV dianggap satu sheet tanpa nama.
+    Iterator baris sheet harus dihabiskan sebelum lanjut ke sheet berikutnya.
+    """
+    ext = str(ext or "").lower()
+    if ext == "csv":
+        yield "", iter_csv_rows(file_path)
+    elif ext == "xlsx":
+        yield from iter_xlsx_sheets(file_path)
+    elif ext == "xls":
+        yield from iter_xls_sheets(file_path)
+    else:
+        raise ValueError(f"bukan file tabular: {ext}")
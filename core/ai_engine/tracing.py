@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+# =========================
+# Stage tracing (per request)
+# =========================
+# Span dicatat ke trace aktif milik context saat ini (aman untuk thread/async karena
+# memakai contextvars). Tanpa trace aktif, `span()` mengembalikan objek no-op bersama
+# sehingga overhead di hot path hanya satu ContextVar.get().
+
+_ACTIVE_TRACE: ContextVar[Optional["Trace"]] = ContextVar("rag_active_trace", default=None)
+_SPAN_PATH: ContextVar[str] = ContextVar("rag_span_path", default="")
+# listener opsional yang dipanggil saat span dimulai (mis. update progress job ingest)
+_SPAN_LISTENER: ContextVar[Optional[Callable[[str], None]]] = ContextVar("rag_span_listener", default=None)
+
+
+def tracing_enabled() -> bool:
+    return (os.environ.get("RAG_TRACE_ENABLED", "1") or "1").strip().lower() in {"1", "true", "yes", "on"}
+
+
+class Trace:
+    __slots__ = ("name", "stages", "counts", "_t0", "_lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, elapsed_ms: float) -> None:
+        # Span dengan nama sama (mis. retrieve per query variant) diakumulasi.
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def breakdown(self) -> Dict[str, float]:
+        with self._lock:
+            out = {k: round(v, 2) for k, v in self.stages.items()}
+        out["total"] = round(self.elapsed_ms(), 2)
+        return out
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_path", "_token", "_t0")
+
+    def __init__(self, trace: Trace, name: str):
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self):
+        parent = _SPAN_PATH.get()
+        self._path = f"{parent}.{self._name}" if parent else self._name
+        self._token = _SPAN_PATH.set(self._path)
+        listener = _SPAN_LISTENER.get()
+        if listener is not None:
+            try:
+                listener(self._path)
+            except Exception:
+                pass
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._trace.add(self._path, (time.perf_counter() - self._t0) * 1000.0)
+        _SPAN_PATH.reset(self._token)
+        return False
+
+
+def span(name: str):
+    """
+    Context manager untuk satu tahap pipeline. Span bersarang membentuk nama
+    bertitik, contoh `retrieval.dense.embed_query`.
+    """
+    trace = _ACTIVE_TRACE.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name)
+
+
+@contextmanager
+def start_trace(name: str = "request") -> Iterator[Optional[Trace]]:
+    if not tracing_enabled():
+        yield None
+        return
+    trace = Trace(name)
+    trace_token = _ACTIVE_TRACE.set(trace)
+    path_token = _SPAN_PATH.set("")
+    try:
+        yield trace
+    finally:
+        _SPAN_PATH.reset(path_token)
+        _ACTIVE_TRACE.reset(trace_token)
+
+
+@contextmanager
+def on_span_start(listener: Callable[[str], None]) -> Iterator[None]:
+    """
+    Daftarkan listener `listener(path)` untuk setiap span yang dimulai di context ini.
+    Exception dari listener diabaikan supaya tidak mengganggu pipeline.
+    """
+    token = _SPAN_LISTENER.set(listener)
+    try:
+        yield
+    finally:
+        _SPAN_LISTENER.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _ACTIVE_TRACE.get()
+
+
+def stage_breakdown() -> Dict[str, float]:
+    trace = _ACTIVE_TRACE.get()
+    if trace is None:
+        return {}
+    return trace.breakdown()
+
+
+def format_breakdown(stages: Dict[str, float], limit: int = 12) -> str:
+    if not stages:
+        return "-"
+    items = sorted(((k, v) for k, v in stages.items() if k != "total"), key=lambda x: x[1], reverse=True)
+    parts = [f"{k}={v:.1f}" for k, v in items[: max(1, int(limit))]]
+    if "total" in stages:
+        parts.append(f"total={stages['total']:.1f}")
+    return " ".join(parts)
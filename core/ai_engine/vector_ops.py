@@ -1,11 +1,24 @@
 # core/ai_engine/vector_ops.py
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import json
 import logging
+import os
+import sqlite3
 import time
 
-from .config import get_vectorstore
+from .config import (
+    BASE_COLLECTION_NAME,
+    collection_name_for_user,
+    get_chroma_client,
+    get_collection_layout,
+    get_memmap_directory,
+    get_persist_directory,
+    get_vector_backend,
+    get_vectorstore,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +43,7 @@ def delete_vectors_for_doc(user_id: str, doc_id: Optional[str] = None, source: O
 
     Return jumlah vector terhapus (best effort; kadang Chroma tidak mengembalikan count).
     """
-    vs = get_vectorstore()
+    vs = get_vectorstore(user_id=user_id)
     col = _get_collection(vs)
     if col is None:
         logger.warning("vector_ops: collection not found; skip delete")
@@ -47,8 +60,7 @@ def delete_vectors_for_doc(user_id: str, doc_id: Optional[str] = None, source: O
     # best-effort count
     count = 0
     try:
-        got = col.get(where=where)
-        count = len(got.get("ids", []) or [])
+        count = _count_ids(col, where)
     except Exception:
         pass
 
@@ -64,7 +76,11 @@ def delete_vectors_for_doc(user_id: str, doc_id: Optional[str] = None, source: O
         return 0
 
 
-def _build_where(user_id: str, doc_id: Optional[str] = None, source: Optional[str] = None):
+def _build_where(
+    user_id: str, doc_id: Optional[str] = None, source: Optional[str] = None, doc_ids: Optional[List[str]] = None
+):
+    if doc_ids:
+        return {"$and": [{"user_id": str(user_id)}, {"doc_id": {"$in": sorted({str(d) for d in doc_ids})}}]}
     if doc_id:
         return {"$and": [{"user_id": str(user_id)}, {"doc_id": str(doc_id)}]}
     if source:
@@ -73,7 +89,8 @@ def _build_where(user_id: str, doc_id: Optional[str] = None, source: Optional[st
 
 
 def _count_ids(col, where) -> int:
-    got = col.get(where=where)
+    # include=[]: cukup ids, jangan tarik dokumen + metadata hanya untuk menghitung
+    got = col.get(where=where, include=[])
     return len(got.get("ids", []) or [])
 
 
@@ -83,18 +100,20 @@ def delete_vectors_for_doc_strict(
     source: Optional[str] = None,
     retries: int = 3,
     sleep_ms: int = 120,
+    doc_ids: Optional[List[str]] = None,
 ) -> Tuple[bool, int]:
     """
     Strict delete untuk memastikan vector benar-benar hilang.
+    `doc_ids` diisi: satu delete `doc_id $in [...]` untuk beberapa dokumen sekaligus (compaction tombstone).
     Return: (ok, remaining_vectors)
     """
-    vs = get_vectorstore()
+    vs = get_vectorstore(user_id=user_id)
     col = _get_collection(vs)
     if col is None:
         logger.error("vector_ops strict: collection not found")
         return False, -1
 
-    where = _build_where(user_id=user_id, doc_id=doc_id, source=source)
+    where = _build_where(user_id=user_id, doc_id=doc_id, source=source, doc_ids=doc_ids)
     if where is None:
         logger.error("vector_ops strict: missing identity user_id=%s doc_id=%s source=%s", user_id, doc_id, source)
         return False, -1
@@ -137,12 +156,147 @@ def delete_vectors_for_doc_strict(
     return False, remaining
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except Exception:
+        return default
+
+
+# =========================
+# Tombstone + compaction background
+# =========================
+# Hapus dokumen cukup menulis VectorTombstone (satu INSERT). Retrieval langsung
+# mengecualikan doc_id yang masih ber-tombstone; vector fisiknya dihapus dan diverifikasi
+# per batch oleh `compact_vector_tombstones` (dipanggil worker ingest), bukan di request DELETE.
+
+
+def tombstone_document_vectors(user_id: int, doc_id: int, source: Optional[str] = None):
+    from core.models import VectorTombstone
+
+    return VectorTombstone.objects.create(user_id=int(user_id), doc_id=int(doc_id), source=(source or "")[:255])
+
+
+def tombstoned_doc_ids(user_id) -> List[str]:
+    """doc_id (string, sesuai metadata vector) milik user yang vector-nya belum selesai dihapus."""
+    from core.models import VectorTombstone
+
+    try:
+        ids = VectorTombstone.objects.filter(user_id=int(user_id), purged_at__isnull=True).values_list("doc_id", flat=True)
+        return sorted({str(x) for x in ids})
+    except Exception as e:
+        logger.warning("vector_ops: baca tombstone gagal user_id=%s err=%r", user_id, e)
+        return []
+
+
+def exclude_tombstoned(where: Optional[Dict[str, Any]], user_id, dead: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Tambahkan `doc_id $nin [tombstone]` ke filter Chroma; filter tidak berubah jika tidak ada tombstone.
+    `dead` bisa diisi hasil tombstoned_doc_ids() supaya beberapa filter cukup satu query DB.
+    """
+    where = dict(where or {"user_id": str(user_id)})
+    dead = tombstoned_doc_ids(user_id) if dead is None else dead
+    if not dead:
+        return where
+    clause = {"doc_id": {"$nin": dead}}
+    if "$and" in where:
+        return {"$and": list(where["$and"]) + [clause]}
+    return {"$and": [{k: v} for k, v in where.items()] + [clause]}
+
+
+def compact_vector_tombstones(batch_size: Optional[int] = None, max_attempts: Optional[int] = None) -> Dict[str, int]:
+    """
+    Hapus fisik vector untuk tombstone yang masih pending, dikelompokkan per user:
+    satu delete `doc_id $in [...]` per batch, lalu verifikasi dengan hitungan ids saja.
+    Tombstone yang sudah bersih diberi purged_at; yang belum, attempts naik dan dicoba
+    lagi di putaran berikutnya sampai VECTOR_COMPACT_MAX_ATTEMPTS. Di akhir putaran,
+    tombstone yang sudah purged lewat masa retensi dihapus (prune_vector_tombstones).
+    """
+    from django.db.models import F
+    from django.utils import timezone
+
+    from core.models import VectorTombstone
+
+    batch_size = max(int(batch_size or _env_int("VECTOR_COMPACT_BATCH", 200)), 1)
+    max_attempts = max(int(max_attempts or _env_int("VECTOR_COMPACT_MAX_ATTEMPTS", 5)), 1)
+    stats = {"tombstones": 0, "users": 0, "purged": 0, "failed": 0, "pruned": 0}
+
+    pending = list(
+        VectorTombstone.objects.filter(purged_at__isnull=True, attempts__lt=max_attempts)
+        .order_by("created_at", "id")
+        .values_list("id", "user_id", "doc_id")[:batch_size]
+    )
+    groups: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for tomb_id, user_id, doc_id in pending:
+        groups[user_id].append((tomb_id, doc_id))
+    stats["tombstones"] = len(pending)
+
+    for user_id, rows in groups.items():
+        stats["users"] += 1
+        tomb_ids = [t for t, _d in rows]
+        doc_ids = sorted({str(d) for _t, d in rows})
+        error = ""
+        try:
+            # satu percobaan per putaran; retry berikutnya lewat attempts tombstone
+            _ok, remaining = delete_vectors_for_doc_strict(str(user_id), doc_ids=doc_ids, retries=1)
+        except Exception as e:
+            logger.warning("vector_ops compact: user_id=%s docs=%s err=%r", user_id, doc_ids, e)
+            remaining, error = -1, repr(e)[:255]
+
+        now = timezone.now()
+        if remaining == 0:
+            VectorTombstone.objects.filter(id__in=tomb_ids).update(
+                purged_at=now, remaining=0, error="", attempts=F("attempts") + 1
+            )
+            stats["purged"] += len(tomb_ids)
+        else:
+            VectorTombstone.objects.filter(id__in=tomb_ids).update(
+                remaining=remaining,
+                error=error or f"vector masih tersisa: {remaining}",
+                attempts=F("attempts") + 1,
+            )
+            stats["failed"] += len(tomb_ids)
+
+    stats["pruned"] = prune_vector_tombstones()
+    if pending or stats["pruned"]:
+        logger.info(
+            " VECTOR_COMPACT tombstones=%s users=%s purged=%s failed=%s pruned=%s",
+            stats["tombstones"],
+            stats["users"],
+            stats["purged"],
+            stats["failed"],
+            stats["pruned"],
+        )
+    return stats
+
+
+def prune_vector_tombstones(retention_hours: Optional[int] = None) -> int:
+    """
+    Hapus baris tombstone yang sudah purged lebih lama dari VECTOR_TOMBSTONE_RETENTION_HOURS
+    (default 24, 0 = langsung dihapus) supaya tabel tidak tumbuh terus. Tombstone pending tidak disentuh.
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from core.models import VectorTombstone
+
+    hours = _env_int("VECTOR_TOMBSTONE_RETENTION_HOURS", 24) if retention_hours is None else int(retention_hours)
+    cutoff = timezone.now() - timedelta(hours=max(hours, 0))
+    try:
+        deleted, _ = VectorTombstone.objects.filter(purged_at__isnull=False, purged_at__lte=cutoff).delete()
+        return deleted
+    except Exception as e:
+        logger.warning("vector_ops: prune tombstone gagal err=%r", e)
+        return 0
+
+
 def purge_vectors_for_user(user_id: int) -> int:
     """
     Hapus SEMUA embeddings milik user tertentu.
     Return jumlah vector terhapus (best effort).
     """
-    vs = get_vectorstore()
+    vs = get_vectorstore(user_id=user_id)
     col = _get_collection(vs)
     if col is None:
         logger.warning("vector_ops: collection not found; skip purge")
@@ -153,8 +307,7 @@ def purge_vectors_for_user(user_id: int) -> int:
     # best-effort count
     count = 0
     try:
-        got = col.get(where=where)
-        count = len(got.get("ids", []) or [])
+        count = _count_ids(col, where)
     except Exception:
         pass
 
@@ -164,9 +317,387 @@ def purge_vectors_for_user(user_id: int) -> int:
             vs.persist()
         except Exception:
             pass
+        if get_collection_layout() == "user" or get_vector_backend() == "memmap":
+            # collection khusus user ini sudah kosong: hapus sekalian supaya segmen HNSW ikut dibuang
+            try:
+                vs.delete_collection()
+            except Exception as e:
+                logger.warning("vector_ops: drop collection user_id=%s gagal err=%r", user_id, e)
 
         logger.warning(" PURGE vectors user_id=%s deleted≈%s", user_id, count)
         return count
     except Exception as e:
         logger.warning("vector_ops: purge_vectors_for_user failed err=%r where=%s", e, where)
         return 0
+
+
+def list_rag_collections(client=None) -> List[str]:
+    """Nama semua collection RAG (academic_rag + academic_rag_u*/s*) di persist directory aktif."""
+    client = client or get_chroma_client()
+    names = []
+    for c in client.list_collections():
+        name = str(getattr(c, "name", c))
+        if name == BASE_COLLECTION_NAME or name.startswith(f"{BASE_COLLECTION_NAME}_"):
+            names.append(name)
+    return sorted(names)
+
+
+def migrate_vector_layout(
+    to_layout: str,
+    *,
+    shards: Optional[int] = None,
+    batch_size: int = 500,
+    delete_source: bool = False,
+    dry_run: bool = False,
+    on_batch: Optional[Callable[[str, Dict[str, int]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Pindahkan vector antar layout collection (single <-> user <-> shard) tanpa embed ulang.
+    Tiap collection RAG dibaca per halaman `batch_size` (ids + embedding + dokumen + metadata),
+    dikelompokkan per collection tujuan berdasarkan metadata user_id, lalu di-upsert.
+    Vector tanpa user_id tetap di academic_rag. Dengan `delete_source`, vector yang sudah
+    di-upsert dihapus dari collection asal per batch.
+    """
+    client = get_chroma_client()
+    stats: Dict[str, Any] = {"collections": 0, "scanned": 0, "moved": 0, "kept": 0, "deleted": 0}
+    target_names = set()
+    targets: Dict[str, Any] = {}
+    for name in list_rag_collections(client):
+        src = client.get_collection(name)
+        stats["collections"] += 1
+        offset = 0
+        while True:
+            got = src.get(
+                include=["embeddings", "documents", "metadatas"], limit=max(int(batch_size), 1), offset=offset
+            ) or {}
+            ids = list(got.get("ids") or [])
+            if not ids:
+                break
+            embeddings = got.get("embeddings")
+            documents = got.get("documents") or [None] * len(ids)
+            metadatas = got.get("metadatas") or [None] * len(ids)
+            groups: Dict[str, Dict[str, list]] = defaultdict(
+                lambda: {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+            )
+            for i, vid in enumerate(ids):
+                meta = metadatas[i] or {}
+                target = collection_name_for_user(meta.get("user_id"), layout=to_layout, shards=shards)
+                if target == name:
+                    continue
+                group = groups[target]
+                group["ids"].append(vid)
+                group["embeddings"].append(list(embeddings[i]))
+                group["documents"].append(documents[i])
+                group["metadatas"].append(meta)
+
+            moved_ids: List[str] = []
+            for target, group in groups.items():
+                target_names.add(target)
+                if not dry_run:
+                    if target not in targets:
+                        targets[target] = client.get_or_create_collection(target, metadata=src.metadata)
+                    targets[target].upsert(**group)
+                moved_ids.extend(group["ids"])
+            stats["scanned"] += len(ids)
+            stats["moved"] += len(moved_ids)
+            stats["kept"] += len(ids) - len(moved_ids)
+
+            if delete_source and not dry_run and moved_ids:
+                src.delete(ids=moved_ids)
+                stats["deleted"] += len(moved_ids)
+                # baris yang dipindah sudah hilang dari halaman ini; offset hanya maju sebanyak yang tetap
+                offset += len(ids) - len(moved_ids)
+            else:
+                offset += len(ids)
+            if on_batch is not None:
+                on_batch(name, {"scanned": len(ids), "moved": len(moved_ids)})
+
+        if delete_source and not dry_run and name != BASE_COLLECTION_NAME and src.count() == 0:
+            client.delete_collection(name)
+    stats["targets"] = sorted(target_names)
+    return stats
+
+
+def copy_vectors_to_memmap(
+    *, batch_size: int = 500, on_batch: Optional[Callable[[str, Dict[str, int]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Salin semua vector Chroma ke backend memmap (satu collection per user) tanpa embed ulang.
+    Collection Chroma tidak diubah, jadi RAG_VECTOR_BACKEND bisa dikembalikan ke chroma kapan saja.
+    """
+    from .memmap_store import MemmapCollection
+
+    client = get_chroma_client()
+    root = get_memmap_directory()
+    stats: Dict[str, Any] = {"collections": 0, "scanned": 0, "copied": 0, "skipped": 0}
+    target_names = set()
+    targets: Dict[str, MemmapCollection] = {}
+    for name in list_rag_collections(client):
+        src = client.get_collection(name)
+        stats["collections"] += 1
+        offset = 0
+        while True:
+            got = src.get(
+                include=["embeddings", "documents", "metadatas"], limit=max(int(batch_size), 1), offset=offset
+            ) or {}
+            ids = list(got.get("ids") or [])
+            if not ids:
+                break
+            offset += len(ids)
+            embeddings = got.get("embeddings")
+            documents = got.get("documents") or [None] * len(ids)
+            metadatas = got.get("metadatas") or [None] * len(ids)
+            groups: Dict[str, List[int]] = defaultdict(list)
+            for i in range(len(ids)):
+                user_id = (metadatas[i] or {}).get("user_id")
+                if user_id in (None, ""):
+                    stats["skipped"] += 1
+                    continue
+                groups[collection_name_for_user(user_id, layout="user")].append(i)
+            for target, rows in groups.items():
+                target_names.add(target)
+                if target not in targets:
+                    targets[target] = MemmapCollection(os.path.join(root, target), target)
+                targets[target].upsert(
+                    ids=[ids[i] for i in rows],
+                    embeddings=[list(embeddings[i]) for i in rows],
+                    metadatas=[metadatas[i] for i in rows],
+                    documents=[documents[i] for i in rows],
+                )
+                stats["copied"] += len(rows)
+            stats["scanned"] += len(ids)
+            if on_batch is not None:
+                on_batch(name, {"scanned": len(ids), "moved": sum(len(r) for r in groups.values())})
+    stats["targets"] = sorted(target_names)
+    return stats
+
+
+# =========================
+# Statistik, orphan GC, dan compaction store
+# =========================
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for fn in files:
+            try:
+                total += os.path.getsize(os.path.join(root, fn))
+            except OSError:
+                pass
+    return total
+
+
+def iter_store_collections() -> Iterator[Tuple[str, Any]]:
+    """(nama, collection) untuk semua collection RAG di backend aktif (Chroma atau memmap)."""
+    if get_vector_backend() == "memmap":
+        from .memmap_store import MemmapCollection
+
+        root = get_memmap_directory()
+        if not os.path.isdir(root):
+            return
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if os.path.isfile(os.path.join(path, "index.sqlite3")):
+                yield name, MemmapCollection(path, name)
+        return
+    client = get_chroma_client()
+    for name in list_rag_collections(client):
+        yield name, client.get_collection(name)
+
+
+def _vector_row_bytes(col) -> int:
+    """Bytes embedding per vector sesuai format backend (memmap: int8 + scale + float32, Chroma: float32)."""
+    row_bytes = getattr(col, "row_bytes", None)
+    if callable(row_bytes):
+        try:
+            return int(row_bytes())
+        except Exception as e:
+            logger.warning("vector_ops stats: baca ukuran row memmap gagal err=%r", e)
+    return _vector_dim(col) * 4
+
+
+def _vector_dim(col) -> int:
+    try:
+        got = col.get(limit=1, include=["embeddings"]) or {}
+        embeddings = got.get("embeddings")
+        if embeddings is not None and len(embeddings):
+            return len(embeddings[0])
+    except Exception as e:
+        logger.warning("vector_ops stats: baca dimensi gagal err=%r", e)
+    return 0
+
+
+def scan_vector_store(
+    *,
+    page_size: int = 500,
+    user_id: Optional[int] = None,
+    on_page: Optional[Callable[[str, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Baca semua collection per halaman (metadata + dokumen, tanpa embedding) dan hitung
+    jumlah vector + perkiraan bytes (embedding sesuai format backend + teks chunk + metadata JSON)
+    per user dan per dokumen. Sekalian cari:
+    - orphan: vector dengan doc_id yang AcademicDocument-nya sudah tidak ada
+      (list (id, (user_id, doc_id)) per collection; dicek ulang ke DB oleh delete_orphan_vectors)
+    - missing: dokumen is_embedded=True yang tidak punya vector sama sekali
+    Vector lama tanpa doc_id hanya dihitung (`legacy`), tidak dianggap orphan.
+    """
+    from core.models import AcademicDocument
+
+    docs_qs = AcademicDocument.objects.all()
+    if user_id is not None:
+        docs_qs = docs_qs.filter(user_id=user_id)
+    live: Dict[Tuple[str, str], Tuple[bool, str]] = {
+        (str(uid), str(did)): (bool(embedded), str(title or ""))
+        for did, uid, embedded, title in docs_qs.values_list("id", "user_id", "is_embedded", "title")
+    }
+    where = {"user_id": str(user_id)} if user_id is not None else None
+
+    stats: Dict[str, Any] = {
+        "collections": 0,
+        "scanned": 0,
+        "bytes": 0,
+        "legacy": 0,
+        "no_user": 0,
+        "orphan_vectors": 0,
+        "orphan_bytes": 0,
+        "users": defaultdict(lambda: {"vectors": 0, "bytes": 0}),
+        "docs": defaultdict(lambda: {"vectors": 0, "bytes": 0}),
+        "orphans": defaultdict(list),
+    }
+    batch = max(int(page_size), 1)
+    for name, col in iter_store_collections():
+        stats["collections"] += 1
+        vec_bytes = _vector_row_bytes(col)
+        offset = 0
+        while True:
+            got = col.get(where=where, include=["metadatas", "documents"], limit=batch, offset=offset) or {}
+            ids = list(got.get("ids") or [])
+            if not ids:
+                break
+            offset += len(ids)
+            documents = got.get("documents") or [None] * len(ids)
+            metadatas = got.get("metadatas") or [None] * len(ids)
+            for vid, text, meta in zip(ids, documents, metadatas):
+                meta = meta or {}
+                size = vec_bytes + len((text or "").encode("utf-8")) + len(json.dumps(meta, default=str).encode("utf-8"))
+                stats["scanned"] += 1
+                stats["bytes"] += size
+                uid = meta.get("user_id")
+                if uid in (None, ""):
+                    stats["no_user"] += 1
+                    continue
+                uid = str(uid)
+                stats["users"][uid]["vectors"] += 1
+                stats["users"][uid]["bytes"] += size
+                did = meta.get("doc_id")
+                if did in (None, ""):
+                    stats["legacy"] += 1
+                    continue
+                key = (uid, str(did))
+                stats["docs"][key]["vectors"] += 1
+                stats["docs"][key]["bytes"] += size
+                if key not in live:
+                    stats["orphans"][name].append((vid, key))
+                    stats["orphan_vectors"] += 1
+                    stats["orphan_bytes"] += size
+            if on_page is not None:
+                on_page(name, len(ids))
+
+    stats["missing"] = sorted(
+        (int(uid), int(did), title)
+        for (uid, did), (embedded, title) in live.items()
+        if embedded and (uid, did) not in stats["docs"]
+    )
+    stats["titles"] = {key: title for key, (_embedded, title) in live.items()}
+    return stats
+
+
+def delete_orphan_vectors(
+    orphans: Dict[str, List[Tuple[str, Tuple[str, str]]]],
+    *,
+    batch_size: int = 500,
+    on_batch: Optional[Callable[[str, int], None]] = None,
+) -> int:
+    """
+    Hapus vector orphan hasil scan_vector_store per batch ids (bukan where), per collection.
+    Snapshot dokumen hidup diambil sebelum scan (bisa makan menit), jadi tepat sebelum tiap
+    batch pasangan (user_id, doc_id) dicek ulang ke AcademicDocument: dokumen yang baru
+    di-ingest selama scan tidak ikut terhapus.
+    """
+    from core.models import AcademicDocument
+
+    collections = dict(iter_store_collections())
+    batch = max(int(batch_size), 1)
+    deleted = 0
+    skipped = 0
+    for name, items in orphans.items():
+        col = collections.get(name)
+        if col is None or not items:
+            continue
+        for start in range(0, len(items), batch):
+            chunk = items[start:start + batch]
+            doc_ids = {int(did) for _vid, (_uid, did) in chunk if str(did).isdigit()}
+            live = {
+                (str(uid), str(did))
+                for did, uid in AcademicDocument.objects.filter(id__in=doc_ids).values_list("id", "user_id")
+            }
+            part = [vid for vid, key in chunk if tuple(key) not in live]
+            skipped += len(chunk) - len(part)
+            if not part:
+                continue
+            try:
+                col.delete(ids=part)
+                deleted += len(part)
+            except Exception as e:
+                logger.warning("vector_ops gc: delete gagal collection=%s n=%s err=%r", name, len(part), e)
+                continue
+            if on_batch is not None:
+                on_batch(name, len(part))
+    if deleted or skipped:
+        logger.warning(" VECTOR_GC orphan vectors deleted=%s skipped_live=%s", deleted, skipped)
+    return deleted
+
+
+def compact_vector_store(timeout: int = 30) -> Dict[str, Any]:
+    """
+    Kecilkan file store setelah GC, lalu laporkan ukuran direktori sebelum/sesudah.
+    - Chroma: collection per user/shard yang kosong di-drop, lalu VACUUM chroma.sqlite3
+      (sama dengan `chroma vacuum`; butuh lock eksklusif, jalankan saat server sepi).
+    - memmap: tiap collection ditulis ulang tanpa slot mati (MemmapCollection.compact),
+      collection kosong di-drop.
+    """
+    memmap = get_vector_backend() == "memmap"
+    # ukur hanya direktori backend aktif (file memmap tidak ikut menghitung sisa chroma.sqlite3, dan sebaliknya)
+    root = get_persist_directory()
+    measured = get_memmap_directory() if memmap else root
+    out: Dict[str, Any] = {"before": _dir_bytes(measured), "dropped": [], "compacted": 0, "vacuum": False}
+    for name, col in list(iter_store_collections()):
+        try:
+            if col.count() == 0 and (memmap or name != BASE_COLLECTION_NAME):
+                if memmap:
+                    col.drop()
+                else:
+                    get_chroma_client().delete_collection(name)
+                out["dropped"].append(name)
+            elif memmap:
+                col.compact()
+                out["compacted"] += 1
+        except Exception as e:
+            logger.warning("vector_ops compact: collection=%s err=%r", name, e)
+
+    sqlite_path = os.path.join(root, "chroma.sqlite3")
+    if not memmap and os.path.isfile(sqlite_path):
+        conn = sqlite3.connect(sqlite_path, timeout=max(int(timeout), 1))
+        try:
+            conn.execute("VACUUM")
+            out["vacuum"] = True
+        except sqlite3.Error as e:
+            logger.warning("vector_ops compact: VACUUM gagal err=%r", e)
+        finally:
+            conn.close()
+
+    out["after"] = _dir_bytes(measured)
+    out["reclaimed"] = max(out["before"] - out["after"], 0)
+    return out
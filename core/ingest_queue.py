@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .ai_engine.ingest import collect_ingest_stats, on_embed_batch
+from .ai_engine.tracing import on_span_start
+from .ai_engine.vector_ops import compact_vector_tombstones
+from .models import AcademicDocument, IngestionJob
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Durable ingestion queue (tanpa broker eksternal)
+# =========================
+# Job disimpan di tabel IngestionJob. Worker lokal (`manage.py ingest_worker`) meng-claim
+# job dengan UPDATE ... WHERE status=queued (atomic di semua backend DB, termasuk SQLite),
+# lalu menjalankan ingest yang sama dengan jalur sync. Progress per stage diambil dari
+# span tracing ingest (pdf_tables, llm_repair, chunking, embed_store, ...).
+
+_STAGE_PROGRESS = {
+    "pdf_tables": 10,
+    "ocr": 15,
+    "pdf_merge": 25,
+    "tabular": 25,
+    "llm_repair": 30,
+    "canonical_rows": 50,
+    "pdf_text": 55,
+    "chunking": 70,
+    "embed_store": 80,
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except Exception:
+        return default
+
+
+def ingest_queue_enabled() -> bool:
+    return (os.environ.get("INGEST_QUEUE_ENABLED", "0") or "0").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _stale_seconds() -> int:
+    return max(_env_int("INGEST_JOB_STALE_SECONDS", 600), 30)
+
+
+def _max_attempts() -> int:
+    return max(_env_int("INGEST_JOB_MAX_ATTEMPTS", 3), 1)
+
+
+def _compact_interval() -> int:
+    # 0 = compaction tombstone vector dimatikan di worker ini
+    return max(_env_int("VECTOR_COMPACT_INTERVAL_SECONDS", 60), 0)
+
+
+def enqueue_ingest_job(user, document: AcademicDocument, kind: str = IngestionJob.KIND_UPLOAD) -> IngestionJob:
+    return IngestionJob.objects.create(
+        user=user,
+        document=document,
+        kind=kind,
+        file_name=(getattr(document, "title", "") or "")[:255],
+    )
+
+
+def serialize_job(job: IngestionJob) -> Dict[str, Any]:
+    def _ts(value):
+        return value.isoformat() if value else None
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "file_name": job.file_name,
+        "document_id": job.document_id,
+        "stage": job.stage,
+        "progress": int(job.progress or 0),
+        "stage_timings": dict(job.stage_timings or {}),
+        "chunk_stats": dict(job.chunk_stats or {}),
+        "error": job.error,
+        "attempts": int(job.attempts or 0),
+        "created_at": _ts(job.created_at),
+        "started_at": _ts(job.started_at),
+        "finished_at": _ts(job.finished_at),
+    }
+
+
+def summarize_jobs(jobs: Iterable[IngestionJob]) -> Dict[str, int]:
+    out = {status: 0 for status, _label in IngestionJob.STATUS_CHOICES}
+    for job in jobs:
+        out[job.status] = out.get(job.status, 0) + 1
+    return out
+
+
+def claim_job(job_id: int, worker_id: str) -> Optional[IngestionJob]:
+    now = timezone.now()
+    updated = IngestionJob.objects.filter(id=job_id, status=IngestionJob.STATUS_QUEUED).update(
+        status=IngestionJob.STATUS_RUNNING,
+        worker_id=worker_id[:64],
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F("attempts") + 1,
+        stage="starting",
+        progress=1,
+        error="",
+    )
+    if not updated:
+        return None
+    return IngestionJob.objects.select_related("document", "user").get(id=job_id)
+
+
+def claim_next_job(worker_id: str, batch: int = 10) -> Optional[IngestionJob]:
+    # beberapa worker bisa melihat kandidat yang sama; yang kalah UPDATE lanjut ke kandidat berikutnya
+    candidates = (
+        IngestionJob.objects.filter(status=IngestionJob.STATUS_QUEUED)
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)[:batch]
+    )
+    for job_id in list(candidates):
+        job = claim_job(job_id, worker_id)
+        if job is not None:
+            return job
+    return None
+
+
+def requeue_stale_jobs(now=None) -> int:
+    """
+    Job `running` tanpa heartbeat lebih lama dari INGEST_JOB_STALE_SECONDS dianggap
+    worker-nya mati: dikembalikan ke antrian, atau ditandai gagal kalau attempts habis.
+    """
+    now = now or timezone.now()
+    threshold = now - timedelta(seconds=_stale_seconds())
+    stale = IngestionJob.objects.filter(status=IngestionJob.STATUS_RUNNING, heartbeat_at__lt=threshold)
+    failed = stale.filter(attempts__gte=_max_attempts()).update(
+        status=IngestionJob.STATUS_FAILED,
+        stage="failed",
+        error="Worker berhenti saat memproses job (batas percobaan habis).",
+        finished_at=now,
+    )
+    requeued = stale.filter(attempts__lt=_max_attempts()).update(
+        status=IngestionJob.STATUS_QUEUED,
+        stage="",
+        progress=0,
+        worker_id="",
+    )
+    if failed or requeued:
+        logger.warning(" INGEST_QUEUE stale jobs requeued=%s failed=%s", requeued, failed)
+    return requeued
+
+
+class _JobProgress:
+    """
+    Listener span ingest: update stage/progress/heartbeat job tiap kali tahap top-level
+    berganti, dan hitung durasi tiap tahap dari transisi tersebut.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.stage = ""
+        self.stage_t0 = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    def _close_stage(self) -> None:
+        if self.stage:
+            elapsed = (time.perf_counter() - self.stage_t0) * 1000.0
+            self.timings[self.stage] = round(self.timings.get(self.stage, 0.0) + elapsed, 2)
+
+    def __call__(self, path: str) -> None:
+        stage = str(path or "").split(".", 1)[0]
+        if not stage or stage == self.stage:
+            return
+        self._close_stage()
+        self.stage = stage
+        self.stage_t0 = time.perf_counter()
+        IngestionJob.objects.filter(id=self.job_id).update(
+            stage=stage[:64],
+            progress=_STAGE_PROGRESS.get(stage, 50),
+            heartbeat_at=timezone.now(),
+        )
+
+    def batch(self, done: int, total: int) -> None:
+        # embed_store ditulis per batch: progress 80..99 + heartbeat supaya dokumen besar
+        # tidak dianggap stale oleh requeue
+        start = _STAGE_PROGRESS["embed_store"]
+        progress = start + int((99 - start) * done / max(total, 1))
+        IngestionJob.objects.filter(id=self.job_id).update(
+            progress=min(progress, 99),
+            heartbeat_at=timezone.now(),
+        )
+
+    def finish(self) -> Dict[str, float]:
+        self._close_stage()
+        self.stage = ""
+        return dict(self.timings)
+
+
+def _finish_job(
+    job_id: int,
+    ok: bool,
+    error: str,
+    stage_timings: Dict[str, float],
+    chunk_stats: Optional[Dict[str, int]] = None,
+) -> None:
+    now = timezone.now()
+    IngestionJob.objects.filter(id=job_id).update(
+        status=IngestionJob.STATUS_SUCCEEDED if ok else IngestionJob.STATUS_FAILED,
+        stage="done" if ok else "failed",
+        progress=100 if ok else F("progress"),
+        stage_timings=stage_timings,
+        chunk_stats=dict(chunk_stats or {}),
+        error=(error or "")[:2000],
+        heartbeat_at=now,
+        finished_at=now,
+    )
+
+
+def run_job(job: IngestionJob) -> bool:
+    from . import service
+
+    doc = job.document
+    if doc is None:
+        _finish_job(job.id, False, "Dokumen sudah dihapus.", {})
+        return False
+
+    progress = _JobProgress(job.id)
+    ok = False
+    error = ""
+    t0 = time.perf_counter()
+    # chunk id deterministik: retry setelah worker mati cukup diff ulang, vector parsial
+    # dari percobaan sebelumnya dipakai lagi atau dihapus oleh sinkronisasi chunk
+    with on_span_start(progress), on_embed_batch(progress.batch), collect_ingest_stats() as chunk_stats:
+        try:
+            if job.kind == IngestionJob.KIND_REINGEST:
+                ok = service.reingest_document(doc)
+            else:
+                ok = service.ingest_new_document(doc)
+            if not ok:
+                error = "Gagal Parsing"
+        except Exception as e:
+            logger.error(" INGEST_QUEUE job=%s crash err=%s", job.id, repr(e), exc_info=True)
+            error = f"System Error: {e!r}"
+            ok = False
+
+    timings = progress.finish()
+    timings["total"] = round((time.perf_counter() - t0) * 1000.0, 2)
+    _finish_job(job.id, ok, error, timings, chunk_stats)
+    logger.info(
+        " INGEST_QUEUE job=%s kind=%s doc=%s ok=%s attempts=%s total_ms=%s embedded=%s skipped=%s",
+        job.id,
+        job.kind,
+        job.file_name,
+        ok,
+        job.attempts,
+        timings["total"],
+        chunk_stats.get("embedded", 0),
+        chunk_stats.get("skipped", 0),
+    )
+    return ok
+
+
+def process_jobs(job_ids: List[int], worker_id: str) -> List[IngestionJob]:
+    # dipakai reingest_docs: jalankan job tertentu inline (tetap lewat status/claim yang sama)
+    out: List[IngestionJob] = []
+    for job_id in job_ids:
+        job = claim_job(job_id, worker_id)
+        if job is None:
+            continue
+        run_job(job)
+        out.append(IngestionJob.objects.get(id=job_id))
+    return out
+
+
+def default_worker_prefix() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class IngestWorkerPool:
+    """
+    Pool thread lokal yang mengambil job dari tabel IngestionJob.
+    `run(once=True)` berhenti saat antrian kosong (untuk cron / test).
+    Satu thread tambahan meng-compact tombstone vector (dokumen yang sudah dihapus)
+    tiap VECTOR_COMPACT_INTERVAL_SECONDS.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 30.0,
+        worker_prefix: str = "",
+    ):
+        self.workers = max(1, int(workers))
+        self.poll_interval = max(0.05, float(poll_interval))
+        self.heartbeat_interval = max(1.0, float(heartbeat_interval))
+        self.worker_prefix = (worker_prefix or default_worker_prefix())[:56]
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.compacted = 0
+
+    def _worker_loop(self, idx: int, once: bool) -> None:
+        worker_id = f"{self.worker_prefix}:{idx}"
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                job = claim_next_job(worker_id)
+                if job is None:
+                    if once:
+                        return
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                ok = run_job(job)
+                with self._lock:
+                    self.processed += 1
+                    if not ok:
+                        self.failed += 1
+        finally:
+            connection.close()
+
+    def _heartbeat_loop(self) -> None:
+        try:
+            while not self.stop_event.wait(self.heartbeat_interval):
+                close_old_connections()
+                IngestionJob.objects.filter(
+                    status=IngestionJob.STATUS_RUNNING,
+                    worker_id__startswith=f"{self.worker_prefix}:",
+                ).update(heartbeat_at=timezone.now())
+                requeue_stale_jobs()
+        finally:
+            connection.close()
+
+    def _compact_once(self) -> None:
+        try:
+            stats = compact_vector_tombstones()
+            with self._lock:
+                self.compacted += stats.get("purged", 0)
+        except Exception as e:
+            logger.warning(" VECTOR_COMPACT gagal err=%r", e)
+
+    def _compact_loop(self, interval: int) -> None:
+        try:
+            while not self.stop_event.wait(interval):
+                close_old_connections()
+                self._compact_once()
+        finally:
+            connection.close()
+
+    def run(self, once: bool = False) -> int:
+        requeue_stale_jobs()
+        threads = [
+            threading.Thread(target=self._worker_loop, args=(i, once), name=f"ingest-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="ingest-heartbeat", daemon=True)
+        heartbeat.start()
+        interval = _compact_interval()
+        compactor = None
+        if interval and not once:
+            compactor = threading.Thread(target=self._compact_loop, args=(interval,), name="vector-compactor", daemon=True)
+            compactor.start()
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(timeout=0.5)
+        finally:
+            self.stop_event.set()
+            heartbeat.join(timeout=2.0)
+            if compactor is not None:
+                compactor.join(timeout=2.0)
+        if once and interval:
+            # mode cron: bersihkan tombstone sekali setelah antrian habis
+            self._compact_once()
+        return self.processed
+
+    def stop(self) -> None:
+        self.stop_event.set()
@@ -0,0 +1 @@
+"""Load-test tooling: fake OpenRouter server and HTTP load driver."""
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+from core.monitoring import _percentile
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# HTTP load driver
+# =========================
+# Setiap virtual user: login (CSRF + session cookie), opsional upload dokumen, lalu
+# loop chat / planner ke server yang sedang jalan. Latency dicatat per endpoint.
+
+DEFAULT_CHAT_QUERIES = [
+    "jadwal kuliah hari senin apa saja?",
+    "apa itu sks?",
+    "berapa ipk saya semester ini?",
+    "tips belajar untuk UTS hukum pidana",
+    "UTS 60 bobot 40 target B, uas minimal berapa?",
+    "mata kuliah apa yang diajar dosen pengampu hukum pemilu?",
+]
+PLANNER_MAX_STEPS = 8
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+
+class LoadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, endpoint: str, elapsed_ms: float, status: int | str, ok: bool) -> None:
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointStats())
+            stats.latencies_ms.append(float(elapsed_ms))
+            key = str(status)
+            stats.status_codes[key] = stats.status_codes.get(key, 0) + 1
+            if not ok:
+                stats.errors += 1
+
+    def summary(self, wall_seconds: float) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        wall = max(wall_seconds, 1e-9)
+        with self._lock:
+            for name, stats in sorted(self.endpoints.items()):
+                values = sorted(stats.latencies_ms)
+                total = len(values)
+                out[name] = {
+                    "requests": total,
+                    "errors": stats.errors,
+                    "error_rate": round(stats.errors / total, 4) if total else 0.0,
+                    "throughput_rps": round(total / wall, 3),
+                    "p50_ms": round(_percentile(values, 0.50), 2),
+                    "p95_ms": round(_percentile(values, 0.95), 2),
+                    "p99_ms": round(_percentile(values, 0.99), 2),
+                    "max_ms": round(values[-1], 2) if values else 0.0,
+                    "status_codes": dict(sorted(stats.status_codes.items())),
+                }
+        return out
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    base_url: str
+    usernames: Sequence[str]
+    password: str
+    iterations: int = 5
+    concurrency: int = 10
+    planner_ratio: float = 0.2
+    upload_path: str = ""
+    queries: Sequence[str] = tuple(DEFAULT_CHAT_QUERIES)
+    timeout: float = 120.0
+    think_time_ms: float = 0.0
+    seed: int | None = None
+
+
+class VirtualUser:
+    def __init__(self, cfg: LoadConfig, username: str, stats: LoadStats, rng: random.Random):
+        self.cfg = cfg
+        self.username = username
+        self.stats = stats
+        self.rng = rng
+        self.http = requests.Session()
+        self.chat_session_id: Optional[int] = None
+
+    def _url(self, path: str) -> str:
+        return self.cfg.base_url.rstrip("/") + path
+
+    def _csrf_headers(self) -> Dict[str, str]:
+        token = self.http.cookies.get("csrftoken") or ""
+        return {"X-CSRFToken": token, "Referer": self._url("/")}
+
+    def _timed(self, endpoint: str, method: str, path: str, ok_status=(200,), **kwargs) -> Optional[requests.Response]:
+        t0 = time.perf_counter()
+        try:
+            resp = self.http.request(method, self._url(path), timeout=self.cfg.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.stats.record(endpoint, (time.perf_counter() - t0) * 1000, type(e).__name__, ok=False)
+            return None
+        self.stats.record(endpoint, (time.perf_counter() - t0) * 1000, resp.status_code, ok=resp.status_code in ok_status)
+        return resp
+
+    def login(self) -> bool:
+        self.http.get(self._url("/login/"), timeout=self.cfg.timeout)
+        resp = self._timed(
+            "login",
+            "POST",
+            "/login/",
+            ok_status=(200, 302),
+            json={"username": self.username, "password": self.cfg.password},
+            headers=self._csrf_headers(),
+            allow_redirects=False,
+        )
+        # login sukses ditandai redirect + session cookie; gagal me-render ulang halaman login
+        return bool(resp is not None and resp.status_code == 302 and self.http.cookies.get("sessionid"))
+
+    def upload(self) -> None:
+        path = self.cfg.upload_path
+        with open(path, "rb") as f:
+            self._timed("upload", "POST", "/api/upload/", files={"files": (path.split("/")[-1], f)})
+
+    def chat(self) -> None:
+        payload: Dict[str, Any] = {"message": self.rng.choice(list(self.cfg.queries)), "mode": "chat"}
+        if self.chat_session_id:
+            payload["session_id"] = self.chat_session_id
+        resp = self._timed("chat", "POST", "/api/chat/", json=payload)
+        if resp is not None and resp.status_code == 200:
+            try:
+                self.chat_session_id = resp.json().get("session_id") or self.chat_session_id
+            except ValueError:
+                pass
+
+    def planner(self) -> None:
+        body: Dict[str, Any] = {"mode": "planner"}
+        for _ in range(PLANNER_MAX_STEPS):
+            resp = self._timed("planner", "POST", "/api/chat/", json=body)
+            if resp is None or resp.status_code != 200:
+                return
+            try:
+                data = resp.json()
+            except ValueError:
+                return
+            options = [o for o in (data.get("options") or []) if isinstance(o, dict) and o.get("id") is not None]
+            body = {"mode": "planner", "session_id": data.get("session_id")}
+            if options:
+                body["option_id"] = self.rng.choice(options)["id"]
+            elif data.get("allow_custom"):
+                body["message"] = "Hukum"
+            else:
+                return
+
+    def run(self) -> None:
+        if not self.login():
+            logger.warning(" LOADTEST login gagal user=%s", self.username)
+            return
+        if self.cfg.upload_path:
+            self.upload()
+        for _ in range(max(1, self.cfg.iterations)):
+            if self.rng.random() < self.cfg.planner_ratio:
+                self.planner()
+            else:
+                self.chat()
+            if self.cfg.think_time_ms > 0:
+                time.sleep(self.cfg.think_time_ms / 1000.0)
+
+
+def run_load(cfg: LoadConfig) -> Dict[str, Any]:
+    stats = LoadStats()
+    seed_rng = random.Random(cfg.seed)
+    users = [VirtualUser(cfg, name, stats, random.Random(seed_rng.random())) for name in cfg.usernames]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, int(cfg.concurrency))) as pool:
+        for fut in [pool.submit(u.run) for u in users]:
+            try:
+                fut.result()
+            except Exception as e:
+                logger.warning(" LOADTEST virtual user crash err=%s", e)
+    wall = time.perf_counter() - t0
+
+    return {
+        "config": {
+            "base_url": cfg.base_url,
+            "users": len(users),
+            "concurrency": int(cfg.concurrency),
+            "iterations": int(cfg.iterations),
+            "planner_ratio": float(cfg.planner_ratio),
+            "upload": bool(cfg.upload_path),
+        },
+        "wall_seconds": round(wall, 3),
+        "endpoints": stats.summary(wall),
+    }
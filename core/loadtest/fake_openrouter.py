@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Fake OpenRouter (OpenAI-compatible) server
+# =========================
+# Stub lokal untuk load test: latency, error rate, dan streaming bisa diatur supaya
+# throughput /api/chat/ bisa diukur tanpa memakai kuota LLM. Arahkan aplikasi ke sini
+# lewat LLMConfiguration.openrouter_base_url (atau env OPENROUTER_BASE_URL),
+# mis. http://127.0.0.1:8765/api/v1
+
+_LATENCY_KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """
+    Distribusi latency dalam milidetik. Format spec:
+    `fixed:MS`, `uniform:LO:HI`, `normal:MEAN:STD`, `lognormal:MEDIAN:SIGMA`.
+    """
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        parts = [p.strip() for p in str(spec or "").split(":") if p.strip()]
+        if not parts:
+            return cls()
+        kind = parts[0].lower()
+        if kind not in _LATENCY_KINDS:
+            raise ValueError(f"Jenis latency tidak dikenal: {kind}")
+        try:
+            params = tuple(float(x) for x in parts[1:])
+        except ValueError:
+            raise ValueError(f"Parameter latency tidak valid: {spec}")
+        if len(params) != _LATENCY_KINDS[kind] or any(p < 0 for p in params):
+            raise ValueError(f"Spec latency tidak valid: {spec}")
+        return cls(kind=kind, params=params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            lo, hi = self.params
+            return rng.uniform(min(lo, hi), max(lo, hi))
+        if self.kind == "normal":
+            mean, std = self.params
+            return max(0.0, rng.gauss(mean, std))
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(0.0, sigma) * median if median > 0 else 0.0
+        return self.params[0]
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+    error_codes: Tuple[int, ...] = (429, 500)
+    reply: str = "Ini jawaban dari stub LLM untuk load test."
+    stream_chunk_chars: int = 12
+    stream_chunk_delay_ms: float = 0.0
+    seed: int | None = None
+
+
+class FakeLLMState:
+    """
+    State bersama antar thread handler: RNG (dikunci) + counter request.
+    """
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"requests": 0, "errors": 0, "streams": 0}
+
+    def draw(self) -> Tuple[float, int]:
+        # return (latency_ms, status_code) untuk satu request
+        with self._lock:
+            self.counts["requests"] += 1
+            latency_ms = self.config.latency.sample_ms(self._rng)
+            status = 200
+            if self.config.error_rate > 0 and self._rng.random() < self.config.error_rate:
+                status = self._rng.choice(self.config.error_codes or (500,))
+                self.counts["errors"] += 1
+            return latency_ms, status
+
+    def mark_stream(self) -> None:
+        with self._lock:
+            self.counts["streams"] += 1
+
+
+def _last_user_message(messages: List[Dict[str, Any]]) -> str:
+    for msg in reversed(messages or []):
+        if isinstance(msg, dict) and msg.get("role") == "user":
+            content = msg.get("content")
+            if isinstance(content, list):
+                return " ".join(str(p.get("text") or "") for p in content if isinstance(p, dict))
+            return str(content or "")
+    return ""
+
+
+def _usage(prompt: str, completion: str) -> Dict[str, int]:
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(completion) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenRouter/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> FakeLLMState:
+        return self.server.fake_state  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args):  # noqa: A002 - signature dari BaseHTTPRequestHandler
+        logger.debug(" FAKE_LLM %s", format % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake/stub-model", "object": "model"}]})
+            return
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, dict(self.state.counts))
+            return
+        self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except Exception:
+            self._send_json(400, {"error": {"message": "Invalid JSON", "code": 400}})
+            return
+
+        latency_ms, status = self.state.draw()
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000.0)
+
+        if status != 200:
+            self._send_json(
+                status,
+                {"error": {"message": f"Fake upstream error {status}", "code": status, "type": "fake_error"}},
+            )
+            return
+
+        model = str(body.get("model") or "fake/stub-model")
+        prompt = _last_user_message(body.get("messages") or [])
+        reply = self.state.config.reply
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            self.state.mark_stream()
+            self._send_stream(completion_id, created, model, reply)
+            return
+
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": _usage(prompt, reply),
+            },
+        )
+
+    def _send_stream(self, completion_id: str, created: int, model: str, reply: str) -> None:
+        cfg = self.state.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: Dict[str, Any], finish_reason: str | None = None) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        step = max(1, int(cfg.stream_chunk_chars))
+        self.wfile.write(chunk({"role": "assistant", "content": ""}))
+        for pos in range(0, len(reply), step):
+            if cfg.stream_chunk_delay_ms > 0:
+                time.sleep(cfg.stream_chunk_delay_ms / 1000.0)
+            self.wfile.write(chunk({"content": reply[pos:pos + step]}))
+            self.wfile.flush()
+        self.wfile.write(chunk({}, finish_reason="stop"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_fake_openrouter_server(host: str, port: int, config: FakeLLMConfig) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, int(port)), FakeOpenRouterHandler)
+    server.daemon_threads = True
+    server.fake_state = FakeLLMState(config)  # type: ignore[attr-defined]
+    return server
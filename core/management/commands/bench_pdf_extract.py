@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+
+import pdfplumber
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.evaluation import SCHEDULE_PDF_NAME
+from core.ai_engine.ingest import _merge_pdf_pages
+from core.ai_engine.pdf_pages import (
+    extract_page_raw,
+    extract_pdf_pages_parallel,
+    file_sha256,
+    load_pdf_pages,
+    write_cached_pages,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ekstraksi tabel PDF per halaman: sequential vs process pool, plus cek parity output. "
+        "Contoh: python manage.py bench_pdf_extract --workers 1,2,4"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pdf", type=str, default="", help="(Opsional) path PDF; default PDF jadwal bawaan")
+        parser.add_argument(
+            "--workers",
+            type=str,
+            default="",
+            help="Daftar jumlah proses dipisah koma; default 2..jumlah core",
+        )
+
+    def handle(self, *args, **options):
+        path = (options.get("pdf") or "").strip() or os.path.join(str(settings.BASE_DIR), SCHEDULE_PDF_NAME)
+        if not os.path.exists(path):
+            raise CommandError(f"PDF tidak ditemukan: {path}")
+
+        raw_workers = (options.get("workers") or "").strip()
+        try:
+            if raw_workers:
+                workers_list = sorted({int(x) for x in raw_workers.split(",") if x.strip()})
+            else:
+                workers_list = sorted({2, max(os.cpu_count() or 1, 1)})
+        except ValueError:
+            raise CommandError("Format --workers tidak valid. Contoh: --workers 1,2,4")
+        workers_list = [w for w in workers_list if w > 1]
+
+        self.stdout.write(f"🧪 Benchmark PDF extract: {os.path.basename(path)} (cpu={os.cpu_count()})")
+
+        t0 = time.perf_counter()
+        with pdfplumber.open(path) as pdf:
+            n_pages = len(pdf.pages)
+            baseline_raw = [extract_page_raw(page) for page in pdf.pages]
+            baseline = _merge_pdf_pages(baseline_raw)
+        seq_s = time.perf_counter() - t0
+        self.stdout.write(
+            f"sequential: {seq_s:.2f}s pages={n_pages} rows={len(baseline[2])} columns={len(baseline[1])}"
+        )
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            write_cached_pages(cache_dir, file_sha256(path), baseline_raw)
+            t0 = time.perf_counter()
+            cached = _merge_pdf_pages(load_pdf_pages(path, cache_dir=cache_dir))
+            hit_s = time.perf_counter() - t0
+        status = "parity OK" if cached == baseline else "PARITY MISMATCH"
+        self.stdout.write(f"page cache hit: {hit_s * 1000:.1f}ms ({status})")
+
+        for workers in workers_list:
+            # run pertama ikut membayar start proses spawn; run kedua memakai pool yang sama
+            for label in ("cold", "warm"):
+                t0 = time.perf_counter()
+                result = _merge_pdf_pages(extract_pdf_pages_parallel(path, n_pages, workers))
+                par_s = time.perf_counter() - t0
+                speedup = seq_s / par_s if par_s else 0.0
+                line = f"workers={workers} {label}: {par_s:.2f}s speedup={speedup:.2f}x"
+                if result == baseline:
+                    self.stdout.write(self.style.SUCCESS(f"  ✅ {line} parity OK"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"  ❌ {line} PARITY MISMATCH"))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.evaluation import SCHEDULE_PDF_NAME
+from core.ai_engine.ingest import _merge_pdf_pages, _repair_candidates
+from core.ai_engine.pdf_extractors import get_extractor, probe_ruled_ops, select_extractor
+from core.ai_engine.schedule_table import ScheduleTable
+
+
+def _row_key(row) -> tuple:
+    return tuple(str(row.get(k) or "") for k in ("page", "hari", "jam", "mata_kuliah", "kelas", "ruang"))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark backend ekstraksi tabel PDF (pdfplumber vs camelot): wall time, jumlah row, "
+        "dan kandidat LLM repair, plus pilihan probe otomatis. "
+        "Contoh: python manage.py bench_pdf_extractors --max-pages 5"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pdf", type=str, default="", help="(Opsional) path PDF; default PDF jadwal bawaan")
+        parser.add_argument("--max-pages", type=int, default=0, help="Batasi jumlah halaman (0 = semua)")
+        parser.add_argument(
+            "--backends", type=str, default="pdfplumber,camelot", help="Daftar backend dipisah koma"
+        )
+
+    def handle(self, *args, **options):
+        path = (options.get("pdf") or "").strip() or os.path.join(str(settings.BASE_DIR), SCHEDULE_PDF_NAME)
+        if not os.path.exists(path):
+            raise CommandError(f"PDF tidak ditemukan: {path}")
+        max_pages = int(options.get("max_pages") or 0) or None
+        try:
+            backends = [get_extractor(x.strip()) for x in (options.get("backends") or "").split(",") if x.strip()]
+        except ValueError as e:
+            raise CommandError(str(e))
+        threshold = float(os.environ.get("INGEST_REPAIR_THRESHOLD", "0.82"))
+
+        self.stdout.write(f"🧪 Benchmark PDF extractor: {os.path.basename(path)} (max_pages={max_pages or 'semua'})")
+
+        t0 = time.perf_counter()
+        ops = probe_ruled_ops(path)
+        probe_ms = (time.perf_counter() - t0) * 1000.0
+        chosen, reason = select_extractor(path)
+        self.stdout.write(f"probe: {probe_ms:.1f}ms ruled_ops={ops} -> {chosen.name} ({reason})")
+
+        keys = {}
+        for extractor in backends:
+            if not extractor.available():
+                self.stdout.write(self.style.WARNING(f"  ⚠️ {extractor.name}: tidak terpasang, dilewati"))
+                continue
+            t0 = time.perf_counter()
+            try:
+                pages = extractor.extract(path, max_pages=max_pages)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"  ❌ {extractor.name}: gagal {e!r}"))
+                continue
+            extract_s = time.perf_counter() - t0
+            _text, columns, rows = _merge_pdf_pages(pages)
+            total_s = time.perf_counter() - t0
+            candidates = _repair_candidates(ScheduleTable.from_rows(rows), threshold)
+            keys[extractor.name] = {_row_key(r) for r in rows}
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  ✅ {extractor.name}: extract={extract_s:.2f}s total={total_s:.2f}s pages={len(pages)} "
+                    f"tables={sum(len(t) for t, _ in pages)} rows={len(rows)} columns={len(columns)} "
+                    f"repair_candidates={len(candidates)} (threshold={threshold})"
+                )
+            )
+
+        names = list(keys)
+        for i, a in enumerate(names):
+            for b in names[i + 1 :]:
+                self.stdout.write(
+                    f"diff rows: hanya {a}={len(keys[a] - keys[b])} hanya {b}={len(keys[b] - keys[a])} "
+                    f"sama={len(keys[a] & keys[b])}"
+                )
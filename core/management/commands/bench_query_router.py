@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, List
+
+from django.core.management.base import BaseCommand
+
+from core.ai_engine.retrieval import main as ret_main
+from core.ai_engine.retrieval.router import route_query
+from core.ai_engine.retrieval.rules import infer_doc_type, is_grade_rescue_query
+
+
+_SAMPLE_QUERIES = [
+    "jadwal hari senin jam 07.00 ruang kelas semester 3",
+    "ipk saya 2.8, aman gak?",
+    "jurusan apa yang cocok jadi HRD?",
+    "tolong hitung nilai uas saya target B",
+    "UTS 60 bobot 40 target B",
+    "cara judi online aman",
+    "bantu bikin strategi propaganda kampanye",
+    "cara jadi dukun paling cepat",
+    "apa itu sks?",
+    "rekap nilai transkrip semester 5 dan mata kuliah yang mengulang",
+]
+
+
+def _legacy_route(q: str) -> tuple:
+    return (
+        ret_main._classify_query_safety(q),
+        ret_main._classify_query_intent(q),
+        infer_doc_type(q),
+        is_grade_rescue_query(q),
+        ret_main._needs_doc_grounding(q),
+        ret_main._is_personal_document_query(q),
+        ret_main._rewrite_queries(q),
+    )
+
+
+def _router_route(q: str) -> tuple:
+    r = route_query(q)
+    return (
+        r.safety(),
+        r.intent,
+        r.doc_type,
+        r.is_grade_rescue,
+        r.needs_doc_grounding,
+        r.is_personal,
+        list(r.query_variants),
+    )
+
+
+def _time_per_call_us(fn: Callable[[str], Any], queries: List[str], rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries:
+            fn(q)
+    return (time.perf_counter() - t0) * 1e6 / max(1, rounds * len(queries))
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark router query (satu pass) vs klasifikasi lama per fungsi. Contoh: python manage.py bench_query_router --rounds 5000"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=2000, help="Jumlah ulangan per query")
+        parser.add_argument(
+            "--query",
+            action="append",
+            default=[],
+            help="(Opsional) query tambahan, boleh diulang",
+        )
+
+    def handle(self, *args, **options):
+        rounds = max(1, int(options.get("rounds") or 2000))
+        queries = list(_SAMPLE_QUERIES) + [q for q in (options.get("query") or []) if q]
+
+        mismatches = [q for q in queries if _legacy_route(q) != _router_route(q)]
+        if mismatches:
+            for q in mismatches:
+                self.stdout.write(self.style.ERROR(f"  ❌ PARITY MISMATCH q='{q}'"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Parity OK untuk {len(queries)} query"))
+
+        legacy_us = _time_per_call_us(_legacy_route, queries, rounds)
+        router_us = _time_per_call_us(route_query, queries, rounds)
+        speedup = legacy_us / router_us if router_us else 0.0
+        self.stdout.write(
+            f"legacy={legacy_us:.1f}us/query router={router_us:.1f}us/query speedup={speedup:.2f}x "
+            f"(rounds={rounds}, queries={len(queries)})"
+        )
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.evaluation import SCHEDULE_PDF_NAME
+from core.ai_engine.ingest import (
+    _merge_pdf_pages,
+    _schedule_rows_to_csv_text,
+    _schedule_rows_to_parent_chunks,
+    _schedule_rows_to_row_chunks,
+)
+from core.ai_engine.pdf_pages import load_pdf_pages
+from core.ai_engine.schedule_table import ScheduleTable
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        current, _peak = tracemalloc.get_traced_memory()
+        blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    return obj, current, blocks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark pipeline schedule_rows PDF (merge -> row/parent chunk -> CSV -> serialisasi) "
+        "dan bandingkan memori ScheduleTable vs list of dict. Contoh: python manage.py bench_schedule_rows --runs 5"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pdf", type=str, default="", help="(Opsional) path PDF; default PDF jadwal bawaan")
+        parser.add_argument("--runs", type=int, default=5, help="Jumlah pengulangan pipeline (default 5)")
+
+    def handle(self, *args, **options):
+        path = (options.get("pdf") or "").strip() or os.path.join(str(settings.BASE_DIR), SCHEDULE_PDF_NAME)
+        if not os.path.exists(path):
+            raise CommandError(f"PDF tidak ditemukan: {path}")
+        runs = max(int(options.get("runs") or 5), 1)
+
+        self.stdout.write(f"🧪 Benchmark schedule_rows: {os.path.basename(path)} runs={runs}")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            pages_raw = load_pdf_pages(path, cache_dir=cache_dir)
+
+        def pipeline():
+            _text, _cols, rows = _merge_pdf_pages(pages_raw)
+            _schedule_rows_to_row_chunks(rows)
+            _schedule_rows_to_parent_chunks(rows)
+            _schedule_rows_to_csv_text(rows)
+            json.dumps(rows.to_dicts(300), ensure_ascii=True)
+            rows.encode(1200)
+            return rows
+
+        timings = []
+        for _ in range(runs):
+            gc.collect()
+            t0 = time.perf_counter()
+            rows = pipeline()
+            timings.append((time.perf_counter() - t0) * 1000.0)
+        self.stdout.write(
+            f"pipeline: rows={len(rows)} min={min(timings):.1f}ms median={statistics.median(timings):.1f}ms"
+        )
+
+        dicts = rows.to_dicts()
+        table, table_bytes, table_blocks = _measure(lambda: ScheduleTable(dicts))
+        listed, list_bytes, list_blocks = _measure(lambda: [dict(r) for r in dicts])
+        self.stdout.write(
+            f"memori: table={table_bytes / 1024:.0f}KB blocks={table_blocks} | "
+            f"list dict={list_bytes / 1024:.0f}KB blocks={list_blocks}"
+        )
+
+        compact = table.encode(1200)[0]
+        legacy = json.dumps(listed[:1200], ensure_ascii=True)
+        self.stdout.write(f"metadata schedule_rows: compact={len(compact)}B list dict={len(legacy)}B")
+
+        if table == listed:
+            self.stdout.write(self.style.SUCCESS("✅ parity OK (ScheduleTable == list of dict)"))
+        else:
+            self.stdout.write(self.style.ERROR("❌ PARITY MISMATCH"))
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from langchain_chroma import Chroma
+
+from core.ai_engine.config import collection_name_for_user, get_chroma_client, override_persist_directory
+from core.ai_engine.memmap_store import MemmapVectorStore
+
+
+def _percentiles(samples_ms: List[float]) -> str:
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"p50={statistics.median(ordered):.2f}ms p95={p95:.2f}ms"
+
+
+def _matches(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    # cukup untuk filter benchmark: kesamaan / $in, opsional dibungkus $and
+    where = where or {}
+    for cond in where.get("$and", [where]):
+        (key, value), = cond.items()
+        if isinstance(value, dict):
+            if meta.get(key) not in set(value["$in"]):
+                return False
+        elif meta.get(key) != value:
+            return False
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark recall@k dan latency: Chroma (collection per user + filter) vs backend memmap "
+        "int8 (dengan/tanpa rescore float32), ground truth = brute force float32. Data sintetis. "
+        "Contoh: python manage.py bench_vector_backend --chunks 1000,3000,6000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunks", type=str, default="1000,3000,6000", help="Ukuran korpus per user, dipisah koma")
+        parser.add_argument("--dim", type=int, default=1024, help="Dimensi vector (e5-large = 1024)")
+        parser.add_argument("--k", type=int, default=20)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=11)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(x) for x in (options.get("chunks") or "").split(",") if x.strip()})
+        except ValueError:
+            raise CommandError("Format --chunks tidak valid. Contoh: --chunks 1000,3000")
+        if not sizes or sizes[0] < 1:
+            raise CommandError("--chunks minimal 1")
+        dim = max(int(options["dim"]), 2)
+        k = max(int(options["k"]), 1)
+        n_queries = max(int(options["queries"]), 1)
+        rng = np.random.default_rng(int(options["seed"]))
+        filters = {
+            "user_id": {"user_id": "1"},
+            "doc_type+semester": {"$and": [{"user_id": "1"}, {"doc_type": "schedule"}, {"semester": {"$in": ["3", "5"]}}]},
+        }
+
+        self.stdout.write(f"🧪 Benchmark vector backend: dim={dim} k={k} queries={n_queries}")
+        for size in sizes:
+            # korpus per user: beberapa "dokumen" dengan topik berbeda, chunk tersebar di sekitarnya
+            centers = rng.normal(size=(max(size // 100, 1), dim))
+            vecs = centers[rng.integers(0, len(centers), size)] + 0.8 * rng.normal(size=(size, dim))
+            vecs = (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+            ids = [f"c{i}" for i in range(size)]
+            metas = [
+                {
+                    "user_id": "1",
+                    "doc_id": str(i % 12),
+                    "doc_type": "schedule" if i % 3 else "transcript",
+                    "semester": str(i % 8),
+                }
+                for i in range(size)
+            ]
+            docs = [f"chunk {i}" for i in range(size)]
+            picks = rng.integers(0, size, n_queries)
+            queries = vecs[picks] + 0.5 * rng.normal(size=(n_queries, dim)).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+            with tempfile.TemporaryDirectory() as tmp, override_persist_directory(tmp):
+                name = collection_name_for_user(1, layout="user")
+                chroma = Chroma(client=get_chroma_client(), collection_name=name)
+                col = chroma._collection
+                memmap = MemmapVectorStore(os.path.join(tmp, "memmap"), embedding_function=None, collection_name=name)
+                t_chroma = t_memmap = 0.0
+                for start in range(0, size, 1000):
+                    part = slice(start, start + 1000)
+                    t0 = time.perf_counter()
+                    col.add(ids=ids[part], embeddings=vecs[part], metadatas=metas[part], documents=docs[part])
+                    t_chroma += time.perf_counter() - t0
+                    t0 = time.perf_counter()
+                    memmap._collection.upsert(ids=ids[part], embeddings=vecs[part], metadatas=metas[part], documents=docs[part])
+                    t_memmap += time.perf_counter() - t0
+                self.stdout.write(f"korpus={size} chunk/user (insert chroma={t_chroma:.1f}s memmap={t_memmap:.1f}s)")
+
+                for label, where in filters.items():
+                    allowed = np.fromiter((_matches(m, where) for m in metas), dtype=bool, count=size)
+                    candidates = np.flatnonzero(allowed)
+                    truth = []
+                    for q in queries:
+                        dist = ((vecs[candidates] - q) ** 2).sum(axis=1)
+                        truth.append({ids[candidates[j]] for j in np.argsort(dist)[:k]})
+
+                    runs: Dict[str, Callable[[np.ndarray], List[Any]]] = {
+                        "chroma": lambda q, w=where: chroma.similarity_search_by_vector_with_relevance_scores(
+                            q.tolist(), k=k, filter=w
+                        ),
+                        "memmap int8+rescore": lambda q, w=where: memmap.similarity_search_by_vector_with_relevance_scores(
+                            q, k=k, filter=w
+                        ),
+                    }
+                    for run_label, fn in runs.items():
+                        lat, recall = [], []
+                        for q, expected in zip(queries, truth):
+                            t0 = time.perf_counter()
+                            hits = fn(q)
+                            lat.append((time.perf_counter() - t0) * 1000.0)
+                            got = {getattr(doc, "id", None) or doc.page_content.replace("chunk ", "c") for doc, _s in hits}
+                            recall.append(len(got & expected) / max(len(expected), 1))
+                        self.stdout.write(
+                            f"  [{label}] {run_label:<20} recall@{k}={statistics.mean(recall):.3f} {_percentiles(lat)}"
+                        )
+
+                    lat, recall = [], []
+                    for q, expected in zip(queries, truth):
+                        t0 = time.perf_counter()
+                        hits = memmap._collection.search(q, k=k, where=where, rescore=0)
+                        lat.append((time.perf_counter() - t0) * 1000.0)
+                        recall.append(len({vid for vid, _m, _d in hits} & expected) / max(len(expected), 1))
+                    self.stdout.write(
+                        f"  [{label}] {'memmap int8 saja':<20} recall@{k}={statistics.mean(recall):.3f} {_percentiles(lat)}"
+                    )
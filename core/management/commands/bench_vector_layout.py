@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.config import BASE_COLLECTION_NAME, collection_name_for_user, get_chroma_client, override_persist_directory
+
+
+def _percentiles(samples_ms: List[float]) -> str:
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"p50={statistics.median(ordered):.2f}ms p95={p95:.2f}ms"
+
+
+def _timed(fn: Callable[[], object], rounds: int) -> List[float]:
+    out = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark latency query Chroma: satu collection + filter user_id vs collection per user, "
+        "untuk beberapa ukuran korpus total (data sintetis di direktori sementara). "
+        "Contoh: python manage.py bench_vector_layout --users 5,20,50 --per-user 1000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=str, default="5,20,50", help="Daftar jumlah user total, dipisah koma")
+        parser.add_argument("--per-user", type=int, default=1000, help="Jumlah chunk per user")
+        parser.add_argument("--dim", type=int, default=1024, help="Dimensi vector (e5-large = 1024)")
+        parser.add_argument("--k", type=int, default=20, help="Top-k per query")
+        parser.add_argument("--queries", type=int, default=50, help="Jumlah query per pengukuran")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        try:
+            steps = sorted({int(x) for x in (options.get("users") or "").split(",") if x.strip()})
+        except ValueError:
+            raise CommandError("Format --users tidak valid. Contoh: --users 5,20,50")
+        if not steps or steps[0] < 1:
+            raise CommandError("--users minimal 1")
+        per_user = max(int(options["per_user"]), 1)
+        dim = max(int(options["dim"]), 2)
+        k = max(int(options["k"]), 1)
+        n_queries = max(int(options["queries"]), 1)
+        rng = np.random.default_rng(int(options["seed"]))
+
+        self.stdout.write(f"🧪 Benchmark layout collection: per_user={per_user} dim={dim} k={k} queries={n_queries}")
+
+        with tempfile.TemporaryDirectory() as tmp, override_persist_directory(tmp):
+            client = get_chroma_client()
+            single = client.get_or_create_collection(BASE_COLLECTION_NAME)
+            probe_user = 1
+            loaded = 0
+            for n_users in steps:
+                t0 = time.perf_counter()
+                for uid in range(loaded + 1, n_users + 1):
+                    # tiap user punya "topik" sendiri supaya tetangga terdekat lintas user tetap realistis
+                    center = rng.normal(size=dim)
+                    vecs = center + 0.6 * rng.normal(size=(per_user, dim))
+                    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+                    ids = [f"u{uid}-{i}" for i in range(per_user)]
+                    metas = [{"user_id": str(uid), "doc_id": str(i % 10), "doc_type": "schedule"} for i in range(per_user)]
+                    own = client.get_or_create_collection(collection_name_for_user(uid, layout="user"))
+                    for start in range(0, per_user, 1000):
+                        part = slice(start, start + 1000)
+                        single.add(ids=ids[part], embeddings=vecs[part], metadatas=metas[part])
+                        own.add(ids=ids[part], embeddings=vecs[part], metadatas=metas[part])
+                loaded = n_users
+                build_s = time.perf_counter() - t0
+
+                own = client.get_collection(collection_name_for_user(probe_user, layout="user"))
+                where = {"user_id": str(probe_user)}
+                queries = iter(rng.normal(size=(n_queries * 4, dim)))
+                overlap = []
+
+                def _single_query():
+                    return single.query(query_embeddings=[next(queries)], n_results=k, where=where, include=[])
+
+                def _own_query():
+                    return own.query(query_embeddings=[next(queries)], n_results=k, where=where, include=[])
+
+                single_ms = _timed(_single_query, n_queries)
+                own_ms = _timed(_own_query, n_queries)
+                for q in rng.normal(size=(10, dim)):
+                    a = single.query(query_embeddings=[q], n_results=k, where=where, include=[])["ids"][0]
+                    b = own.query(query_embeddings=[q], n_results=k, where=where, include=[])["ids"][0]
+                    overlap.append(len(set(a) & set(b)) / max(len(b), 1))
+                single_get_ms = _timed(lambda: single.get(where={"$and": [where, {"doc_id": "3"}]}, include=[]), 10)
+                own_get_ms = _timed(lambda: own.get(where={"$and": [where, {"doc_id": "3"}]}, include=[]), 10)
+
+                self.stdout.write(f"korpus={n_users * per_user} vector ({n_users} user, build +{build_s:.1f}s)")
+                self.stdout.write(f"  single+filter query: {_percentiles(single_ms)} | get(doc): {_percentiles(single_get_ms)}")
+                self.stdout.write(f"  per-user      query: {_percentiles(own_ms)} | get(doc): {_percentiles(own_get_ms)}")
+                self.stdout.write(f"  overlap top-{k} single vs per-user: {statistics.mean(overlap):.2f}")
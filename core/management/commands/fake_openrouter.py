@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest.fake_openrouter import FakeLLMConfig, LatencyModel, make_fake_openrouter_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Jalankan server OpenAI-compatible palsu untuk load test tanpa kuota LLM. "
+        "Contoh: python manage.py fake_openrouter --port 8765 --latency lognormal:800:0.4 --error-rate 0.02 "
+        "lalu set LLMConfiguration.openrouter_base_url = http://127.0.0.1:8765/api/v1"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", type=str, default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency",
+            type=str,
+            default="fixed:0",
+            help="Distribusi latency (ms): fixed:MS | uniform:LO:HI | normal:MEAN:STD | lognormal:MEDIAN:SIGMA",
+        )
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraksi request yang dibalas error (0-1)")
+        parser.add_argument("--error-codes", type=str, default="429,500", help="Status error yang diacak, dipisah koma")
+        parser.add_argument("--reply", type=str, default="", help="(Opsional) isi jawaban stub")
+        parser.add_argument("--stream-chunk-chars", type=int, default=12, help="Ukuran potongan teks per chunk SSE")
+        parser.add_argument("--stream-chunk-delay-ms", type=float, default=0.0, help="Jeda antar chunk SSE (ms)")
+        parser.add_argument("--seed", type=int, default=None, help="(Opsional) seed RNG agar run bisa diulang")
+
+    def handle(self, *args, **options):
+        try:
+            latency = LatencyModel.parse(options["latency"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        error_rate = float(options.get("error_rate") or 0.0)
+        if not 0.0 <= error_rate <= 1.0:
+            raise CommandError("--error-rate harus di antara 0 dan 1.")
+        try:
+            error_codes = tuple(int(x) for x in str(options.get("error_codes") or "").split(",") if x.strip())
+        except ValueError:
+            raise CommandError("Format --error-codes tidak valid. Contoh: --error-codes 429,500,503")
+
+        config = FakeLLMConfig(
+            latency=latency,
+            error_rate=error_rate,
+            error_codes=error_codes or (500,),
+            stream_chunk_chars=max(1, int(options.get("stream_chunk_chars") or 12)),
+            stream_chunk_delay_ms=max(0.0, float(options.get("stream_chunk_delay_ms") or 0.0)),
+            seed=options.get("seed"),
+        )
+        if (options.get("reply") or "").strip():
+            config.reply = options["reply"].strip()
+
+        server = make_fake_openrouter_server(options["host"], options["port"], config)
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"✅ Fake OpenRouter jalan di http://{host}:{port}/api/v1"))
+        self.stdout.write(
+            f"latency={latency.kind}:{':'.join(str(p) for p in latency.params)} "
+            f"error_rate={error_rate} error_codes={list(config.error_codes)}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            counts = server.fake_state.counts
+            self.stdout.write(
+                f"🛑 Berhenti. requests={counts['requests']} errors={counts['errors']} streams={counts['streams']}"
+            )
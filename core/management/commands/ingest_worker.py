@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.ingest_queue import IngestWorkerPool, requeue_stale_jobs
+from core.models import IngestionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker lokal antrian ingest (tanpa broker eksternal). Aktifkan INGEST_QUEUE_ENABLED=1 di web server "
+        "agar upload/reingest masuk antrian. Contoh: python manage.py ingest_worker --workers 2"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Jumlah thread worker")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Jeda polling saat antrian kosong (detik)")
+        parser.add_argument(
+            "--heartbeat-interval",
+            type=float,
+            default=30.0,
+            help="Interval heartbeat job yang sedang jalan + cek job stale (detik)",
+        )
+        parser.add_argument("--once", action="store_true", help="Proses antrian sampai kosong lalu keluar")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"⚠️ {requeued} job stale dikembalikan ke antrian"))
+
+        pool = IngestWorkerPool(
+            workers=int(options.get("workers") or 1),
+            poll_interval=float(options.get("poll_interval") or 1.0),
+            heartbeat_interval=float(options.get("heartbeat_interval") or 30.0),
+        )
+
+        def _stop(signum, frame):
+            self.stdout.write(self.style.WARNING("🛑 Sinyal stop diterima, menunggu job berjalan selesai..."))
+            pool.stop()
+
+        signal.signal(signal.SIGINT, _stop)
+        signal.signal(signal.SIGTERM, _stop)
+
+        queued = IngestionJob.objects.filter(status=IngestionJob.STATUS_QUEUED).count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Ingest worker jalan: workers={pool.workers} prefix={pool.worker_prefix} queued={queued} once={bool(options.get('once'))}"
+            )
+        )
+        processed = pool.run(once=bool(options.get("once")))
+        self.stdout.write(self.style.SUCCESS(f"Selesai. processed={processed} failed={pool.failed}"))
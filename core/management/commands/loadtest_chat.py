@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.evaluation import load_eval_queries, write_synthetic_transcript
+from core.loadtest.driver import DEFAULT_CHAT_QUERIES, LoadConfig, run_load
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test HTTP ke server yang sedang jalan: login banyak user test, upload dokumen, "
+        "lalu kirim chat + planner secara concurrent. Contoh: "
+        "python manage.py loadtest_chat --base-url http://127.0.0.1:8000 --users 50 --concurrency 20 --create-users"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", type=str, default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=10, help="Jumlah virtual user")
+        parser.add_argument("--user-prefix", type=str, default="loadtest_user")
+        parser.add_argument("--password", type=str, default="LoadTest#12345")
+        parser.add_argument(
+            "--create-users",
+            action="store_true",
+            help="Buat/reset password user test di DB sebelum mulai",
+        )
+        parser.add_argument("--concurrency", type=int, default=10, help="Jumlah virtual user yang jalan bersamaan")
+        parser.add_argument("--iterations", type=int, default=5, help="Jumlah aksi chat/planner per user")
+        parser.add_argument("--planner-ratio", type=float, default=0.2, help="Fraksi aksi yang berupa planner flow")
+        parser.add_argument(
+            "--upload",
+            type=str,
+            default="synthetic",
+            help="File yang di-upload tiap user: path file, 'synthetic' (transkrip CSV sintetis), atau 'none'",
+        )
+        parser.add_argument("--think-time-ms", type=float, default=0.0, help="Jeda antar aksi per user (ms)")
+        parser.add_argument("--timeout", type=float, default=120.0, help="Timeout per request (detik)")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", type=str, default="", help="(Opsional) simpan report JSON ke file")
+
+    def handle(self, *args, **options):
+        n_users = int(options.get("users") or 0)
+        if n_users < 1:
+            raise CommandError("--users harus >= 1.")
+        planner_ratio = float(options.get("planner_ratio") or 0.0)
+        if not 0.0 <= planner_ratio <= 1.0:
+            raise CommandError("--planner-ratio harus di antara 0 dan 1.")
+
+        prefix = str(options.get("user_prefix") or "loadtest_user").strip()
+        password = str(options.get("password") or "")
+        usernames = [f"{prefix}_{i:04d}" for i in range(1, n_users + 1)]
+
+        if options.get("create_users"):
+            for username in usernames:
+                user, _created = User.objects.get_or_create(username=username)
+                user.set_password(password)
+                user.save(update_fields=["password"])
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(usernames)} user test siap (prefix={prefix})"))
+
+        upload = str(options.get("upload") or "none").strip()
+        upload_path = ""
+        if upload == "synthetic":
+            work_dir = os.path.join(os.getcwd(), "logs")
+            os.makedirs(work_dir, exist_ok=True)
+            upload_path = write_synthetic_transcript(work_dir)
+        elif upload.lower() != "none":
+            if not os.path.exists(upload):
+                raise CommandError(f"File upload tidak ditemukan: {upload}")
+            upload_path = upload
+
+        try:
+            queries = [q.query for q in load_eval_queries()] or list(DEFAULT_CHAT_QUERIES)
+        except (OSError, ValueError):
+            queries = list(DEFAULT_CHAT_QUERIES)
+
+        cfg = LoadConfig(
+            base_url=str(options["base_url"]),
+            usernames=usernames,
+            password=password,
+            iterations=max(1, int(options.get("iterations") or 1)),
+            concurrency=max(1, int(options.get("concurrency") or 1)),
+            planner_ratio=planner_ratio,
+            upload_path=upload_path,
+            queries=tuple(queries),
+            timeout=float(options.get("timeout") or 120.0),
+            think_time_ms=max(0.0, float(options.get("think_time_ms") or 0.0)),
+            seed=options.get("seed"),
+        )
+        self.stdout.write(
+            f"🚀 Load test {cfg.base_url} users={len(usernames)} concurrency={cfg.concurrency} "
+            f"iterations={cfg.iterations} planner_ratio={cfg.planner_ratio} upload={bool(upload_path)}"
+        )
+        report = run_load(cfg)
+
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        output = (options.get("output") or "").strip()
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Report disimpan ke {output}"))
+        self.stdout.write(payload)
+
+        for name, row in report["endpoints"].items():
+            line = (
+                f"{name:<8} req={row['requests']} rps={row['throughput_rps']} "
+                f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms p99={row['p99_ms']}ms err={row['error_rate']}"
+            )
+            style = self.style.WARNING if row["errors"] else self.style.SUCCESS
+            self.stdout.write(style(line))
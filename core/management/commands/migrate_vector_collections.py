@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.config import COLLECTION_LAYOUTS, get_collection_layout, get_collection_shards, get_vector_backend
+from core.ai_engine.vector_ops import copy_vectors_to_memmap, list_rag_collections, migrate_vector_layout
+
+
+class Command(BaseCommand):
+    help = (
+        "Pindahkan vector Chroma ke layout collection lain (single / user / shard) atau salin ke backend "
+        "memmap, tanpa embed ulang. Contoh: python manage.py migrate_vector_collections --to user --delete-source"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--to",
+            type=str,
+            required=True,
+            choices=[*COLLECTION_LAYOUTS, "memmap"],
+            help="Layout tujuan, atau `memmap` untuk menyalin ke backend memmap (per user)",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=0,
+            help="Jumlah shard untuk --to shard (default RAG_COLLECTION_SHARDS); harus sama dengan env saat serving",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Jumlah vector per halaman baca/upsert")
+        parser.add_argument(
+            "--delete-source",
+            action="store_true",
+            help="Hapus vector dari collection asal setelah di-upsert (default: hanya salin)",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Hitung saja, tidak menulis apa pun")
+
+    def handle(self, *args, **options):
+        to_layout = options["to"]
+        shards = int(options.get("shards") or 0) or get_collection_shards()
+        if shards < 1:
+            raise CommandError("--shards minimal 1")
+
+        before = list_rag_collections()
+        if to_layout == "memmap":
+            self._copy_to_memmap(before, max(int(options.get("batch_size") or 500), 1))
+            return
+        self.stdout.write(
+            f"🚚 Migrasi vector ke layout={to_layout}"
+            + (f" shards={shards}" if to_layout == "shard" else "")
+            + f" (collection sekarang: {len(before)}, dry_run={bool(options.get('dry_run'))})"
+        )
+
+        def _progress(name, batch):
+            self.stdout.write(f"- {name}: scanned={batch['scanned']} moved={batch['moved']}")
+
+        t0 = time.perf_counter()
+        stats = migrate_vector_layout(
+            to_layout,
+            shards=shards,
+            batch_size=max(int(options.get("batch_size") or 500), 1),
+            delete_source=bool(options.get("delete_source")),
+            dry_run=bool(options.get("dry_run")),
+            on_batch=_progress,
+        )
+        elapsed = time.perf_counter() - t0
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Selesai {elapsed:.1f}s: scanned={stats['scanned']} moved={stats['moved']} kept={stats['kept']} "
+                f"deleted={stats['deleted']} target_collections={len(stats['targets'])}"
+            )
+        )
+        if not options.get("dry_run") and get_collection_layout() != to_layout:
+            self.stdout.write(
+                self.style.WARNING(f"ℹ️ Set RAG_COLLECTION_LAYOUT={to_layout} lalu restart server/worker agar query memakai layout baru.")
+            )
+
+    def _copy_to_memmap(self, before, batch_size: int):
+        self.stdout.write(f"🚚 Salin vector Chroma ke backend memmap (collection Chroma: {len(before)})")
+        t0 = time.perf_counter()
+        stats = copy_vectors_to_memmap(
+            batch_size=batch_size,
+            on_batch=lambda name, batch: self.stdout.write(f"- {name}: scanned={batch['scanned']} copied={batch['moved']}"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Selesai {time.perf_counter() - t0:.1f}s: scanned={stats['scanned']} copied={stats['copied']} "
+                f"tanpa_user={stats['skipped']} user_collections={len(stats['targets'])}"
+            )
+        )
+        if get_vector_backend() != "memmap":
+            self.stdout.write(self.style.WARNING("ℹ️ Set RAG_VECTOR_BACKEND=memmap lalu restart server/worker."))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.evaluation import DEFAULT_KS, load_eval_queries, run_retrieval_eval
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluasi retrieval offline: ingest corpus tetap ke Chroma sementara, replay query berlabel "
+        "tanpa LLM, lalu cetak p50/p95/p99 per stage, recall@k, dan MRR (JSON). "
+        "Contoh: python manage.py rag_eval --output eval.json"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=str, default="", help="(Opsional) path JSON query berlabel")
+        parser.add_argument(
+            "--mode",
+            type=str,
+            default="doc_background",
+            choices=["doc_background", "doc_referenced"],
+            help="Mode retrieval ask_bot yang dievaluasi",
+        )
+        parser.add_argument(
+            "--k",
+            type=str,
+            default=",".join(str(k) for k in DEFAULT_KS),
+            help="Daftar k untuk recall@k dipisah koma, contoh: --k 1,5,10",
+        )
+        parser.add_argument("--output", type=str, default="", help="(Opsional) simpan report JSON ke file")
+        parser.add_argument(
+            "--keep-dir",
+            type=str,
+            default="",
+            help="(Opsional) pakai/simpan direktori kerja ini (Chroma + transkrip sintetis) alih-alih temp dir",
+        )
+        parser.add_argument("--skip-pdf", action="store_true", help="Jangan ingest PDF jadwal bawaan")
+
+    def handle(self, *args, **options):
+        try:
+            ks = sorted({int(x) for x in str(options.get("k") or "").split(",") if x.strip()})
+        except ValueError:
+            raise CommandError("Format --k tidak valid. Contoh: --k 1,3,5,10")
+        if not ks or min(ks) < 1:
+            raise CommandError("--k harus berisi bilangan bulat >= 1.")
+
+        try:
+            queries = load_eval_queries(options.get("queries") or None)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Gagal membaca query eval: {e}")
+        if not queries:
+            raise CommandError("Tidak ada query berlabel yang valid.")
+
+        self.stdout.write(f"🧪 RAG eval: {len(queries)} query, mode={options['mode']}, k={ks}")
+        report = run_retrieval_eval(
+            queries,
+            mode=options["mode"],
+            ks=ks,
+            include_pdf=not bool(options.get("skip_pdf")),
+            keep_dir=(options.get("keep_dir") or "").strip(),
+        )
+
+        failed = [row["source"] for row in report["ingest"] if not row["ok"]]
+        for source in failed:
+            self.stdout.write(self.style.WARNING(f"  ⚠️ Ingest gagal: {source}"))
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True)
+        output = (options.get("output") or "").strip()
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Report disimpan ke {output}"))
+        self.stdout.write(payload)
+
+        summary = " ".join(f"{k}={v}" for k, v in report["metrics"].items())
+        self.stdout.write(self.style.SUCCESS(f"✅ Selesai. {summary}"))
@@ -1,28 +1,56 @@
 from __future__ import annotations
 
+import os
 from typing import List, Optional
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 
-from core.models import AcademicDocument
-from core.ai_engine.ingest import process_document
-from core.ai_engine.vector_ops import delete_vectors_for_doc
+from core.ai_engine.config import DEFAULT_EMBEDDING_MODEL
+from core.models import AcademicDocument, IngestionJob
+from core.ingest_queue import default_worker_prefix, enqueue_ingest_job, process_jobs
+from core.reingest_parallel import ReingestCheckpoint, format_eta, run_parallel_reingest
 
 
 User = get_user_model()
 
 
 class Command(BaseCommand):
-    help = "Re-ingest dokumen (rebuild embeddings) untuk user tertentu. Contoh: python manage.py reingest_docs --user 1 --all"
+    help = (
+        "Re-ingest dokumen (rebuild embeddings). Contoh: python manage.py reingest_docs --user 1 --all | "
+        "rebuild semua user paralel: python manage.py reingest_docs --all-users --workers 4"
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--user",
             type=int,
-            required=True,
+            default=None,
             help="User ID yang dokumennya akan di-reingest",
         )
+        parser.add_argument(
+            "--all-users",
+            action="store_true",
+            help="Re-ingest semua dokumen semua user (rebuild index penuh, bisa dilanjutkan via checkpoint)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Jumlah proses worker parse/chunk; embedding tetap satu model di proses utama (default 1)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default="",
+            help="(Opsional) path file checkpoint rebuild (default: <BASE_DIR>/reingest_checkpoint.json)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="(Opsional) abaikan checkpoint lama dan mulai rebuild dari awal",
+        )
         parser.add_argument(
             "--all",
             action="store_true",
@@ -45,19 +73,34 @@ class Command(BaseCommand):
             action="store_true",
             help="(Opsional) hanya tampilkan dokumen yang akan diproses, tanpa delete/ingest",
         )
+        parser.add_argument(
+            "--enqueue-only",
+            action="store_true",
+            help="(Opsional) hanya masukkan job ke antrian ingest; diproses oleh `manage.py ingest_worker`",
+        )
 
     def handle(self, *args, **options):
-        user_id: int = options["user"]
-        do_all: bool = bool(options["all"])
+        user_id: Optional[int] = options.get("user")
+        all_users: bool = bool(options.get("all_users"))
+        workers: int = int(options.get("workers") or 1)
+        do_all: bool = bool(options["all"]) or all_users
         doc_ids_raw: str = (options.get("doc_ids") or "").strip()
         limit: int = int(options.get("limit") or 0)
         dry_run: bool = bool(options.get("dry_run"))
+        enqueue_only: bool = bool(options.get("enqueue_only"))
+
+        if all_users == (user_id is not None):
+            raise CommandError("Wajib pilih salah satu: --user <id> atau --all-users")
+        if workers < 1:
+            raise CommandError("--workers minimal 1")
 
         # validate user
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise CommandError(f"User id={user_id} tidak ditemukan.")
+        user = None
+        if user_id is not None:
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                raise CommandError(f"User id={user_id} tidak ditemukan.")
 
         # parse doc ids
         doc_ids: List[int] = []
@@ -73,7 +116,11 @@ class Command(BaseCommand):
         if not do_all and not doc_ids:
             raise CommandError("Wajib pilih salah satu: --all atau --doc-ids 1,2,3")
 
-        qs = AcademicDocument.objects.filter(user=user).order_by("-uploaded_at")
+        if all_users:
+            # urutan stabil supaya checkpoint & ETA konsisten antar run
+            qs = AcademicDocument.objects.select_related("user").order_by("user_id", "id")
+        else:
+            qs = AcademicDocument.objects.filter(user=user).order_by("-uploaded_at")
         if doc_ids:
             qs = qs.filter(id__in=doc_ids)
 
@@ -85,40 +132,116 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Tidak ada dokumen untuk diproses."))
             return
 
-        self.stdout.write(self.style.SUCCESS(f"Re-ingest start: user={user.username} (id={user.id}), docs={total}, dry_run={dry_run}"))
-
-        ok_count = 0
-        fail_count = 0
+        scope = "all-users" if all_users else f"user={user.username} (id={user.id})"
+        self.stdout.write(self.style.SUCCESS(f"Re-ingest start: {scope}, docs={total}, workers={workers}, dry_run={dry_run}"))
+
+        if (all_users or workers > 1) and not dry_run and not options.get("enqueue_only"):
+            self._run_parallel(
+                list(qs.values_list("id", flat=True)),
+                workers=workers,
+                scope="all" if all_users else f"user:{user.id}",
+                doc_ids_raw=doc_ids_raw,
+                options=options,
+            )
+            return
 
+        jobs = []
         for idx, doc in enumerate(qs, start=1):
             title = getattr(doc, "title", None) or getattr(doc.file, "name", f"doc-{doc.id}")
             self.stdout.write(f"[{idx}/{total}] doc_id={doc.id} title='{title}' file='{getattr(doc.file, 'name', '-')}'")
 
             if dry_run:
                 continue
-
-            try:
-                # 1) delete lama (aman: by doc_id; fallback: source)
-                delete_vectors_for_doc(user_id=str(user.id), doc_id=str(doc.id), source=title)
-
-                # 2) ingest ulang
-                ok = process_document(doc)
-                if ok:
-                    doc.is_embedded = True
-                    doc.save(update_fields=["is_embedded"])
-                    ok_count += 1
-                    self.stdout.write(self.style.SUCCESS(f"  ✅ OK re-ingest doc_id={doc.id}"))
-                else:
-                    fail_count += 1
-                    self.stdout.write(self.style.ERROR(f"  ❌ FAIL parsing/ingest doc_id={doc.id}"))
-
-            except Exception as e:
-                fail_count += 1
-                self.stdout.write(self.style.ERROR(f"  ❌ ERROR doc_id={doc.id}: {repr(e)}"))
+            # pakai antrian yang sama dengan /api/reingest/ supaya status job tercatat
+            jobs.append(enqueue_ingest_job(user or doc.user, doc, IngestionJob.KIND_REINGEST))
 
         self.stdout.write("")
         if dry_run:
             self.stdout.write(self.style.WARNING("Dry-run selesai (tidak ada perubahan)."))
             return
 
-        self.stdout.write(self.style.SUCCESS(f"Selesai. OK={ok_count} FAIL={fail_count} (total={total})"))
+        if enqueue_only:
+            ids = ",".join(str(j.id) for j in jobs)
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(jobs)} job masuk antrian (job_ids={ids}). Jalankan: python manage.py ingest_worker"))
+            return
+
+        ok_count = 0
+        fail_count = 0
+        embedded = 0
+        skipped = 0
+        for job in process_jobs([j.id for j in jobs], worker_id=f"{default_worker_prefix()}:cli"):
+            stats = job.chunk_stats or {}
+            embedded += int(stats.get("embedded", 0))
+            skipped += int(stats.get("skipped", 0))
+            if job.status == IngestionJob.STATUS_SUCCEEDED:
+                ok_count += 1
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"  ✅ OK re-ingest doc_id={job.document_id} job={job.id} "
+                        f"embedded={stats.get('embedded', 0)} skipped={stats.get('skipped', 0)} "
+                        f"updated={stats.get('updated', 0)} deleted={stats.get('deleted', 0)}"
+                    )
+                )
+            else:
+                fail_count += 1
+                self.stdout.write(self.style.ERROR(f"  ❌ FAIL doc_id={job.document_id} job={job.id}: {job.error or '-'}"))
+
+        taken = len(jobs) - ok_count - fail_count
+        if taken:
+            self.stdout.write(self.style.WARNING(f"  ⚠️ {taken} job sudah diambil worker lain"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Selesai. OK={ok_count} FAIL={fail_count} (total={total}) "
+                f"chunks embedded={embedded} skipped={skipped}"
+            )
+        )
+
+    def _run_parallel(self, doc_ids: List[int], *, workers: int, scope: str, doc_ids_raw: str, options) -> None:
+        path = (options.get("checkpoint") or "").strip() or os.path.join(str(settings.BASE_DIR), "reingest_checkpoint.json")
+        model = str(os.environ.get("RAG_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)).strip() or DEFAULT_EMBEDDING_MODEL
+        checkpoint = ReingestCheckpoint(path, {"scope": scope, "doc_ids": doc_ids_raw, "embedding_model": model})
+        if options.get("restart"):
+            checkpoint.clear()
+        elif checkpoint.load():
+            self.stdout.write(
+                self.style.WARNING(
+                    f"↩️ Lanjut dari checkpoint {path}: done={len(checkpoint.done)} failed={len(checkpoint.failed)}"
+                )
+            )
+
+        def _on_result(doc_id: int, ok: bool, stats, progress) -> None:
+            icon = "✅" if ok else "❌"
+            self.stdout.write(
+                f"[{progress.done}/{progress.total}] {icon} doc_id={doc_id} chunks={stats.get('chunks', 0)} "
+                f"embedded={stats.get('embedded', 0)} skipped={stats.get('skipped', 0)} | "
+                f"{progress.docs_per_sec:.2f} dok/s · {progress.chunks_per_sec:.1f} chunk/s · "
+                f"ETA {format_eta(progress.eta_seconds)}"
+            )
+
+        progress = run_parallel_reingest(
+            doc_ids,
+            workers=workers,
+            worker_id=f"{default_worker_prefix()}:cli",
+            checkpoint=checkpoint,
+            on_result=_on_result,
+        )
+
+        self.stdout.write("")
+        summary = (
+            f"OK={progress.ok} FAIL={progress.failed} (diproses={progress.done}/{progress.total}) "
+            f"chunks embedded={progress.embedded} skipped={progress.skipped} "
+            f"waktu={format_eta(progress.elapsed)} throughput={progress.docs_per_sec:.2f} dok/s "
+            f"{progress.chunks_per_sec:.1f} chunk/s"
+        )
+        if progress.interrupted:
+            self.stdout.write(self.style.WARNING(f"🛑 Dihentikan. {summary}"))
+            self.stdout.write(self.style.WARNING(f"Jalankan perintah yang sama untuk melanjutkan (checkpoint: {path})"))
+            return
+        if checkpoint.failed:
+            self.stdout.write(
+                self.style.WARNING(f"⚠️ {len(checkpoint.failed)} dokumen gagal; jalankan ulang untuk mencoba lagi (checkpoint: {path})")
+            )
+        else:
+            checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(f"Selesai. {summary}"))
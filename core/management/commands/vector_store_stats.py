@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai_engine.config import get_persist_directory, get_vector_backend
+from core.ai_engine.vector_ops import compact_vector_store, delete_orphan_vectors, scan_vector_store
+
+
+def _fmt_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{n}B"
+
+
+class Command(BaseCommand):
+    help = (
+        "Laporan isi vector store per user & dokumen (jumlah vector + perkiraan bytes), deteksi vector orphan "
+        "(dokumen sudah dihapus) dan dokumen is_embedded tanpa vector. Opsional: hapus orphan per batch "
+        "lalu compact store. Contoh: python manage.py vector_store_stats --gc --compact"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, default=None, help="Batasi scan ke satu user ID")
+        parser.add_argument("--page-size", type=int, default=500, help="Jumlah vector per halaman baca")
+        parser.add_argument("--top", type=int, default=10, help="Dokumen terbesar yang ditampilkan per user (0 = semua)")
+        parser.add_argument("--gc", action="store_true", help="Hapus vector orphan (default: hanya lapor)")
+        parser.add_argument("--batch-size", type=int, default=500, help="Jumlah id per batch delete orphan")
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="Drop collection kosong + VACUUM chroma.sqlite3 / tulis ulang file memmap, lalu lapor ruang yang kembali",
+        )
+
+    def handle(self, *args, **options):
+        page_size = int(options.get("page_size") or 0)
+        if page_size < 1:
+            raise CommandError("--page-size minimal 1")
+        top = max(int(options.get("top") or 0), 0)
+
+        self.stdout.write(f"🔎 Scan vector store backend={get_vector_backend()} dir={get_persist_directory()}")
+        t0 = time.perf_counter()
+        stats = scan_vector_store(page_size=page_size, user_id=options.get("user"))
+        self.stdout.write(
+            f"📦 {stats['scanned']} vector ({_fmt_bytes(stats['bytes'])}) di {stats['collections']} collection, "
+            f"{time.perf_counter() - t0:.1f}s"
+        )
+
+        docs_by_user = {}
+        for (uid, did), row in stats["docs"].items():
+            docs_by_user.setdefault(uid, []).append((did, row))
+        for uid, row in sorted(stats["users"].items(), key=lambda kv: -kv[1]["bytes"]):
+            docs = sorted(docs_by_user.get(uid, []), key=lambda item: -item[1]["bytes"])
+            self.stdout.write(f"- user_id={uid}: {row['vectors']} vector, {_fmt_bytes(row['bytes'])}, {len(docs)} dokumen")
+            for did, doc_row in docs[: top or None]:
+                title = stats["titles"].get((uid, did)) or "(orphan)"
+                self.stdout.write(f"    doc_id={did} {title}: {doc_row['vectors']} vector, {_fmt_bytes(doc_row['bytes'])}")
+            if top and len(docs) > top:
+                self.stdout.write(f"    ... {len(docs) - top} dokumen lain")
+
+        if stats["legacy"] or stats["no_user"]:
+            self.stdout.write(
+                self.style.WARNING(f"ℹ️ Vector tanpa doc_id={stats['legacy']} tanpa user_id={stats['no_user']} (tidak disentuh GC)")
+            )
+        for uid, did, title in stats["missing"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ is_embedded tanpa vector: user_id={uid} doc_id={did} {title}"))
+        if stats["missing"]:
+            self.stdout.write("   Jalankan `python manage.py reingest_docs --user <id>` untuk dokumen di atas.")
+
+        self.stdout.write(
+            f"🧟 Orphan: {stats['orphan_vectors']} vector ({_fmt_bytes(stats['orphan_bytes'])}) "
+            f"di {sum(1 for ids in stats['orphans'].values() if ids)} collection"
+        )
+        if options.get("gc") and stats["orphan_vectors"]:
+            deleted = delete_orphan_vectors(
+                stats["orphans"],
+                batch_size=max(int(options.get("batch_size") or 500), 1),
+                on_batch=lambda name, n: self.stdout.write(f"- {name}: hapus {n} orphan"),
+            )
+            self.stdout.write(self.style.SUCCESS(f"✅ GC selesai: {deleted} vector orphan dihapus"))
+        elif stats["orphan_vectors"]:
+            self.stdout.write("   Tambahkan --gc untuk menghapusnya.")
+
+        if options.get("compact"):
+            out = compact_vector_store()
+            dropped = ", ".join(out["dropped"]) or "-"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Compact: {_fmt_bytes(out['before'])} -> {_fmt_bytes(out['after'])} "
+                    f"(kembali {_fmt_bytes(out['reclaimed'])}), collection kosong di-drop: {dropped}"
+                )
+            )
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-03-02 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_rename_core_ragreq_created_56a5b7_idx_core_ragreq_created_0e1d24_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ragrequestmetric',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
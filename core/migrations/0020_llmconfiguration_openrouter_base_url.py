@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-03-03 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_ragrequestmetric_stage_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmconfiguration',
+            name='openrouter_base_url',
+            field=models.URLField(blank=True, default='', help_text='Kosongkan untuk https://openrouter.ai/api/v1. Isi URL server OpenAI-compatible lain (mis. stub lokal untuk load test).', max_length=255),
+        ),
+    ]
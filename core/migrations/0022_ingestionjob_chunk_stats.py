@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='chunk_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_ingestionjob_chunk_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestDocumentMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_id', models.PositiveIntegerField(blank=True, db_index=True, null=True)),
+                ('file_name', models.CharField(blank=True, default='', max_length=255)),
+                ('file_type', models.CharField(blank=True, default='', max_length=16)),
+                ('ok', models.BooleanField(default=False)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('bytes_in', models.PositiveBigIntegerField(default=0)),
+                ('text_chars', models.PositiveIntegerField(default=0)),
+                ('chunk_bytes', models.PositiveBigIntegerField(default=0)),
+                ('chunks', models.PositiveIntegerField(default=0)),
+                ('embedded', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('peak_rss_mb', models.FloatField(blank=True, null=True)),
+                ('total_ms', models.PositiveIntegerField(default=0)),
+                ('stage_timings', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ingest_metrics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='core_ingest_created_23aff2_idx'), models.Index(fields=['ok', 'created_at'], name='core_ingest_ok_f601fd_idx')],
+            },
+        ),
+    ]
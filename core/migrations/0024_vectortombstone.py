@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_ingestdocumentmetric'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VectorTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_id', models.PositiveIntegerField()),
+                ('source', models.CharField(blank=True, default='', max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('remaining', models.IntegerField(default=0)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('purged_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vector_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['user', 'purged_at'], name='core_vector_user_id_359daf_idx'), models.Index(fields=['purged_at', 'created_at'], name='core_vector_purged__85ff79_idx')],
+            },
+        ),
+    ]
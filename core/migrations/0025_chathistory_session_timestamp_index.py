@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 07:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_vectortombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chathistory',
+            index=models.Index(fields=['session', 'timestamp', 'id'], name='core_chathi_session_859363_idx'),
+        ),
+    ]
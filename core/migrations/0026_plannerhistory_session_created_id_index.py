@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_chathistory_session_timestamp_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plannerhistory',
+            index=models.Index(fields=['session', 'created_at', 'id'], name='core_planne_session_d59d3b_idx'),
+        ),
+    ]
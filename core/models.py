@@ -44,6 +44,10 @@ class ChatHistory(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]  # Yang terbaru muncul duluan
+        indexes = [
+            # keyset pagination riwayat per session: (timestamp, id) < cursor
+            models.Index(fields=["session", "timestamp", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.question[:20]}..."
@@ -78,6 +82,8 @@ class PlannerHistory(models.Model):
         indexes = [
             models.Index(fields=["user", "session", "created_at"]),
             models.Index(fields=["session", "created_at"]),
+            # keyset timeline per session: (created_at, id) < cursor
+            models.Index(fields=["session", "created_at", "id"]),
             models.Index(fields=["event_type", "created_at"]),
         ]
 
@@ -115,6 +121,12 @@ class LLMConfiguration(models.Model):
     openrouter_timeout = models.PositiveIntegerField(default=45)
     openrouter_max_retries = models.PositiveIntegerField(default=1)
     openrouter_temperature = models.FloatField(default=0.2)
+    openrouter_base_url = models.URLField(
+        max_length=255,
+        blank=True,
+        default="",
+        help_text="Kosongkan untuk https://openrouter.ai/api/v1. Isi URL server OpenAI-compatible lain (mis. stub lokal untuk load test).",
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -256,6 +268,8 @@ class RagRequestMetric(models.Model):
     fallback_used = models.BooleanField(default=False)
     source_count = models.PositiveIntegerField(default=0)
     status_code = models.PositiveIntegerField(default=200)
+    # breakdown durasi per tahap (ms), contoh {"retrieval.dense.embed_query": 41.2, "total": 980.5}
+    stage_timings = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -272,3 +286,128 @@ class RagRequestMetric(models.Model):
             f"RAG {self.request_id} user={user_part} mode={self.mode} "
             f"retrieval={self.retrieval_ms}ms llm={self.llm_time_ms}ms status={self.status_code}"
         )
+
+
+class IngestDocumentMetric(models.Model):
+    """Metrik satu kali ingest dokumen: durasi per tahap pipeline, ukuran, dan jumlah chunk."""
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="ingest_metrics")
+    # bukan FK: dokumen bisa sudah dihapus saat metrik dibaca
+    doc_id = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    file_type = models.CharField(max_length=16, blank=True, default="")
+    ok = models.BooleanField(default=False)
+    error = models.CharField(max_length=255, blank=True, default="")
+    bytes_in = models.PositiveBigIntegerField(default=0)
+    text_chars = models.PositiveIntegerField(default=0)
+    chunk_bytes = models.PositiveBigIntegerField(default=0)
+    chunks = models.PositiveIntegerField(default=0)
+    embedded = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    peak_rss_mb = models.FloatField(null=True, blank=True)
+    total_ms = models.PositiveIntegerField(default=0)
+    # durasi eksklusif per tahap (ms), contoh {"parse": 812.4, "chunk": 35.1, "embed": 2210.9, "store": 140.2, "total": 3221.0}
+    stage_timings = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["ok", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"INGEST {self.file_name or self.doc_id} ok={self.ok} chunks={self.chunks} total={self.total_ms}ms"
+
+
+class IngestionJob(models.Model):
+    """
+    Job ingest dokumen (upload / re-ingest) yang diproses worker lokal
+    (`python manage.py ingest_worker`), bukan di dalam request HTTP.
+    """
+
+    KIND_UPLOAD = "upload"
+    KIND_REINGEST = "reingest"
+    KIND_CHOICES = [
+        (KIND_UPLOAD, "Upload"),
+        (KIND_REINGEST, "Re-ingest"),
+    ]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # SET_NULL: upload yang gagal parsing menghapus dokumennya, job tetap ada untuk status polling
+    document = models.ForeignKey(AcademicDocument, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, default=KIND_UPLOAD)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    stage = models.CharField(max_length=64, blank=True, default="")
+    progress = models.PositiveSmallIntegerField(default=0)
+    stage_timings = models.JSONField(default=dict, blank=True)
+    # hasil sinkronisasi chunk: embedded / skipped / updated / deleted
+    chunk_stats = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker_id = models.CharField(max_length=64, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["user", "created_at"]),
+            models.Index(fields=["status", "heartbeat_at"]),
+        ]
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in {self.STATUS_SUCCEEDED, self.STATUS_FAILED}
+
+    def __str__(self):
+        return f"IngestionJob#{self.id} {self.kind} {self.status} {self.file_name}".strip()
+
+
+class VectorTombstone(models.Model):
+    """
+    Penanda dokumen yang sudah dihapus tetapi vector-nya belum dibuang fisik.
+    Retrieval langsung mengecualikan doc_id ini; penghapusan + verifikasi vector
+    dilakukan batch di background (`compact_vector_tombstones`).
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="vector_tombstones")
+    # bukan FK: AcademicDocument sudah dihapus saat tombstone dibuat
+    doc_id = models.PositiveIntegerField()
+    source = models.CharField(max_length=255, blank=True, default="")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # sisa vector saat verifikasi terakhir (-1 = verifikasi gagal)
+    remaining = models.IntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    purged_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["user", "purged_at"]),
+            models.Index(fields=["purged_at", "created_at"]),
+        ]
+
+    def __str__(self):
+        state = "purged" if self.purged_at else "pending"
+        return f"VectorTombstone user={self.user_id} doc={self.doc_id} {state}"
@@ -8,10 +8,10 @@ from typing import Any
 from django.contrib.auth import get_user_model
 from django.contrib.sessions.models import Session
 from django.core.cache import cache
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Q, Sum
 from django.utils import timezone
 
-from .models import RagRequestMetric, SystemHealthSnapshot
+from .models import IngestDocumentMetric, RagRequestMetric, SystemHealthSnapshot
 from .presence import count_active_online_non_staff_users
 from .system_settings import get_admin_dashboard_state, get_concurrent_limit_state, get_registration_limit_state
 
@@ -97,7 +97,8 @@ def maybe_cleanup_monitoring_retention(chance: float = 0.01) -> int:
         threshold = timezone.now() - timedelta(days=state.retention_days)
         a = SystemHealthSnapshot.objects.filter(captured_at__lt=threshold).delete()[0]
         b = RagRequestMetric.objects.filter(created_at__lt=threshold).delete()[0]
-        return int(a + b)
+        c = IngestDocumentMetric.objects.filter(created_at__lt=threshold).delete()[0]
+        return int(a + b + c)
     except Exception:
         return 0
 
@@ -118,6 +119,7 @@ def record_rag_metric(
     fallback_used: bool,
     source_count: int,
     status_code: int,
+    stage_timings: dict[str, float] | None = None,
 ) -> None:
     # write path dibuat ringan dan fail-safe supaya tidak mengganggu request utama
     try:
@@ -139,11 +141,94 @@ def record_rag_metric(
             fallback_used=bool(fallback_used),
             source_count=max(int(source_count or 0), 0),
             status_code=max(int(status_code or 0), 0),
+            stage_timings=_clean_stage_timings(stage_timings),
         )
     except Exception:
         return
 
 
+def record_ingest_metric(
+    *,
+    user_id: int | None,
+    doc_id: int | None,
+    file_name: str,
+    ok: bool,
+    total_ms: float,
+    file_type: str = "",
+    error: str = "",
+    bytes_in: int = 0,
+    text_chars: int = 0,
+    chunk_bytes: int = 0,
+    chunks: int = 0,
+    embedded: int = 0,
+    skipped: int = 0,
+    updated: int = 0,
+    deleted: int = 0,
+    batches: int = 0,
+    peak_rss_mb: float | None = None,
+    stage_timings: dict[str, float] | None = None,
+) -> None:
+    # dipanggil dari worker ingest; gagal simpan metrik tidak boleh menggagalkan ingest
+    try:
+        user = None
+        if user_id:
+            user = get_user_model().objects.filter(id=user_id).only("id").first()
+        IngestDocumentMetric.objects.create(
+            user=user,
+            doc_id=doc_id or None,
+            file_name=(file_name or "")[:255],
+            file_type=(file_type or "")[:16],
+            ok=bool(ok),
+            error=(error or "")[:255],
+            bytes_in=max(int(bytes_in or 0), 0),
+            text_chars=max(int(text_chars or 0), 0),
+            chunk_bytes=max(int(chunk_bytes or 0), 0),
+            chunks=max(int(chunks or 0), 0),
+            embedded=max(int(embedded or 0), 0),
+            skipped=max(int(skipped or 0), 0),
+            updated=max(int(updated or 0), 0),
+            deleted=max(int(deleted or 0), 0),
+            batches=max(int(batches or 0), 0),
+            peak_rss_mb=round(float(peak_rss_mb), 1) if peak_rss_mb is not None else None,
+            total_ms=max(int(total_ms or 0), 0),
+            stage_timings=_clean_stage_timings(stage_timings),
+        )
+    except Exception:
+        return
+
+
+def _clean_stage_timings(stage_timings: dict[str, float] | None) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for key, value in (stage_timings or {}).items():
+        try:
+            out[str(key)[:64]] = round(max(float(value), 0.0), 2)
+        except Exception:
+            continue
+    return out
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(int(len(sorted_values) * pct), len(sorted_values) - 1)
+    return float(sorted_values[idx])
+
+
+def summarize_stage_timings(rows: list[dict[str, float]], pct: float = 0.95) -> dict[str, float]:
+    # p95 per stage dari sekumpulan breakdown; stage yang tidak muncul di request tidak dihitung.
+    per_stage: dict[str, list[float]] = {}
+    for stages in rows:
+        for key, value in (stages or {}).items():
+            try:
+                per_stage.setdefault(str(key), []).append(float(value))
+            except Exception:
+                continue
+    return {
+        key: round(_percentile(sorted(values), pct), 2)
+        for key, values in sorted(per_stage.items())
+    }
+
+
 def _capacity_status(usage_pct: int) -> str:
     if usage_pct >= 100:
         return "FULL"
@@ -252,6 +337,7 @@ def build_realtime_rag_payload(limit: int = 50) -> dict[str, Any]:
                     "status_code",
                     "source_count",
                     "llm_model",
+                    "stage_timings",
                     "created_at",
                 )
                 .order_by("-created_at")[:limit]
@@ -269,6 +355,7 @@ def build_realtime_rag_payload(limit: int = 50) -> dict[str, Any]:
                 "status_code": row.status_code,
                 "source_count": row.source_count,
                 "llm_model": row.llm_model,
+                "stage_timings": row.stage_timings or {},
                 "created_at": row.created_at.isoformat() if row.created_at else None,
             }
             for row in rows
@@ -279,11 +366,92 @@ def build_realtime_rag_payload(limit: int = 50) -> dict[str, Any]:
             idx = min(int(len(sorted_ms) * 0.95), len(sorted_ms) - 1)
             p95_retrieval = int(sorted_ms[idx])
 
-        return {"events": items, "p95_retrieval_ms": p95_retrieval}
+        return {
+            "events": items,
+            "p95_retrieval_ms": p95_retrieval,
+            "p95_stage_ms": summarize_stage_timings([x["stage_timings"] for x in items]),
+        }
 
     return _cache_get_or_set("monitoring:rag", _builder)
 
 
+def build_realtime_ingest_payload(limit: int = 20) -> dict[str, Any]:
+    state = get_admin_dashboard_state()
+    limit = max(min(int(limit), state.max_rows), 1)
+
+    def _builder():
+        try:
+            rows = list(
+                IngestDocumentMetric.objects.select_related("user")
+                .only(
+                    "user__username",
+                    "doc_id",
+                    "file_name",
+                    "file_type",
+                    "ok",
+                    "bytes_in",
+                    "chunks",
+                    "embedded",
+                    "skipped",
+                    "peak_rss_mb",
+                    "total_ms",
+                    "stage_timings",
+                    "created_at",
+                )
+                .order_by("-created_at")[:limit]
+            )
+        except Exception:
+            rows = []
+        items = [
+            {
+                "username": row.user.username if row.user_id else "-",
+                "doc_id": row.doc_id,
+                "file_name": row.file_name,
+                "file_type": row.file_type,
+                "ok": row.ok,
+                "bytes_in": row.bytes_in,
+                "chunks": row.chunks,
+                "embedded": row.embedded,
+                "skipped": row.skipped,
+                "peak_rss_mb": row.peak_rss_mb,
+                "total_ms": row.total_ms,
+                "stage_timings": row.stage_timings or {},
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            for row in rows
+        ]
+
+        # throughput 10 menit terakhir: chunk/detik dihitung dari waktu kerja ingest, bukan wall clock
+        window = timezone.now() - timedelta(minutes=10)
+        try:
+            agg = IngestDocumentMetric.objects.filter(created_at__gte=window).aggregate(
+                docs=Count("id"),
+                failed=Count("id", filter=Q(ok=False)),
+                chunks=Sum("chunks"),
+                bytes_in=Sum("bytes_in"),
+                busy_ms=Sum("total_ms"),
+            )
+        except Exception:
+            agg = {"docs": 0, "failed": 0, "chunks": 0, "bytes_in": 0, "busy_ms": 0}
+        busy_sec = (agg["busy_ms"] or 0) / 1000.0
+        throughput = {
+            "docs_10m": int(agg["docs"] or 0),
+            "failed_10m": int(agg["failed"] or 0),
+            "chunks_10m": int(agg["chunks"] or 0),
+            "mb_10m": round((agg["bytes_in"] or 0) / (1024 * 1024), 2),
+            "chunks_per_sec": round((agg["chunks"] or 0) / busy_sec, 1) if busy_sec else 0.0,
+            "mb_per_min": round((agg["bytes_in"] or 0) / (1024 * 1024) / busy_sec * 60, 2) if busy_sec else 0.0,
+        }
+
+        return {
+            "events": items,
+            "throughput": throughput,
+            "p95_stage_ms": summarize_stage_timings([x["stage_timings"] for x in items]),
+        }
+
+    return _cache_get_or_set("monitoring:ingest", _builder)
+
+
 def build_realtime_infra_payload(limit: int = 20) -> dict[str, Any]:
     state = get_admin_dashboard_state()
     limit = max(min(int(limit), state.max_rows), 1)
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Reingest paralel multi-proses (`reingest_docs --workers N`)
+# =========================
+# Model embedding (e5-large ~2 GB) hanya dimuat sekali, di proses utama. Worker proses cuma
+# menjalankan tahap parse + chunk (pdfplumber, OCR, LLM repair) lewat ingest.prepare_document
+# lalu mengirim payload chunk ke proses utama, yang meng-embed dan menulis ke Chroma satu
+# dokumen per waktu. Chroma persistent client memang tidak aman ditulis dari banyak proses,
+# jadi penulisan tetap terpusat; yang diparalelkan adalah bagian CPU/IO-bound sebelum embed.
+#
+# Worker memakai start method "spawn" (bersih di Linux/Windows, tanpa koneksi DB/thread warisan).
+# Karena itu modul ini hanya mengimpor stdlib di level atas: proses spawn meng-unpickle fungsi
+# worker sebelum django.setup() dijalankan di initializer.
+
+CHECKPOINT_VERSION = 1
+# batas dokumen per worker sebelum proses diganti (membatasi memori bocor dari parser PDF)
+_MAX_TASKS_PER_CHILD = 50
+
+
+class ReingestCheckpoint:
+    """
+    Checkpoint JSON `{"signature", "done", "failed"}` untuk rebuild yang bisa dilanjutkan.
+    Ditulis atomik (tmp + os.replace) setiap satu dokumen selesai. Signature (scope + model
+    embedding) yang berbeda berarti rebuild baru, jadi checkpoint lama diabaikan.
+    """
+
+    def __init__(self, path: str, signature: Dict[str, Any]):
+        self.path = path
+        self.signature = {"v": CHECKPOINT_VERSION, **signature}
+        self.done: Set[int] = set()
+        self.failed: Set[int] = set()
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(" REINGEST checkpoint rusak path=%s err=%r", self.path, e)
+            return False
+        if not isinstance(data, dict) or data.get("signature") != self.signature:
+            return False
+        self.done = {int(x) for x in data.get("done") or []}
+        self.failed = {int(x) for x in data.get("failed") or []} - self.done
+        return True
+
+    def mark(self, doc_id: int, ok: bool) -> None:
+        if ok:
+            self.done.add(int(doc_id))
+            self.failed.discard(int(doc_id))
+        else:
+            self.failed.add(int(doc_id))
+        self.save()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        payload = {"signature": self.signature, "done": sorted(self.done), "failed": sorted(self.failed)}
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=True)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class ReingestProgress:
+    total: int
+    done: int = 0
+    ok: int = 0
+    failed: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    skipped: int = 0
+    started_at: float = 0.0
+    interrupted: bool = False
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.perf_counter() - self.started_at, 1e-6)
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.done / self.elapsed
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if not self.done:
+            return None
+        return (self.total - self.done) / self.docs_per_sec
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(max(seconds, 0))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _init_worker() -> None:
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _prepare_worker(doc_id: int) -> Tuple[int, Any, Dict[str, Any]]:
+    from django.db import close_old_connections
+
+    from .ai_engine.ingest import prepare_document
+    from .models import AcademicDocument
+
+    close_old_connections()
+    doc = AcademicDocument.objects.select_related("user").filter(id=doc_id).first()
+    if doc is None:
+        return doc_id, None, {"error": "Dokumen sudah dihapus."}
+    prepared, report = prepare_document(doc)
+    return doc_id, prepared, report
+
+
+def _store_result(job_id: int, doc_id: int, prepared: Any, report: Dict[str, Any]) -> Tuple[bool, Dict[str, int]]:
+    from . import service
+    from .ai_engine.ingest import collect_ingest_stats
+    from .ingest_queue import _finish_job
+    from .models import AcademicDocument
+
+    t0 = time.perf_counter()
+    timings = dict(report.get("stage_timings") or {})
+    doc = AcademicDocument.objects.select_related("user").filter(id=doc_id).first()
+    ok = False
+    error = str(report.get("error") or "")
+    with collect_ingest_stats() as chunk_stats:
+        if doc is None:
+            error = "Dokumen sudah dihapus."
+        else:
+            try:
+                ok = service.reingest_prepared_document(doc, prepared, report)
+            except Exception as e:
+                logger.error(" REINGEST_PARALLEL doc=%s crash err=%r", doc_id, e, exc_info=True)
+                error = f"System Error: {e!r}"
+    if not ok and not error:
+        error = "Gagal Parsing"
+    store_ms = (time.perf_counter() - t0) * 1000.0
+    timings["embed_store"] = round(store_ms, 2)
+    timings["total"] = round(float(report.get("prepare_ms") or 0.0) + store_ms, 2)
+    stats = dict(chunk_stats)
+    stats["chunks"] = int(report.get("chunks") or 0)
+    _finish_job(job_id, ok, error, timings, stats)
+    return ok, stats
+
+
+def _dispatch_job(doc_id: int, worker_id: str) -> Optional[int]:
+    from .ingest_queue import claim_job, enqueue_ingest_job
+    from .models import AcademicDocument, IngestionJob
+
+    doc = AcademicDocument.objects.select_related("user").filter(id=doc_id).first()
+    if doc is None:
+        return None
+    # job dibuat tepat saat dokumen dikirim ke worker supaya tidak ada job "queued" yang
+    # tertinggal (dan diambil ingest_worker) ketika rebuild dihentikan di tengah jalan
+    job = enqueue_ingest_job(doc.user, doc, IngestionJob.KIND_REINGEST)
+    claimed = claim_job(job.id, worker_id)
+    return claimed.id if claimed is not None else None
+
+
+def _warm_embedding_model() -> None:
+    from .ai_engine.config import get_embedding_function
+
+    try:
+        get_embedding_function()
+    except Exception as e:
+        logger.warning(" REINGEST_PARALLEL gagal memuat model embedding lebih awal err=%r", e)
+
+
+def run_parallel_reingest(
+    doc_ids: List[int],
+    *,
+    workers: int,
+    worker_id: str,
+    checkpoint: Optional[ReingestCheckpoint] = None,
+    on_result: Optional[Callable[[int, bool, Dict[str, int], ReingestProgress], None]] = None,
+) -> ReingestProgress:
+    """
+    Reingest `doc_ids` dengan parse/chunk di `workers` proses dan embed/store di proses ini.
+    Dokumen yang sudah tercatat `done` di checkpoint dilewati. Maksimal 2x jumlah worker
+    dokumen yang sedang diproses/menunggu embed, sehingga payload chunk di memori terbatas.
+    """
+    from .ingest_queue import _finish_job
+
+    pending = [d for d in doc_ids if checkpoint is None or d not in checkpoint.done]
+    progress = ReingestProgress(total=len(pending), started_at=time.perf_counter())
+    workers = max(1, int(workers))
+
+    def _record(doc_id: int, ok: bool, stats: Dict[str, int]) -> None:
+        progress.done += 1
+        progress.ok += int(ok)
+        progress.failed += int(not ok)
+        progress.chunks += int(stats.get("chunks", 0))
+        progress.embedded += int(stats.get("embedded", 0))
+        progress.skipped += int(stats.get("skipped", 0))
+        if checkpoint is not None:
+            checkpoint.mark(doc_id, ok)
+        if on_result is not None:
+            on_result(doc_id, ok, stats, progress)
+
+    if workers == 1:
+        # tanpa pool: parse dan embed bergantian di proses ini (checkpoint/ETA tetap jalan)
+        try:
+            for doc_id in pending:
+                job_id = _dispatch_job(doc_id, worker_id)
+                if job_id is None:
+                    progress.total -= 1
+                    continue
+                _, prepared, report = _prepare_worker(doc_id)
+                ok, stats = _store_result(job_id, doc_id, prepared, report)
+                _record(doc_id, ok, stats)
+        except KeyboardInterrupt:
+            progress.interrupted = True
+        return progress
+
+    inflight: Dict[Future, Tuple[int, int]] = {}
+    queue = iter(pending)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        max_tasks_per_child=_MAX_TASKS_PER_CHILD,
+    )
+
+    def _fill() -> None:
+        while len(inflight) < workers * 2:
+            doc_id = next(queue, None)
+            if doc_id is None:
+                return
+            job_id = _dispatch_job(doc_id, worker_id)
+            if job_id is None:
+                progress.total -= 1
+                continue
+            inflight[executor.submit(_prepare_worker, doc_id)] = (doc_id, job_id)
+
+    try:
+        _fill()
+        # model dimuat selagi worker pertama masih parsing
+        _warm_embedding_model()
+        while inflight:
+            finished, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                doc_id, job_id = inflight.pop(future)
+                try:
+                    _, prepared, report = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.error(" REINGEST_PARALLEL worker doc=%s crash err=%r", doc_id, e)
+                    prepared, report = None, {"error": f"System Error: {e!r}"}
+                ok, stats = _store_result(job_id, doc_id, prepared, report)
+                _record(doc_id, ok, stats)
+            _fill()
+    except (KeyboardInterrupt, BrokenProcessPool) as e:
+        progress.interrupted = True
+        logger.warning(" REINGEST_PARALLEL dihentikan: %r (sisa in-flight=%s)", e, len(inflight))
+        for doc_id, job_id in inflight.values():
+            _finish_job(job_id, False, "Dibatalkan: reingest paralel dihentikan", {})
+        inflight.clear()
+    finally:
+        executor.shutdown(wait=not progress.interrupted, cancel_futures=True)
+    return progress
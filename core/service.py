@@ -1,15 +1,27 @@
 # core/service.py
+import base64
+import heapq
+import os
 import time
 import logging
-from typing import Any, Dict, List, Tuple
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
 
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from django.db.models import Q
 
-from .models import AcademicDocument, ChatHistory, ChatSession, PlannerHistory, UserQuota
-from .ai_engine.ingest import process_document
+from .models import AcademicDocument, ChatHistory, ChatSession, IngestionJob, PlannerHistory, UserQuota
+from .ai_engine.ingest import collect_ingest_stats, process_document, store_prepared_document
 from .ai_engine.retrieval import ask_bot
-from .ai_engine.vector_ops import delete_vectors_for_doc, delete_vectors_for_doc_strict
+from .ai_engine.vector_ops import (
+    compact_vector_tombstones,
+    delete_vectors_for_doc,
+    exclude_tombstoned,
+    tombstone_document_vectors,
+)
 from .ai_engine.config import get_vectorstore
 from .ai_engine.retrieval.llm import (
     build_llm,
@@ -19,6 +31,9 @@ from .ai_engine.retrieval.llm import (
 )
 from .ai_engine.retrieval.prompt import PLANNER_OUTPUT_TEMPLATE
 from .ai_engine.retrieval.rules import extract_grade_calc_input, is_grade_rescue_query
+from .ai_engine.retrieval.router import route_query
+from .ai_engine.retrieval.doc_index import get_user_title_index, remove_document_title
+from .ingest_queue import enqueue_ingest_job, ingest_queue_enabled, serialize_job, summarize_jobs
 from .academic import planner as planner_engine
 from .academic.profile_extractor import extract_profile_hints
 from .academic.grade_calculator import (
@@ -52,6 +67,71 @@ def bytes_to_human(n: int) -> str:
     return f"{int(n)} B"
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except Exception:
+        return default
+
+
+def history_page_size() -> int:
+    """Jumlah pesan terbaru yang dikirim di render pertama / per halaman scroll ke atas."""
+    return min(max(_env_int("CHAT_HISTORY_PAGE_SIZE", 30), 1), 200)
+
+
+def timeline_page_size() -> int:
+    """Event per halaman timeline: satu pesan chat = 2 event (pertanyaan + jawaban)."""
+    return 2 * history_page_size()
+
+
+def encode_cursor(ts: datetime, *keys: int) -> str:
+    """[HELPER] Cursor keyset opaque (timestamp, id, ...) untuk pagination riwayat/timeline."""
+    raw = "|".join([ts.isoformat(), *(str(int(k)) for k in keys)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, n_keys: int = 1) -> Tuple[Any, ...]:
+    """Kebalikan encode_cursor -> (timestamp, *keys); ValueError kalau cursor rusak."""
+    try:
+        raw = base64.urlsafe_b64decode(str(cursor) + "=" * (-len(str(cursor)) % 4)).decode("utf-8")
+        ts, *keys = raw.split("|")
+        if len(keys) != n_keys:
+            raise ValueError("jumlah key cursor tidak cocok")
+        return (datetime.fromisoformat(ts), *(int(k) for k in keys))
+    except Exception as e:
+        raise ValueError(f"cursor tidak valid: {cursor!r}") from e
+
+
+def _serialize_history(h: ChatHistory) -> Dict[str, Any]:
+    return {
+        "question": h.question,
+        "answer": h.answer,
+        "time": h.timestamp.strftime("%H:%M"),
+        "date": h.timestamp.strftime("%Y-%m-%d"),
+    }
+
+
+def get_history_page(user: User, session: ChatSession, limit: int, before: str | None = None) -> Dict[str, Any]:
+    """
+    [HELPER] Keyset pagination riwayat chat: `limit` pesan terbaru sebelum cursor `before`
+    (urutan lama -> baru untuk ditampilkan). `next_cursor` dipakai untuk memuat halaman
+    yang lebih lama; None kalau sudah sampai awal session.
+    """
+    limit = max(int(limit), 1)
+    qs = ChatHistory.objects.filter(user=user, session=session)
+    if before:
+        ts, pk = decode_cursor(before)
+        qs = qs.filter(Q(timestamp__lt=ts) | Q(timestamp=ts, id__lt=pk))
+    rows = list(qs.order_by("-timestamp", "-id")[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit][::-1]
+    return {
+        "history": [_serialize_history(h) for h in rows],
+        "next_cursor": encode_cursor(rows[0].timestamp, rows[0].id) if has_more and rows else None,
+        "has_more": has_more,
+    }
+
+
 def serialize_documents_for_user(user: User, limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
     """
     [HELPER] Ambil daftar dokumen milik user dari DB + hitung total ukuran file.
@@ -141,37 +221,24 @@ def build_storage_payload(total_bytes: int, quota_bytes: int) -> Dict[str, Any]:
 def get_dashboard_props(user: User, quota_bytes: int) -> Dict[str, Any]:
     """
     [USE-CASE UTAMA: DASHBOARD]
-    Menyusun semua data awal untuk halaman utama chat (Inertia page):
+    Menyusun data render pertama halaman utama chat (Inertia page):
       1) Profile user
-      2) Riwayat chat user (initialHistory)
-      3) Daftar dokumen user
-      4) Informasi storage/quota
+      2) Halaman terbaru riwayat chat session default (initialHistory + historyCursor)
+    Ukurannya tetap berapa pun panjang riwayatnya; pesan lama dimuat saat scroll ke atas.
+    Panel dokumen/storage dan daftar session dikirim terpisah (deferred prop di view),
+    lihat get_documents_payload dan list_sessions.
     """
     session = _get_or_create_default_session(user)
     _attach_legacy_history_to_session(user, session)
 
-    histories = ChatHistory.objects.filter(user=user, session=session).order_by("timestamp")
-    history_data = [
-        {
-            "question": h.question,
-            "answer": h.answer,
-            "time": h.timestamp.strftime("%H:%M"),
-            "date": h.timestamp.strftime("%Y-%m-%d"),
-        }
-        for h in histories
-    ]
-
-    documents, total_bytes = serialize_documents_for_user(user, limit=50)
-    storage = build_storage_payload(total_bytes, quota_bytes)
-    sessions = serialize_sessions_for_user(user, limit=50)
+    page = get_history_page(user, session, limit=history_page_size())
 
     return {
         "user": {"id": user.id, "username": user.username, "email": user.email},
         "activeSessionId": session.id,
-        "sessions": sessions,
-        "initialHistory": history_data,
-        "documents": documents,
-        "storage": storage,
+        "initialHistory": page["history"],
+        "historyCursor": page["next_cursor"],
+        "hasPlannerEvents": PlannerHistory.objects.filter(user=user, session=session).exists(),
     }
 
 
@@ -197,6 +264,58 @@ def get_documents_payload(user: User, quota_bytes: int) -> Dict[str, Any]:
     return {"documents": documents, "storage": storage}
 
 
+def search_document_mentions(user: User, query: str, limit: int = 8) -> Dict[str, Any]:
+    """
+    Autocomplete @mention: dilayani dari index judul per-user (cache), bukan scan DB.
+    """
+    limit = max(1, min(int(limit), 20))
+    index = get_user_title_index(user.id)
+    items = [{"id": did, "title": title} for did, title in index.suggest(query or "", limit=limit)]
+    return {"items": items}
+
+
+def ingest_new_document(doc: AcademicDocument) -> bool:
+    """
+    Ingest dokumen yang baru di-upload. Sukses -> is_embedded=True;
+    gagal parsing -> hapus record agar DB bersih.
+    Dipakai jalur sync upload dan worker antrian ingest.
+    """
+    ok = process_document(doc)
+    if ok:
+        doc.is_embedded = True
+        doc.save(update_fields=["is_embedded"])
+        return True
+    failed_doc_id = doc.id
+    user_id = doc.user_id
+    doc.delete()
+    remove_document_title(user_id, failed_doc_id)
+    return False
+
+
+def reingest_document(doc: AcademicDocument) -> bool:
+    """
+    Jalankan process_document lagi. Chunk ber-id deterministik di-diff terhadap Chroma:
+    hanya chunk baru yang di-embed, chunk yang hilang dihapus.
+    """
+    ok = process_document(doc)
+    if ok:
+        doc.is_embedded = True
+        doc.save(update_fields=["is_embedded"])
+    return ok
+
+
+def reingest_prepared_document(doc: AcademicDocument, prepared, report: Dict[str, Any]) -> bool:
+    """
+    Sisi proses utama `reingest_docs --workers`: parse + chunk sudah dikerjakan worker proses
+    (ingest.prepare_document), di sini tinggal embed + store dengan model embedding milik proses ini.
+    """
+    ok = store_prepared_document(doc, prepared, report)
+    if ok:
+        doc.is_embedded = True
+        doc.save(update_fields=["is_embedded"])
+    return ok
+
+
 def upload_files_batch(user: User, files: List[UploadedFile], quota_bytes: int) -> Dict[str, Any]:
     """
     [USE-CASE UTAMA: UPLOAD + INGEST]
@@ -206,10 +325,14 @@ def upload_files_batch(user: User, files: List[UploadedFile], quota_bytes: int)
       2) Ingest ke vector DB (Chroma) via process_document()
       3) Jika sukses -> is_embedded=True
       4) Jika gagal parsing -> hapus record agar DB bersih
+    Jika INGEST_QUEUE_ENABLED=1, langkah 2-4 dijalankan worker (`manage.py ingest_worker`)
+    dan response langsung berisi daftar job untuk di-poll.
     """
     success_count = 0
     error_count = 0
     errors: List[str] = []
+    jobs: List[IngestionJob] = []
+    use_queue = ingest_queue_enabled()
 
     # cek kuota (total file yang sudah ada)
     _, total_bytes = serialize_documents_for_user(user, limit=100000)
@@ -228,19 +351,25 @@ def upload_files_batch(user: User, files: List[UploadedFile], quota_bytes: int)
             total_bytes += file_size
             remaining_bytes = max(0, int(quota_bytes) - int(total_bytes))
 
-            ok = process_document(doc)
-            if ok:
-                doc.is_embedded = True
-                doc.save(update_fields=["is_embedded"])
+            if use_queue:
+                jobs.append(enqueue_ingest_job(user, doc, IngestionJob.KIND_UPLOAD))
+                continue
+
+            if ingest_new_document(doc):
                 success_count += 1
             else:
-                doc.delete()
                 error_count += 1
                 errors.append(f"{file_obj.name} (Gagal Parsing)")
 
         except Exception:
             error_count += 1
             errors.append(f"{file_obj.name} (System Error)")
+
+    if jobs:
+        msg = f"{len(jobs)} file masuk antrian ingest."
+        if error_count > 0:
+            msg += f" (Gagal: {error_count}: {', '.join(errors[:5])})"
+        return {"status": "success", "msg": msg, "queued": True, "jobs": [serialize_job(j) for j in jobs]}
 
     if success_count > 0:
         msg = f"Berhasil memproses {success_count} file."
@@ -338,8 +467,10 @@ def _append_verified_grade_rescue(
 
 def _planner_context_for_user(user: User, query: str) -> str:
     try:
-        vectorstore = get_vectorstore()
-        docs = vectorstore.similarity_search(query or "rencana studi", k=8, filter={"user_id": str(user.id)})
+        vectorstore = get_vectorstore(user_id=user.id)
+        docs = vectorstore.similarity_search(
+            query or "rencana studi", k=8, filter=exclude_tombstoned({"user_id": str(user.id)}, user.id)
+        )
     except Exception:
         return ""
 
@@ -415,7 +546,8 @@ def chat_and_save(user: User, message: str, request_id: str = "-", session_id: i
     """
     session = get_or_create_chat_session(user=user, session_id=session_id)
 
-    parsed_grade = extract_grade_calc_input(message) if is_grade_rescue_query(message) else None
+    route = route_query(message)
+    parsed_grade = extract_grade_calc_input(message) if route.is_grade_rescue else None
     if parsed_grade:
         calc = calculate_required_score(
             achieved_components=parsed_grade.get("achieved_components") or [],
@@ -424,7 +556,7 @@ def chat_and_save(user: User, message: str, request_id: str = "-", session_id: i
         )
         result: Dict[str, Any] = {"answer": _build_grade_rescue_response(parsed_grade, calc), "sources": []}
     else:
-        result = ask_bot(user.id, message, request_id=request_id)
+        result = ask_bot(user.id, message, request_id=request_id, route=route)
 
     # Normalisasi output (biar backward compatible kalau suatu saat ask_bot return string)
     if isinstance(result, dict):
@@ -497,20 +629,13 @@ def delete_session(user: User, session_id: int) -> bool:
     return True
 
 
-def get_session_history(user: User, session_id: int) -> List[Dict[str, Any]]:
+def get_session_history(
+    user: User, session_id: int, limit: int | None = None, before: str | None = None
+) -> Dict[str, Any]:
     session = ChatSession.objects.filter(user=user, id=session_id).first()
     if not session:
-        return []
-    histories = ChatHistory.objects.filter(user=user, session=session).order_by("timestamp")
-    return [
-        {
-            "question": h.question,
-            "answer": h.answer,
-            "time": h.timestamp.strftime("%H:%M"),
-            "date": h.timestamp.strftime("%Y-%m-%d"),
-        }
-        for h in histories
-    ]
+        return {"history": [], "next_cursor": None, "has_more": False}
+    return get_history_page(user, session, limit=min(int(limit or history_page_size()), 200), before=before)
 
 
 def _planner_option_label_from_payload(payload: Dict[str, Any], option_id: int | None) -> str:
@@ -555,89 +680,158 @@ def record_planner_history(
     )
 
 
-def get_session_timeline(user: User, session_id: int, page: int = 1, page_size: int = 100) -> Dict[str, Any]:
+# urutan event timeline (sama dengan versi offset lama): waktu, lalu rank stream
+# (pertanyaan chat < jawaban chat < planner), lalu id baris. Tiap rank = satu stream terindeks
+# (session, waktu, id) yang sudah terurut, jadi halaman cukup di-merge tanpa sort seluruh session.
+TIMELINE_RANK_CHAT_USER = 0
+TIMELINE_RANK_CHAT_ASSISTANT = 1
+TIMELINE_RANK_PLANNER = 2
+
+_PLANNER_TIMELINE_FIELDS = (
+    "id",
+    "created_at",
+    "event_type",
+    "planner_step",
+    "text",
+    "option_id",
+    "option_label",
+    # ambil key yang dipakai saja di DB, bukan seluruh payload JSON
+    "payload__planner_warning",
+    "payload__profile_hints__confidence_summary",
+)
+
+
+def _timeline_streams(user: User, session: ChatSession) -> List[Tuple[int, Any, str, Tuple[str, ...]]]:
+    chat_qs = ChatHistory.objects.filter(user=user, session=session)
+    return [
+        (TIMELINE_RANK_CHAT_USER, chat_qs, "timestamp", ("id", "timestamp", "question")),
+        (TIMELINE_RANK_CHAT_ASSISTANT, chat_qs, "timestamp", ("id", "timestamp", "answer")),
+        (
+            TIMELINE_RANK_PLANNER,
+            PlannerHistory.objects.filter(user=user, session=session),
+            "created_at",
+            _PLANNER_TIMELINE_FIELDS,
+        ),
+    ]
+
+
+def _timeline_events(rank: int, rows) -> Iterator[Tuple[Tuple[Any, int, int], Dict[str, Any]]]:
+    for row in rows:
+        if rank == TIMELINE_RANK_PLANNER:
+            ts = row["created_at"]
+            kind = "planner_output" if row["event_type"] == PlannerHistory.EVENT_GENERATE else "planner_milestone"
+            item = {
+                "id": f"planner-{row['id']}",
+                "kind": kind,
+                "text": row["text"],
+                "time": ts.strftime("%H:%M"),
+                "date": ts.strftime("%Y-%m-%d"),
+                "meta": {
+                    "planner_step": row["planner_step"],
+                    "event_type": row["event_type"],
+                    "option_id": row["option_id"],
+                    "option_label": row["option_label"],
+                    "warning": row["payload__planner_warning"],
+                    "confidence_summary": row["payload__profile_hints__confidence_summary"],
+                },
+            }
+        else:
+            ts = row["timestamp"]
+            is_user = rank == TIMELINE_RANK_CHAT_USER
+            item = {
+                "id": f"chat-{'user' if is_user else 'assistant'}-{row['id']}",
+                "kind": "chat_user" if is_user else "chat_assistant",
+                "text": row["question"] if is_user else row["answer"],
+                "time": ts.strftime("%H:%M"),
+                "date": ts.strftime("%Y-%m-%d"),
+            }
+        yield (ts, rank, row["id"]), item
+
+
+def get_timeline_page(user: User, session: ChatSession, limit: int, cursor: str | None = None) -> Dict[str, Any]:
+    """
+    [HELPER] Keyset pagination timeline gabungan chat + planner: `limit` event terbaru
+    sebelum `cursor` (urutan lama -> baru). Tiap stream dibaca menurun maks limit+1 baris
+    lalu di-merge (k-way), tanpa memuat seluruh session / payload planner ke memori.
+    """
+    limit = max(int(limit), 1)
+    cursor_key = decode_cursor(cursor, n_keys=2) if cursor else None
+    streams = []
+    for rank, qs, ts_field, fields in _timeline_streams(user, session):
+        if cursor_key is not None:
+            ts, cursor_rank, pk = cursor_key
+            # event (waktu, rank, id) < cursor, diterjemahkan per stream supaya tetap pakai index
+            if rank < cursor_rank:
+                qs = qs.filter(**{f"{ts_field}__lte": ts})
+            elif rank == cursor_rank:
+                qs = qs.filter(Q(**{f"{ts_field}__lt": ts}) | Q(**{ts_field: ts, "id__lt": pk}))
+            else:
+                qs = qs.filter(**{f"{ts_field}__lt": ts})
+        rows = qs.order_by(f"-{ts_field}", "-id").values(*fields)[: limit + 1]
+        streams.append(_timeline_events(rank, rows))
+
+    # tiap stream terpotong masih punya limit+1 event, jadi limit+1 teratas hasil merge tetap benar
+    merged = heapq.merge(*streams, key=lambda e: e[0], reverse=True)
+    page = [e for _i, e in zip(range(limit + 1), merged)]
+    has_more = len(page) > limit
+    page = page[:limit][::-1]
+    return {
+        "timeline": [item for _key, item in page],
+        "next_cursor": encode_cursor(*page[0][0]) if has_more and page else None,
+        "has_more": has_more,
+    }
+
+
+def get_session_timeline(
+    user: User,
+    session_id: int,
+    page: int = 1,
+    page_size: int = 100,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Timeline gabungan chat + planner satu session.
+    Default: offset per `page` (urut lama -> baru) + `pagination`, seperti sebelumnya.
+    `cursor` diisi (string kosong = halaman terbaru): keyset -> {timeline, next_cursor, has_more}.
+    """
+    page_size = max(int(page_size), 1)
     session = ChatSession.objects.filter(user=user, id=session_id).first()
+    if cursor is not None:
+        if not session:
+            return {"timeline": [], "next_cursor": None, "has_more": False}
+        return get_timeline_page(user, session, limit=page_size, cursor=cursor)
+
+    page = max(int(page), 1)
     if not session:
         return {
             "timeline": [],
-            "pagination": {"page": max(int(page), 1), "page_size": max(int(page_size), 1), "total": 0, "has_next": False},
+            "pagination": {"page": page, "page_size": page_size, "total": 0, "has_next": False},
         }
 
-    events: List[Tuple[Any, int, Dict[str, Any]]] = []
-    chat_qs = ChatHistory.objects.filter(user=user, session=session).order_by("timestamp")
-    planner_qs = PlannerHistory.objects.filter(user=user, session=session).order_by("created_at")
-
-    for h in chat_qs:
-        events.append(
-            (
-                h.timestamp,
-                0,
-                {
-                    "id": f"chat-user-{h.id}",
-                    "kind": "chat_user",
-                    "text": h.question,
-                    "time": h.timestamp.strftime("%H:%M"),
-                    "date": h.timestamp.strftime("%Y-%m-%d"),
-                },
-            )
-        )
-        events.append(
-            (
-                h.timestamp,
-                1,
-                {
-                    "id": f"chat-assistant-{h.id}",
-                    "kind": "chat_assistant",
-                    "text": h.answer,
-                    "time": h.timestamp.strftime("%H:%M"),
-                    "date": h.timestamp.strftime("%Y-%m-%d"),
-                },
-            )
-        )
-
-    for p in planner_qs:
-        kind = "planner_output" if p.event_type == PlannerHistory.EVENT_GENERATE else "planner_milestone"
-        meta = {
-            "planner_step": p.planner_step,
-            "event_type": p.event_type,
-            "option_id": p.option_id,
-            "option_label": p.option_label,
-            "warning": (p.payload or {}).get("planner_warning"),
-            "confidence_summary": ((p.payload or {}).get("profile_hints") or {}).get("confidence_summary"),
-        }
-        events.append(
-            (
-                p.created_at,
-                2,
-                {
-                    "id": f"planner-{p.id}",
-                    "kind": kind,
-                    "text": p.text,
-                    "time": p.created_at.strftime("%H:%M"),
-                    "date": p.created_at.strftime("%Y-%m-%d"),
-                    "meta": meta,
-                },
-            )
-        )
-
-    events.sort(key=lambda x: (x[0], x[1]))
-    rows = [e[2] for e in events]
-    page = max(int(page), 1)
-    page_size = max(int(page_size), 1)
+    # offset: baca maju tiap stream sampai offset+page_size baris saja, bukan seluruh session
     offset = (page - 1) * page_size
-    selected = rows[offset : offset + page_size]
-    total = len(rows)
-    has_next = (offset + page_size) < total
+    need = offset + page_size
+    streams = [
+        _timeline_events(rank, qs.order_by(ts_field, "id").values(*fields)[:need])
+        for rank, qs, ts_field, fields in _timeline_streams(user, session)
+    ]
+    merged = heapq.merge(*streams, key=lambda e: e[0])
+    selected = [item for i, (_key, item) in zip(range(need), merged) if i >= offset]
+    total = (
+        2 * ChatHistory.objects.filter(user=user, session=session).count()
+        + PlannerHistory.objects.filter(user=user, session=session).count()
+    )
     return {
         "timeline": selected,
-        "pagination": {"page": page, "page_size": page_size, "total": total, "has_next": has_next},
+        "pagination": {"page": page, "page_size": page_size, "total": total, "has_next": need < total},
     }
+
 
 def reingest_documents_for_user(user: User, doc_ids: List[int] | None = None) -> Dict[str, Any]:
     """
-    Re-ingest dokumen milik user tanpa upload ulang.
-    - Hapus embedding lama dulu (by doc_id)
-    - Jalankan process_document lagi
+    Re-ingest dokumen milik user tanpa upload ulang (incremental per chunk,
+    lihat reingest_document).
+    Jika INGEST_QUEUE_ENABLED=1, tiap dokumen menjadi job antrian.
     """
     qs = AcademicDocument.objects.filter(user=user).order_by("-uploaded_at")
     if doc_ids:
@@ -647,59 +841,88 @@ def reingest_documents_for_user(user: User, doc_ids: List[int] | None = None) ->
     if total == 0:
         return {"status": "error", "msg": "Tidak ada dokumen untuk di-reingest."}
 
+    if ingest_queue_enabled():
+        jobs = [enqueue_ingest_job(user, doc, IngestionJob.KIND_REINGEST) for doc in qs]
+        return {
+            "status": "success",
+            "msg": f"{len(jobs)} dokumen masuk antrian re-ingest.",
+            "queued": True,
+            "jobs": [serialize_job(j) for j in jobs],
+        }
+
     ok_count = 0
     fail_count = 0
     fails: List[str] = []
 
-    for doc in qs:
-        try:
-            #  delete embeddings lama
-            delete_vectors_for_doc(user_id=str(user.id), doc_id=str(doc.id), source=getattr(doc, "title", None))
-
-            #  ingest ulang
-            ok = process_document(doc)
-            if ok:
-                doc.is_embedded = True
-                doc.save(update_fields=["is_embedded"])
-                ok_count += 1
-            else:
-                fail_count += 1
-                fails.append(f"{doc.title} (Gagal Parsing)")
+    with collect_ingest_stats() as chunk_stats:
+        for doc in qs:
+            try:
+                if reingest_document(doc):
+                    ok_count += 1
+                else:
+                    fail_count += 1
+                    fails.append(f"{doc.title} (Gagal Parsing)")
 
-        except Exception:
-            fail_count += 1
-            fails.append(f"{doc.title} (System Error)")
+            except Exception:
+                fail_count += 1
+                fails.append(f"{doc.title} (System Error)")
 
     if ok_count > 0:
-        msg = f"Re-ingest berhasil: {ok_count}/{total} dokumen."
+        msg = (
+            f"Re-ingest berhasil: {ok_count}/{total} dokumen "
+            f"(chunk di-embed: {chunk_stats['embedded']}, dilewati: {chunk_stats['skipped']})."
+        )
         if fail_count > 0:
             msg += f" Gagal: {fail_count} ({', '.join(fails[:5])}{'...' if len(fails) > 5 else ''})"
-        return {"status": "success", "msg": msg}
+        return {"status": "success", "msg": msg, "chunk_stats": dict(chunk_stats)}
 
     return {"status": "error", "msg": f"Gagal re-ingest semua dokumen. Detail: {', '.join(fails)}"}
 
 
+def list_ingest_jobs_for_user(user: User, job_ids: List[int] | None = None, limit: int = 20) -> Dict[str, Any]:
+    qs = IngestionJob.objects.filter(user=user).order_by("-created_at", "-id")
+    if job_ids:
+        qs = qs.filter(id__in=job_ids)
+    jobs = list(qs[: max(1, min(int(limit), 200))])
+    return {
+        "jobs": [serialize_job(j) for j in jobs],
+        "summary": summarize_jobs(jobs),
+        "done": all(j.is_terminal for j in jobs),
+    }
+
+
+def _compact_vectors_in_background() -> None:
+    # tanpa ingest_worker (INGEST_QUEUE_ENABLED=0) tidak ada yang meng-compact tombstone:
+    # jalankan satu putaran di thread terpisah supaya response DELETE tidak menunggu Chroma
+    def _run():
+        try:
+            compact_vector_tombstones()
+        except Exception as e:
+            logger.warning(" VECTOR_COMPACT background gagal err=%r", e)
+        finally:
+            connection.close()
+
+    threading.Thread(target=_run, name="vector-compact", daemon=True).start()
+
+
 def delete_document_for_user(user: User, doc_id: int) -> bool:
     doc = AcademicDocument.objects.filter(user=user, id=doc_id).first()
     if not doc:
         return False
-    # Strict delete: jika vector masih tersisa, batalkan delete dokumen.
-    ok, remaining = delete_vectors_for_doc_strict(
-        user_id=str(user.id),
-        doc_id=str(doc.id),
-        source=getattr(doc, "title", None),
-    )
-    if not ok:
-        raise RuntimeError(
-            f"Gagal menghapus vector dokumen secara tuntas (doc_id={doc.id}, remaining={remaining})"
-        )
+    # Tombstone dulu: retrieval langsung mengecualikan doc_id ini, vector fisiknya
+    # dihapus + diverifikasi oleh compaction background (compact_vector_tombstones).
+    tombstone_document_vectors(user_id=user.id, doc_id=doc.id, source=getattr(doc, "title", None))
     # Hapus file dari storage
     try:
         if doc.file:
             doc.file.delete(save=False)
     except Exception:
         pass
+    deleted_doc_id = doc.id
     doc.delete()
+    remove_document_title(user.id, deleted_doc_id)
+    if not ingest_queue_enabled():
+        transaction.on_commit(_compact_vectors_in_background)
     return True
 
 
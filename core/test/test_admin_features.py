@@ -11,7 +11,9 @@ from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 from core.admin import SystemSettingAdminForm, UserQuotaForm, _build_quick_admin_links
+from core.monitoring import record_ingest_metric
 from core.models import (
+    IngestDocumentMetric,
     LLMConfiguration,
     RagRequestMetric,
     SystemHealthSnapshot,
@@ -119,6 +121,7 @@ class AdminFeatureTests(TestCase):
             "admin:core_userquota_changelist",
             "admin:core_userloginpresence_changelist",
             "admin:core_ragrequestmetric_changelist",
+            "admin:core_ingestdocumentmetric_changelist",
             "admin:core_systemhealthsnapshot_changelist",
             "admin:core_llmconfiguration_changelist",
             "admin:core_systemsetting_changelist",
@@ -139,6 +142,7 @@ class AdminFeatureTests(TestCase):
             reverse("admin:realtime_overview"),
             reverse("admin:realtime_rag"),
             reverse("admin:realtime_infra"),
+            reverse("admin:realtime_ingest"),
         ]
         for url in urls:
             with self.subTest(url=url):
@@ -217,6 +221,7 @@ class AdminFeatureTests(TestCase):
             "admin:realtime_overview",
             "admin:realtime_rag",
             "admin:realtime_infra",
+            "admin:realtime_ingest",
         ]:
             resp = self.client.get(reverse(name))
             self.assertIn(resp.status_code, (302, 403), name)
@@ -268,6 +273,42 @@ class AdminFeatureTests(TestCase):
         self.assertIn("p95_retrieval_ms", rag_payload)
         self.assertIn("snapshots", infra_payload)
 
+    def test_realtime_ingest_reports_throughput_and_stage_p95(self):
+        self.client.force_login(self.staff)
+        for i, ok in enumerate([True, True, False]):
+            record_ingest_metric(
+                user_id=self.user.id,
+                doc_id=10 + i,
+                file_name=f"jadwal-{i}.pdf",
+                file_type="pdf",
+                ok=ok,
+                total_ms=1000,
+                bytes_in=1024 * 1024,
+                chunks=50,
+                stage_timings={"parse": 200, "chunk": 10, "embed": 700 + i, "store": 90, "total": 1000},
+            )
+        cache.clear()
+
+        resp = self.client.get(reverse("admin:realtime_ingest"))
+        self.assertEqual(resp.status_code, 200)
+        payload = json.loads(resp.content.decode())
+
+        self.assertEqual(len(payload["events"]), 3)
+        self.assertEqual(payload["events"][0]["username"], "alice")
+        self.assertEqual(payload["throughput"]["docs_10m"], 3)
+        self.assertEqual(payload["throughput"]["failed_10m"], 1)
+        self.assertEqual(payload["throughput"]["chunks_per_sec"], 50.0)
+        self.assertEqual(payload["throughput"]["mb_per_min"], 60.0)
+        self.assertEqual(payload["p95_stage_ms"]["embed"], 702.0)
+
+    def test_record_ingest_metric_is_fail_safe(self):
+        with patch.object(IngestDocumentMetric.objects, "create", side_effect=RuntimeError("db down")):
+            record_ingest_metric(user_id=None, doc_id=None, file_name="x.pdf", ok=True, total_ms=5)
+        record_ingest_metric(user_id=999999, doc_id=1, file_name="x.pdf", ok=True, total_ms=-5)
+        row = IngestDocumentMetric.objects.get()
+        self.assertIsNone(row.user_id)
+        self.assertEqual(row.total_ms, 0)
+
     def test_realtime_rows_follow_admin_max_rows_limit(self):
         self.client.force_login(self.staff)
         SystemSetting.objects.update_or_create(
@@ -367,10 +408,13 @@ class AdminFeatureTests(TestCase):
         req = self._staff_request()
 
         metric_admin = admin.site._registry[RagRequestMetric]
+        ingest_admin = admin.site._registry[IngestDocumentMetric]
         health_admin = admin.site._registry[SystemHealthSnapshot]
 
         self.assertFalse(metric_admin.has_add_permission(req))
         self.assertFalse(metric_admin.has_change_permission(req))
+        self.assertFalse(ingest_admin.has_add_permission(req))
+        self.assertFalse(ingest_admin.has_change_permission(req))
         self.assertFalse(health_admin.has_add_permission(req))
         self.assertFalse(health_admin.has_change_permission(req))
 
@@ -8,10 +8,25 @@ from core.ai_engine.retrieval.main import (
     _normalize_doc_key,
     _resolve_user_doc_mentions,
 )
+from core.ai_engine.retrieval.doc_index import (
+    DocTitleIndex,
+    get_user_title_index,
+    index_document_title,
+    invalidate_user_title_index,
+    remove_document_title,
+)
+from core.models import AcademicDocument
 from core import service
 
 
 class DocMentionParserTests(SimpleTestCase):
+    def setUp(self):
+        # index judul di-cache lintas request; bersihkan agar mock DB per test terpakai
+        invalidate_user_title_index(1)
+
+    def tearDown(self):
+        invalidate_user_title_index(1)
+
     def test_extract_doc_mentions_returns_clean_query_and_mentions(self):
         clean, mentions = _extract_doc_mentions(
             "tolong cek @Jadwal Semester 3.pdf dan @Transkrip_aku.csv untuk saya"
@@ -27,7 +42,7 @@ class DocMentionParserTests(SimpleTestCase):
         out = _normalize_doc_key("  Jadwal-Mata Kuliah_Semester 3.PDF ")
         self.assertEqual(out, "jadwal mata kuliah semester 3")
 
-    @patch("core.ai_engine.retrieval.main.AcademicDocument")
+    @patch("core.ai_engine.retrieval.doc_index.AcademicDocument")
     def test_resolve_user_doc_mentions_unique_and_unresolved(self, doc_model_mock):
         doc_model_mock.objects.filter.return_value.values.return_value = [
             {"id": 11, "title": "Jadwal Semester 3.pdf"},
@@ -39,7 +54,7 @@ class DocMentionParserTests(SimpleTestCase):
         self.assertEqual(out["unresolved_mentions"], ["file ga ada"])
         self.assertEqual(out["ambiguous_mentions"], [])
 
-    @patch("core.ai_engine.retrieval.main.AcademicDocument")
+    @patch("core.ai_engine.retrieval.doc_index.AcademicDocument")
     def test_resolve_user_doc_mentions_ambiguous(self, doc_model_mock):
         doc_model_mock.objects.filter.return_value.values.return_value = [
             {"id": 11, "title": "Jadwal Semester 3 A.pdf"},
@@ -49,6 +64,37 @@ class DocMentionParserTests(SimpleTestCase):
         self.assertEqual(out["resolved_doc_ids"], [])
         self.assertEqual(out["ambiguous_mentions"], ["jadwal semester 3"])
 
+    @patch("core.ai_engine.retrieval.doc_index.AcademicDocument")
+    def test_title_index_cached_and_invalidated_on_ingest_delete(self, doc_model_mock):
+        rows = [{"id": 11, "title": "Jadwal Semester 3.pdf"}]
+        doc_model_mock.objects.filter.return_value.values.return_value = rows
+        get_user_title_index(1)
+        get_user_title_index(1)
+        self.assertEqual(doc_model_mock.objects.filter.call_count, 1)
+
+        # ingest: key dihapus, read berikutnya build ulang dari DB (bukan patch in-place)
+        rows.append({"id": 12, "title": "Transkrip Nilai.csv"})
+        index_document_title(1, 12, "Transkrip Nilai.csv")
+        out = _resolve_user_doc_mentions(user_id=1, mentions=["transkrip nilai"])
+        self.assertEqual(out["resolved_doc_ids"], [12])
+        self.assertEqual(doc_model_mock.objects.filter.call_count, 2)
+
+        rows.pop()
+        remove_document_title(1, 12)
+        out = _resolve_user_doc_mentions(user_id=1, mentions=["transkrip nilai"])
+        self.assertEqual(out["unresolved_mentions"], ["transkrip nilai"])
+        self.assertEqual(doc_model_mock.objects.filter.call_count, 3)
+
+    def test_title_index_suggest_prefix_then_word_prefix(self):
+        index = DocTitleIndex.build([
+            (1, "Jadwal Semester 3.pdf"),
+            (2, "Rekap Jadwal Dosen.xlsx"),
+            (3, "Transkrip.csv"),
+        ])
+        self.assertEqual([d for d, _ in index.suggest("jad")], [1, 2])
+        self.assertEqual([d for d, _ in index.suggest("trans", limit=1)], [3])
+        self.assertEqual(index.resolve("jadwal")[0], "ambiguous")
+
 
 class ServiceMetaPropagationTests(TestCase):
     def setUp(self):
@@ -102,3 +148,20 @@ class ChatApiMetaResponseTests(TestCase):
         payload = res.json()
         self.assertIn("meta", payload)
         self.assertEqual(payload["meta"]["mode"], "llm_only")
+
+
+class DocumentMentionApiTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="u_mention", password="pass12345")
+        self.other = User.objects.create_user(username="u_other", password="pass12345")
+        AcademicDocument.objects.create(user=self.user, title="Jadwal Semester 3.pdf", file="documents/a.pdf")
+        AcademicDocument.objects.create(user=self.other, title="Jadwal Rahasia.pdf", file="documents/b.pdf")
+        invalidate_user_title_index(self.user.id)
+        self.client.force_login(self.user)
+
+    def test_mention_autocomplete_only_returns_own_documents(self):
+        res = self.client.get("/api/documents/mentions/?q=jad")
+        self.assertEqual(res.status_code, 200)
+        titles = [x["title"] for x in res.json()["items"]]
+        self.assertEqual(titles, ["Jadwal Semester 3.pdf"])
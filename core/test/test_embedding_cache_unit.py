@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+from core.ai_engine.embedding_cache import EmbeddingCache
+
+
+class _FakeModel:
+    def __init__(self, dim: int = 4):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t) + i) / 10.0 for i in range(self.dim)] for t in texts]
+
+
+class EmbeddingCacheUnitTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _cache(self, max_bytes: int = 1024 * 1024, model: str = "intfloat/multilingual-e5-large"):
+        return EmbeddingCache(self._tmp.name, model_name=model, normalize=True, max_bytes=max_bytes)
+
+    def test_only_misses_go_to_model(self):
+        model = _FakeModel()
+        cache = self._cache()
+        first = cache.embed(["passage: a", "passage: bb", "passage: a"], model)
+        second = cache.embed(["passage: bb", "passage: ccc"], model)
+
+        self.assertEqual(model.calls, [["passage: a", "passage: bb"], ["passage: ccc"]])
+        self.assertEqual(first[0], first[2])
+        self.assertEqual(second[0], first[1])
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_hits_survive_reopen_and_match_miss_vectors(self):
+        model = _FakeModel()
+        miss = self._cache().embed(["passage: jadwal senin"], model)
+        hit = self._cache().embed(["passage: jadwal senin"], model)
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(miss, hit)
+
+    def test_namespace_per_model(self):
+        model = _FakeModel()
+        self._cache(model="model-a").embed(["passage: x"], model)
+        self._cache(model="model-b").embed(["passage: x"], model)
+        self.assertEqual(len(model.calls), 2)
+
+    def test_evicts_least_recently_used_when_full(self):
+        model = _FakeModel(dim=4)
+        cache = self._cache(max_bytes=3 * 4 * 2)  # 3 slot float16 x dim 4
+        cache.embed(["a", "b", "c"], model)
+        cache.embed(["a"], model)  # a jadi paling baru dipakai
+        cache.embed(["d"], model)  # b dibuang
+
+        model.calls.clear()
+        cache.embed(["a", "b", "c", "d"], model)
+        self.assertEqual(model.calls, [["b"]])
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_other_process_shrinking_cache_is_remapped_before_read(self):
+        model = _FakeModel(dim=4)
+        big = self._cache(max_bytes=8 * 4 * 2)
+        big.embed([f"t{i}" for i in range(8)], model)
+        # "proses" lain dengan batas lebih kecil: file di-truncate ke 2 slot
+        small = self._cache(max_bytes=2 * 4 * 2)
+        small.embed(["t0"], model)
+
+        model.calls.clear()
+        out = big.embed(["t0", "t1", "t5"], model)
+        self.assertEqual(big.stats()["capacity"], 2)
+        self.assertEqual(model.calls, [["t5"]])
+        self.assertEqual(len(out), 3)
+        self.assertEqual(big.stats()["entries"], 2)
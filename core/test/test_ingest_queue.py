@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from core.ai_engine.tracing import span, start_trace
+from core.ingest_queue import claim_job, claim_next_job, requeue_stale_jobs, run_job
+from core.models import AcademicDocument, IngestionJob
+
+
+def _fake_ingest(doc):
+    with start_trace("ingest"):
+        with span("chunking"):
+            pass
+        with span("embed_store"):
+            pass
+    return True
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+@patch.dict(os.environ, {"INGEST_QUEUE_ENABLED": "1"})
+class IngestQueueTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="queue_user", password="pass123")
+        self.other = User.objects.create_user(username="other_user", password="pass123")
+        self.client.force_login(self.user)
+
+    @patch("core.service.process_document")
+    def test_upload_returns_jobs_without_ingesting(self, mock_process):
+        resp = self.client.post("/api/upload/", {"files": [SimpleUploadedFile("a.txt", b"hello")]})
+        self.assertEqual(resp.status_code, 202)
+        body = resp.json()
+        self.assertTrue(body["queued"])
+        self.assertEqual(len(body["jobs"]), 1)
+        self.assertEqual(body["jobs"][0]["status"], IngestionJob.STATUS_QUEUED)
+        mock_process.assert_not_called()
+        doc = AcademicDocument.objects.get(user=self.user)
+        self.assertFalse(doc.is_embedded)
+
+    @patch("core.service.process_document", side_effect=_fake_ingest)
+    def test_worker_runs_job_and_records_stage_progress(self, _):
+        doc = AcademicDocument.objects.create(user=self.user, file=SimpleUploadedFile("b.txt", b"isi"))
+        job = IngestionJob.objects.create(user=self.user, document=doc, file_name=doc.title)
+
+        claimed = claim_next_job("test:0")
+        self.assertEqual(claimed.id, job.id)
+        self.assertIsNone(claim_job(job.id, "test:1"))
+        self.assertTrue(run_job(claimed))
+
+        job.refresh_from_db()
+        doc.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("chunking", job.stage_timings)
+        self.assertIn("embed_store", job.stage_timings)
+        self.assertTrue(doc.is_embedded)
+
+    @patch("core.service.process_document", return_value=False)
+    def test_failed_upload_job_removes_document_but_keeps_job(self, _):
+        doc = AcademicDocument.objects.create(user=self.user, file=SimpleUploadedFile("c.txt", b"isi"))
+        job = IngestionJob.objects.create(user=self.user, document=doc, file_name=doc.title)
+        self.assertFalse(run_job(claim_next_job("test:0")))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_FAILED)
+        self.assertEqual(job.error, "Gagal Parsing")
+        self.assertIsNone(job.document_id)
+        self.assertFalse(AcademicDocument.objects.filter(id=doc.id).exists())
+
+    @patch("core.ai_engine.ingest.get_vectorstore")
+    @patch(
+        "core.ai_engine.ingest._sync_chunks",
+        return_value={"embedded": 2, "skipped": 5, "updated": 1, "deleted": 3, "batches": 1},
+    )
+    @patch("core.service.delete_vectors_for_doc", return_value=1)
+    def test_reingest_api_enqueues_and_worker_reingests_incrementally(self, mock_del, mock_sync, _vs):
+        doc = AcademicDocument.objects.create(
+            user=self.user, file=SimpleUploadedFile("d.txt", "Jadwal kuliah hari Senin.\n".encode("utf-8") * 20)
+        )
+        resp = self.client.post("/api/reingest/", data=json.dumps({"doc_ids": [doc.id]}), content_type="application/json")
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()["jobs"][0]["id"]
+        self.assertEqual(IngestionJob.objects.get(id=job_id).kind, IngestionJob.KIND_REINGEST)
+        self.assertEqual(resp.json()["jobs"][0]["chunk_stats"], {})
+
+        self.assertTrue(run_job(claim_next_job("test:0")))
+        # incremental: vector lama tidak dihapus massal, hitungan diff chunk tersimpan di job
+        mock_del.assert_not_called()
+        mock_sync.assert_called_once()
+        job = self.client.get(f"/api/ingest/jobs/{job_id}/").json()["job"]
+        self.assertEqual(job["status"], IngestionJob.STATUS_SUCCEEDED)
+        self.assertEqual(job["chunk_stats"], {"embedded": 2, "skipped": 5, "updated": 1, "deleted": 3})
+
+    def test_status_api_is_user_scoped(self):
+        job = IngestionJob.objects.create(user=self.user, file_name="x.pdf")
+        resp = self.client.get(f"/api/ingest/jobs/?ids={job.id}")
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual([j["id"] for j in body["jobs"]], [job.id])
+        self.assertFalse(body["done"])
+        self.assertEqual(body["summary"]["queued"], 1)
+
+        other = Client()
+        other.force_login(self.other)
+        self.assertEqual(other.get(f"/api/ingest/jobs/{job.id}/").status_code, 404)
+        self.assertEqual(other.get(f"/api/ingest/jobs/?ids={job.id}").json()["jobs"], [])
+
+    @patch.dict(os.environ, {"INGEST_JOB_STALE_SECONDS": "60", "INGEST_JOB_MAX_ATTEMPTS": "2"})
+    def test_stale_running_jobs_are_requeued_or_failed(self):
+        old = timezone.now() - timedelta(minutes=10)
+        retry = IngestionJob.objects.create(
+            user=self.user, status=IngestionJob.STATUS_RUNNING, attempts=1, heartbeat_at=old
+        )
+        exhausted = IngestionJob.objects.create(
+            user=self.user, status=IngestionJob.STATUS_RUNNING, attempts=2, heartbeat_at=old
+        )
+        fresh = IngestionJob.objects.create(
+            user=self.user, status=IngestionJob.STATUS_RUNNING, attempts=1, heartbeat_at=timezone.now()
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(retry.status, IngestionJob.STATUS_QUEUED)
+        self.assertEqual(exhausted.status, IngestionJob.STATUS_FAILED)
+        self.assertEqual(fresh.status, IngestionJob.STATUS_RUNNING)
@@ -0,0 +1,156 @@
+import json
+import re
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.ai_engine import ingest as ingest_mod
+
+
+class _FakeRepairLLM:
+    """Balas setiap batch dengan dosen terisi; batch tertentu bisa diperlambat."""
+
+    def __init__(self, delays=None):
+        self.delays = dict(delays or {})
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(n, 0.02))
+            payload = json.loads(re.search(r"Input rows:\n(.*)$", prompt, flags=re.DOTALL).group(1))
+            items = [dict(p["row"], idx=p["idx"], dosen=f"Dosen {p['idx']}") for p in payload]
+            return mock.Mock(content=json.dumps(items))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _rows(n):
+    return [
+        {"hari": "SENIN", "sesi": "1", "jam": "07:00-08:40", "ruang": "A1", "semester": "3",
+         "mata_kuliah": f"MK {i}", "kelas": "A", "dosen": "", "kode": ""}
+        for i in range(n)
+    ]
+
+
+class RepairRowsConcurrencyTests(SimpleTestCase):
+    def _run(self, llm, rows, **env):
+        base = {
+            "PDF_HYBRID_LLM_REPAIR": "1",
+            "INGEST_REPAIR_BATCH_SIZE": "2",
+            "INGEST_REPAIR_CONCURRENCY": "3",
+            "INGEST_REPAIR_DEADLINE": "30",
+            "INGEST_REPAIR_CACHE": "0",
+        }
+        base.update(env)
+        with mock.patch.object(ingest_mod, "_build_repair_llm", return_value=llm), mock.patch.dict(
+            "os.environ", base
+        ):
+            return ingest_mod._repair_rows_with_llm(rows, "jadwal.pdf")
+
+    def test_batches_run_concurrently_within_limit(self):
+        llm = _FakeRepairLLM(delays={i: 0.1 for i in range(6)})
+        rows, stats = self._run(llm, _rows(12))
+
+        self.assertEqual(llm.calls, 6)
+        self.assertLessEqual(llm.max_in_flight, 3)
+        self.assertGreater(llm.max_in_flight, 1)
+        self.assertEqual(stats["repaired"], 12)
+        self.assertEqual([r["dosen"] for r in rows], [f"Dosen {i}" for i in range(12)])
+        self.assertEqual([b["batch"] for b in stats["batches"]], list(range(6)))
+        self.assertTrue(all(b["latency_ms"] is not None for b in stats["batches"]))
+
+    def test_batch_past_deadline_is_skipped(self):
+        llm = _FakeRepairLLM(delays={1: 1.5})
+        rows, stats = self._run(llm, _rows(6), INGEST_REPAIR_DEADLINE="0.5")
+
+        self.assertEqual([b["status"] for b in stats["batches"]], ["ok", "timeout", "ok"])
+        self.assertEqual(stats["timed_out"], 1)
+        self.assertEqual(stats["repaired"], 4)
+        self.assertEqual([r["dosen"] for r in rows[2:4]], ["", ""])
+
+    def test_failed_batch_does_not_fail_repair(self):
+        llm = _FakeRepairLLM()
+        original = llm.invoke
+
+        def flaky(prompt):
+            if '"idx": 0' in prompt:
+                raise RuntimeError("upstream 502")
+            return original(prompt)
+
+        llm.invoke = flaky
+        rows, stats = self._run(llm, _rows(4))
+        self.assertEqual([b["status"] for b in stats["batches"]], ["error", "ok"])
+        self.assertEqual(stats["repaired"], 2)
+
+
+class RepairCacheTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _run(self, llm, rows):
+        env = {
+            "PDF_HYBRID_LLM_REPAIR": "1",
+            "INGEST_REPAIR_BATCH_SIZE": "2",
+            "INGEST_REPAIR_CACHE": "1",
+            "INGEST_REPAIR_CACHE_DIR": self._tmp.name,
+        }
+        with mock.patch.object(ingest_mod, "_build_repair_llm", return_value=llm), mock.patch.dict(
+            "os.environ", env
+        ):
+            return ingest_mod._repair_rows_with_llm(rows, "jadwal.pdf")
+
+    def test_reingest_applies_cached_fixes_without_llm(self):
+        first_llm = _FakeRepairLLM()
+        first_rows, first = self._run(first_llm, _rows(5))
+        self.assertEqual((first["cache_hits"], first["cache_misses"]), (0, 5))
+        self.assertEqual(first_llm.calls, 3)
+
+        second_llm = _FakeRepairLLM()
+        second_rows, second = self._run(second_llm, _rows(5))
+        self.assertEqual(second_llm.calls, 0)
+        self.assertEqual((second["cache_hits"], second["cache_misses"]), (5, 0))
+        self.assertEqual(second["repaired"], 5)
+        self.assertEqual([r["dosen"] for r in second_rows], [r["dosen"] for r in first_rows])
+
+    def test_rows_answered_without_fix_are_not_resent(self):
+        llm = _FakeRepairLLM()
+        llm.invoke = lambda prompt: mock.Mock(content=json.dumps([{"idx": 0}, {"idx": 1}]))
+        self._run(llm, _rows(2))
+
+        again = _FakeRepairLLM()
+        _rows_out, stats = self._run(again, _rows(2))
+        self.assertEqual(again.calls, 0)
+        self.assertEqual(stats["cache_hits"], 2)
+        self.assertEqual(stats["repaired"], 0)
+
+    def test_rows_omitted_by_llm_are_not_cached(self):
+        llm = _FakeRepairLLM()
+        llm.invoke = lambda prompt: mock.Mock(content=json.dumps([{"idx": 0, "dosen": "Dosen 0"}]))
+        self._run(llm, _rows(2))
+
+        again = _FakeRepairLLM()
+        rows, stats = self._run(again, _rows(2))
+        self.assertEqual((stats["cache_hits"], stats["cache_misses"]), (1, 1))
+        self.assertEqual(again.calls, 1)
+        self.assertEqual(rows[1]["dosen"], "Dosen 1")
+
+    def test_prompt_version_change_misses_cache(self):
+        self._run(_FakeRepairLLM(), _rows(2))
+        llm = _FakeRepairLLM()
+        with mock.patch.object(ingest_mod, "REPAIR_PROMPT_VERSION", "repair-test"):
+            _rows_out, stats = self._run(llm, _rows(2))
+        self.assertEqual(stats["cache_misses"], 2)
+        self.assertEqual(llm.calls, 1)
@@ -0,0 +1,216 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.ai_engine import ingest as ingest_mod
+from core.ai_engine import stages as stages_mod
+from core.ai_engine.stages import StageMeter, batched
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.rows = {}
+        self.updated = []
+        self.deleted = []
+
+    def get(self, where=None, include=None, limit=None, offset=0):
+        ids = list(self.rows)[offset:offset + limit if limit else None]
+        return {"ids": ids, "metadatas": [self.rows[i]["meta"] for i in ids]}
+
+    def delete(self, ids=None, where=None):
+        self.deleted.extend(ids or [])
+        for cid in ids or []:
+            self.rows.pop(cid, None)
+
+    def update(self, ids=None, metadatas=None):
+        self.updated.extend(ids or [])
+        for cid, meta in zip(ids or [], metadatas or []):
+            self.rows[cid]["meta"] = meta
+
+
+class _FakeVectorStore:
+    def __init__(self, fail_on_call=None):
+        self._collection = _FakeCollection()
+        self.embedded = []
+        self.batches = []
+        self.fail_on_call = fail_on_call
+
+    def add_texts(self, texts, metadatas, ids):
+        if self.fail_on_call is not None and len(self.batches) == self.fail_on_call:
+            raise RuntimeError("embedding gagal")
+        self.batches.append(list(texts))
+        self.embedded.extend(texts)
+        for cid, text, meta in zip(ids, texts, metadatas):
+            self._collection.rows[cid] = {"text": text, "meta": meta}
+        return ids
+
+
+def _payloads(*texts, kind="text"):
+    return [{"text": t, "chunk_kind": kind} for t in texts]
+
+
+class IngestChunkSyncTests(SimpleTestCase):
+    def _sync(self, vs, payloads, meta=None, batch_size=None):
+        return ingest_mod._sync_chunks(
+            vs,
+            base_meta=meta or {"user_id": "1", "doc_id": "7"},
+            payloads=payloads,
+            batch_size=batch_size,
+        )
+
+    def _texts(self, vs):
+        return sorted(r["text"] for r in vs._collection.rows.values())
+
+    def test_chunk_ids_are_deterministic_and_unique(self):
+        payloads = _payloads("a", "b", "a")
+        ids = ingest_mod._chunk_ids("7", payloads)
+        self.assertEqual(ids, ingest_mod._chunk_ids("7", payloads))
+        self.assertEqual(len(set(ids)), 3)
+        self.assertTrue(all(i.startswith("7:text:") for i in ids))
+        self.assertNotEqual(ids[0], ingest_mod._chunk_ids("7", _payloads("a", kind="row"))[0])
+
+    def test_reingest_only_embeds_new_chunks_and_deletes_removed(self):
+        vs = _FakeVectorStore()
+        first = self._sync(vs, _payloads("a", "b", "c"))
+        self.assertEqual(
+            first, {"embedded": 3, "skipped": 0, "updated": 0, "deleted": 0, "batches": 1}
+        )
+
+        vs.embedded.clear()
+        second = self._sync(vs, _payloads("a", "b", "d"))
+        self.assertEqual(vs.embedded, ["d"])
+        self.assertEqual(
+            second, {"embedded": 1, "skipped": 2, "updated": 0, "deleted": 1, "batches": 1}
+        )
+        self.assertEqual(self._texts(vs), ["a", "b", "d"])
+
+    def test_metadata_change_updates_without_embedding(self):
+        vs = _FakeVectorStore()
+        self._sync(vs, _payloads("a", "b"))
+        vs.embedded.clear()
+
+        stats = self._sync(vs, _payloads("a", "b"), meta={"user_id": "1", "doc_id": "7", "source": "baru.pdf"})
+        self.assertEqual(vs.embedded, [])
+        self.assertEqual(stats["updated"], 2)
+        self.assertEqual(stats["skipped"], 2)
+        self.assertTrue(all(r["meta"].get("source") == "baru.pdf" for r in vs._collection.rows.values()))
+
+    def test_embeds_in_bounded_batches_and_reports_progress(self):
+        vs = _FakeVectorStore()
+        progress = []
+        with ingest_mod.on_embed_batch(lambda done, total: progress.append((done, total))):
+            stats = self._sync(vs, _payloads(*[f"chunk {i}" for i in range(7)]), batch_size=3)
+
+        self.assertEqual([len(b) for b in vs.batches], [3, 3, 1])
+        self.assertEqual(progress, [(3, 7), (6, 7), (7, 7)])
+        self.assertEqual(stats["batches"], 3)
+        self.assertEqual(stats["embedded"], 7)
+
+    def test_failed_batch_rolls_back_chunks_added_in_this_run(self):
+        vs = _FakeVectorStore()
+        self._sync(vs, _payloads("lama 1", "lama 2"))
+
+        vs.fail_on_call = len(vs.batches) + 1
+        with self.assertRaises(RuntimeError):
+            self._sync(vs, _payloads("baru 1", "baru 2", "baru 3", "baru 4"), batch_size=2)
+
+        # batch pertama dihapus lagi; chunk lama tidak disentuh karena hapus stale terjadi di akhir
+        self.assertEqual(self._texts(vs), ["lama 1", "lama 2"])
+
+    def test_failed_batch_keeps_old_metadata(self):
+        vs = _FakeVectorStore()
+        self._sync(vs, _payloads("lama 1", "lama 2"))
+
+        vs.fail_on_call = len(vs.batches)
+        with self.assertRaises(RuntimeError):
+            self._sync(
+                vs,
+                _payloads("lama 1", "lama 2", "baru 1"),
+                meta={"user_id": "1", "doc_id": "7", "source": "baru.pdf"},
+                batch_size=2,
+            )
+
+        # batch pertama hanya beda metadata, tapi update baru jalan setelah semua batch berhasil
+        self.assertEqual(vs._collection.updated, [])
+        self.assertTrue(all("source" not in r["meta"] for r in vs._collection.rows.values()))
+
+    def test_peak_rss_is_max_of_samples_taken_per_batch(self):
+        rss_mb = iter([120, 480, 300, 200])
+
+        class _Proc:
+            def memory_info(self):
+                return type("mem", (), {"rss": next(rss_mb) * 1024 * 1024})()
+
+        fake_psutil = type("psutil", (), {"Process": staticmethod(_Proc)})
+        meter = StageMeter()
+        with patch.object(stages_mod, "psutil", fake_psutil):
+            stats = ingest_mod._sync_chunks(
+                _FakeVectorStore(),
+                base_meta={"user_id": "1", "doc_id": "7"},
+                payloads=_payloads("a", "b", "c", "d", "e", "f"),
+                batch_size=2,
+                meter=meter,
+            )
+        self.assertEqual(stats["batches"], 3)
+        self.assertEqual(meter.peak_rss_mb, 480.0)
+
+    def test_streams_generator_payloads_with_estimated_total(self):
+        vs = _FakeVectorStore()
+        pulled = []
+
+        def gen():
+            for i in range(5):
+                pulled.append(i)
+                yield {"text": f"chunk {i}", "chunk_kind": "text"}
+
+        progress = []
+        with ingest_mod.on_embed_batch(lambda done, total: progress.append((done, total, len(pulled)))):
+            stats = ingest_mod._sync_chunks(
+                vs, base_meta={"user_id": "1", "doc_id": "7"}, payloads=gen(), batch_size=2, total=4
+            )
+
+        # generator hanya ditarik satu batch di depan; total perkiraan dikoreksi jika terlampaui
+        self.assertEqual(progress, [(2, 4, 2), (4, 4, 4), (5, 5, 5)])
+        self.assertEqual(stats["embedded"], 5)
+
+    def test_meter_splits_embed_and_store_when_collection_upsert_available(self):
+        class _Embeddings:
+            def embed_documents(self, texts):
+                return [[float(len(t))] for t in texts]
+
+        vs = _FakeVectorStore()
+        vs.embeddings = _Embeddings()
+        upserts = []
+        vs._collection.upsert = lambda ids, embeddings, metadatas, documents: upserts.append(
+            (list(ids), embeddings)
+        ) or vs._collection.rows.update(
+            {cid: {"text": d, "meta": m} for cid, d, m in zip(ids, documents, metadatas)}
+        )
+        meter = StageMeter()
+        ingest_mod._sync_chunks(
+            vs, base_meta={"user_id": "1", "doc_id": "7"}, payloads=_payloads("a", "bb"), meter=meter
+        )
+
+        self.assertEqual(vs.embedded, [])
+        self.assertEqual(upserts[0][1], [[1.0], [2.0]])
+        self.assertEqual(self._texts(vs), ["a", "bb"])
+        self.assertIn("embed", meter.timings)
+        self.assertIn("store", meter.timings)
+
+
+class StageMeterTests(SimpleTestCase):
+    def test_nested_stage_time_is_exclusive(self):
+        clock = iter([0.0, 0.0, 1.0, 3.0, 4.0])
+        with patch("core.ai_engine.stages.time.perf_counter", side_effect=lambda: next(clock)):
+            meter = StageMeter()
+            with meter.stage("chunk"):
+                with meter.stage("embed"):
+                    pass
+        # chunk: 0->1 ; embed: 1->3 ; chunk lagi: 3->4
+        self.assertEqual(meter.breakdown(), {"chunk": 2000.0, "embed": 2000.0})
+
+    def test_iterate_counts_items_and_batched_keeps_remainder(self):
+        meter = StageMeter()
+        out = list(batched(meter.iterate("chunk", range(5)), 2))
+        self.assertEqual(out, [[0, 1], [2, 3], [4]])
+        self.assertEqual(meter.items, {"chunk": 5})
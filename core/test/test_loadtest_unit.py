@@ -0,0 +1,86 @@
+import json
+import random
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.ai_engine.retrieval import llm as llm_mod
+from core.loadtest.driver import LoadStats
+from core.loadtest.fake_openrouter import FakeLLMConfig, LatencyModel, make_fake_openrouter_server
+
+
+class FakeOpenRouterTests(SimpleTestCase):
+    def _start(self, config):
+        server = make_fake_openrouter_server("127.0.0.1", 0, config)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+    def _post(self, base, payload):
+        req = urllib.request.Request(
+            f"{base}/chat/completions",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                return resp.status, resp.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode("utf-8")
+
+    def test_latency_spec_parsing(self):
+        self.assertEqual(LatencyModel.parse("fixed:250").sample_ms(random.Random(0)), 250.0)
+        value = LatencyModel.parse("uniform:10:20").sample_ms(random.Random(0))
+        self.assertTrue(10.0 <= value <= 20.0)
+        for bad in ("gamma:1", "uniform:5", "fixed:-3", "normal:a:b"):
+            with self.subTest(spec=bad):
+                with self.assertRaises(ValueError):
+                    LatencyModel.parse(bad)
+
+    def test_chat_completion_and_stream_are_openai_compatible(self):
+        _server, base = self._start(FakeLLMConfig(reply="halo dari stub", stream_chunk_chars=4))
+        status, body = self._post(base, {"model": "m", "messages": [{"role": "user", "content": "tes"}]})
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertEqual(data["choices"][0]["message"]["content"], "halo dari stub")
+        self.assertIn("usage", data)
+
+        status, body = self._post(base, {"model": "m", "messages": [], "stream": True})
+        self.assertEqual(status, 200)
+        events = [line[len("data: "):] for line in body.splitlines() if line.startswith("data: ")]
+        self.assertEqual(events[-1], "[DONE]")
+        text = "".join(json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1])
+        self.assertEqual(text, "halo dari stub")
+
+    def test_error_rate_returns_configured_status(self):
+        server, base = self._start(FakeLLMConfig(error_rate=1.0, error_codes=(503,), seed=7))
+        status, body = self._post(base, {"model": "m", "messages": []})
+        self.assertEqual(status, 503)
+        self.assertEqual(json.loads(body)["error"]["code"], 503)
+        self.assertEqual(server.fake_state.counts["errors"], 1)
+
+    def test_build_llm_uses_configured_base_url(self):
+        with patch.object(llm_mod, "ChatOpenAI") as mocked:
+            llm_mod.build_llm("m", {"api_key": "k", "base_url": "http://127.0.0.1:8765/api/v1"})
+            self.assertEqual(mocked.call_args.kwargs["openai_api_base"], "http://127.0.0.1:8765/api/v1")
+            llm_mod.build_llm("m", {"api_key": "k"})
+            self.assertEqual(mocked.call_args.kwargs["openai_api_base"], llm_mod.DEFAULT_BASE_URL)
+
+
+class LoadStatsTests(SimpleTestCase):
+    def test_summary_per_endpoint(self):
+        stats = LoadStats()
+        for i in range(1, 101):
+            stats.record("chat", float(i), 200 if i <= 90 else 500, ok=i <= 90)
+        stats.record("login", 5.0, 302, ok=True)
+        out = stats.summary(wall_seconds=10.0)
+        self.assertEqual(out["chat"]["requests"], 100)
+        self.assertEqual(out["chat"]["error_rate"], 0.1)
+        self.assertEqual(out["chat"]["throughput_rps"], 10.0)
+        self.assertEqual(out["chat"]["p95_ms"], 96.0)
+        self.assertEqual(out["chat"]["status_codes"], {"200": 90, "500": 10})
+        self.assertEqual(out["login"]["errors"], 0)
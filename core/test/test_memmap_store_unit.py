@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from core.ai_engine import config as cfg
+from core.ai_engine import ingest as ingest_mod
+from core.ai_engine.memmap_store import MemmapCollection, MemmapVectorStore, quantize_rows
+
+
+class _FakeEmbedder:
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+
+    def _vec(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % (2**32))
+        return rng.normal(size=self.dim).astype(np.float32).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+class MemmapStoreUnitTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.rng = np.random.default_rng(3)
+
+    def _collection(self, n=400, dim=16):
+        col = MemmapCollection(os.path.join(self._tmp.name, "academic_rag_u1"), "academic_rag_u1")
+        vecs = self.rng.normal(size=(n, dim)).astype(np.float32)
+        metas = [{"user_id": "1", "doc_id": str(i % 5), "doc_type": "schedule" if i % 2 else "transcript"} for i in range(n)]
+        col.upsert([f"c{i}" for i in range(n)], vecs, metas, [f"chunk {i}" for i in range(n)])
+        return col, vecs, metas
+
+    def test_quantize_rows_roundtrip_error_is_small(self):
+        vecs = self.rng.normal(size=(10, 32)).astype(np.float32)
+        codes, scale = quantize_rows(vecs)
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertLess(np.abs(codes * scale[:, None] - vecs).max(), scale.max())
+
+    def test_search_matches_bruteforce_with_filter_and_l2_distance(self):
+        col, vecs, metas = self._collection()
+        q = self.rng.normal(size=16).astype(np.float32)
+        where = {"$and": [{"user_id": "1"}, {"doc_type": "schedule"}, {"doc_id": {"$in": ["1", "3"]}}]}
+        allowed = [i for i, m in enumerate(metas) if m["doc_type"] == "schedule" and m["doc_id"] in {"1", "3"}]
+        dist = ((vecs[allowed] - q) ** 2).sum(axis=1)
+        expected = [f"c{allowed[j]}" for j in np.argsort(dist)[:5]]
+
+        hits = col.search(q, k=5, where=where)
+
+        self.assertEqual([vid for vid, _m, _d in hits], expected)
+        self.assertAlmostEqual(hits[0][2], float(dist.min()), places=3)
+        self.assertTrue(all(m["doc_type"] == "schedule" for _v, m, _d in hits))
+
+    def test_delete_and_upsert_compact_without_losing_rows(self):
+        col, vecs, _metas = self._collection()
+        with patch.dict(os.environ, {"RAG_MEMMAP_COMPACT_MIN_DEAD": "10"}):
+            col.delete(where={"doc_id": "0"})
+            col.upsert(["c1"], [vecs[2]], [{"user_id": "1", "doc_id": "9"}], ["baru"])
+            self.assertEqual(col.count(), 320)
+            col.delete(ids=[f"c{i}" for i in range(1, 60)])
+
+        state = col._state(col._connect())
+        self.assertEqual((state["dead"], state["next_slot"], state["gen"]), (0, 272, 1))
+        self.assertEqual(col.count(), 272)
+        got = col.get(ids=["c61"], include=["embeddings", "documents", "metadatas"])
+        self.assertEqual(got["documents"], ["chunk 61"])
+        self.assertTrue(np.allclose(got["embeddings"][0], vecs[61]))
+        self.assertEqual(col.search(vecs[61], k=1)[0][0], "c61")
+
+    def test_sync_chunks_runs_against_memmap_vectorstore(self):
+        vs = MemmapVectorStore(self._tmp.name, _FakeEmbedder(), "academic_rag_u1")
+        payloads = [{"text": t, "chunk_kind": "text"} for t in ("a", "b", "c")]
+        first = ingest_mod._sync_chunks(vs, base_meta={"user_id": "1", "doc_id": "7"}, payloads=payloads)
+        second = ingest_mod._sync_chunks(vs, base_meta={"user_id": "1", "doc_id": "7"}, payloads=payloads[:2])
+
+        self.assertEqual((first["embedded"], second["skipped"], second["deleted"]), (3, 2, 1))
+        docs = vs.similarity_search("b", k=2, filter={"user_id": "1"})
+        self.assertEqual(docs[0].page_content, "b")
+        self.assertEqual(docs[0].metadata["doc_id"], "7")
+
+    def test_get_vectorstore_uses_memmap_backend_per_user(self):
+        with patch.dict(os.environ, {"RAG_VECTOR_BACKEND": "memmap", "RAG_COLLECTION_LAYOUT": "single"}), patch.object(
+            cfg, "get_embedding_function", return_value=_FakeEmbedder()
+        ), cfg.override_persist_directory(self._tmp.name):
+            vs = cfg.get_vectorstore(user_id=5)
+        self.assertIsInstance(vs, MemmapVectorStore)
+        self.assertEqual(vs._collection.dir, os.path.join(self._tmp.name, "memmap", "academic_rag_u5"))
@@ -1,6 +1,14 @@
+import json
+import os
+import tempfile
 import unittest
+from concurrent.futures import Future
+from unittest.mock import patch
 
 from core.ai_engine import ingest as ingest_mod
+from core.ai_engine import pdf_extractors, pdf_ocr, pdf_pages
+from core.ai_engine.pdf_pages import chunk_page_numbers
+from core.ai_engine.schedule_table import ScheduleTable, decode_rows
 
 
 class TestParserChunkingProfile(unittest.TestCase):
@@ -70,3 +78,288 @@ class TestParserChunkingProfile(unittest.TestCase):
     def test_ocr_like_row_still_normalized_time(self):
         s = ingest_mod._normalize_time_range("0 5 :7 0-0 0 :7 0")
         self.assertEqual(s, "07:00-07:50")
+
+    def test_merge_pdf_pages_carries_slot_across_pages(self):
+        header = ["Hari", "Sesi", "Jam", "Kode", "Mata Kuliah", "Dosen"]
+        pages_raw = [
+            ([[header, ["Senin", "I", "07.00-07.50", "IF101", "Algoritma", "Dosen A"]]], ""),
+            ([[header, ["", "", "", "IF102", "Struktur Data", "Dosen B"]]], ""),
+        ]
+        _text, columns, rows = ingest_mod._merge_pdf_pages(pages_raw)
+        self.assertTrue(columns)
+        by_kode = {r.get("kode"): r for r in rows}
+        self.assertEqual(by_kode["IF102"]["page"], 2)
+        self.assertEqual(by_kode["IF102"]["hari"], "Senin")
+        self.assertEqual(by_kode["IF102"]["jam"], "07:00-07:50")
+
+    def test_chunk_page_numbers_contiguous_and_complete(self):
+        chunks = chunk_page_numbers(50, 4)
+        flat = [p for chunk in chunks for p in chunk]
+        self.assertEqual(flat, list(range(1, 51)))
+        self.assertLessEqual(len(chunks), 12)
+
+    def test_pdf_page_cache_hit_skips_extraction(self):
+        pages = [([[["Hari", "Jam"], ["Senin", "07:00-07:50"]]], "Jadwal Senin")]
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, "jadwal.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(b"%PDF-1.4 fake")
+            cache_dir = os.path.join(tmp, "cache")
+
+            with patch.object(pdf_pages, "extract_pdf_pages", return_value=pages) as extract_mock:
+                first = pdf_pages.load_pdf_pages(pdf_path, cache_dir=cache_dir)
+                second = pdf_pages.load_pdf_pages(pdf_path, cache_dir=cache_dir)
+                head = pdf_pages.load_pdf_pages(pdf_path, cache_dir=cache_dir, max_pages=1)
+
+            self.assertEqual(extract_mock.call_count, 1)
+            self.assertEqual(first, pages)
+            self.assertEqual(second, pages)
+            self.assertEqual(head, pages)
+
+    def test_pdf_page_cache_ignores_other_extractor_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            digest = "ab" * 32
+            pdf_pages.write_cached_pages(tmp, digest, [([], "teks")])
+            self.assertEqual(pdf_pages.read_cached_pages(tmp, digest), [([], "teks")])
+
+            path = pdf_pages._cache_file(tmp, digest)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"extractor": "lama", "pages": [{"tables": [], "text": "teks"}]}, f)
+            self.assertIsNone(pdf_pages.read_cached_pages(tmp, digest))
+
+    def test_pdf_extractor_probe_selects_camelot_for_ruled_pdf(self):
+        camelot_ext = pdf_extractors.get_extractor("camelot")
+        with patch.dict(os.environ, {"PDF_TABLE_EXTRACTOR": "auto"}), patch.object(
+            type(camelot_ext), "available", return_value=True
+        ):
+            with patch.object(pdf_extractors, "probe_ruled_ops", return_value=2000):
+                self.assertEqual(pdf_extractors.select_extractor("x.pdf")[0].name, "camelot")
+            with patch.object(pdf_extractors, "probe_ruled_ops", return_value=3):
+                self.assertEqual(pdf_extractors.select_extractor("x.pdf")[0].name, "pdfplumber")
+            with patch.object(pdf_extractors, "probe_ruled_ops", side_effect=OSError("rusak")):
+                chosen, reason = pdf_extractors.select_extractor("x.pdf")
+                self.assertEqual((chosen.name, reason), ("pdfplumber", "probe_error"))
+        with patch.dict(os.environ, {"PDF_TABLE_EXTRACTOR": "pdfplumber"}):
+            self.assertEqual(pdf_extractors.select_extractor("x.pdf")[0].name, "pdfplumber")
+            self.assertEqual(pdf_extractors.cache_versions(), [pdf_pages.EXTRACTOR_VERSION])
+
+    def test_camelot_extractor_returns_page_raw_format(self):
+        class _Values:
+            def __init__(self, rows):
+                self._rows = rows
+
+            def tolist(self):
+                return self._rows
+
+        class _Table:
+            def __init__(self, page, rows):
+                self.page = str(page)
+                self.df = type("Df", (), {"values": _Values(rows)})()
+
+        class _Page:
+            def __init__(self, text):
+                self._text = text
+
+            def extract_text(self):
+                return self._text
+
+        class _Pdf:
+            pages = [_Page("Jadwal Senin "), _Page("kosong")]
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        header = ["Hari", "Jam", "Mata Kuliah"]
+        fake_camelot = type("Camelot", (), {})()
+        fake_camelot.read_pdf = lambda *a, **k: [_Table(1, [header, ["Senin", "07.00-07.50", "Algoritma"]])]
+        with patch.object(pdf_extractors, "camelot", fake_camelot), patch.object(
+            pdf_extractors.pdfplumber, "open", return_value=_Pdf()
+        ):
+            pages = pdf_extractors.get_extractor("camelot").extract("jadwal.pdf")
+
+        self.assertEqual(pages, [([[header, ["Senin", "07.00-07.50", "Algoritma"]]], "Jadwal Senin"), ([], "kosong")])
+        _text, _columns, rows = ingest_mod._merge_pdf_pages(pages)
+        self.assertEqual(rows[0]["jam"], "07:00-07:50")
+
+    def test_pdf_extractor_falls_back_to_pdfplumber_without_tables(self):
+        pages = [([[["Hari"], ["Senin"]]], "teks")]
+        camelot_ext = pdf_extractors.get_extractor("camelot")
+        with patch.object(type(camelot_ext), "extract", return_value=[([], "teks")]), patch.object(
+            pdf_pages, "extract_pdf_pages", return_value=pages
+        ):
+            result, used = pdf_extractors.extract_with_fallback(camelot_ext, "jadwal.pdf")
+        self.assertEqual(result, pages)
+        self.assertEqual(used.name, "pdfplumber")
+
+    def test_pdf_page_cache_accepts_versions_of_available_backends(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            digest = "cd" * 32
+            pdf_pages.write_cached_pages(tmp, digest, [([], "teks")], extractor="camelot-x-lattice-r1")
+            self.assertIsNone(pdf_pages.read_cached_pages(tmp, digest))
+            self.assertEqual(pdf_pages.read_cached_pages(tmp, digest, ["camelot-x-lattice-r1"]), [([], "teks")])
+
+    def test_repair_candidates_only_low_confidence_rows_with_course(self):
+        rows = ScheduleTable.from_rows(
+            [
+                {"hari": "Senin", "jam": "07:00-07:50", "mata_kuliah": "Algoritma", "kelas": "A", "ruang": "1.10",
+                 "dosen": "Dosen A", "sks": "3", "semester": "3", "sesi": "I"},
+                {"hari": "", "jam": "", "mata_kuliah": "Struktur Data"},
+                {"hari": "Senin", "jam": "07:00-07:50"},
+            ]
+        )
+        candidates = ingest_mod._repair_candidates(rows, 0.82)
+        self.assertEqual([idx for idx, _row, _issues, _conf in candidates], [1])
+
+    def test_tabular_xlsx_streams_all_sheets_into_row_chunks(self):
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Senin"
+        ws.append(["JADWAL KULIAH SEMESTER 3"])
+        ws.append(["No", "Hari", "Jam", "Kode MK", "Mata Kuliah", "SKS", "Kelas", "Ruang", "Dosen"])
+        ws.append([1, "Senin", "07:00-08:40", "IF101", "Algoritma", 3.0, "A", "R1", "Budi"])
+        ws.append([2, "Senin", "08:40-10:20", "IF102", "Basis Data", 3.0, "B", "R2", "Sari"])
+        ws2 = wb.create_sheet("Rekap")
+        ws2.append(["Kode", "Peserta"])
+        ws2.append(["IF101", 40])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jadwal.xlsx")
+            wb.save(path)
+            text, cols, rows, row_chunks = ingest_mod._parse_tabular(path, "xlsx")
+
+        self.assertIn("JADWAL KULIAH SEMESTER 3", text)
+        self.assertIn("Mata Kuliah", cols)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["mata_kuliah"], "Algoritma")
+        self.assertEqual(rows[0]["sks"], "3")
+        self.assertTrue(row_chunks[0].startswith("CSV_ROW 1: sheet=Senin | hari=Senin | jam=07:00-08:40"))
+        self.assertEqual(row_chunks[-1], "CSV_ROW 3: sheet=Rekap | kode=IF101 | Peserta=40")
+
+        payloads = ingest_mod._build_chunk_payloads(
+            doc_type=ingest_mod._detect_doc_type(cols, rows),
+            text_content=text,
+            row_chunks=row_chunks,
+            schedule_rows=rows,
+        )
+        self.assertEqual({p["chunk_kind"] for p in payloads}, {"row", "parent", "text"})
+
+    def test_tabular_csv_sniffs_dialect_and_encoding_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jadwal.csv")
+            with open(path, "wb") as f:
+                f.write("hari;jam;mata kuliah;dosen\nSenin;07:00-08:40;Café;Zoë\n".encode("latin-1"))
+            with patch.dict(os.environ, {"INGEST_TABULAR_MAX_ROWS": "1"}):
+                with open(path, "ab") as f:
+                    f.write("Selasa;09:00-10:00;Hukum;Ani\n".encode("latin-1"))
+                _text, cols, rows, row_chunks = ingest_mod._parse_tabular(path, "csv")
+
+        self.assertEqual(cols, ["hari", "jam", "mata kuliah", "dosen"])
+        self.assertEqual(row_chunks, ["CSV_ROW 1: hari=Senin | jam=07:00-08:40 | mata_kuliah=Café | dosen=Zoë"])
+        self.assertEqual(len(rows), 1)
+
+    def test_ocr_fallback_covers_all_pages_with_per_page_cache(self):
+        calls = []
+
+        def fake_ocr(path, page_number, dpi, lang, timeout_s):
+            calls.append(page_number)
+            if page_number == 3 and calls.count(3) == 1:
+                return page_number, "", "timeout"
+            return page_number, f"SENIN 07:00-08:40 halaman {page_number}", "ok"
+
+        env = {"PDF_OCR_WORKERS": "1", "PDF_OCR_MAX_PAGES": "4", "PDF_OCR_DPI": "150"}
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, env), patch.object(
+            pdf_ocr, "ocr_page", side_effect=fake_ocr
+        ):
+            pdf_path = os.path.join(tmp, "scan.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(b"%PDF-1.4 scan")
+            first, stats = pdf_ocr.load_ocr_pages(pdf_path, 5, cache_dir=tmp)
+            second, stats2 = pdf_ocr.load_ocr_pages(pdf_path, 5, cache_dir=tmp)
+
+        self.assertEqual(calls, [1, 2, 3, 4, 3])
+        self.assertEqual(len(first), 5)
+        self.assertEqual(first[2], ([], ""))
+        self.assertEqual(first[4], ([], ""))
+        self.assertEqual((stats["ocr"], stats["timeout"], stats["skipped"]), (3, 1, 1))
+        self.assertEqual((stats2["cached"], stats2["ocr"]), (3, 1))
+        self.assertEqual(second[2], ([], "SENIN 07:00-08:40 halaman 3"))
+
+    def test_ocr_pool_error_falls_back_sequential_and_workers_default_opt_in(self):
+        class _CancelledPool:
+            def submit(self, *args):
+                fut = Future()
+                fut.cancel()
+                return fut
+
+        def fake_ocr(path, page_number, dpi, lang, timeout_s):
+            return page_number, f"halaman {page_number}", "ok"
+
+        with patch.dict(os.environ, {"PDF_OCR_WORKERS": "4"}), patch.object(
+            pdf_ocr, "_get_ocr_pool", return_value=_CancelledPool()
+        ) as pool_mock, patch.object(pdf_ocr, "ocr_page", side_effect=fake_ocr):
+            out = pdf_ocr._run_ocr("scan.pdf", [1, 2, 3], pdf_ocr.ocr_settings())
+        pool_mock.assert_called_once_with(4)
+        self.assertEqual([page for page, _text, _status in out], [1, 2, 3])
+
+        with patch.dict(os.environ, {"PDF_OCR_WORKERS": "", "PDF_PARALLEL_WORKERS": "0"}):
+            self.assertEqual(pdf_ocr.ocr_workers(), 1)
+        with patch.dict(os.environ, {"PDF_OCR_WORKERS": "", "PDF_PARALLEL_WORKERS": "3"}):
+            self.assertEqual(pdf_ocr.ocr_workers(), 3)
+
+    def test_ocr_cache_keyed_by_dpi(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_ocr.write_cached_ocr(tmp, "cd" * 32, "tesseract-r1:200:ind", {1: "teks"})
+            self.assertEqual(pdf_ocr.read_cached_ocr(tmp, "cd" * 32, "tesseract-r1:200:ind"), {1: "teks"})
+            self.assertEqual(pdf_ocr.read_cached_ocr(tmp, "cd" * 32, "tesseract-r1:300:ind"), {})
+
+    def test_schedule_table_normalizes_once_and_interns_repeated_values(self):
+        table = ScheduleTable([
+            {"page": "2", "hari": "Senin ", "jam": "07:00-07:50", "mata_kuliah": "Basis\u00a0 Data", "raw": "x"},
+            {"page": 2, "hari": "Senin", "jam": "07:00-07:50", "mata_kuliah": "Algoritma"},
+        ])
+        self.assertEqual(table[0]["mata_kuliah"], "Basis Data")
+        self.assertEqual(table[0]["page"], 2)
+        self.assertIs(table.column("hari")[0], table.column("hari")[1])
+        self.assertNotIn("semester", table[1])
+        self.assertEqual(table[1].get("semester", "-"), "-")
+
+        table[1]["semester"] = 3
+        table[1].update({"_confidence": 0.9})
+        self.assertEqual(table[1].to_dict(), {
+            "page": 2, "hari": "Senin", "jam": "07:00-07:50", "mata_kuliah": "Algoritma",
+            "semester": "3", "_confidence": 0.9,
+        })
+        self.assertEqual(table.extra(0), {"raw": "x"})
+        self.assertIs(ScheduleTable.from_rows(table), table)
+
+    def test_schedule_table_encode_shares_rows_across_limits(self):
+        rows = [{"page": i, "hari": "Selasa", "kode": f"IF{i}", "fallback": "page_text"} for i in range(1, 4)]
+        table = ScheduleTable(rows)
+        short, full = table.encode(2, 10)
+        self.assertEqual(json.loads(short)["v"], 1)
+        self.assertEqual(len(json.loads(short)["rows"]), 2)
+        decoded = decode_rows(full)
+        self.assertEqual(len(decoded), 3)
+        self.assertEqual(decoded[2]["kode"], "IF3")
+        self.assertEqual(decoded[2]["fallback"], "page_text")
+        # format lama (list of dict) tetap terbaca
+        self.assertEqual(decode_rows(json.dumps(rows)), rows)
+
+    def test_schedule_csv_text_skips_rows_without_course(self):
+        rows = [
+            {"hari": "senin", "jam": "07.00-07.50", "mata_kuliah": "Algoritma", "ruang": "1,10", "kelas": "A"},
+            {"hari": "senin", "jam": "08:00-08:50", "fallback": "page_text"},
+        ]
+        csv_text, n_rows, n_cols = ingest_mod._schedule_rows_to_csv_text(rows)
+        self.assertEqual((n_rows, n_cols), (1, 10))
+        self.assertEqual(
+            csv_text.splitlines(),
+            [
+                "NO,HARI,SESI,JAM,Ruang,SMT,MATA_KULIAH,SKS,KLS,DOSEN_PENGAMPU_TEAM_TEACHING",
+                "1,SENIN,,07:00-07:50,1.10,,Algoritma,,A,",
+            ],
+        )
@@ -1,11 +1,14 @@
 import json
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 
-from core.models import AcademicDocument, PlannerHistory, ChatHistory
+from core.models import AcademicDocument, PlannerHistory, ChatHistory, ChatSession
+from core import service
 from core.academic import planner as planner_engine
 
 
@@ -286,7 +289,8 @@ class PlannerApiTests(TestCase):
         labels = [str(o.get("label")) for o in body.get("options", [])]
         self.assertIn("Software Engineer", labels)
 
-    @patch("core.academic.profile_extractor.pdfplumber.open")
+    @patch.dict("os.environ", {"PDF_PAGE_CACHE": "0"})
+    @patch("core.ai_engine.pdf_pages.pdfplumber.open")
     @patch("core.academic.profile_extractor.get_vectorstore")
     def test_planner_flow_dynamic_question_for_campus_pdf_format_indonesia(self, vs_mock, pdf_open_mock):
         vs_mock.return_value.similarity_search.return_value = []
@@ -336,7 +340,8 @@ class PlannerApiTests(TestCase):
         self.assertIn("hari", fields)
         self.assertIn("jam", fields)
 
-    @patch("core.academic.profile_extractor.pdfplumber.open")
+    @patch.dict("os.environ", {"PDF_PAGE_CACHE": "0"})
+    @patch("core.ai_engine.pdf_pages.pdfplumber.open")
     @patch("core.academic.profile_extractor.get_vectorstore")
     def test_planner_flow_dynamic_question_for_campus_pdf_format_english_headers(self, vs_mock, pdf_open_mock):
         vs_mock.return_value.similarity_search.return_value = []
@@ -569,6 +574,57 @@ class PlannerApiTests(TestCase):
         res = self.client.get(f"/api/sessions/{session_id}/timeline/")
         self.assertEqual(res.status_code, 404)
 
+    def test_session_timeline_keyset_pages_match_full_merged_order(self):
+        session = ChatSession.objects.create(user=self.user, title="Timeline")
+        base = timezone.now() - timedelta(hours=1)
+        # (detik, jenis): detik sama = uji tie-break chat vs planner & dua chat sekaligus
+        plan = [(0, "chat"), (1, "planner"), (2, "chat"), (2, "planner"), (2, "chat"), (3, "planner"), (4, "chat")]
+        for i, (sec, kind) in enumerate(plan):
+            if kind == "chat":
+                row = ChatHistory.objects.create(user=self.user, session=session, question=f"q{i}", answer=f"a{i}")
+                ChatHistory.objects.filter(id=row.id).update(timestamp=base + timedelta(seconds=sec))
+            else:
+                row = PlannerHistory.objects.create(
+                    user=self.user,
+                    session=session,
+                    event_type=PlannerHistory.EVENT_GENERATE,
+                    text=f"p{i}",
+                    payload={"planner_warning": "cek", "profile_hints": {"confidence_summary": "low"}, "big": "x" * 1000},
+                )
+                PlannerHistory.objects.filter(id=row.id).update(created_at=base + timedelta(seconds=sec))
+
+        # default tanpa parameter: bentuk & urutan lama (detik sama: pertanyaan, jawaban, lalu planner)
+        full = json.loads(self.client.get(f"/api/sessions/{session.id}/timeline/").content)
+        texts = [x["text"] for x in full["timeline"]]
+        self.assertEqual(texts, ["q0", "a0", "p1", "q2", "q4", "a2", "a4", "p3", "p5", "q6", "a6"])
+        self.assertEqual(full["pagination"], {"page": 1, "page_size": 100, "total": 11, "has_next": False})
+        self.assertNotIn("next_cursor", full)
+        self.assertEqual(full["timeline"][2]["meta"]["warning"], "cek")
+        self.assertEqual(full["timeline"][2]["meta"]["confidence_summary"], "low")
+
+        collected, cursor, pages = [], None, 0
+        while True:
+            url = f"/api/sessions/{session.id}/timeline/?page_size=3&cursor={cursor or ''}"
+            body = json.loads(self.client.get(url).content)
+            collected = body["timeline"] + collected
+            pages += 1
+            cursor = body["next_cursor"]
+            self.assertEqual(body["has_more"], cursor is not None)
+            if not cursor:
+                break
+        self.assertEqual(collected, full["timeline"])
+        self.assertEqual(pages, 4)
+
+        # session + satu query berbatas per stream (pertanyaan, jawaban, planner)
+        with self.assertNumQueries(4):
+            service.get_session_timeline(self.user, session.id, page_size=3, cursor="")
+        legacy_page2 = service.get_session_timeline(self.user, session.id, page=2, page_size=4)
+        self.assertEqual([x["text"] for x in legacy_page2["timeline"]], texts[4:8])
+        self.assertTrue(legacy_page2["pagination"]["has_next"])
+
+        bad = self.client.get(f"/api/sessions/{session.id}/timeline/?cursor=rusak")
+        self.assertEqual(bad.status_code, 400)
+
     def test_existing_session_detail_history_endpoint_backward_compatible(self):
         resp_chat = self.client.post(
             "/api/chat/",
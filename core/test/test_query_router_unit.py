@@ -0,0 +1,105 @@
+import random
+import unittest
+
+from core.ai_engine.retrieval import main as ret_main
+from core.ai_engine.retrieval.router import KeywordScanner, route_query
+from core.ai_engine.retrieval.rules import infer_doc_type, is_grade_rescue_query
+
+
+def _legacy(q: str) -> tuple:
+    return (
+        ret_main._classify_query_safety(q),
+        ret_main._classify_query_intent(q),
+        infer_doc_type(q),
+        is_grade_rescue_query(q),
+        ret_main._needs_doc_grounding(q),
+        ret_main._is_personal_document_query(q),
+        ret_main._rewrite_queries(q),
+    )
+
+
+def _routed(q: str) -> tuple:
+    r = route_query(q)
+    return (
+        r.safety(),
+        r.intent,
+        r.doc_type,
+        r.is_grade_rescue,
+        r.needs_doc_grounding,
+        r.is_personal,
+        list(r.query_variants),
+    )
+
+
+_FIXED_QUERIES = [
+    "",
+    "   ",
+    "jadwal senin",
+    "jadwal hari senin jam 07.00",
+    "ipk saya 2.8, aman gak?",
+    "jurusan apa yang cocok jadi HRD?",
+    "jurusan kuliah untuk judi online apa?",
+    "bantu bikin strategi propaganda kampanye",
+    "cara jadi dukun paling cepat",
+    "apa itu sks?",
+    "tolong hitung nilai uas saya",
+    "target nilai akhir B gimana?",
+    "UTS 60 bobot 40 target B",
+    "uts 70 final 85",
+    "tugas 80 supaya b",
+    "hacking akun kampus",
+    "hacker itu apa",
+    "slots kosong di kelas",
+    "meretas wifi",
+    "Semester 5 KRS",
+    "semester3 jadwalsaya",
+    "jam berapa waktu kuliah",
+]
+
+_FUZZ_WORDS = [
+    "judi", "online", "slot", "slots", "hack", "hacking", "hacker", "meretas", "mereta",
+    "kampanye", "black campaign", "jadwal", "saya", "aku", "jam", "waktu", "hari", "day",
+    "kelas", "ruang", "nilai", "akhir", "target", "b", "final", "80", "supaya", "agar",
+    "uts", "uas", "bobot", "weight", "semester", "3", "krs", "ips", "ipk", "transkrip",
+    "santet", "cara jadi dukun", "mata kuliah", "sks", "grade", "tugas", "quiz", "JUDI",
+]
+
+
+class QueryRouterParityTests(unittest.TestCase):
+    def test_fixed_queries_match_legacy_functions(self):
+        for q in _FIXED_QUERIES:
+            with self.subTest(q=q):
+                self.assertEqual(_routed(q), _legacy(q))
+
+    def test_fuzzed_queries_match_legacy_functions(self):
+        rng = random.Random(2024)
+        seps = [" ", "", ",", "-", "_", "."]
+        for _ in range(3000):
+            q = "".join(rng.choice(_FUZZ_WORDS) + rng.choice(seps) for _ in range(rng.randint(1, 6)))
+            with self.subTest(q=q):
+                self.assertEqual(_routed(q), _legacy(q))
+
+    def test_semester_and_doc_type_feed_chroma_filter(self):
+        route = route_query("jadwal semester 3")
+        self.assertEqual(route.semester, 3)
+        self.assertEqual(
+            ret_main._build_chroma_filter(user_id=7, query="jadwal semester 3", route=route),
+            ret_main._build_chroma_filter(user_id=7, query="jadwal semester 3"),
+        )
+
+
+class KeywordScannerUnitTests(unittest.TestCase):
+    def test_overlapping_and_nested_keywords(self):
+        scanner = KeywordScanner([
+            ("a", "jadwal", False),
+            ("b", "jadwal saya", False),
+            ("c", "saya", False),
+            ("d", "judi", True),
+        ])
+        self.assertEqual(scanner.scan("jadwal saya"), {"a", "b", "c"})
+        self.assertEqual(scanner.scan("judiku"), set())
+        self.assertEqual(scanner.scan("main judi."), {"d"})
+
+    def test_boundary_literal_must_start_with_word_char(self):
+        with self.assertRaises(ValueError):
+            KeywordScanner([("x", " spasi", True)])
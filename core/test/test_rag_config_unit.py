@@ -24,3 +24,44 @@ class RagConfigUnitTests(SimpleTestCase):
             emb = cfg.get_embedding_function()
         self.assertEqual(emb, "legacy-embedder")
         self.assertEqual(build_mock.call_count, 2)
+
+    def test_collection_name_routes_by_layout(self):
+        with patch.dict("os.environ", {"RAG_COLLECTION_LAYOUT": "single"}, clear=False):
+            self.assertEqual(cfg.collection_name_for_user(7), "academic_rag")
+        with patch.dict("os.environ", {"RAG_COLLECTION_LAYOUT": "user"}, clear=False):
+            self.assertEqual(cfg.collection_name_for_user("7"), "academic_rag_u7")
+            self.assertEqual(cfg.collection_name_for_user(None), "academic_rag")
+        with patch.dict("os.environ", {"RAG_COLLECTION_LAYOUT": "shard", "RAG_COLLECTION_SHARDS": "4"}, clear=False):
+            self.assertEqual(cfg.collection_name_for_user(7), "academic_rag_s003")
+            self.assertEqual(cfg.collection_name_for_user("legacy-user"), cfg.collection_name_for_user("legacy-user"))
+        with patch.dict("os.environ", {"RAG_COLLECTION_LAYOUT": "bogus"}, clear=False):
+            self.assertEqual(cfg.get_collection_layout(), "single")
+
+    def test_migrate_vector_layout_moves_vectors_without_reembedding(self):
+        import tempfile
+
+        from core.ai_engine import vector_ops
+
+        with tempfile.TemporaryDirectory() as tmp, cfg.override_persist_directory(tmp):
+            client = cfg.get_chroma_client()
+            base = client.get_or_create_collection(cfg.BASE_COLLECTION_NAME)
+            base.add(
+                ids=["a1", "a2", "b1", "x1"],
+                embeddings=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.5, 0.5]],
+                documents=["A1", "A2", "B1", "tanpa user"],
+                metadatas=[{"user_id": "1"}, {"user_id": "1"}, {"user_id": "2"}, {"source": "lama"}],
+            )
+
+            stats = vector_ops.migrate_vector_layout("user", batch_size=2, delete_source=True)
+
+            self.assertEqual((stats["moved"], stats["kept"], stats["deleted"]), (3, 1, 3))
+            self.assertEqual(stats["targets"], ["academic_rag_u1", "academic_rag_u2"])
+            self.assertEqual(base.get()["ids"], ["x1"])
+            moved = client.get_collection("academic_rag_u1").get(include=["embeddings", "documents"])
+            self.assertEqual(sorted(moved["ids"]), ["a1", "a2"])
+            self.assertEqual(sorted(moved["documents"]), ["A1", "A2"])
+
+            back = vector_ops.migrate_vector_layout("single", delete_source=True)
+            self.assertEqual(back["moved"], 3)
+            self.assertEqual(vector_ops.list_rag_collections(client), [cfg.BASE_COLLECTION_NAME])
+            self.assertEqual(base.count(), 4)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.ai_engine import evaluation
+from core.ai_engine import ingest as ingest_mod
+from core.ai_engine.evaluation import (
+    EvalQuery,
+    first_relevant_rank,
+    is_relevant,
+    mean_reciprocal_rank,
+    recall_at_k,
+    stage_percentiles,
+)
+from core.ai_engine.retrieval.main import RetrievalResult
+from core.ai_engine.tracing import span
+
+
+def _doc(text, source="Jadwal.pdf"):
+    return SimpleNamespace(page_content=text, metadata={"source": source})
+
+
+class RagEvalMetricTests(SimpleTestCase):
+    def test_relevance_is_case_and_whitespace_insensitive_and_checks_source(self):
+        label = EvalQuery(qid="q1", query="jadwal", contains=("hukum pemilu",), source="jadwal")
+        self.assertTrue(is_relevant(_doc("mata_kuliah=Hukum   Pemilu | ruang=2.04"), label))
+        self.assertFalse(is_relevant(_doc("mata_kuliah=Hukum Pemilu", source="Transkrip.csv"), label))
+        self.assertFalse(is_relevant(_doc("mata_kuliah=Hukum Pajak"), label))
+
+    def test_rank_recall_and_mrr(self):
+        label = EvalQuery(qid="q1", query="x", contains=("delik korupsi",))
+        docs = [_doc("Hukum Pajak"), _doc("Delik Korupsi kelas A")]
+        self.assertEqual(first_relevant_rank(docs, label), 2)
+        ranks = [1, 2, 0, 5]
+        self.assertEqual(recall_at_k(ranks, 1), 0.25)
+        self.assertEqual(recall_at_k(ranks, 3), 0.5)
+        self.assertEqual(recall_at_k(ranks, 5), 0.75)
+        self.assertEqual(mean_reciprocal_rank(ranks), round((1 + 0.5 + 0 + 0.2) / 4, 4))
+        self.assertEqual(recall_at_k([], 5), 0.0)
+
+    def test_stage_percentiles(self):
+        rows = [{"retrieval": float(i)} for i in range(1, 101)]
+        out = stage_percentiles(rows)
+        self.assertEqual(out["retrieval"], {"p50": 51.0, "p95": 96.0, "p99": 100.0})
+
+    def test_evaluate_query_uses_retrieval_without_llm(self):
+        label = EvalQuery(qid="q1", query="jadwal Hukum Pemilu", contains=("hukum pemilu",))
+        ranked = [_doc("Hukum Pajak"), _doc("Hukum Pemilu ruang 2.04")]
+        result = RetrievalResult(docs=ranked[:1], ranked_docs=ranked, top_score=0.5)
+        with patch.object(evaluation, "retrieve_context", return_value=result) as mocked:
+            out = evaluation.evaluate_query(label, mode="doc_background")
+        self.assertEqual(mocked.call_args.kwargs["mode"], "doc_background")
+        self.assertEqual(out.rank, 2)
+        self.assertFalse(out.context_hit)
+        self.assertIn("routing", out.stages)
+
+    def test_ingest_corpus_reports_process_document_stage_timings(self):
+        def fake_process(doc, meter, report):
+            with span("pdf_tables"), meter.stage("parse"):
+                pass
+            return True
+
+        doc = SimpleNamespace(id=2, title="Transkrip.csv")
+        with patch.object(ingest_mod, "_process_document", side_effect=fake_process):
+            out = evaluation.ingest_corpus([doc])
+        self.assertTrue(out[0]["ok"])
+        self.assertIn("pdf_tables", out[0]["stages"])
+        self.assertIn("parse", out[0]["stages"])
+        self.assertIn("total", out[0]["stages"])
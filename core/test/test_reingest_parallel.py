@@ -0,0 +1,96 @@
+import io
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from core.models import AcademicDocument, IngestionJob
+from core.reingest_parallel import ReingestCheckpoint, run_parallel_reingest
+
+
+def _fake_prepare(doc):
+    if doc.title.startswith("rusak"):
+        return None, {"error": "ValueError('pdf rusak')", "stage_timings": {"parse": 1.0}, "prepare_ms": 1.0}
+    return object(), {"chunks": 3, "stage_timings": {"parse": 1.0, "chunk": 0.5}, "prepare_ms": 1.5}
+
+
+def _fake_store(doc, prepared, report, record_metric=True):
+    return prepared is not None
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+@patch("core.service.store_prepared_document", side_effect=_fake_store)
+@patch("core.ai_engine.ingest.prepare_document", side_effect=_fake_prepare)
+class ParallelReingestTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice_re", password="pass123")
+        self.bob = User.objects.create_user(username="bob_re", password="pass123")
+        self.docs = [
+            AcademicDocument.objects.create(user=self.alice, file=SimpleUploadedFile("a1.txt", b"isi")),
+            AcademicDocument.objects.create(user=self.bob, file=SimpleUploadedFile("rusak.txt", b"isi")),
+            AcademicDocument.objects.create(user=self.bob, file=SimpleUploadedFile("b2.txt", b"isi")),
+        ]
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "ckpt.json")
+
+    def test_inline_run_records_jobs_and_checkpoint(self, mock_prepare, mock_store):
+        ckpt = ReingestCheckpoint(self.path, {"scope": "all"})
+        seen = []
+        progress = run_parallel_reingest(
+            [d.id for d in self.docs],
+            workers=1,
+            worker_id="test:cli",
+            checkpoint=ckpt,
+            on_result=lambda doc_id, ok, stats, p: seen.append((doc_id, ok, p.done)),
+        )
+
+        self.assertEqual((progress.total, progress.ok, progress.failed, progress.chunks), (3, 2, 1, 6))
+        self.assertEqual([x[2] for x in seen], [1, 2, 3])
+        self.assertIsNotNone(progress.eta_seconds)
+
+        jobs = {j.document_id: j for j in IngestionJob.objects.filter(kind=IngestionJob.KIND_REINGEST)}
+        self.assertEqual(jobs[self.docs[0].id].status, IngestionJob.STATUS_SUCCEEDED)
+        self.assertEqual(jobs[self.docs[0].id].chunk_stats["chunks"], 3)
+        self.assertIn("parse", jobs[self.docs[0].id].stage_timings)
+        self.assertEqual(jobs[self.docs[1].id].status, IngestionJob.STATUS_FAILED)
+        self.assertIn("pdf rusak", jobs[self.docs[1].id].error)
+        self.docs[0].refresh_from_db()
+        self.assertTrue(self.docs[0].is_embedded)
+
+        saved = ReingestCheckpoint(self.path, {"scope": "all"})
+        self.assertTrue(saved.load())
+        self.assertEqual(saved.done, {self.docs[0].id, self.docs[2].id})
+        self.assertEqual(saved.failed, {self.docs[1].id})
+        self.assertFalse(ReingestCheckpoint(self.path, {"scope": "user:1"}).load())
+
+    def test_resume_skips_documents_done_in_checkpoint(self, mock_prepare, mock_store):
+        ckpt = ReingestCheckpoint(self.path, {"scope": "all"})
+        ckpt.mark(self.docs[0].id, True)
+        ckpt.mark(self.docs[1].id, False)
+
+        resumed = ReingestCheckpoint(self.path, {"scope": "all"})
+        self.assertTrue(resumed.load())
+        progress = run_parallel_reingest([d.id for d in self.docs], workers=1, worker_id="test:cli", checkpoint=resumed)
+
+        # dokumen gagal dicoba lagi, yang sudah done dilewati
+        self.assertEqual(progress.total, 2)
+        self.assertEqual([c.args[0].id for c in mock_prepare.call_args_list], [self.docs[1].id, self.docs[2].id])
+
+    def test_command_all_users_prints_eta_and_clears_checkpoint_when_clean(self, mock_prepare, mock_store):
+        AcademicDocument.objects.filter(id=self.docs[1].id).delete()
+        out = io.StringIO()
+        call_command("reingest_docs", "--all-users", "--checkpoint", self.path, stdout=out)
+
+        text = out.getvalue()
+        self.assertIn("[2/2] ✅", text)
+        self.assertIn("ETA", text)
+        self.assertIn("chunk/s", text)
+        self.assertFalse(os.path.exists(self.path))
+
+        with self.assertRaises(CommandError):
+            call_command("reingest_docs", "--all-users", "--user", str(self.alice.id), stdout=io.StringIO())
@@ -16,10 +16,12 @@ from core.models import (
     UserLoginPresence,
     RagRequestMetric,
     SystemHealthSnapshot,
+    VectorTombstone,
 )
 from core.ai_engine.ingest import process_document
 from core import views
-from core.ai_engine.retrieval.main import ask_bot
+from core.ai_engine.retrieval.main import _retrieval_settings, ask_bot, retrieve_context
+from core.ai_engine.retrieval.router import route_query
 from core.ai_engine.retrieval.prompt import LLM_FIRST_TEMPLATE
 from django.core.exceptions import RequestDataTooBig
 
@@ -134,9 +136,9 @@ class SecurityAndApiTests(TestCase):
         body = json.loads(resp.content.decode())
         self.assertIn("msg", body)
 
-    @patch("core.service.delete_vectors_for_doc_strict", return_value=(True, 0))
-    def test_delete_document_calls_vector_delete(self, mock_del):
-        self._announce("Delete doc triggers vector delete")
+    @patch("core.service.delete_vectors_for_doc", return_value=1)
+    def test_delete_document_writes_vector_tombstone(self, mock_del):
+        self._announce("Delete doc writes vector tombstone")
         self.client.force_login(self.user_a)
         doc = AcademicDocument.objects.create(
             user=self.user_a,
@@ -144,7 +146,68 @@ class SecurityAndApiTests(TestCase):
         )
         resp = self.client.delete(f"/api/documents/{doc.id}/")
         self.assertEqual(resp.status_code, 200)
-        mock_del.assert_called_once()
+        tomb = VectorTombstone.objects.get(user=self.user_a)
+        self.assertEqual((tomb.doc_id, tomb.purged_at), (doc.id, None))
+        self.assertFalse(AcademicDocument.objects.filter(id=doc.id).exists())
+        mock_del.assert_not_called()
+
+    def test_retrieval_excludes_tombstoned_document(self):
+        self._announce("Retrieval filters out chunks of tombstoned document")
+        self.client.force_login(self.user_a)
+        doc = AcademicDocument.objects.create(user=self.user_a, file=SimpleUploadedFile("krs.txt", b"hello"))
+        self.assertEqual(self.client.delete(f"/api/documents/{doc.id}/").status_code, 200)
+        fake_vs = _FakeVectorStore()
+
+        route = route_query("jadwal semester 1")
+        retrieve_context(
+            user_id=self.user_a.id,
+            query=route.query,
+            mode="doc_background",
+            route=route,
+            settings=_retrieval_settings("doc_background"),
+            vectorstore=fake_vs,
+        )
+
+        # dense + fallback: keduanya wajib mengecualikan doc_id yang ber-tombstone
+        self.assertEqual(len(fake_vs.filters), 2)
+        for where in fake_vs.filters:
+            self.assertIn({"user_id": str(self.user_a.id)}, where["$and"])
+            self.assertIn({"doc_id": {"$nin": [str(doc.id)]}}, where["$and"])
+
+    @patch.dict(os.environ, {"CHAT_HISTORY_PAGE_SIZE": "2"})
+    def test_dashboard_sends_latest_history_page_and_defers_panels(self):
+        self._announce("Dashboard history keyset + deferred panels")
+        self.client.force_login(self.user_a)
+        session = ChatSession.objects.create(user=self.user_a, title="Panjang")
+        for i in range(5):
+            ChatHistory.objects.create(user=self.user_a, session=session, question=f"q{i}", answer=f"a{i}")
+
+        resp = self.client.get("/", HTTP_X_INERTIA="true", HTTP_X_INERTIA_VERSION="1.0")
+        self.assertEqual(resp.status_code, 200)
+        page = resp.json()
+        props = page["props"]
+        self.assertEqual([h["question"] for h in props["initialHistory"]], ["q3", "q4"])
+        self.assertNotIn("documents", props)
+        self.assertNotIn("sessions", props)
+        self.assertEqual(page["deferredProps"], {"documents": ["documents", "storage"], "sessions": ["sessions", "sessionsHasNext"]})
+
+        resp = self.client.get(f"/api/sessions/{session.id}/", {"before": props["historyCursor"]})
+        body = resp.json()
+        self.assertEqual([h["question"] for h in body["history"]], ["q1", "q2"])
+        self.assertTrue(body["has_more"])
+        resp = self.client.get(f"/api/sessions/{session.id}/", {"before": body["next_cursor"]})
+        self.assertEqual(([h["question"] for h in resp.json()["history"]], resp.json()["next_cursor"]), (["q0"], None))
+        resp = self.client.get(f"/api/sessions/{session.id}/", {"before": "bukan-cursor"})
+        self.assertEqual(resp.status_code, 400)
+
+        resp = self.client.get(
+            "/",
+            HTTP_X_INERTIA="true",
+            HTTP_X_INERTIA_VERSION="1.0",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Chat/Index",
+            HTTP_X_INERTIA_PARTIAL_DATA="documents,storage",
+        )
+        self.assertEqual(sorted(resp.json()["props"]), ["documents", "storage"])
 
     def test_session_crud_and_isolation(self):
         self._announce("Session CRUD + isolation")
@@ -268,8 +331,8 @@ class SecurityAndApiTests(TestCase):
 
     @patch("core.service.process_document", return_value=True)
     @patch("core.service.delete_vectors_for_doc", return_value=1)
-    def test_reingest_deletes_and_reingests(self, mock_del, _):
-        self._announce("Reingest deletes old embeddings and re-ingests")
+    def test_reingest_is_incremental_without_bulk_delete(self, mock_del, mock_process):
+        self._announce("Reingest re-runs ingest and diffs chunks instead of deleting all embeddings")
         self.client.force_login(self.user_a)
         doc = AcademicDocument.objects.create(
             user=self.user_a,
@@ -277,7 +340,9 @@ class SecurityAndApiTests(TestCase):
         )
         resp = self.client.post("/api/reingest/", data=json.dumps({"doc_ids": [doc.id]}), content_type="application/json")
         self.assertEqual(resp.status_code, 200)
-        mock_del.assert_called()
+        mock_process.assert_called_once()
+        mock_del.assert_not_called()
+        self.assertIn("chunk_stats", resp.json())
 
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     @patch("core.ai_engine.ingest.get_vectorstore")
@@ -429,7 +494,7 @@ class SecurityAndApiTests(TestCase):
             self.assertTrue(any(isinstance(x, dict) and x.get("user_id") == "99" for x in and_list))
 
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
-    @patch("core.ai_engine.ingest.pdfplumber.open", side_effect=Exception("bad pdf"))
+    @patch("core.ai_engine.pdf_pages.pdfplumber.open", side_effect=Exception("bad pdf"))
     def test_mime_mismatch_pdf_rejected(self, _):
         self._announce("MIME mismatch: .pdf with invalid content rejected")
         self.client.force_login(self.user_a)
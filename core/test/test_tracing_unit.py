@@ -0,0 +1,59 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.ai_engine.retrieval.hybrid import retrieve_dense
+from core.ai_engine.tracing import current_trace, span, stage_breakdown, start_trace
+from core.monitoring import summarize_stage_timings
+
+
+class TracingUnitTests(SimpleTestCase):
+    def test_span_without_trace_is_noop(self):
+        with span("retrieval") as s:
+            self.assertIsNotNone(s)
+        self.assertIsNone(current_trace())
+        self.assertEqual(stage_breakdown(), {})
+
+    def test_nested_spans_use_dotted_path_and_accumulate(self):
+        with start_trace("rag") as trace:
+            with span("retrieval"):
+                with span("dense"):
+                    pass
+                with span("dense"):
+                    pass
+            stages = stage_breakdown()
+        self.assertIsNone(current_trace())
+        self.assertIn("retrieval", stages)
+        self.assertIn("retrieval.dense", stages)
+        self.assertIn("total", stages)
+        self.assertEqual(trace.counts["retrieval.dense"], 2)
+
+    @patch.dict(os.environ, {"RAG_TRACE_ENABLED": "0"})
+    def test_trace_disabled_yields_none(self):
+        with start_trace("rag") as trace:
+            with span("safety"):
+                pass
+            self.assertIsNone(trace)
+            self.assertEqual(stage_breakdown(), {})
+
+    def test_retrieve_dense_splits_embedding_and_chroma_query(self):
+        doc = SimpleNamespace(page_content="jadwal", metadata={})
+        vs = SimpleNamespace(
+            embeddings=SimpleNamespace(embed_query=lambda q: [0.1, 0.2]),
+            similarity_search_by_vector_with_relevance_scores=lambda vec, k, filter: [(doc, 0.3)],
+        )
+        with start_trace("rag"):
+            with span("dense"):
+                out = retrieve_dense(vs, "jadwal senin", k=3, filter_where={"user_id": "1"})
+            stages = stage_breakdown()
+        self.assertEqual(out, [(doc, 0.3)])
+        self.assertIn("dense.embed_query", stages)
+        self.assertIn("dense.chroma_query", stages)
+
+    def test_summarize_stage_timings_p95(self):
+        rows = [{"retrieval": float(i), "total": float(i * 2)} for i in range(1, 21)]
+        out = summarize_stage_timings(rows)
+        self.assertEqual(out["retrieval"], 20.0)
+        self.assertEqual(out["total"], 40.0)
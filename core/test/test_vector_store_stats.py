@@ -0,0 +1,55 @@
+import io
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.ai_engine import config as cfg
+from core.ai_engine.vector_ops import delete_orphan_vectors, scan_vector_store
+from core.models import AcademicDocument
+
+
+class VectorStoreStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="stats_user", password="pass123")
+        self.doc = AcademicDocument.objects.create(user=self.user, file=SimpleUploadedFile("krs.txt", b"isi"), is_embedded=True)
+        self.empty = AcademicDocument.objects.create(user=self.user, file=SimpleUploadedFile("kosong.txt", b"isi"), is_embedded=True)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = cfg.override_persist_directory(tmp.name)
+        override.__enter__()
+        self.addCleanup(override.__exit__, None, None, None)
+        uid = str(self.user.id)
+        self.col = cfg.get_chroma_client().get_or_create_collection(cfg.collection_name_for_user(self.user.id))
+        self.col.add(
+            ids=[f"c{i}" for i in range(7)],
+            embeddings=[[float(i), 1.0, 0.5, 0.0] for i in range(7)],
+            metadatas=[{"user_id": uid, "doc_id": str(self.doc.id if i < 4 else 999)} for i in range(7)],
+            documents=[f"chunk {i}" for i in range(7)],
+        )
+
+    def test_command_reports_orphans_and_missing_then_gc(self):
+        out = io.StringIO()
+        call_command("vector_store_stats", "--page-size", "3", stdout=out)
+        text = out.getvalue()
+        self.assertIn(f"user_id={self.user.id}: 7 vector", text)
+        self.assertIn(f"doc_id={self.doc.id} krs.txt: 4 vector", text)
+        self.assertIn(f"is_embedded tanpa vector: user_id={self.user.id} doc_id={self.empty.id}", text)
+        self.assertIn("Orphan: 3 vector", text)
+        self.assertEqual(self.col.count(), 7)
+
+        out = io.StringIO()
+        call_command("vector_store_stats", "--gc", "--batch-size", "2", "--compact", stdout=out)
+        self.assertIn("3 vector orphan dihapus", out.getvalue())
+        self.assertIn("Compact:", out.getvalue())
+        self.assertEqual(sorted(self.col.get(include=[])["ids"]), ["c0", "c1", "c2", "c3"])
+
+    def test_gc_rechecks_orphans_ingested_during_scan(self):
+        stats = scan_vector_store(page_size=3)
+        self.assertEqual(stats["orphan_vectors"], 3)
+        # dokumen doc_id=999 baru di-ingest setelah snapshot scan: jangan ikut dihapus
+        AcademicDocument.objects.create(id=999, user=self.user, file=SimpleUploadedFile("baru.txt", b"isi"))
+        self.assertEqual(delete_orphan_vectors(stats["orphans"], batch_size=2), 0)
+        self.assertEqual(self.col.count(), 7)
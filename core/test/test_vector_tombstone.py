@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+
+from core import service
+from core.ai_engine import config as cfg
+from core.ai_engine.vector_ops import (
+    compact_vector_store,
+    compact_vector_tombstones,
+    exclude_tombstoned,
+    prune_vector_tombstones,
+    scan_vector_store,
+)
+from core.models import AcademicDocument, VectorTombstone
+
+
+class _FakeEmbedder:
+    def embed_documents(self, texts):
+        return [[1.0, 0.0, 0.0] for _t in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+class VectorTombstoneTests(TestCase):
+    def setUp(self):
+        env = patch.dict(os.environ, {"RAG_VECTOR_BACKEND": "memmap"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.user = User.objects.create_user(username="tomb_user", password="pass123")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = cfg.override_persist_directory(tmp.name)
+        override.__enter__()
+        self.addCleanup(override.__exit__, None, None, None)
+        embedder = patch.object(cfg, "get_embedding_function", return_value=_FakeEmbedder())
+        embedder.start()
+        self.addCleanup(embedder.stop)
+        self.col = cfg.get_vectorstore(user_id=self.user.id)._collection
+        uid = str(self.user.id)
+        self.col.upsert(
+            [f"c{i}" for i in range(6)],
+            [[float(i), 1.0, 0.5] for i in range(6)],
+            [{"user_id": uid, "doc_id": str(i % 3)} for i in range(6)],
+            [f"chunk {i}" for i in range(6)],
+        )
+
+    def test_tombstone_is_filtered_then_compacted(self):
+        VectorTombstone.objects.create(user=self.user, doc_id=1, source="a.pdf")
+        where = exclude_tombstoned({"user_id": str(self.user.id)}, self.user.id)
+        visible = self.col.get(where=where, include=["metadatas"])["metadatas"]
+        self.assertEqual(sorted({m["doc_id"] for m in visible}), ["0", "2"])
+        self.assertEqual(self.col.count(), 6)
+
+        stats = compact_vector_tombstones()
+
+        self.assertEqual((stats["purged"], stats["failed"]), (1, 0))
+        self.assertEqual(self.col.count(), 4)
+        tomb = VectorTombstone.objects.get(user=self.user)
+        self.assertIsNotNone(tomb.purged_at)
+        self.assertEqual(tomb.attempts, 1)
+        self.assertEqual(exclude_tombstoned({"user_id": str(self.user.id)}, self.user.id), {"user_id": str(self.user.id)})
+
+    def test_failed_compaction_keeps_tombstone_pending(self):
+        VectorTombstone.objects.create(user=self.user, doc_id=2)
+        with patch("core.ai_engine.vector_ops._count_ids", return_value=2):
+            stats = compact_vector_tombstones()
+        tomb = VectorTombstone.objects.get(user=self.user)
+        self.assertEqual((stats["failed"], tomb.remaining, tomb.purged_at), (1, 2, None))
+        self.assertEqual(compact_vector_tombstones(max_attempts=1)["tombstones"], 0)
+
+    @patch.dict(os.environ, {"VECTOR_TOMBSTONE_RETENTION_HOURS": "0"})
+    def test_deleted_document_hidden_from_search_then_purged_and_tombstone_cleared(self):
+        uid = str(self.user.id)
+        # id eksplisit: jangan bentrok dengan doc_id 0..2 milik chunk di setUp
+        doc = AcademicDocument.objects.create(
+            id=50, user=self.user, file=SimpleUploadedFile("krs.txt", b"isi"), title="krs.txt"
+        )
+        self.col.upsert(
+            ["d0", "d1"],
+            [[9.0, 1.0, 0.5], [9.5, 1.0, 0.5]],
+            [{"user_id": uid, "doc_id": str(doc.id)}] * 2,
+            ["krs 0", "krs 1"],
+        )
+        self.assertEqual(self.col.search([9.2, 1.0, 0.5], k=2)[0][0], "d0")
+
+        self.assertTrue(service.delete_document_for_user(self.user, doc.id))
+
+        # vector masih ada fisiknya, tapi filter retrieval tidak lagi mengembalikannya
+        self.assertEqual(self.col.count(), 8)
+        hits = self.col.search([9.2, 1.0, 0.5], k=8, where=exclude_tombstoned({"user_id": uid}, self.user.id))
+        self.assertEqual(len(hits), 6)
+        self.assertFalse({"d0", "d1"} & {vid for vid, _m, _d in hits})
+
+        stats = compact_vector_tombstones()
+
+        self.assertEqual((stats["purged"], stats["pruned"]), (1, 1))
+        self.assertEqual(self.col.get(ids=["d0", "d1"])["ids"], [])
+        self.assertEqual(self.col.count(), 6)
+        self.assertFalse(VectorTombstone.objects.exists())
+
+    def test_scan_counts_memmap_row_bytes_and_compact_measures_memmap_dir(self):
+        got = self.col.get(include=["metadatas", "documents"])
+        # dim 3: codes int8 (3) + rowinfo (8) + float32 rescore (12) per row
+        expected = sum(
+            23 + len(text.encode("utf-8")) + len(json.dumps(meta).encode("utf-8"))
+            for text, meta in zip(got["documents"], got["metadatas"])
+        )
+        self.assertEqual(scan_vector_store()["bytes"], expected)
+
+        out = compact_vector_store()
+        self.assertEqual(out["after"], sum(os.path.getsize(os.path.join(self.col.dir, f)) for f in os.listdir(self.col.dir)))
+
+    def test_prune_keeps_pending_and_recent_tombstones(self):
+        old = timezone.now() - timedelta(hours=48)
+        VectorTombstone.objects.create(user=self.user, doc_id=1, purged_at=old)
+        VectorTombstone.objects.create(user=self.user, doc_id=2, purged_at=timezone.now())
+        VectorTombstone.objects.create(user=self.user, doc_id=3)
+
+        self.assertEqual(prune_vector_tombstones(retention_hours=24), 1)
+        self.assertEqual(sorted(VectorTombstone.objects.values_list("doc_id", flat=True)), [2, 3])
@@ -2,13 +2,14 @@
 import json
 import logging
 import time
+from functools import lru_cache
 
 from django.shortcuts import render, redirect
 from django.http import JsonResponse, HttpResponseServerError
 from django.core.exceptions import RequestDataTooBig
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
-from inertia import render as inertia_render
+from inertia import defer, render as inertia_render
 
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
@@ -34,6 +35,8 @@ logger = logging.getLogger(__name__)
 audit_logger = logging.getLogger("audit")
 
 QUOTA_BYTES = 10 * 1024 * 1024  # 10MB
+SESSIONS_PANEL_PAGE_SIZE = 20  # sama dengan SESSIONS_PAGE_SIZE di frontend
+TIMELINE_PAGE_SIZE_MAX = 400
 
 
 def _rid(request) -> str:
@@ -456,11 +459,21 @@ def chat_view(request):
         quota_bytes = service.get_user_quota_bytes(user=user, default_quota_bytes=QUOTA_BYTES)
         props = service.get_dashboard_props(user=user, quota_bytes=quota_bytes)
 
+        # Panel sidebar tidak ikut render pertama: Inertia memintanya lewat partial reload
+        # setelah halaman tampil (satu request per group, dokumen + storage dihitung sekali).
+        documents_payload = lru_cache(maxsize=1)(lambda: service.get_documents_payload(user=user, quota_bytes=quota_bytes))
+        sessions_payload = lru_cache(maxsize=1)(lambda: service.list_sessions(user=user, limit=SESSIONS_PANEL_PAGE_SIZE))
+        props.update({
+            "documents": defer(lambda: documents_payload()["documents"], group="documents"),
+            "storage": defer(lambda: documents_payload()["storage"], group="documents"),
+            "sessions": defer(lambda: sessions_payload()["sessions"], group="sessions"),
+            "sessionsHasNext": defer(lambda: sessions_payload()["pagination"]["has_next"], group="sessions"),
+        })
+
         dur = round(time.time() - t0, 4)
         logger.info(
             f" [VIEW OK] user={user.username}(id={user.id}) hist={len(props['initialHistory'])} "
-            f"docs={len(props['documents'])} storage={props['storage']['used_human']}/{props['storage']['quota_human']} "
-            f"({props['storage']['used_pct']}%) in {dur}s",
+            f"more={bool(props['historyCursor'])} in {dur}s",
             extra=_log_extra(request),
         )
 
@@ -506,6 +519,35 @@ def documents_api(request):
         return JsonResponse({"status": "error", "msg": "Terjadi kesalahan server."}, status=500)
 
 
+@csrf_exempt
+@login_required
+def document_mentions_api(request):
+    user = request.user
+    ip = _get_client_ip(request)
+
+    if request.method != "GET":
+        logger.warning(f" [MENTION API] Method not allowed method={request.method} ip={ip}", extra=_log_extra(request))
+        return JsonResponse({"status": "error", "msg": "Method not allowed"}, status=405)
+
+    query = (request.GET.get("q") or "").strip()[:120]
+    try:
+        limit = int(request.GET.get("limit", 8))
+    except (TypeError, ValueError):
+        limit = 8
+
+    try:
+        payload = service.search_document_mentions(user=user, query=query, limit=limit)
+        logger.debug(
+            f" [MENTION API OK] user={user.username}(id={user.id}) q_len={len(query)} items={len(payload['items'])}",
+            extra=_log_extra(request),
+        )
+        return JsonResponse(payload)
+    except Exception as e:
+        logger.error(f" [MENTION API ERROR] user={user.username}(id={user.id}) ip={ip} err={repr(e)}",
+                     extra=_log_extra(request), exc_info=True)
+        return JsonResponse({"status": "error", "msg": "Terjadi kesalahan server."}, status=500)
+
+
 @csrf_exempt
 @login_required
 def document_detail_api(request, doc_id: int):
@@ -581,9 +623,9 @@ def upload_api(request):
             extra=_audit_extra(request),
         )
 
-        # status code sesuai behavior lama
+        # status code sesuai behavior lama; mode antrian -> 202 + daftar job untuk di-poll
         if payload.get("status") == "success":
-            return JsonResponse(payload)
+            return JsonResponse(payload, status=202 if payload.get("queued") else 200)
         return JsonResponse(payload, status=400)
 
     except Exception as e:
@@ -712,7 +754,7 @@ def reingest_api(request):
         )
 
         if payload.get("status") == "success":
-            return JsonResponse(payload)
+            return JsonResponse(payload, status=202 if payload.get("queued") else 200)
         return JsonResponse(payload, status=400)
 
     except Exception as e:
@@ -725,6 +767,49 @@ def reingest_api(request):
         return JsonResponse({"status": "error", "msg": "Terjadi kesalahan server."}, status=500)
 
 
+@csrf_exempt
+@login_required
+def ingest_jobs_api(request):
+    user = request.user
+    ip = _get_client_ip(request)
+
+    if request.method != "GET":
+        logger.warning(f" [INGEST JOBS] Method not allowed method={request.method} ip={ip}", extra=_log_extra(request))
+        return JsonResponse({"status": "error", "msg": "Method not allowed"}, status=405)
+
+    # ?ids=1,2,3 untuk polling job upload tertentu; tanpa ids -> job terbaru
+    raw_ids = (request.GET.get("ids") or "").strip()
+    job_ids = [int(x) for x in raw_ids.split(",") if x.strip().isdigit()] if raw_ids else None
+    try:
+        limit = int(request.GET.get("limit", 20))
+    except (TypeError, ValueError):
+        limit = 20
+
+    try:
+        payload = service.list_ingest_jobs_for_user(user=user, job_ids=job_ids, limit=limit)
+        return JsonResponse(payload)
+    except Exception as e:
+        logger.error(f" [INGEST JOBS ERROR] user={user.username}(id={user.id}) ip={ip} err={repr(e)}",
+                     extra=_log_extra(request), exc_info=True)
+        return JsonResponse({"status": "error", "msg": "Terjadi kesalahan server."}, status=500)
+
+
+@csrf_exempt
+@login_required
+def ingest_job_detail_api(request, job_id: int):
+    user = request.user
+    ip = _get_client_ip(request)
+
+    if request.method != "GET":
+        logger.warning(f" [INGEST JOB] Method not allowed method={request.method} ip={ip}", extra=_log_extra(request))
+        return JsonResponse({"status": "error", "msg": "Method not allowed"}, status=405)
+
+    payload = service.list_ingest_jobs_for_user(user=user, job_ids=[job_id], limit=1)
+    if not payload["jobs"]:
+        return JsonResponse({"status": "error", "msg": "Job tidak ditemukan"}, status=404)
+    return JsonResponse({"job": payload["jobs"][0]})
+
+
 # =========================
 # CHAT SESSIONS API
 # =========================
@@ -840,8 +925,17 @@ def session_detail_api(request, session_id: int):
 
     if request.method == "GET":
         try:
-            history = service.get_session_history(user=user, session_id=session_id)
-            return JsonResponse({"history": history})
+            try:
+                limit = int(request.GET.get("limit") or 0) or None
+                payload = service.get_session_history(
+                    user=user,
+                    session_id=session_id,
+                    limit=limit,
+                    before=request.GET.get("before") or None,
+                )
+            except ValueError:
+                return JsonResponse({"status": "error", "msg": "Parameter pagination tidak valid."}, status=400)
+            return JsonResponse(payload)
         except Exception as e:
             logger.error(f" [SESSIONS HISTORY ERROR] user={user.username}(id={user.id}) ip={ip} err={repr(e)}",
                          extra=_log_extra(request), exc_info=True)
@@ -864,14 +958,24 @@ def session_timeline_api(request, session_id: int):
     try:
         if not ChatSession.objects.filter(user=user, id=session_id).exists():
             return JsonResponse({"status": "error", "msg": "Session tidak ditemukan."}, status=404)
-        page = request.GET.get("page", "1")
-        page_size = request.GET.get("page_size", "100")
         try:
-            page_i = int(page)
-            page_size_i = int(page_size)
-        except Exception:
+            if "cursor" in request.GET:
+                # keyset (opt-in): ?cursor= kosong = halaman terbaru, lalu next_cursor untuk halaman lebih lama
+                page_size_i = int(request.GET.get("page_size") or 0) or service.timeline_page_size()
+                payload = service.get_session_timeline(
+                    user=user,
+                    session_id=session_id,
+                    page_size=min(page_size_i, TIMELINE_PAGE_SIZE_MAX),
+                    cursor=request.GET.get("cursor") or "",
+                )
+            else:
+                page_i = int(request.GET.get("page", "1"))
+                page_size_i = int(request.GET.get("page_size", "100"))
+                payload = service.get_session_timeline(
+                    user=user, session_id=session_id, page=page_i, page_size=page_size_i
+                )
+        except ValueError:
             return JsonResponse({"status": "error", "msg": "Parameter pagination tidak valid."}, status=400)
-        payload = service.get_session_timeline(user=user, session_id=session_id, page=page_i, page_size=page_size_i)
         return JsonResponse(payload)
     except Exception as e:
         logger.error(f" [SESSIONS TIMELINE ERROR] user={user.username}(id={user.id}) ip={ip} err={repr(e)}",
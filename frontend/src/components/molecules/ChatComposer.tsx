@@ -1,5 +1,6 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from "react";
 import { cn } from "@/lib/utils";
+import { searchDocumentMentions } from "@/lib/api";
 
 export default function ChatComposer({
   onSend,
@@ -58,16 +59,38 @@ export default function ChatComposer({
     };
   }, [cursorPos, value]);
 
+  const [remoteMatches, setRemoteMatches] = useState<{ query: string; items: Array<{ id: number; title: string }> } | null>(null);
+  const mentionQuery = mentionState && isFocused ? mentionState.query : null;
+
+  useEffect(() => {
+    if (mentionQuery === null || !mentionQuery) return;
+    let cancelled = false;
+    const timer = window.setTimeout(() => {
+      searchDocumentMentions(mentionQuery, 8)
+        .then((res) => {
+          if (!cancelled) setRemoteMatches({ query: mentionQuery, items: res.items || [] });
+        })
+        .catch(() => {
+          // fallback ke filter lokal
+        });
+    }, 150);
+    return () => {
+      cancelled = true;
+      window.clearTimeout(timer);
+    };
+  }, [mentionQuery]);
+
   const mentionCandidates = useMemo(() => {
     if (!mentionState || !isFocused) return [];
     const query = mentionState.query;
+    if (query && remoteMatches?.query === query) return remoteMatches.items;
     const list = docs.filter((d) => {
         const title = (d.title || "").toLowerCase();
         return !query || title.includes(query);
       })
       .slice(0, 8);
     return list;
-  }, [docs, isFocused, mentionState]);
+  }, [docs, isFocused, mentionState, remoteMatches]);
 
   useEffect(() => {
     setMentionIndex(0);
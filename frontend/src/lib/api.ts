@@ -88,9 +88,35 @@ export type SendChatPayload = {
 };
 
 // ✅ Upload API
+export interface IngestJobDto {
+  id: number;
+  kind: "upload" | "reingest";
+  status: "queued" | "running" | "succeeded" | "failed";
+  file_name: string;
+  document_id: number | null;
+  stage: string;
+  progress: number;
+  stage_timings: Record<string, number>;
+  chunk_stats: Partial<Record<"embedded" | "skipped" | "updated" | "deleted", number>>;
+  error: string;
+  attempts: number;
+  created_at: string | null;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface UploadResponse {
   status: "success" | "error";
   msg: string;
+  // ada jika backend memakai antrian ingest (INGEST_QUEUE_ENABLED=1)
+  queued?: boolean;
+  jobs?: IngestJobDto[];
+}
+
+export interface IngestJobsResponse {
+  jobs: IngestJobDto[];
+  summary: Record<IngestJobDto["status"], number>;
+  done: boolean;
 }
 
 // ✅ Documents API (BARU)
@@ -150,6 +176,10 @@ export interface TimelineItem {
 
 export interface SessionTimelineResponse {
   timeline: TimelineItem[];
+  // mode keyset (dipanggil dengan cursor): urut lama -> baru, next_cursor = halaman yang lebih lama
+  next_cursor?: string | null;
+  has_more?: boolean;
+  // mode offset (tanpa cursor): ?page=&page_size=
   pagination?: {
     page: number;
     page_size: number;
@@ -210,6 +240,16 @@ export const uploadDocuments = async (files: FileList) => {
   return response.data;
 };
 
+/** Status job ingest (polling setelah upload/reingest mode antrian).
+ * URL Backend: GET /api/ingest/jobs/?ids=1,2
+ */
+export const getIngestJobs = async (ids: number[]) => {
+  const response = await apiClient.get<IngestJobsResponse>("/ingest/jobs/", {
+    params: { ids: ids.join(","), limit: Math.max(ids.length, 1) },
+  });
+  return response.data;
+};
+
 /** ⭐ FUNGSI UTAMA #3: GET DOCUMENTS (BARU)
  * Ambil daftar dokumen + storage untuk sidebar (refresh setelah upload)
  * URL Backend: GET /api/documents/
@@ -219,6 +259,19 @@ export const getDocuments = async () => {
   return response.data;
 };
 
+export interface DocumentMentionItem {
+  id: number;
+  title: string;
+}
+
+/** Autocomplete @mention: dilayani dari index judul per-user di backend. */
+export const searchDocumentMentions = async (q: string, limit: number = 8) => {
+  const response = await apiClient.get<{ items: DocumentMentionItem[] }>("/documents/mentions/", {
+    params: { q, limit },
+  });
+  return response.data;
+};
+
 export const deleteDocument = async (docId: number) => {
   const response = await apiClient.delete<{ status: string }>(`/documents/${docId}/`);
   return response.data;
@@ -250,16 +303,31 @@ export const deleteSession = async (sessionId: number) => {
   return response.data;
 };
 
-export const getSessionHistory = async (sessionId: number) => {
-  const response = await apiClient.get<{ history: Array<{ question: string; answer: string; time: string; date: string }> }>(
-    `/sessions/${sessionId}/`
-  );
+export interface HistoryItemDto {
+  question: string;
+  answer: string;
+  time: string;
+  date: string;
+}
+
+// Keyset pagination: halaman terbaru dulu, `next_cursor` untuk memuat yang lebih lama (null = sudah habis)
+export interface SessionHistoryResponse {
+  history: HistoryItemDto[];
+  next_cursor: string | null;
+  has_more: boolean;
+}
+
+export const getSessionHistory = async (sessionId: number, before?: string | null, limit?: number) => {
+  const response = await apiClient.get<SessionHistoryResponse>(`/sessions/${sessionId}/`, {
+    params: { before: before || undefined, limit },
+  });
   return response.data;
 };
 
-export const getSessionTimeline = async (sessionId: number, page: number = 1, pageSize: number = 100) => {
+export const getSessionTimeline = async (sessionId: number, cursor?: string | null, pageSize?: number) => {
   const response = await apiClient.get<SessionTimelineResponse>(`/sessions/${sessionId}/timeline/`, {
-    params: { page, page_size: pageSize },
+    // cursor selalu dikirim (kosong = halaman terbaru) supaya backend memakai mode keyset
+    params: { cursor: cursor ?? "", page_size: pageSize },
   });
   return response.data;
 };
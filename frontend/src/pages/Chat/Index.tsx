@@ -10,8 +10,8 @@ import ChatComposer from "@/components/molecules/ChatComposer";
 import Toast from "@/components/molecules/Toast";
 
 // API & Types
-import { sendChat, uploadDocuments, getDocuments, getSessions, createSession, deleteSession, getSessionTimeline, renameSession, deleteDocument } from "@/lib/api";
-import type { DocumentDto, DocumentsResponse, ChatSessionDto, ChatResponse, PlannerModeResponse, TimelineItem } from "@/lib/api";
+import { sendChat, uploadDocuments, getDocuments, getIngestJobs, getSessions, createSession, deleteSession, getSessionHistory, getSessionTimeline, renameSession, deleteDocument } from "@/lib/api";
+import type { DocumentDto, DocumentsResponse, ChatSessionDto, ChatResponse, HistoryItemDto, PlannerModeResponse, TimelineItem } from "@/lib/api";
 import type { ChatItem } from "@/components/molecules/ChatBubble";
 
 // --- Types ---
@@ -26,15 +26,15 @@ type StorageInfo = {
 type PageProps = {
   user: { id: number; username: string; email: string };
   activeSessionId: number;
-  sessions: ChatSessionDto[];
-  initialHistory: Array<{
-    question: string;
-    answer: string;
-    time: string;
-    date: string;
-  }>;
-  documents: DocumentDto[];
-  storage: StorageInfo;
+  // halaman terbaru riwayat session aktif; historyCursor = cursor halaman lebih lama (null = habis)
+  initialHistory: HistoryItemDto[];
+  historyCursor: string | null;
+  hasPlannerEvents: boolean;
+  // deferred props: undefined di render pertama, diisi Inertia lewat partial reload
+  sessions?: ChatSessionDto[];
+  sessionsHasNext?: boolean;
+  documents?: DocumentDto[];
+  storage?: StorageInfo;
 };
 
 // --- Helper ---
@@ -42,6 +42,15 @@ function uid() {
   return Math.random().toString(16).slice(2) + Date.now().toString(16);
 }
 
+function mapHistoryToChatItems(history: HistoryItemDto[]): ChatItem[] {
+  const arr: ChatItem[] = [];
+  for (const h of history) {
+    arr.push({ id: uid(), role: "user", text: h.question, time: h.time });
+    arr.push({ id: uid(), role: "assistant", text: h.answer, time: h.time });
+  }
+  return arr;
+}
+
 function isPlannerResponse(res: ChatResponse): res is PlannerModeResponse {
   return (
     (res as PlannerModeResponse)?.type === "planner_step" ||
@@ -113,7 +122,17 @@ function mapTimelineItemToChatItem(t: TimelineItem): ChatItem {
 export default function Index() {
   const SESSIONS_PAGE_SIZE = 20;
   const { props } = usePage<PageProps>();
-  const { user, initialHistory, documents: initialDocs, storage: initialStorage, sessions: initialSessions, activeSessionId } = props;
+  const {
+    user,
+    initialHistory,
+    historyCursor: initialHistoryCursor,
+    hasPlannerEvents,
+    documents: initialDocs,
+    storage: initialStorage,
+    sessions: initialSessions,
+    sessionsHasNext: initialSessionsHasNext,
+    activeSessionId,
+  } = props;
 
   // State
   const [dark, setDark] = useState<boolean>(() => {
@@ -130,6 +149,10 @@ export default function Index() {
   const [sessionsPage, setSessionsPage] = useState(1);
   const [sessionsHasNext, setSessionsHasNext] = useState(false);
   const [sessionsLoadingMore, setSessionsLoadingMore] = useState(false);
+  const [historyCursor, setHistoryCursor] = useState<string | null>(initialHistoryCursor ?? null);
+  const [historyLoadingMore, setHistoryLoadingMore] = useState(false);
+  // cursor dari props/history endpoint (chat saja) atau dari timeline (chat + planner)
+  const historyCursorSourceRef = useRef<"history" | "timeline">("history");
   const [mode, setMode] = useState<"chat" | "planner">("chat");
   const [plannerStateBySession, setPlannerStateBySession] = useState<Record<number, Record<string, unknown>>>({});
   const [plannerInitializedBySession, setPlannerInitializedBySession] = useState<Record<number, boolean>>({});
@@ -144,6 +167,8 @@ export default function Index() {
 
   // ✅ scroll container ref
   const scrollRef = useRef<HTMLDivElement | null>(null);
+  // tinggi scroll sebelum prepend riwayat lama: posisi baca dipertahankan, bukan auto-scroll ke bawah
+  const prependAnchorRef = useRef<number | null>(null);
 
   // ✅ composer height & safe area padding
   const [composerH, setComposerH] = useState(220); // fallback
@@ -172,26 +197,21 @@ export default function Index() {
     window.localStorage.setItem("theme", "light");
   }, [dark]);
 
-  // ✅ Auto-load sessions on mount (fresh login / avoid stale state)
+  // ✅ Deferred props (sessions, dokumen, storage) datang setelah render pertama
   useEffect(() => {
-    let cancelled = false;
-    const load = async () => {
-      try {
-        const res = await getSessions(1, SESSIONS_PAGE_SIZE);
-        if (!cancelled) {
-          setSessions(res.sessions ?? []);
-          setSessionsPage(1);
-          setSessionsHasNext(!!res.pagination?.has_next);
-        }
-      } catch {
-        // silent
-      }
-    };
-    load();
-    return () => {
-      cancelled = true;
-    };
-  }, []);
+    if (!initialSessions) return;
+    setSessions(initialSessions);
+    setSessionsPage(1);
+    setSessionsHasNext(!!initialSessionsHasNext);
+  }, [initialSessions, initialSessionsHasNext]);
+
+  useEffect(() => {
+    if (initialDocs) setDocuments(initialDocs);
+  }, [initialDocs]);
+
+  useEffect(() => {
+    if (initialStorage) setStorage(initialStorage);
+  }, [initialStorage]);
 
   // ✅ Safe-area bottom (iPhone)
   useEffect(() => {
@@ -265,6 +285,30 @@ export default function Index() {
     }
   };
 
+  // Mode antrian ingest: poll status job sampai semua selesai, lalu refresh sidebar dokumen.
+  const pollIngestJobs = async (jobIds: number[]) => {
+    const deadline = Date.now() + 15 * 60 * 1000;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      try {
+        const res = await getIngestJobs(jobIds);
+        if (!res.done) continue;
+        await refreshDocuments();
+        const failed = res.jobs.filter((j) => j.status === "failed");
+        setToast({
+          open: true,
+          kind: failed.length ? "error" : "success",
+          msg: failed.length
+            ? `Ingest selesai. Gagal: ${failed.map((j) => `${j.file_name} (${j.error || "error"})`).join(", ")}`
+            : `Ingest selesai: ${res.jobs.length} file siap dipakai.`,
+        });
+        return;
+      } catch {
+        // silent retry
+      }
+    }
+  };
+
   const initialItems = useMemo<ChatItem[]>(() => {
     const arr: ChatItem[] = [];
     if (!initialHistory || initialHistory.length === 0) {
@@ -281,11 +325,7 @@ export default function Index() {
       });
       return arr;
     }
-    for (const h of initialHistory) {
-      arr.push({ id: uid(), role: "user", text: h.question, time: h.time });
-      arr.push({ id: uid(), role: "assistant", text: h.answer, time: h.time });
-    }
-    return arr;
+    return mapHistoryToChatItems(initialHistory);
   }, [initialHistory]);
 
   const [items, setItems] = useState<ChatItem[]>(initialItems);
@@ -296,18 +336,24 @@ export default function Index() {
   // ✅ Inertia reuse fix: sinkronkan ulang items saat user/history berubah
   useEffect(() => {
     setItems(initialItems);
-  }, [user.id, initialItems]);
+    setHistoryCursor(initialHistoryCursor ?? null);
+    historyCursorSourceRef.current = "history";
+  }, [user.id, initialItems, initialHistoryCursor]);
 
   useEffect(() => {
+    // session awal tanpa event planner: riwayatnya sudah lengkap di props (+ cursor), tidak perlu timeline
+    if (activeSessionIdNum === activeSessionId && !hasPlannerEvents) return;
     let cancelled = false;
     const loadTimeline = async () => {
       if (!activeSessionIdNum) return;
       try {
-        const res = await getSessionTimeline(activeSessionIdNum, 1, 200);
+        const res = await getSessionTimeline(activeSessionIdNum);
         if (cancelled) return;
         const mapped = (res.timeline ?? []).map(mapTimelineItemToChatItem);
         if (mapped.length > 0) {
           setItems(mapped);
+          setHistoryCursor(res.next_cursor ?? null);
+          historyCursorSourceRef.current = "timeline";
         }
       } catch {
         // fallback to initialHistory mapping
@@ -317,10 +363,47 @@ export default function Index() {
     return () => {
       cancelled = true;
     };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [activeSessionIdNum]);
+
+  // ✅ scroll ke atas: muat halaman riwayat yang lebih lama (keyset cursor)
+  const loadOlderHistory = async () => {
+    if (!activeSessionIdNum || !historyCursor || historyLoadingMore) return;
+    setHistoryLoadingMore(true);
+    try {
+      const res =
+        historyCursorSourceRef.current === "timeline"
+          ? await getSessionTimeline(activeSessionIdNum, historyCursor)
+          : await getSessionHistory(activeSessionIdNum, historyCursor);
+      const older =
+        "timeline" in res ? (res.timeline ?? []).map(mapTimelineItemToChatItem) : mapHistoryToChatItems(res.history ?? []);
+      if (older.length > 0) {
+        prependAnchorRef.current = scrollRef.current?.scrollHeight ?? null;
+        setItems((prev) => [...older, ...prev]);
+      }
+      setHistoryCursor(res.next_cursor ?? null);
+    } catch {
+      // silent: dicoba lagi saat scroll berikutnya
+    } finally {
+      setHistoryLoadingMore(false);
+    }
+  };
+
+  const onChatScroll = (e: React.UIEvent<HTMLDivElement>) => {
+    if (e.currentTarget.scrollTop < 120) {
+      loadOlderHistory();
+    }
+  };
 
   // ✅ auto-scroll lebih “nempel bawah” (pakai scrollHeight besar)
   useEffect(() => {
+    const anchor = prependAnchorRef.current;
+    if (anchor !== null) {
+      prependAnchorRef.current = null;
+      const el = scrollRef.current;
+      if (el) el.scrollTop += el.scrollHeight - anchor;
+      return;
+    }
     const t = setTimeout(() => {
       const el = scrollRef.current;
       if (!el) return;
@@ -473,6 +556,9 @@ export default function Index() {
       const res = await uploadDocuments(dt.files);
       setToast({ open: true, kind: res.status === "success" ? "success" : "error", msg: res.msg });
       await refreshDocuments();
+      if (res.queued && res.jobs?.length) {
+        void pollIngestJobs(res.jobs.map((j) => j.id));
+      }
     } catch (err: any) {
       const msg = err?.response?.data?.msg ?? err?.message ?? "Upload gagal.";
       setToast({ open: true, kind: "error", msg });
@@ -609,6 +695,7 @@ export default function Index() {
       });
       setSessions((prev) => [newSession, ...prev.filter((s) => s.id !== newSession.id)]);
       setActiveSession(newSession.id);
+      setHistoryCursor(null);
       setItems([
         {
           id: uid(),
@@ -632,10 +719,11 @@ export default function Index() {
   const onSelectSession = async (sessionId: number) => {
     if (sessionId === activeSession) return;
     setActiveSession(sessionId);
+    setHistoryCursor(null);
     setActivePlannerOptionMessageId(null);
     setLoading(true);
     try {
-      const res = await getSessionTimeline(sessionId, 1, 200);
+      const res = await getSessionTimeline(sessionId);
       const timeline = res.timeline ?? [];
       if (timeline.length === 0) {
         setItems([
@@ -653,6 +741,8 @@ export default function Index() {
         ]);
       } else {
         setItems(timeline.map(mapTimelineItemToChatItem));
+        setHistoryCursor(res.next_cursor ?? null);
+        historyCursorSourceRef.current = "timeline";
       }
       setMobileMenuOpen(false);
     } catch (e: any) {
@@ -861,6 +951,7 @@ export default function Index() {
           <div
             ref={scrollRef}
             id="chat-scroll-container"
+            onScroll={onChatScroll}
             className="chat-scrollbar flex-1 min-h-0 min-w-0 w-full overflow-y-auto overscroll-contain touch-pan-y pt-20 md:pt-4"
             style={{
               paddingBottom: chatPaddingBottom,
@@ -971,6 +1062,7 @@ export default function Index() {
                         await onSelectSession(fallback);
                       } else {
                         setActiveSession(undefined);
+                        setHistoryCursor(null);
                         setActivePlannerOptionMessageId(null);
                         setItems([
                           {
@@ -13,6 +13,7 @@ const getSessionsMock = vi.fn();
 const createSessionMock = vi.fn();
 const deleteSessionMock = vi.fn();
 const getSessionTimelineMock = vi.fn();
+const getSessionHistoryMock = vi.fn();
 const renameSessionMock = vi.fn();
 const deleteDocumentMock = vi.fn();
 
@@ -28,6 +29,7 @@ vi.mock("@/lib/api", () => ({
   createSession: (...args: unknown[]) => createSessionMock(...args),
   deleteSession: (...args: unknown[]) => deleteSessionMock(...args),
   getSessionTimeline: (...args: unknown[]) => getSessionTimelineMock(...args),
+  getSessionHistory: (...args: unknown[]) => getSessionHistoryMock(...args),
   renameSession: (...args: unknown[]) => renameSessionMock(...args),
   deleteDocument: (...args: unknown[]) => deleteDocumentMock(...args),
 }));
@@ -41,6 +43,8 @@ const basePageProps = {
   activeSessionId: 10,
   sessions: [],
   initialHistory: [],
+  historyCursor: null,
+  hasPlannerEvents: false,
   documents: [],
   storage: {
     used_bytes: 0,
@@ -87,7 +91,8 @@ describe("Phase 4 frontend interactions", () => {
     });
     getSessionTimelineMock.mockResolvedValue({
       timeline: [],
-      pagination: { page: 1, page_size: 100, total: 0, has_next: false },
+      next_cursor: null,
+      has_more: false,
     });
     uploadDocumentsMock.mockResolvedValue({ status: "success", msg: "ok" });
     sendChatMock.mockImplementation(async (payloadRaw: unknown) => {
@@ -239,11 +244,63 @@ describe("Phase 4 frontend interactions", () => {
           meta: { planner_step: "data", event_type: "option_select" },
         },
       ],
-      pagination: { page: 1, page_size: 100, total: 1, has_next: false },
+      next_cursor: null,
+      has_more: false,
     });
+    usePageMock.mockReturnValue({ props: { ...basePageProps, hasPlannerEvents: true } });
 
     render(<Index />);
     expect(await screen.findByText("Pilih opsi 2: Manual")).toBeInTheDocument();
     expect(await screen.findByText("Milestone Planner · data")).toBeInTheDocument();
   });
+
+  it("scroll ke atas memuat riwayat lama dengan cursor tanpa memanggil timeline", async () => {
+    usePageMock.mockReturnValue({
+      props: {
+        ...basePageProps,
+        initialHistory: [{ question: "pertanyaan baru", answer: "jawaban baru", time: "10:00", date: "2026-02-18" }],
+        historyCursor: "cursor-1",
+      },
+    });
+    getSessionHistoryMock.mockResolvedValueOnce({
+      history: [{ question: "pertanyaan lama", answer: "jawaban lama", time: "09:00", date: "2026-02-18" }],
+      next_cursor: null,
+      has_more: false,
+    });
+
+    const { container } = render(<Index />);
+    expect(await screen.findByText("pertanyaan baru")).toBeInTheDocument();
+    fireEvent.scroll(container.querySelector("#chat-scroll-container") as HTMLElement);
+
+    expect(await screen.findByText("pertanyaan lama")).toBeInTheDocument();
+    expect(getSessionHistoryMock).toHaveBeenCalledWith(10, "cursor-1");
+    expect(getSessionTimelineMock).not.toHaveBeenCalled();
+  });
+
+  it("scroll ke atas setelah timeline dimuat memakai cursor timeline", async () => {
+    usePageMock.mockReturnValue({ props: { ...basePageProps, hasPlannerEvents: true } });
+    getSessionTimelineMock
+      .mockResolvedValueOnce({
+        timeline: [
+          { id: "planner-2", kind: "planner_output", text: "Rencana terbaru", time: "10:10", date: "2026-02-18" },
+        ],
+        next_cursor: "tl-1",
+        has_more: true,
+      })
+      .mockResolvedValueOnce({
+        timeline: [
+          { id: "chat-user-1", kind: "chat_user", text: "pertanyaan awal", time: "09:00", date: "2026-02-18" },
+        ],
+        next_cursor: null,
+        has_more: false,
+      });
+
+    const { container } = render(<Index />);
+    expect(await screen.findByText("Rencana terbaru")).toBeInTheDocument();
+    fireEvent.scroll(container.querySelector("#chat-scroll-container") as HTMLElement);
+
+    expect(await screen.findByText("pertanyaan awal")).toBeInTheDocument();
+    expect(getSessionTimelineMock).toHaveBeenLastCalledWith(10, "tl-1");
+    expect(getSessionHistoryMock).not.toHaveBeenCalled();
+  });
 });